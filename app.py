@@ -27,6 +27,12 @@ from src.utils.performance_tracker import performance_tracker
 from src.utils.error_tracker import error_tracker
 from src.utils.logging_config import setup_logging
 from src.utils.call_recorder import call_recorder
+from src.utils.call_tracer import call_tracer
+from src.utils.slow_call_store import slow_call_store
+from src.utils.circuit_breaker import circuit_breakers
+from src.utils.metrics_registry import (
+    MetricFamily, OPENMETRICS_CONTENT_TYPE, PROMETHEUS_CONTENT_TYPE, metrics_registry
+)
 
 # Import production utilities
 from src.utils.production_logger import setup_request_logging
@@ -204,6 +210,8 @@ def index():
                 'webhook_callend': '/webhook/call-end',
                 'api_process_question': '/api/process-question',
                 'api_processing_status': '/api/processing-status/<phone_number>',
+                'api_job_status': '/api/jobs/<job_id>',
+                'api_job_events': '/api/jobs/<job_id>/events',
                 'demo_xml': '/demo/xml-responses',
                 'api_docs': '/api/docs',
                 'session_stats': '/api/session/stats',
@@ -735,9 +743,56 @@ def demo_xml_responses():
 
 # Question Processing API Endpoints
 
+def _store_processing_result(phone_number: str, language: str, session_id: str, result) -> dict:
+    """Store a pipeline result in the caller's session and build the API payload"""
+    if result.success:
+        # Store response data in session
+        from src.session.session_manager import ResponseData
+        response_data = ResponseData(
+            question_text=result.question_text,
+            response_text=result.response_text,
+            response_audio_url=result.response_audio_url,
+            detailed_response_text=result.detailed_response_text,
+            detailed_audio_url=result.detailed_audio_url,
+            language=language
+        )
+        
+        session_manager.store_response_data(phone_number, response_data)
+        session_manager.update_processing_status(phone_number, 'ready')
+        
+        # Add to session history
+        session_manager.add_question_to_session(phone_number, result.question_text)
+        session_manager.add_response_to_session(phone_number, result.response_text)
+        
+        return {
+            'success': True,
+            'session_id': session_id,
+            'question_text': result.question_text,
+            'response_text': result.response_text,
+            'response_audio_url': result.response_audio_url,
+            'detailed_response_text': result.detailed_response_text,
+            'detailed_audio_url': result.detailed_audio_url,
+            'processing_time': result.processing_time
+        }
+    
+    session_manager.update_processing_status(phone_number, 'error')
+    return {
+        'success': False,
+        'session_id': session_id,
+        'error_message': result.error_message,
+        'processing_time': result.processing_time
+    }
+
 @app.route('/api/process-question', methods=['POST'])
 def process_question():
-    """Process question asynchronously and return result"""
+    """
+    Process a recorded question
+    
+    Runs the pipeline in the request by default. With "async": true in the
+    body (or a "Prefer: respond-async" header) the question is queued on the
+    shared pipeline executor and 202 is returned with a job ID; progress is
+    available from /api/jobs/<job_id> and streamed from /api/jobs/<job_id>/events.
+    """
     # Initialize variables to prevent UnboundLocalError
     session_id = None
     phone_number = None
@@ -760,52 +815,41 @@ def process_question():
         # Get or create session
         session = session_manager.get_or_create_session(phone_number)
         
+        if data.get('async') or 'respond-async' in request.headers.get('Prefer', ''):
+            from src.ivr.job_manager import job_manager
+            
+            job = job_manager.submit(
+                get_ivr_handler().processing_pipeline,
+                audio_url, language, phone_number, session_id,
+                on_complete=lambda result: _store_processing_result(phone_number, language, session_id, result)
+            )
+            if job is None:
+                return jsonify({
+                    'success': False,
+                    'error': 'Too many questions are being processed, please retry shortly'
+                }), 503, {'Retry-After': '2'}
+            
+            session_manager.update_processing_status(phone_number, 'processing_audio')
+            status_url = f"/api/jobs/{job.job_id}"
+            return jsonify({
+                'success': True,
+                'job_id': job.job_id,
+                'session_id': session_id,
+                'status': job.status,
+                'status_url': status_url,
+                'events_url': f"{status_url}/events"
+            }), 202, {'Location': status_url}
+        
         # Update processing status
         session_manager.update_processing_status(phone_number, 'processing_audio')
         
-        # Process question synchronously (for demo simplicity)
-        from src.ivr.processing_pipeline import IVRProcessingPipeline
-        pipeline = IVRProcessingPipeline(Config())
+        # Process question synchronously (for demo simplicity), on the shared pipeline
+        pipeline = get_ivr_handler().processing_pipeline
         
         result = pipeline.process_question_sync(audio_url, language, phone_number)
+        payload = _store_processing_result(phone_number, language, session_id, result)
         
-        if result.success:
-            # Store response data in session
-            from src.session.session_manager import ResponseData
-            response_data = ResponseData(
-                question_text=result.question_text,
-                response_text=result.response_text,
-                response_audio_url=result.response_audio_url,
-                detailed_response_text=result.detailed_response_text,
-                detailed_audio_url=result.detailed_audio_url,
-                language=language
-            )
-            
-            session_manager.store_response_data(phone_number, response_data)
-            session_manager.update_processing_status(phone_number, 'ready')
-            
-            # Add to session history
-            session_manager.add_question_to_session(phone_number, result.question_text)
-            session_manager.add_response_to_session(phone_number, result.response_text)
-            
-            return jsonify({
-                'success': True,
-                'session_id': session_id,
-                'question_text': result.question_text,
-                'response_text': result.response_text,
-                'response_audio_url': result.response_audio_url,
-                'detailed_response_text': result.detailed_response_text,
-                'detailed_audio_url': result.detailed_audio_url,
-                'processing_time': result.processing_time
-            })
-        else:
-            session_manager.update_processing_status(phone_number, 'error')
-            return jsonify({
-                'success': False,
-                'session_id': session_id,
-                'error_message': result.error_message,
-                'processing_time': result.processing_time
-            }), 500
+        return jsonify(payload), 200 if payload['success'] else 500
             
     except Exception as e:
         logger.error(f"Error processing question: {str(e)}")
@@ -815,6 +859,50 @@ def process_question():
                                  recovery_action='Returned error response to client')
         return jsonify({'error': 'Failed to process question'}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get status, stage progress and result of a question processing job"""
+    from src.ivr.job_manager import job_manager
+    
+    status = job_manager.get_job_status(job_id)
+    if status is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(status)
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Stream job status and stage progress as Server-Sent Events"""
+    from flask import Response, stream_with_context
+    from src.ivr.job_manager import job_manager, format_sse
+    
+    if job_manager.get_job(job_id) is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    # Each open stream holds a request thread; past the cap, clients poll the status URL
+    if not job_manager.open_stream():
+        return jsonify({
+            'error': 'Too many event streams open, poll the status URL instead',
+            'status_url': f"/api/jobs/{job_id}"
+        }), 429, {'Retry-After': '2'}
+    
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', -1))
+    except ValueError:
+        last_event_id = -1
+    
+    def generate():
+        yield "retry: 2000\n\n"
+        for event in job_manager.iter_events(job_id, last_event_id=last_event_id):
+            yield format_sse(event) if event is not None else ": keep-alive\n\n"
+    
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(job_manager.close_stream)
+    return response
+
 @app.route('/api/processing-status/<phone_number>', methods=['GET'])
 def get_processing_status(phone_number):
     """Get current processing status for a session"""
@@ -854,6 +942,15 @@ def get_demo_questions():
         logger.error(f"Error getting demo questions: {str(e)}")
         return jsonify({'error': 'Failed to get demo questions'}), 500
 
+def _match_faq(question, language=None):
+    """Demo or banked question matching a typed question, found before any retrieval or LLM call"""
+    from src.content.vector_database import index_version
+    from src.rag.answer_bank import shared_answer_bank
+    from src.utils.faq_matcher import faq_matcher
+    
+    shared_answer_bank(Config.ANSWER_BANK_PATH, index_version())
+    return faq_matcher.match(question, language)
+
 @app.route('/api/demo/response', methods=['POST'])
 def get_demo_response():
     """Get cached response for demo question"""
@@ -864,13 +961,16 @@ def get_demo_response():
         if not question:
             return jsonify({'error': 'question is required'}), 400
         
-        response = session_manager.get_cached_demo_response(question)
+        match = _match_faq(question, data.get('language'))
         
-        if response:
+        if match:
             return jsonify({
                 'question': question,
-                'response': response,
-                'cached': True
+                'response': match.answer_text,
+                'cached': True,
+                'matched_question': match.question,
+                'match_score': match.score,
+                'source': match.source
             })
         else:
             return jsonify({
@@ -897,13 +997,25 @@ def answer_question():
         
         logger.info(f"Processing text question: {question}")
         
-        # Import RAG components
-        from src.rag.context_builder import ContextBuilder
-        from src.rag.response_generator import ResponseGenerator
+        # Demo and banked questions are answered without retrieval or LLM calls
+        match = _match_faq(question, language)
+        if match:
+            return jsonify({
+                'success': True,
+                'question': question,
+                'response': clean_markdown_formatting(match.answer_text),
+                'detailed_response': clean_markdown_formatting(match.detailed_text),
+                'sources_used': 0,
+                'language': language,
+                'method': 'faq',
+                'matched_question': match.question,
+                'match_score': match.score
+            })
         
-        # Initialize components
-        context_builder = ContextBuilder(Config())
-        response_generator = ResponseGenerator(Config())
+        # Reuse the IVR pipeline's RAG components (and their in-flight request sharing)
+        pipeline = get_ivr_handler().processing_pipeline
+        context_builder = pipeline.context_builder
+        response_generator = pipeline.response_generator
         
         # Step 1 & 2: Build context (includes semantic search)
         context = context_builder.build_context(
@@ -1093,6 +1205,7 @@ def get_component_performance():
         metrics = performance_tracker.get_performance_summary()
         return jsonify({
             'component_metrics': metrics['component_metrics'],
+            'latency_percentiles': performance_tracker.get_latency_percentiles(),
             'timestamp': metrics['system_metrics']['last_activity_time']
         })
     
@@ -1146,7 +1259,8 @@ def get_performance_alerts():
         metrics = performance_tracker.get_performance_summary()
         return jsonify({
             'recent_alerts': metrics['recent_alerts'],
-            'alert_count': len(metrics['recent_alerts']),
+            'alert_count': sum(metrics['alert_counts'].values()),
+            'alert_counts': metrics['alert_counts'],
             'timestamp': metrics['system_metrics']['last_activity_time']
         })
     
@@ -1205,9 +1319,12 @@ def get_performance_dashboard():
             component_summary[name] = {
                 'avg_response_time': comp_metrics['average_response_time'],
                 'success_rate': comp_metrics['success_rate'],
-                'total_calls': comp_metrics['total_calls']
+                'total_calls': comp_metrics['total_calls'],
+                'latency_percentiles': comp_metrics.get('latency_percentiles', {})
             }
         
+        latency_percentiles = performance_tracker.get_latency_percentiles()
+        
         # API cost summary
         total_cost = sum(
             api_data['estimated_cost'] 
@@ -1236,8 +1353,9 @@ def get_performance_dashboard():
                 'components': component_summary,
                 'total_estimated_cost': total_cost,
                 'cache_hit_rate': overall_cache_hit_rate,
-                'recent_alerts_count': len(metrics['recent_alerts'])
+                'recent_alerts_count': sum(metrics['alert_counts'].values())
             },
+            'latency_percentiles': latency_percentiles,
             'detailed_metrics': metrics
         }
         
@@ -1377,6 +1495,126 @@ def get_load_balancer_metrics():
         logger.error(f"Load balancer metrics error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Metrics Exposition
+
+_HEALTH_STATUS_VALUES = {'healthy': 0, 'warning': 1, 'critical': 2}
+
+def _collect_runtime_metrics():
+    """Point-in-time metrics of this worker, gathered when /metrics is scraped"""
+    from src.storage.audio_storage import audio_storage
+    from src.ivr.job_manager import job_manager
+    
+    session_stats = session_manager.get_session_stats()
+    yield MetricFamily('vidyavani_sessions', 'gauge', 'Sessions held by this worker').add(
+        session_stats['active_sessions'], state='active'
+    ).add(session_stats['total_sessions'] - session_stats['active_sessions'], state='inactive')
+    
+    storage_stats = audio_storage.get_storage_stats()
+    yield MetricFamily('vidyavani_audio_files', 'gauge', 'Audio files indexed by this worker').add(
+        storage_stats['pinned_files'], pinned='true'
+    ).add(storage_stats['total_files'] - storage_stats['pinned_files'], pinned='false')
+    yield MetricFamily('vidyavani_audio_storage_bytes', 'gauge', 'Size of indexed audio files').add(
+        storage_stats['total_size_bytes']
+    )
+    
+    job_stats = job_manager.get_stats()
+    yield MetricFamily('vidyavani_question_jobs_active', 'gauge', 'Queued or running question jobs').add(
+        job_stats['active_jobs']
+    )
+    
+    if Config.IS_PRODUCTION:
+        health_monitor = get_health_monitor(Config)
+        if health_monitor.health_history:
+            latest = health_monitor.health_history[-1]
+            status = MetricFamily('vidyavani_health_status', 'gauge',
+                                  'Last health check result (0=healthy, 1=warning, 2=critical)')
+            for check in latest.checks:
+                status.add(_HEALTH_STATUS_VALUES.get(check.status, 2), component=check.component)
+                if check.component == 'system_resources' and check.details:
+                    for resource in ('memory_percent', 'disk_percent', 'cpu_percent'):
+                        if resource in check.details:
+                            yield MetricFamily(f"vidyavani_system_{resource}", 'gauge',
+                                               f"System {resource.split('_')[0]} usage percentage").add(
+                                check.details[resource]
+                            )
+            yield status
+
+metrics_registry.register_collector(_collect_runtime_metrics)
+
+@app.route('/api/circuits', methods=['GET'])
+def get_circuit_status():
+    """Get the circuit breaker state of each external dependency"""
+    try:
+        return jsonify({
+            'open_circuits': circuit_breakers.open_circuits(),
+            'dependencies': circuit_breakers.get_status()
+        })
+    
+    except Exception as e:
+        logger.error(f"Circuit status error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose runtime metrics in OpenMetrics (or Prometheus text) format"""
+    from flask import Response
+    
+    openmetrics = 'application/openmetrics-text' in request.headers.get('Accept', '')
+    body = metrics_registry.render(openmetrics=openmetrics)
+    return Response(body, content_type=OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+
+# Call Tracing API Endpoints
+
+@app.route('/api/traces', methods=['GET'])
+def list_call_traces():
+    """List the most recent call traces held by this worker"""
+    try:
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify({'traces': call_tracer.list_traces(limit)})
+    
+    except Exception as e:
+        logger.error(f"Error listing call traces: {str(e)}")
+        return jsonify({'error': 'Failed to list call traces'}), 500
+
+@app.route('/api/traces/slow', methods=['GET'])
+def list_slow_calls():
+    """List captured slow calls, newest first"""
+    try:
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify({
+            'threshold_seconds': slow_call_store.threshold_seconds,
+            'captures': slow_call_store.list_captures(limit)
+        })
+    
+    except Exception as e:
+        logger.error(f"Error listing slow calls: {str(e)}")
+        return jsonify({'error': 'Failed to list slow calls'}), 500
+
+@app.route('/api/traces/slow/<capture_id>', methods=['GET'])
+def get_slow_call(capture_id):
+    """Get one slow call capture with its stage breakdown, inputs and full trace"""
+    capture = slow_call_store.load(capture_id)
+    if capture is None:
+        return jsonify({'error': 'Capture not found'}), 404
+    return jsonify(capture)
+
+@app.route('/api/traces/<session_id>', methods=['GET'])
+def get_call_trace(session_id):
+    """Get the trace of one call by session ID or CallSid (?format=otlp for OTLP/JSON)"""
+    try:
+        if request.args.get('format') == 'otlp':
+            trace = call_tracer.get_trace_otlp(session_id)
+        else:
+            trace = call_tracer.get_trace(session_id)
+        
+        if trace is None:
+            return jsonify({'error': 'Trace not found'}), 404
+        return jsonify(trace)
+    
+    except Exception as e:
+        logger.error(f"Error getting call trace {session_id}: {str(e)}")
+        return jsonify({'error': 'Failed to get call trace'}), 500
+
 # Error Tracking API Endpoints
 
 @app.route('/api/errors/summary', methods=['GET'])
@@ -1402,6 +1640,14 @@ def get_debugging_report():
         logger.error(f"Error getting debugging report: {str(e)}")
         return jsonify({'error': 'Failed to get debugging report'}), 500
 
+@app.route('/api/errors/stacks/<fingerprint>', methods=['GET'])
+def get_error_stack(fingerprint):
+    """Get the stack trace and occurrence count of a fingerprinted error"""
+    stack = error_tracker.get_stack_trace(fingerprint)
+    if stack is None:
+        return jsonify({'error': 'Stack not found'}), 404
+    return jsonify(stack)
+
 @app.route('/api/errors/export', methods=['POST'])
 def export_error_report():
     """Export error report to file"""
@@ -4,6 +4,7 @@ Configuration settings for VidyaVani IVR Learning System
 
 import os
 import json
+import tempfile
 from dataclasses import dataclass
 from typing import Dict, Any
 
@@ -48,20 +49,28 @@ class Config:
     OPENAI_MODEL: str = os.getenv('OPENAI_MODEL', 'gpt-4o-mini')  # Default model
     OPENAI_MAX_TOKENS: int = int(os.getenv('OPENAI_MAX_TOKENS', '150'))
     OPENAI_TEMPERATURE: float = float(os.getenv('OPENAI_TEMPERATURE', '0.3'))
+    OPENAI_MAX_CONCURRENT: int = int(os.getenv('OPENAI_MAX_CONCURRENT', '8'))  # Requests in flight to OpenAI/OpenRouter at once
     
     # Google Gemini Configuration (alternative to OpenAI)
     GOOGLE_GEMINI_API_KEY: str = os.getenv('GOOGLE_GEMINI_API_KEY', '')
     GEMINI_MODEL: str = os.getenv('GEMINI_MODEL', 'gemini-2.5-flash')
     GEMINI_MAX_TOKENS: int = int(os.getenv('GEMINI_MAX_TOKENS', '500'))
     GEMINI_TEMPERATURE: float = float(os.getenv('GEMINI_TEMPERATURE', '0.7'))
+    GEMINI_MAX_CONCURRENT: int = int(os.getenv('GEMINI_MAX_CONCURRENT', '8'))  # Requests in flight to Gemini at once
     
     # AI Provider Selection (auto-detect based on available keys)
     USE_GEMINI: bool = bool(GOOGLE_GEMINI_API_KEY and (not OPENAI_API_KEY or OPENAI_API_KEY.strip() == ''))
     
+    # LLM Routing (every provider with a key is used; the fastest healthy one gets each request)
+    LLM_HEDGING: bool = os.getenv('LLM_HEDGING', 'true').lower() == 'true'  # Send a second request when the first is slower than p90
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.5'))  # Shortest wait in seconds before hedging
+    
     # LLM Configuration
     LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-5-nano')  # Changed from gpt-4o-mini
     LLM_TEMPERATURE = float(os.getenv('LLM_TEMPERATURE', '0.7'))
     LLM_MAX_TOKENS = int(os.getenv('LLM_MAX_TOKENS', '500'))
+    SPEECH_TARGET_SECONDS_SIMPLE: float = float(os.getenv('SPEECH_TARGET_SECONDS_SIMPLE', '45'))  # Spoken length of a simple answer; limits generated tokens
+    SPEECH_TARGET_SECONDS_DETAILED: float = float(os.getenv('SPEECH_TARGET_SECONDS_DETAILED', '90'))  # Spoken length of a detailed answer
     
     # Google Cloud Configuration
     GOOGLE_CLOUD_PROJECT: str = os.getenv('GOOGLE_CLOUD_PROJECT', '')
@@ -70,19 +79,48 @@ class Config:
     # Performance Configuration
     MAX_CONCURRENT_CALLS: int = int(os.getenv('MAX_CONCURRENT_CALLS', '5'))
     RESPONSE_TIMEOUT: int = int(os.getenv('RESPONSE_TIMEOUT', '8'))
+    QUESTION_DEADLINE: float = float(os.getenv('QUESTION_DEADLINE', '15'))  # Seconds a caller waits for an answer before the call gives up on it
     CACHE_TTL: int = int(os.getenv('CACHE_TTL', '3600'))
+    WEBHOOK_TARGET_LATENCY: float = float(os.getenv('WEBHOOK_TARGET_LATENCY', '1.0'))  # Seconds a webhook should answer within
+    RATE_LIMIT_PER_MINUTE: int = int(os.getenv('RATE_LIMIT_PER_MINUTE', '30'))  # Sustained requests per caller
+    RATE_LIMIT_BURST: int = int(os.getenv('RATE_LIMIT_BURST', '30'))  # Back-to-back requests per caller
+    RATE_LIMIT_MAX_CALLERS: int = int(os.getenv('RATE_LIMIT_MAX_CALLERS', '10000'))  # Caller buckets kept in memory
+    CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '5'))  # Consecutive dependency failures that open its circuit
+    CIRCUIT_RECOVERY_TIMEOUT: float = float(os.getenv('CIRCUIT_RECOVERY_TIMEOUT', '30'))  # Seconds before an open circuit is probed
+    JOB_MAX_PENDING: int = int(os.getenv('JOB_MAX_PENDING', '20'))  # Queued + running async question jobs per worker
+    JOB_MAX_STREAMS: int = int(os.getenv('JOB_MAX_STREAMS', '2'))  # Open SSE job streams per worker (each holds a request thread)
+    JOB_STORE_PATH: str = os.getenv('JOB_STORE_PATH', os.path.join(tempfile.gettempdir(), 'vidyavani_jobs.sqlite'))  # Job state shared by all workers on the host
     
     # Audio Configuration
     MAX_RECORDING_DURATION: int = int(os.getenv('MAX_RECORDING_DURATION', '15'))
     AUDIO_SAMPLE_RATE: int = int(os.getenv('AUDIO_SAMPLE_RATE', '16000'))
     AUDIO_IVR_SAMPLE_RATE: int = int(os.getenv('AUDIO_IVR_SAMPLE_RATE', '8000'))
+    AUDIO_IVR_ENCODING: str = os.getenv('AUDIO_IVR_ENCODING', 'LINEAR16')  # LINEAR16, PCMU (8-bit μ-law), PCMA
+    AUDIO_NORMALIZE_TARGET_DB: float = float(os.getenv('AUDIO_NORMALIZE_TARGET_DB', '-16'))
     AUDIO_STORAGE_BASE_URL: str = os.getenv('AUDIO_STORAGE_BASE_URL', 'http://localhost:5001')
     AUDIO_STORAGE_DIR: str = os.getenv('AUDIO_STORAGE_DIR', os.path.join(os.getcwd(), 'audio_storage'))
+    AUDIO_RETENTION_SECONDS: int = int(os.getenv('AUDIO_RETENTION_SECONDS', '3600'))
+    AUDIO_STORAGE_MAX_MB: int = int(os.getenv('AUDIO_STORAGE_MAX_MB', '512'))  # 0 disables the quota
+    
+    # Voice Activity Detection Configuration
+    VAD_ENABLED: bool = os.getenv('VAD_ENABLED', 'true').lower() == 'true'
+    VAD_ENERGY_THRESHOLD_DB: float = float(os.getenv('VAD_ENERGY_THRESHOLD_DB', '-45'))
+    VAD_MIN_SPEECH_MS: int = int(os.getenv('VAD_MIN_SPEECH_MS', '300'))
+    VAD_HANGOVER_MS: int = int(os.getenv('VAD_HANGOVER_MS', '200'))
     
     # Content Configuration
     CONTENT_CHUNK_SIZE: int = int(os.getenv('CONTENT_CHUNK_SIZE', '300'))
     CONTENT_OVERLAP: int = int(os.getenv('CONTENT_OVERLAP', '50'))
     TOP_K_RETRIEVAL: int = int(os.getenv('TOP_K_RETRIEVAL', '3'))
+    EMBEDDING_TIMEOUT: float = float(os.getenv('EMBEDDING_TIMEOUT', '2'))  # Seconds to wait for a query embedding before searching lexically only
+    VECTOR_INDEX_COMPRESSION: str = os.getenv('VECTOR_INDEX_COMPRESSION', 'flat')  # flat (exact), fp16, sq8 or pq; compressed indexes re-rank from vectors on disk
+    VECTOR_RERANK_CANDIDATES: int = int(os.getenv('VECTOR_RERANK_CANDIDATES', '50'))  # Approximate candidates re-ranked exactly per compressed search
+    CONTEXT_TOKEN_BUDGET_SIMPLE: int = int(os.getenv('CONTEXT_TOKEN_BUDGET_SIMPLE', '500'))  # Prompt tokens of retrieved content for simple answers
+    CONTEXT_TOKEN_BUDGET_DETAILED: int = int(os.getenv('CONTEXT_TOKEN_BUDGET_DETAILED', '900'))  # Prompt tokens of retrieved content for detailed answers
+    ANSWER_BANK_PATH: str = os.getenv('ANSWER_BANK_PATH', 'data/answer_bank/answers.jsonl')  # Precomputed answers served without API calls
+    ANSWER_BANK_QUESTIONS_PER_SECTION: int = int(os.getenv('ANSWER_BANK_QUESTIONS_PER_SECTION', '5'))  # Questions banked per section and language
+    ANSWER_BANK_WORKERS: int = int(os.getenv('ANSWER_BANK_WORKERS', '4'))  # Questions the offline build answers at once
+    FAQ_MATCH_THRESHOLD: float = float(os.getenv('FAQ_MATCH_THRESHOLD', '0.8'))  # Lowest word/trigram overlap (0-1) answered from demo or banked questions
     
     # Deployment Configuration
     DEPLOYMENT_PLATFORM: str = os.getenv('DEPLOYMENT_PLATFORM', 'local')  # render, railway, docker, local
@@ -100,6 +138,14 @@ class Config:
     # Logging Configuration
     LOG_LEVEL: str = os.getenv('LOG_LEVEL', 'INFO' if IS_PRODUCTION else 'DEBUG')
     LOG_FORMAT: str = os.getenv('LOG_FORMAT', 'json' if IS_PRODUCTION else 'console')
+    METRICS_MULTIPROC_DIR: str = os.getenv('METRICS_MULTIPROC_DIR', '')  # Shared dir for per-worker metric files
+    PERF_LOG_SUCCESS: bool = os.getenv('PERF_LOG_SUCCESS', 'false').lower() == 'true'  # Log every successful tracked call
+    TRACE_BUFFER_SIZE: int = int(os.getenv('TRACE_BUFFER_SIZE', '200'))  # Recent call traces kept in memory (0 disables)
+    TRACE_MAX_SPANS: int = int(os.getenv('TRACE_MAX_SPANS', '500'))  # Spans kept per call trace
+    TRACE_EXPORT_PATH: str = os.getenv('TRACE_EXPORT_PATH', '')  # OTLP/JSON lines file for finished traces
+    SLOW_CALL_THRESHOLD: float = float(os.getenv('SLOW_CALL_THRESHOLD', '12.0'))  # Seconds end to end before a question's trace is captured
+    SLOW_CALL_DIR: str = os.getenv('SLOW_CALL_DIR', 'logs/slow_calls')
+    SLOW_CALL_MAX_CAPTURES: int = int(os.getenv('SLOW_CALL_MAX_CAPTURES', '100'))  # Captures kept on disk (0 disables)
     
     # Health Check Configuration
     HEALTH_CHECK_TIMEOUT: int = int(os.getenv('HEALTH_CHECK_TIMEOUT', '10'))
@@ -0,0 +1,22 @@
+"""
+Gunicorn server hooks for VidyaVani
+
+Gunicorn loads ./gunicorn.conf.py by default, so the Procfile, Dockerfile
+and render.yaml commands pick these hooks up. They keep the per-worker
+metric files in METRICS_MULTIPROC_DIR in step with the live workers and load
+the prompt tokenizer once, before workers are forked.
+"""
+
+
+def on_starting(server):
+    """Drop gauges left by a previous run and load the tokenizer before any worker starts"""
+    from src.utils.metrics_registry import metrics_registry
+    from src.utils.token_counter import load_tokenizer
+    metrics_registry.remove_stale_gauges()
+    load_tokenizer()
+
+
+def child_exit(server, worker):
+    """Retire an exited worker's metric files before its PID can be reused"""
+    from src.utils.metrics_registry import metrics_registry
+    metrics_registry.mark_process_dead(worker.pid)
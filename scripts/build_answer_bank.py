@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Build the precomputed answer bank
+
+Generates likely student questions for every section of the saved index and
+banks simple and detailed answers with their audio (see src/rag/answer_bank.py).
+Safe to stop and rerun: answers already banked for the current index are kept.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from config import Config
+from src.audio.audio_processor import AudioProcessor
+from src.content.vector_database import VECTOR_DB_DIR, index_version
+from src.rag.answer_bank import LANGUAGES, AnswerBank, AnswerBankBuilder
+from src.rag.context_builder import ContextBuilder
+from src.rag.response_generator import ResponseGenerator
+from src.storage.audio_storage import audio_storage
+
+
+def main():
+    config = Config()
+    parser = argparse.ArgumentParser(description="Build the precomputed answer bank from the saved index")
+    parser.add_argument('--bank', default=config.ANSWER_BANK_PATH, help="Answer bank file")
+    parser.add_argument('--questions-per-section', type=int, default=config.ANSWER_BANK_QUESTIONS_PER_SECTION)
+    parser.add_argument('--workers', type=int, default=config.ANSWER_BANK_WORKERS, help="Questions answered at once")
+    parser.add_argument('--languages', nargs='+', choices=LANGUAGES, default=list(LANGUAGES))
+    parser.add_argument('--section', action='append', help="Only build sections whose name contains this text")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    version = index_version()
+    if not version:
+        print(f"❌ No saved index in {VECTOR_DB_DIR}; build the knowledge base first")
+        return 1
+
+    bank = AnswerBank(args.bank, index_version=version)
+    bank.load()
+    builder = AnswerBankBuilder(
+        bank, ContextBuilder(config), ResponseGenerator(config), AudioProcessor(config), audio_storage,
+        index_version=version, questions_per_section=args.questions_per_section, workers=args.workers,
+        languages=tuple(args.languages)
+    )
+
+    sections = builder.load_sections(os.path.join(VECTOR_DB_DIR, "chunk_metadata.json"))
+    if args.section:
+        sections = [s for s in sections if any(name.lower() in s.section.lower() for name in args.section)]
+    print(f"📚 Building answers for {len(sections)} sections against index {version}")
+
+    counts = builder.build(sections)
+    print(f"✅ {counts['built']} answers built, {counts['already_banked']} already banked, "
+          f"{counts['failed']} failed; {len(bank)} answers in {args.bank}")
+    return 0 if counts['failed'] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
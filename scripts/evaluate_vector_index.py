@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Evaluate vector index compression
+
+Measures recall@k of each compressed index (fp16, sq8, pq) against the exact
+flat index over the saved chunk vectors, with and without exact re-ranking,
+along with the memory each needs (see src/content/vector_compression.py).
+No embedding requests are made: stored vectors serve as the queries.
+"""
+
+import argparse
+import os
+import sys
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from config import Config
+from src.content.vector_compression import COMPRESSIONS, evaluate_recall
+from src.content.vector_database import (
+    GEMINI_EMBEDDING_MODEL, OPENAI_EMBEDDING_MODEL, VECTOR_DB_DIR, IndexRegistry, active_embedding_model
+)
+
+MODELS = {model.name: model for model in (OPENAI_EMBEDDING_MODEL, GEMINI_EMBEDDING_MODEL)}
+
+
+def main():
+    config = Config()
+    parser = argparse.ArgumentParser(description="Report recall@k of compressed vector indexes against the flat index")
+    parser.add_argument('--model', choices=sorted(MODELS), default=active_embedding_model(config).name,
+                        help="Embedding model whose saved index is evaluated")
+    parser.add_argument('--db-dir', default=VECTOR_DB_DIR)
+    parser.add_argument('-k', type=int, default=config.TOP_K_RETRIEVAL, help="Results per query compared")
+    parser.add_argument('--queries', type=int, default=200, help="Stored vectors sampled as queries")
+    parser.add_argument('--rerank-candidates', type=int, default=config.VECTOR_RERANK_CANDIDATES)
+    parser.add_argument('--compression', nargs='+', choices=COMPRESSIONS, default=list(COMPRESSIONS))
+    args = parser.parse_args()
+
+    database = IndexRegistry(config, args.db_dir).database(MODELS[args.model])
+    if not database.has_vectors:
+        print(f"❌ No usable {args.model} index in {args.db_dir}; build the knowledge base first")
+        return 1
+
+    vectors = database.stored_vectors()
+    print(f"📊 {args.model}: {len(vectors)} vectors of {vectors.shape[1]} dimensions, "
+          f"recall@{args.k} over {min(args.queries, len(vectors))} queries, "
+          f"{args.rerank_candidates} candidates re-ranked\n")
+
+    report = evaluate_recall(vectors, k=args.k, queries=args.queries,
+                             rerank_candidates=args.rerank_candidates, compressions=args.compression)
+    print(f"{'compression':<12}{'bytes/vector':>13}{'index MB':>10}{'recall':>9}{'re-ranked':>11}{'ms/query':>10}")
+    for compression, row in report.items():
+        print(f"{compression:<12}{row['bytes_per_vector']:>13}{row['index_mb']:>10.2f}{row['recall_at_k']:>9.3f}"
+              f"{row['reranked_recall_at_k']:>11.3f}{row['query_ms']:>10.3f}")
+    print(f"\nConfigured: VECTOR_INDEX_COMPRESSION={config.VECTOR_INDEX_COMPRESSION}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Shared test doubles for the IVR processing pipeline
+
+Imported by the scripts/test_*.py files that drive the pipeline or the IVR
+handler without external services. The fakes record what they were asked
+and take their behaviour as constructor arguments; fake_pipeline builds an
+IVRProcessingPipeline around them.
+"""
+
+import os
+import sys
+import tempfile
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Callable, Dict, List, Optional, Sequence
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.audio.audio_processor import AudioProcessingResult
+from src.ivr.processing_pipeline import IVRProcessingPipeline
+from src.storage.audio_storage import AudioStorageService
+from src.utils.call_recorder import CallRecorder
+from src.utils.deadline import current_deadline
+from config import Config
+
+QUESTION = "Why does a pencil look bent in water?"
+ANSWER = "Light bends when it changes medium."
+
+
+class FakeAudioProcessor:
+    """Transcribes every recording as one question and synthesizes answers without Google Cloud"""
+
+    def __init__(self, transcript: str = QUESTION, tts_results: Sequence[AudioProcessingResult] = (),
+                 tts_result: Optional[AudioProcessingResult] = None, tts_delay: float = 0.0,
+                 on_stt: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            transcript: Text returned for every recording
+            tts_results: Results of the first synthesis calls, in order
+            tts_result: Result of later synthesis calls (default: WAV bytes)
+            tts_delay: Seconds each synthesis call takes
+            on_stt: Called before each transcription, e.g. to cancel a deadline
+        """
+        self.transcript = transcript
+        self.tts_results = list(tts_results)
+        self.tts_result = tts_result or AudioProcessingResult(success=True, audio_data=b'RIFF')
+        self.tts_delay = tts_delay
+        self.on_stt = on_stt
+        self.tts_texts: List[str] = []
+
+    @property
+    def tts_calls(self) -> int:
+        return len(self.tts_texts)
+
+    def process_question_audio(self, audio_data, language):
+        if self.on_stt:
+            self.on_stt()
+        return AudioProcessingResult(success=True, content=self.transcript, speech_duration=2.0)
+
+    def generate_response_audio(self, text, language):
+        self.tts_texts.append(text)
+        if self.tts_delay:
+            time.sleep(self.tts_delay)
+        return self.tts_results.pop(0) if self.tts_results else self.tts_result
+
+
+class FakeContextBuilder:
+    """Context with fixed source chunks and the question it was built for"""
+
+    def __init__(self, source_chunks: Sequence[Dict] = ()):
+        self.source_chunks = list(source_chunks)
+
+    def build_context(self, question, language, detail_level):
+        return {'question': question, 'language': language, 'detail_level': detail_level,
+                'search_results': {'source_chunks': self.source_chunks}}
+
+
+class FakeResponseGenerator:
+    """Answers every context, recording calls and the deadline budget left for each"""
+
+    def __init__(self, response_text: str = ANSWER, delay: float = 0.0, **fields):
+        """
+        Args:
+            response_text: Answer text, formatted with the context (e.g. '{detail_level}')
+            delay: Seconds each answer takes
+            **fields: Extra result fields, e.g. tokens_used
+        """
+        self.response_text = response_text
+        self.delay = delay
+        self.fields = fields
+        self.budgets: List[Optional[float]] = []
+
+    @property
+    def calls(self) -> int:
+        return len(self.budgets)
+
+    def generate_response(self, context):
+        self.budgets.append(current_deadline().remaining())
+        if self.delay:
+            time.sleep(self.delay)
+        return {'success': True, 'response_text': self.response_text.format(**context), **self.fields}
+
+
+def fake_pipeline(config: Optional[Config] = None, audio_processor=None, context_builder=None,
+                  response_generator=None) -> IVRProcessingPipeline:
+    """
+    Pipeline whose audio processor, context builder and response generator are fakes
+
+    Args:
+        config: Pipeline configuration (default: Config())
+        audio_processor, context_builder, response_generator: Instances to use
+            instead of the default fakes (any object, e.g. a mock.Mock)
+    """
+    components = {
+        'AudioProcessor': audio_processor or FakeAudioProcessor(),
+        'ContextBuilder': context_builder or FakeContextBuilder(),
+        'ResponseGenerator': response_generator or FakeResponseGenerator(),
+    }
+    with ExitStack() as patches:
+        for name, instance in components.items():
+            patches.enter_context(mock.patch(f'src.ivr.processing_pipeline.{name}', return_value=instance))
+        return IVRProcessingPipeline(config or Config())
+
+
+@contextmanager
+def isolated_storage():
+    """
+    Point call recordings and stored audio at a temporary directory
+
+    The IVR handler records calls and the pipeline uploads answer audio
+    through process-wide instances writing into the working directory;
+    tests use throwaway ones instead.
+
+    Yields:
+        The temporary directory
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        recorder = CallRecorder(os.path.join(directory, 'call_recordings'))
+        storage = AudioStorageService(storage_dir=os.path.join(directory, 'audio_storage'))
+        with mock.patch('src.ivr.ivr_handler.call_recorder', recorder), \
+                mock.patch('src.storage.audio_storage.audio_storage', storage):
+            yield directory
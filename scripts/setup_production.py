@@ -81,7 +81,7 @@ def initialize_vector_database():
     vector_db_path = Path('data/ncert/vector_db')
     
     # Check if vector database exists
-    if not (vector_db_path / 'faiss_index.bin').exists():
+    if not (any(vector_db_path.glob('indexes/*/faiss_index.bin')) or (vector_db_path / 'faiss_index.bin').exists()):
         logger.info("Vector database not found - will be created on first content processing")
     else:
         logger.info("✓ Vector database found")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Test Adaptive Concurrency
+Tests request classification, AIMD limit adjustment and load shedding responses
+"""
+
+import os
+import sys
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask, jsonify, request
+
+from src.utils.adaptive_concurrency import AIMDLimiter, classify_request
+from src.utils.load_balancer import LoadBalancer, RequestMiddleware
+from config import Config
+
+
+def test_request_classification():
+    """Endpoints map to request classes; health checks and static files are not limited"""
+    print("🧪 Testing request classification")
+
+    assert classify_request('webhook_response_delivery', '/webhook/response-delivery') == 'webhook'
+    assert classify_request('process_question', '/api/process-question') == 'question'
+    assert classify_request('answer_question', '/api/answer-question') == 'text_qa'
+    assert classify_request('get_performance_dashboard', '/api/performance/dashboard') == 'dashboard'
+    assert classify_request('get_session', '/api/session/+919999900038') == 'api'
+    for endpoint in ('health_check', 'metrics', 'serve_frontend_files', 'static',
+                     'performance_dashboard_page', 'webhook_call_end', 'webhook_question_recording',
+                     'webhook_language_selection', 'webhook_follow_up_menu', None):
+        assert classify_request(endpoint, '/') is None, endpoint
+    print("✅ Webhooks, questions, text Q&A and dashboards limited separately")
+
+
+def test_aimd_adjustment():
+    """Fast completions grow a used limit; slow ones cut it once per interval"""
+    print("🧪 Testing AIMD limit adjustment")
+
+    limiter = AIMDLimiter('test', target_latency=1.0, initial_limit=4, min_limit=1, max_limit=10)
+    assert [limiter.try_acquire() for _ in range(5)] == [True, True, True, True, False]
+    for _ in range(4):
+        limiter.release(0.2, now=0.0)
+    grown = limiter.limit  # +1/limit for the 3 completions made while at least half the limit was in use
+    assert 4.7 < grown < 4.71, grown
+    print(f"✅ Limit grew to {grown:.2f} after a window of fast requests")
+
+    for _ in range(4):
+        limiter.try_acquire()
+        limiter.release(0.2, now=0.0)  # One request in flight: no growth while the limit is unused
+    assert limiter.limit == grown
+
+    for now in (10.0, 10.2, 10.5):
+        limiter.try_acquire()
+        limiter.release(3.0, now=now)
+    assert abs(limiter.limit - grown * 0.9) < 1e-9 and limiter.snapshot()['overshoots'] == 3
+    limiter.try_acquire()
+    limiter.release(3.0, now=11.5)
+    assert abs(limiter.limit - grown * 0.81) < 1e-9 and limiter.snapshot()['shed'] == 1
+    print("✅ Overshoots in one interval cut the limit once")
+
+
+def test_limit_tracks_capacity():
+    """Under saturating load the limit settles just below where latency reaches the target"""
+    print("🧪 Testing limit convergence")
+
+    capacity = 8  # Latency climbs once more than 8 requests run together
+    at_target = capacity * 8.0 / 5.0  # Concurrency at which latency reaches the 8s target
+    limiter = AIMDLimiter('question', target_latency=8.0, initial_limit=2, min_limit=1, max_limit=64)
+    now = 0.0
+    limits = []
+    for _ in range(400):
+        admitted = 0
+        while limiter.try_acquire():
+            admitted += 1
+        latency = 5.0 * max(1.0, admitted / capacity)
+        now += latency
+        for _ in range(admitted):
+            limiter.release(latency, now=now)
+        limits.append(int(limiter.limit))
+
+    settled = limits[100:]
+    assert at_target * 0.8 <= min(settled) and max(settled) <= at_target + 1, (min(settled), max(settled))
+    print(f"✅ Limit settled between {min(settled)} and {max(settled)}; latency reaches target at {at_target:.1f}")
+
+
+def _shedding_app():
+    class _Config(Config):
+        MAX_CONCURRENT_CALLS = 5
+
+    app = Flask(__name__)
+    balancer = LoadBalancer(_Config)
+    RequestMiddleware(app, balancer)
+
+    @app.route('/webhook/incoming-call', methods=['POST'])
+    def webhook_incoming_call():
+        return 'connected'
+
+    @app.route('/webhook/response-delivery', methods=['POST'])
+    def webhook_response_delivery():
+        return 'delivered'
+
+    @app.route('/webhook/question-recording', methods=['POST'])
+    def webhook_question_recording():
+        return request.form['RecordingUrl']
+
+    @app.route('/api/session/stats', methods=['GET'])
+    def get_session_stats():
+        return jsonify({'active': 0})
+
+    @app.route('/health', methods=['GET'])
+    def health_check():
+        return 'ok'
+
+    return app, balancer
+
+
+def test_load_shedding_responses():
+    """Shed webhooks get call flow XML, other requests a 503 with Retry-After"""
+    print("🧪 Testing load shedding responses")
+
+    app, balancer = _shedding_app()
+    client = app.test_client()
+    assert client.post('/webhook/incoming-call', data={'From': '+919999900038'}).data == b'connected'
+
+    for name in ('webhook', 'api'):
+        limiter = balancer.concurrency.limiters[name]
+        while limiter.try_acquire():
+            pass
+
+    busy = client.post('/webhook/incoming-call', data={'From': '+919999900039'})
+    assert busy.status_code == 200 and busy.mimetype == 'application/xml'
+    assert b'<Hangup' in busy.data and b'lines are busy' in busy.data
+
+    hold = client.post('/webhook/response-delivery', data={'From': '+919999900038'})
+    assert hold.status_code == 200
+    assert b'<Redirect method="POST">/webhook/response-delivery</Redirect>' in hold.data
+    assert b'Please hold on a moment.' in hold.data
+    print("✅ New call told lines are busy; call in progress asked to hold and retried")
+
+    recording_url = 'https://recordings.example/q38.wav'
+    question = client.post('/webhook/question-recording',
+                           data={'From': '+919999900040', 'RecordingUrl': recording_url})
+    assert question.data == recording_url.encode()
+    print("✅ Webhook carrying the caller's recording admitted while at the limit")
+
+    overloaded = client.get('/api/session/stats')
+    assert overloaded.status_code == 503 and overloaded.headers['Retry-After'] == '30'
+    assert client.get('/health').data == b'ok'
+    status = balancer.get_load_status()['concurrency']
+    assert status['webhook']['shed'] == 3 and status['api']['shed'] == 2  # Including the fill loop's last attempt
+    print(f"✅ API request got 503; health check exempt; status: {status['webhook']}")
+
+
+def main():
+    """Run adaptive concurrency tests"""
+    tests = [
+        test_request_classification,
+        test_aimd_adjustment,
+        test_limit_tracks_capacity,
+        test_load_shedding_responses,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} adaptive concurrency tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test Admission Control
+Tests per-caller token buckets and the phone -> active request index in LoadBalancer
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.load_balancer import CallerRateLimiter, LoadBalancer, RequestInfo
+from config import Config
+
+
+class _Config(Config):
+    MAX_CONCURRENT_CALLS = 100000
+    RATE_LIMIT_PER_MINUTE = 30
+    RATE_LIMIT_BURST = 30
+    RATE_LIMIT_MAX_CALLERS = 1000
+
+
+def _request(request_id, phone_number):
+    return RequestInfo(request_id=request_id, phone_number=phone_number,
+                       endpoint='webhook_question_recording', start_time=datetime.now())
+
+
+def test_token_bucket_refill_and_lru():
+    """Buckets allow a burst, refill at the sustained rate and are evicted LRU"""
+    print("🧪 Testing caller token buckets")
+
+    limiter = CallerRateLimiter(rate_per_minute=30, burst=5, max_callers=3)
+    assert all(limiter.try_acquire('+911', 100.0) for _ in range(5))
+    assert not limiter.allows('+911', 100.0) and not limiter.try_acquire('+911', 100.0)
+    assert limiter.allows('+911', 102.0)  # 30/min refills one token every 2s
+    assert limiter.try_acquire('+911', 102.0) and not limiter.try_acquire('+911', 102.5)
+    print("✅ Burst of 5 spent, one token refilled after 2s")
+
+    for phone in ('+912', '+913', '+914'):
+        limiter.try_acquire(phone, 103.0)
+    assert len(limiter) == 3 and limiter.allows('+911', 103.0) is True
+    assert limiter.try_acquire('+911', 103.0)  # Evicted, so it starts with a full bucket
+    print("✅ Least recently seen caller evicted at capacity")
+
+
+def test_rate_limit_under_high_traffic():
+    """The per-caller limit holds no matter how many other callers are active"""
+    print("🧪 Testing per-caller rate limit under load")
+
+    balancer = LoadBalancer(_Config)
+    accepted = 0
+    start = time.monotonic()
+    for i in range(5000):  # Many distinct callers between one caller's requests
+        if balancer.submit_request(_request(f"other_{i}", f"+9180000{i:05d}")):
+            balancer.complete_request(f"other_{i}", True, 0.1)
+        if i % 100 == 0 and balancer.submit_request(_request(f"caller_{i}", '+919999900037')):
+            accepted += 1
+            balancer.complete_request(f"caller_{i}", True, 0.1)
+
+    refilled = (time.monotonic() - start) * _Config.RATE_LIMIT_PER_MINUTE / 60
+    assert 30 <= accepted <= 30 + refilled + 1, (accepted, refilled)
+    assert balancer.metrics['rate_limited_requests'] == 50 - accepted
+    assert len(balancer.rate_limiter) <= _Config.RATE_LIMIT_MAX_CALLERS
+    print(f"✅ {accepted} of 50 requests from one caller accepted among 5000 callers")
+
+
+def test_active_request_index():
+    """A caller with a request in flight is rejected until it completes"""
+    print("🧪 Testing phone -> active request index")
+
+    balancer = LoadBalancer(_Config)
+    assert balancer.submit_request(_request('r1', '+919999900001'))
+    assert balancer.can_accept_request('+919999900001') == (False, "Request already in progress for this phone number")
+    assert not balancer.submit_request(_request('r2', '+919999900001'))
+    assert balancer.submit_request(_request('a1', 'unknown')) and balancer.submit_request(_request('a2', 'unknown'))
+
+    balancer.complete_request('r1', True, 0.2)
+    balancer.complete_request('r1', True, 0.2)  # Already completed, ignored
+    assert balancer.active_by_phone == {}
+    assert balancer.submit_request(_request('r3', '+919999900001'))
+    assert balancer.get_load_status()['active_callers'] == 1
+    print("✅ Duplicate rejected, index cleared on completion")
+
+
+def test_concurrent_admission():
+    """Concurrent submissions for one caller admit exactly one request"""
+    print("🧪 Testing concurrent admission")
+
+    balancer = LoadBalancer(_Config)
+    results = []
+    barrier = threading.Barrier(16)
+
+    def submit(i):
+        barrier.wait()
+        results.append(balancer.submit_request(_request(f"c{i}", '+919999900099')))
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results.count(True) == 1 and len(balancer.active_requests) == 1
+
+    start = time.perf_counter()
+    for i in range(20000):
+        balancer.can_accept_request(f"+9170000{i:05d}")
+    per_check = (time.perf_counter() - start) / 20000
+    assert per_check < 0.0005
+    print(f"✅ One of 16 concurrent requests admitted; {per_check * 1e6:.1f}µs per admission check")
+
+
+def main():
+    """Run admission control tests"""
+    tests = [
+        test_token_bucket_refill_and_lru,
+        test_rate_limit_under_high_traffic,
+        test_active_request_index,
+        test_concurrent_admission,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} admission control tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
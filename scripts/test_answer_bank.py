@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Test Answer Bank
+Tests the offline answer bank build (parallel, resumable, versioned) and serving banked answers
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.rag.answer_bank import AnswerBank, AnswerBankBuilder, BankedAnswer
+from pipeline_fakes import FakeAudioProcessor, FakeContextBuilder, fake_pipeline
+from config import Config
+
+CHUNKS = [
+    {'id': 'c0', 'chapter_name': 'Light', 'section_name': '10.2 Spherical Mirrors', 'chunk_index': 0,
+     'content_text': 'A concave mirror curves inwards. It converges light to a focus.'},
+    {'id': 'c1', 'chapter_name': 'Light', 'section_name': '10.3 Refraction of Light', 'chunk_index': 1,
+     'content_text': 'Light bends when it passes from air into water.'},
+    {'id': 'c2', 'chapter_name': 'Light', 'section_name': 'Exercises', 'chunk_index': 2,
+     'content_text': '1. Define the principal focus of a concave mirror.'},
+]
+
+
+class _FakeResponseGenerator:
+    """Writes questions about a section and answers them, failing on request"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.question_requests = 0
+        self.answers = 0
+        self.threads = set()
+        self._lock = threading.Lock()
+        self.router = SimpleNamespace(complete=self._complete)
+
+    def _complete(self, messages, timeout):
+        with self._lock:
+            self.question_requests += 1
+        prompt = messages[-1]['content']
+        topic = 'mirrors' if 'Mirrors' in prompt else 'refraction'
+        language = 'Telugu' if 'in Telugu' in prompt else 'English'
+        lines = [f"{i}. {language} question {i} about {topic}?" for i in (1, 2, 3)] + ["1. About it?", ""]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='\n'.join(lines)))]), None
+
+    def generate_response(self, context):
+        with self._lock:
+            self.answers += 1
+            self.threads.add(threading.current_thread().name)
+        if context['question'] in self.failing:
+            return {'success': False, 'response_text': 'Sorry', 'fallback_type': 'technical_error'}
+        return {'success': True, 'response_text': f"{context['detail_level']} answer to {context['question']}"}
+
+
+class _FakeStorage:
+    def __init__(self):
+        self.pinned = []
+
+    def store_audio(self, audio_data, filename_prefix, pinned=False):
+        self.pinned.append(pinned)
+        return f"http://localhost/audio/{filename_prefix}_{len(self.pinned)}.wav"
+
+
+def _builder(bank_path, generator, storage, version='v1'):
+    bank = AnswerBank(bank_path, index_version=version)
+    bank.load()
+    return AnswerBankBuilder(bank, FakeContextBuilder(), generator, FakeAudioProcessor(), storage,
+                             index_version=version, questions_per_section=2, workers=4)
+
+
+def test_build_resumable():
+    """Every section gets banked answers in both languages; a rerun only builds what is missing"""
+    print("🧪 Testing answer bank build")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        metadata_path = os.path.join(tmp, 'chunk_metadata.json')
+        with open(metadata_path, 'w', encoding='utf-8') as f:
+            json.dump(CHUNKS, f)
+        bank_path = os.path.join(tmp, 'bank', 'answers.jsonl')
+
+        failing = "English question 1 about refraction?"
+        generator, storage = _FakeResponseGenerator(failing=[failing]), _FakeStorage()
+        builder = _builder(bank_path, generator, storage)
+        sections = builder.load_sections(metadata_path)
+        assert [s.section for s in sections] == ['10.2 Spherical Mirrors', '10.3 Refraction of Light']
+
+        counts = builder.build(sections)
+        assert counts == {'built': 7, 'already_banked': 0, 'failed': 1}, counts
+        assert generator.question_requests == 4 and len(generator.threads) > 1
+        assert all(storage.pinned) and len(storage.pinned) == 14
+
+        banked = builder.bank.lookup("  telugu QUESTION 2 about mirrors? ", 'Telugu')
+        assert banked.detailed_text == "detailed answer to Telugu question 2 about mirrors?"
+        assert banked.index_version == 'v1' and banked.simple_audio.endswith('.wav')
+        print(f"✅ 2 sections x 2 languages x 2 questions: {counts}, audio pinned, Exercises skipped")
+
+        rerun_generator = _FakeResponseGenerator()
+        rerun = _builder(bank_path, rerun_generator, _FakeStorage())
+        counts = rerun.build(sections)
+        assert counts == {'built': 1, 'already_banked': 7, 'failed': 0}, counts
+        assert rerun_generator.question_requests == 0 and rerun_generator.answers == 2
+        assert rerun.bank.lookup(failing, 'english') is not None
+        print("✅ Rerun reused saved questions and built only the missing answer")
+
+
+def test_index_version():
+    """Answers built from another index version are not served and are rebuilt"""
+    print("🧪 Testing answer bank index versions")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'answers.jsonl')
+        bank = AnswerBank(path, index_version='v1')
+        bank.add(BankedAnswer("What is refraction?", 'english', 'Light', '10.3', 'Light bends.', 'Light bends a lot.',
+                              index_version='v1'))
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write('{"question": "What is a mirr')  # Line cut off by a killed build
+
+        assert AnswerBank(path, index_version='v1').load() == 1
+        current = AnswerBank(path, index_version='v2')
+        assert current.load() == 0 and current.stale_answers == 1
+        assert ("What is refraction?", 'english') not in current
+        assert AnswerBank(path).load() == 1
+        print("✅ Stale answers skipped, truncated line ignored")
+
+
+def test_pipeline_serves_banked_answer():
+    """A banked question is answered without retrieval, LLM or TTS requests"""
+    print("🧪 Testing answers served from the bank")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Config()
+        config.ANSWER_BANK_PATH = os.path.join(tmp, 'answers.jsonl')
+        with mock.patch('src.ivr.processing_pipeline.index_version', return_value='v1'):
+            AnswerBank(config.ANSWER_BANK_PATH).add(BankedAnswer(
+                "What is refraction?", 'english', 'Light', '10.3 Refraction of Light',
+                'Light bends.', 'Light bends when it changes medium.',
+                simple_audio='bank_simple_1_ab12cd34.wav', detailed_audio='bank_detailed_1_ef56ab78.wav',
+                index_version='v1'))
+            pipeline = fake_pipeline(config, FakeAudioProcessor(transcript="what is  Refraction?"),
+                                     mock.MagicMock(), mock.MagicMock())
+
+        keyed, stored = {}, []
+
+        def store_audio(audio_data, filename_prefix, pinned=False, key=None):
+            stored.append((filename_prefix, pinned))
+            keyed[(key, filename_prefix)] = f"http://localhost/audio/{filename_prefix}_0_{len(stored)}.wav"
+            return keyed[(key, filename_prefix)]
+
+        storage = SimpleNamespace(
+            get_audio_file_path=lambda filename: filename if 'simple' in filename else None,
+            get_public_url=lambda filename: f"http://localhost/audio/{filename}",
+            get_keyed_audio_url=lambda key, filename_prefix: keyed.get((key, filename_prefix)),
+            store_audio=store_audio
+        )
+        try:
+            with mock.patch('src.storage.audio_storage.audio_storage', storage), \
+                    mock.patch.object(pipeline, '_download_audio_from_url', return_value=b'RIFF'):
+                result = pipeline.process_question_sync('https://example.com/q.wav', 'english', '+919999900001')
+                assert result.success and result.response_text == 'Light bends.'
+                assert result.response_audio_url == "http://localhost/audio/bank_simple_1_ab12cd34.wav"
+                assert result.detailed_audio_url == "http://localhost/audio/faq_0_1.wav"
+                pipeline.context_builder.build_context.assert_not_called()
+                pipeline.response_generator.generate_response.assert_not_called()
+                assert pipeline.audio_processor.tts_texts == ['Light bends when it changes medium.']
+                assert stored == [('faq', True)]
+
+                # The synthesized audio is pinned and keyed, so later callers reuse it
+                again = pipeline.process_question_sync('https://example.com/q.wav', 'english', '+919999900003')
+                assert again.detailed_audio_url == result.detailed_audio_url
+                assert pipeline.audio_processor.tts_calls == 1 and len(stored) == 1
+
+                pipeline.process_question_sync('https://example.com/q.wav', 'telugu', '+919999900002')
+                assert pipeline.context_builder.build_context.called
+            print("✅ Banked answer served with stored audio; the missing detailed audio was synthesized once and pinned")
+        finally:
+            pipeline.cleanup()
+
+
+def main():
+    """Run answer bank tests"""
+    tests = [
+        test_build_resumable,
+        test_index_version,
+        test_pipeline_serves_banked_answer,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} answer bank tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
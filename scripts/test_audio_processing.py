@@ -16,7 +16,13 @@ from audio import (
     AudioProcessor, 
     Language, 
     AudioQualityChecker,
-    create_test_audio_file
+    AudioCodec,
+    AudioFormat,
+    VoiceActivityDetector,
+    create_test_audio_file,
+    read_wav,
+    write_wav,
+    resample_poly
 )
 from config import Config
 
@@ -120,6 +126,130 @@ def test_audio_utils():
     assert isinstance(is_suitable, bool)
 
 
+def test_voice_activity_detection():
+    """Test local voice activity detection and silence trimming"""
+    import io
+    import wave
+    
+    logger.info("Testing Voice Activity Detection...")
+    vad = VoiceActivityDetector()
+    
+    def _wav(frames: bytes) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(16000)
+            wav_file.writeframes(frames)
+        return buffer.getvalue()
+    
+    def _frames(audio: bytes) -> bytes:
+        with wave.open(io.BytesIO(audio), 'rb') as wav_file:
+            return wav_file.readframes(wav_file.getnframes())
+    
+    # Pure silence is rejected locally
+    silence = _wav(b'\x00\x00' * 16000 * 2)
+    result = vad.analyze(silence)
+    assert result is not None
+    assert not result.has_speech
+    assert result.speech_duration == 0.0
+    logger.info("✓ Silent recording rejected")
+    
+    # A continuous tone is treated as speech and kept whole
+    tone = create_test_audio_file(duration_seconds=1.0, frequency=440.0)
+    result = vad.analyze(tone)
+    assert result.has_speech
+    assert result.speech_duration > 0.9
+    logger.info(f"✓ Tone detected: {result.speech_duration:.2f}s speech")
+    
+    # Leading/trailing silence is trimmed
+    padded = _wav(b'\x00\x00' * 16000 + _frames(tone) + b'\x00\x00' * 16000)
+    result = vad.analyze(padded)
+    assert result.has_speech
+    assert abs(result.total_duration - 3.0) < 0.01
+    assert 0.7 < result.speech_start < 1.0
+    assert 2.0 < result.speech_end < 2.3
+    assert len(result.trimmed_audio) < len(padded)
+    logger.info(f"✓ Silence trimmed: {result.speech_start:.2f}s-{result.speech_end:.2f}s kept")
+    
+    # Non-WAV input is passed through untouched
+    assert vad.analyze(b'not a wav file') is None
+    logger.info("✓ Undecodable audio passed through")
+
+
+def test_audio_codec_dsp():
+    """Test resampling, normalization and G.711 encoding"""
+    import io
+    import time
+    import wave
+    import numpy as np
+    
+    logger.info("Testing Audio Codec DSP...")
+    
+    # Resampling keeps in-band tones and removes content above the new Nyquist
+    t = np.arange(16000 * 2) / 16000
+    tone = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+    alias = (0.5 * np.sin(2 * np.pi * 6000 * t)).astype(np.float32)
+    resampled = resample_poly(tone, 16000, 8000)
+    assert len(resampled) == 16000
+    assert abs(np.abs(resampled[1000:-1000]).max() - 0.5) < 0.01
+    assert np.abs(resample_poly(alias, 16000, 8000)[1000:-1000]).max() < 0.01
+    logger.info("✓ Polyphase resampling 16kHz -> 8kHz")
+    
+    # Stereo 22.05kHz input is downmixed and resampled to 8kHz mono
+    t = np.arange(22050) / 22050
+    left = (0.4 * np.sin(2 * np.pi * 300 * t) * 32767).astype('<i2')
+    stereo = np.stack([left, left], axis=1).tobytes()
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(22050)
+        wav_file.writeframes(stereo)
+    converted = AudioCodec.convert_to_ivr_format(buffer.getvalue(), target_rate=8000)
+    samples, rate = read_wav(converted)
+    assert rate == 8000 and len(samples) == 8000
+    logger.info("✓ Stereo downmix and 22.05kHz -> 8kHz conversion")
+    
+    # G.711 round trips within quantization error and halves the payload
+    test_audio = create_test_audio_file(duration_seconds=1.0, frequency=440.0)
+    pcm_samples, _ = read_wav(test_audio)
+    for law in (AudioFormat.PCMU, AudioFormat.PCMA):
+        encoded = AudioCodec.convert_to_ivr_format(test_audio, target_rate=16000, output_format=law)
+        assert AudioCodec.get_wav_format(encoded) == law
+        decoded, _ = read_wav(encoded)
+        assert np.abs(decoded - pcm_samples).max() < 0.035
+        assert len(encoded) < len(test_audio) * 0.55
+    logger.info("✓ G.711 μ-law/A-law encoding")
+    
+    # Normalization raises quiet audio towards the target RMS without clipping
+    quiet = write_wav(tone * 0.2, 16000)
+    normalized, _ = read_wav(AudioCodec.normalize_audio_volume(quiet, target_db=-12.0))
+    rms_db = 20 * np.log10(np.sqrt(np.mean(normalized ** 2)))
+    assert abs(rms_db + 12.0) < 0.5
+    assert np.abs(normalized).max() < 1.0
+    logger.info(f"✓ Volume normalized to {rms_db:.1f} dBFS")
+    
+    # A 60 second clip converts quickly
+    long_clip = write_wav(np.tile(tone, 30), 16000)
+    start = time.perf_counter()
+    AudioCodec.convert_to_ivr_format(long_clip, target_rate=8000, output_format=AudioFormat.PCMU)
+    elapsed = time.perf_counter() - start
+    logger.info(f"✓ 60s clip converted to 8kHz μ-law in {elapsed * 1000:.1f} ms")
+    assert elapsed < 0.1
+
+    # Resampling 60 seconds takes a few ms per common TTS rate (best of 3 to ignore scheduler noise)
+    for input_rate, limit_ms in ((16000, 15), (24000, 20), (22050, 25)):
+        clip = np.random.default_rng(0).normal(scale=0.1, size=input_rate * 60).astype(np.float32)
+        timings = []
+        for _ in range(3):
+            start = time.perf_counter()
+            resample_poly(clip, input_rate, 8000)
+            timings.append((time.perf_counter() - start) * 1000)
+        logger.info(f"✓ 60s {input_rate}Hz -> 8kHz resampled in {min(timings):.1f} ms")
+        assert min(timings) < limit_ms, (input_rate, timings)
+
+
 def test_configuration():
     """Test configuration and environment setup"""
     logger.info("Testing Configuration...")
@@ -161,6 +291,8 @@ def main():
     tests = [
         ("Configuration", test_configuration),
         ("Audio Utilities", test_audio_utils),
+        ("Voice Activity Detection", test_voice_activity_detection),
+        ("Audio Codec DSP", test_audio_codec_dsp),
         ("Audio Processor", test_audio_processor),
     ]
     
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Test Audio Storage Service
+Tests sharded file storage and HTTP serving without a running server
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from flask import Flask
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.audio.audio_utils import create_test_audio_file
+from src.storage.audio_storage import AudioStorageService, register_audio_routes
+
+
+def _make_client(storage):
+    app = Flask(__name__)
+    register_audio_routes(app, storage)
+    return app.test_client()
+
+
+def test_cross_worker_serving():
+    """Files stored by one worker are served by another"""
+    print("🧪 Testing cross-worker audio serving")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        writer = AudioStorageService(storage_dir=storage_dir)
+        reader = AudioStorageService(storage_dir=storage_dir)
+
+        audio = create_test_audio_file(duration_seconds=0.5)
+        url = writer.store_audio(audio, "response_+919876543210_1700000000")
+        filename = url.rsplit('/', 1)[-1]
+
+        assert '+' not in filename
+        assert filename not in reader.audio_files
+
+        file_path = reader.get_audio_file_path(filename)
+        assert file_path is not None
+        assert os.path.dirname(file_path) == os.path.join(storage_dir, reader.get_etag(filename)[:2])
+        assert os.stat(file_path).st_mode & 0o777 == 0o644
+        print(f"✅ Stored {filename} resolved from shard by a second instance")
+
+        response = _make_client(reader).get(f"/audio/{filename}")
+        assert response.status_code == 200
+        assert response.data == audio
+        print("✅ Second instance served the file")
+
+
+def test_caching_headers_and_ranges():
+    """Audio responses support ETag, If-None-Match and Range"""
+    print("🧪 Testing audio caching headers and range requests")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        storage = AudioStorageService(storage_dir=storage_dir)
+        client = _make_client(storage)
+
+        audio = create_test_audio_file(duration_seconds=0.5)
+        filename = storage.store_audio(audio, "detailed").rsplit('/', 1)[-1]
+
+        response = client.get(f"/audio/{filename}")
+        etag = response.headers['ETag']
+        cache_control = response.headers['Cache-Control']
+        assert etag == f'"{storage.get_etag(filename)}"'
+        assert 'immutable' in cache_control and 'max-age=31536000' in cache_control
+        assert response.headers.get('Accept-Ranges') == 'bytes'
+        print(f"✅ ETag {etag}, Cache-Control: {cache_control}")
+
+        response = client.get(f"/audio/{filename}", headers={'If-None-Match': etag})
+        assert response.status_code == 304
+        assert response.data == b''
+        print("✅ Conditional refetch returned 304")
+
+        response = client.get(f"/audio/{filename}", headers={'Range': 'bytes=0-43'})
+        assert response.status_code == 206
+        assert response.data == audio[:44]
+        print("✅ Range request returned 206 with the WAV header")
+
+
+def test_invalid_filenames():
+    """Unknown or malformed filenames are rejected"""
+    print("🧪 Testing invalid audio filenames")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        storage = AudioStorageService(storage_dir=storage_dir)
+        client = _make_client(storage)
+
+        for filename in ["missing_1700000000_0123456789abcdef.wav", "..%2Fconfig.py", "notes.txt"]:
+            assert client.get(f"/audio/{filename}").status_code == 404
+        assert storage.get_audio_file_path("../../etc/passwd") is None
+        print("✅ Invalid filenames return 404")
+
+
+def test_expiry_ordered_retention():
+    """Expired files are removed from the head of the expiry index only"""
+    print("🧪 Testing expiry-ordered retention")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        storage = AudioStorageService(storage_dir=storage_dir, retention_seconds=60)
+
+        old = storage.store_audio(create_test_audio_file(0.2, 300.0), "old").rsplit('/', 1)[-1]
+        time.sleep(0.01)
+        new = storage.store_audio(create_test_audio_file(0.2, 500.0), "new").rsplit('/', 1)[-1]
+        pinned = storage.store_audio(create_test_audio_file(0.2, 700.0), "prompt", pinned=True).rsplit('/', 1)[-1]
+
+        # Advance the clock to the first file's expiry
+        expired = storage._pop_expired(storage.audio_files[old]['expires_at'])
+        storage._delete_files(expired)
+        assert storage.get_audio_file_path(old) is None
+        assert storage.get_audio_file_path(new) is not None
+        print("✅ Only the expired file was deleted")
+
+        expired = storage._pop_expired(time.time() + 3600)
+        storage._delete_files(expired)
+        assert storage.get_audio_file_path(new) is None
+        assert storage.get_audio_file_path(pinned) is not None
+        assert storage.get_storage_stats()['pinned_files'] == 1
+        print("✅ Pinned audio survived expiry")
+
+
+def test_byte_quota_lru_eviction():
+    """Least recently used unpinned files are evicted over quota"""
+    print("🧪 Testing byte quota with LRU eviction")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        audio = [create_test_audio_file(0.5, 200.0 + 100 * i) for i in range(4)]
+        # Room for two files: the third evicts one, down to the 90% low-water mark
+        storage = AudioStorageService(storage_dir=storage_dir, max_bytes=int(len(audio[0]) * 2.5))
+
+        pinned = storage.store_audio(audio[3], "faq", pinned=True).rsplit('/', 1)[-1]
+        first = storage.store_audio(audio[0], "a").rsplit('/', 1)[-1]
+        second = storage.store_audio(audio[1], "b").rsplit('/', 1)[-1]
+
+        # Touch the first file so the second becomes least recently used
+        assert storage.get_audio_file_path(first)
+        third = storage.store_audio(audio[2], "c").rsplit('/', 1)[-1]
+
+        assert storage.get_audio_file_path(second) is None
+        assert storage.get_audio_file_path(first) is not None
+        assert storage.get_audio_file_path(third) is not None
+        assert storage.get_audio_file_path(pinned) is not None
+        assert storage.get_storage_stats()['evicted_files'] == 1
+        print("✅ LRU file evicted, recently used and pinned files kept")
+
+
+def test_quota_shared_across_workers():
+    """Workers share one quota and recency order; a file larger than the quota outlives its store"""
+    print("🧪 Testing the byte quota across workers")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        audio = [create_test_audio_file(0.5, 200.0 + 100 * i) for i in range(3)]
+        quota = int(len(audio[0]) * 2.5)
+        worker_a = AudioStorageService(storage_dir=storage_dir, max_bytes=quota)
+        worker_b = AudioStorageService(storage_dir=storage_dir, max_bytes=quota)
+        assert worker_a.cleanup_thread is None  # Started on first use, in the serving process
+
+        first = worker_a.store_audio(audio[0], "a").rsplit('/', 1)[-1]
+        second = worker_b.store_audio(audio[1], "b").rsplit('/', 1)[-1]
+        assert worker_a.cleanup_thread.is_alive()
+        assert worker_b.get_storage_stats()['unpinned_size_bytes'] == len(audio[0]) * 2
+
+        # Worker B serves A's file, so B's own file is the least recently used
+        assert worker_b.get_audio_file_path(first)
+        third = worker_a.store_audio(audio[2], "c").rsplit('/', 1)[-1]
+        assert worker_a.get_audio_file_path(second) is None
+        assert worker_a.get_audio_file_path(first) and worker_a.get_audio_file_path(third)
+        assert worker_b.get_storage_stats()['unpinned_size_bytes'] == len(audio[0]) * 2
+        print("✅ Worker A evicted worker B's least recently served file")
+
+        small = AudioStorageService(storage_dir=storage_dir, max_bytes=len(audio[0]) // 2)
+        url = small.store_audio(create_test_audio_file(0.5, 900.0), "big")
+        assert _make_client(small).get(f"/audio/{url.rsplit('/', 1)[-1]}").status_code == 200
+        assert small.get_audio_file_path(first) is None and small.get_audio_file_path(third) is None
+        print("✅ A file larger than the quota is kept for the caller, older files evicted")
+
+
+def test_keyed_pinned_audio():
+    """Audio stored under a key is found again by any worker and survives expiry"""
+    print("🧪 Testing keyed pinned audio")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        writer = AudioStorageService(storage_dir=storage_dir, retention_seconds=60)
+        reader = AudioStorageService(storage_dir=storage_dir)
+        key = "demo|english|What is reflection of light?"
+        assert reader.get_keyed_audio_url(key, "demo") is None
+
+        url = writer.store_audio(create_test_audio_file(0.2, 300.0), "demo", pinned=True, key=key)
+        assert reader.get_keyed_audio_url(key, "demo") == url
+        assert reader.get_keyed_audio_url(key, "other") is None
+
+        writer._delete_files(writer._pop_expired(time.time() + 3600))
+        assert reader.get_keyed_audio_url(key, "demo") == url
+        print("✅ Keyed audio resolved by a second instance after expiry")
+
+
+def test_reconcile_on_startup():
+    """Files written before a restart are indexed and leftover temp files removed"""
+    print("🧪 Testing startup reconciliation")
+
+    with tempfile.TemporaryDirectory() as storage_dir:
+        first = AudioStorageService(storage_dir=storage_dir)
+        regular = first.store_audio(create_test_audio_file(0.2, 300.0), "before").rsplit('/', 1)[-1]
+        pinned = first.store_audio(create_test_audio_file(0.2, 400.0), "prompt", pinned=True).rsplit('/', 1)[-1]
+
+        stale_temp = os.path.join(storage_dir, 'ab', 'leftover.tmp')
+        os.makedirs(os.path.dirname(stale_temp), exist_ok=True)
+        open(stale_temp, 'wb').close()
+        os.utime(stale_temp, (time.time() - 3600, time.time() - 3600))
+
+        restarted = AudioStorageService(storage_dir=storage_dir)
+        assert regular in restarted.audio_files
+        assert restarted.audio_files[pinned]['pinned']
+        assert restarted.audio_files[regular]['expires_at'] is not None
+        assert not os.path.exists(stale_temp)
+        print("✅ Existing files reconciled with pin state preserved")
+
+
+def main():
+    """Run audio storage tests"""
+    tests = [
+        test_cross_worker_serving,
+        test_caching_headers_and_ranges,
+        test_invalid_filenames,
+        test_expiry_ordered_retention,
+        test_byte_quota_lru_eviction,
+        test_quota_shared_across_workers,
+        test_keyed_pinned_audio,
+        test_reconcile_on_startup,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} audio storage tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
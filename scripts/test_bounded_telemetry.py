@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Test Bounded Telemetry Storage
+Tests time-bucketed alert/error storage and deduplicated stack capture
+"""
+
+import os
+import sys
+import time
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.error_tracker import ErrorTracker, track_error
+from src.utils.performance_tracker import PerformanceTracker
+from src.utils.time_buckets import TimeBucketedLog
+
+
+def test_time_bucketed_log():
+    """Counts cover the window, retained events are bounded and old buckets are reused"""
+    print("🧪 Testing time-bucketed log")
+
+    log = TimeBucketedLog(bucket_seconds=60, num_buckets=60, max_events_per_bucket=5)
+    start = 1_700_000_040.0  # Minute aligned
+    for second in range(600):  # 10 minutes, one event per second
+        log.append({'second': second}, key='timeout' if second % 3 else 'quota', timestamp=start + second)
+
+    now = start + 599
+    assert log.total(60, now) == 60
+    assert log.counts(600, now) == {'timeout': 400, 'quota': 200}
+    events = log.events(600, now)
+    assert len(events) == 50 and events[-1] == {'second': 599}
+    assert [event['second'] for event in log.events(600, now, limit=3)] == [597, 598, 599]
+    print(f"✅ 600 events counted, {len(events)} retained")
+
+    # An hour later the ring has wrapped and the old minutes are gone
+    log.append({'second': 4200}, key='timeout', timestamp=start + 4200)
+    assert log.total(3600, start + 4200) == 1
+    assert log.prune(0, start + 4300) == 601 and log.total(3600, start + 4300) == 0
+    print("✅ Wrapped buckets reset and prune dropped expired events")
+
+
+def test_alert_storage_bounded():
+    """A flood of slow calls keeps alert storage and the summary bounded"""
+    print("🧪 Testing bounded performance alerts")
+
+    tracker = PerformanceTracker(log_success=False)
+    for _ in range(2000):
+        token = tracker.start_component_timing('tts_processing')
+        tracker.end_component_timing(token._replace(start_time=token.start_time - 13.0))
+
+    summary = tracker.get_performance_summary()
+    assert summary['alert_counts']['response_time_critical'] == 2000
+    assert len(summary['recent_alerts']) <= 100
+    assert summary['recent_alerts'][-1]['type'] == 'response_time_critical'
+    print(f"✅ 2000 alerts counted, {len(summary['recent_alerts'])} returned")
+
+    tracker.reset_metrics()
+    assert tracker.get_performance_summary()['alert_counts'] == {}
+
+
+def _fail_in_stt():
+    raise TimeoutError("speech deadline exceeded")
+
+
+def _caller_frame():
+    return sys._getframe()
+
+
+def test_error_stack_deduplication():
+    """Repeated errors from one location store a single stack and are counted"""
+    print("🧪 Testing deduplicated stack capture")
+
+    tracker = ErrorTracker()
+    for _ in range(500):
+        try:
+            _fail_in_stt()
+        except TimeoutError as e:
+            tracker.track_error('STT_Processing', e, phone_number='+919999900036')
+    tracker.track_error('Response_Delivery_Timeout', Exception("Processing timeout after 16s"))
+
+    assert len(tracker.stack_records) == 2
+    top = tracker.get_top_stacks()
+    assert top[0]['count'] == 500 and top[0]['exception_type'] == 'TimeoutError'
+    assert top[0]['location'].startswith('test_bounded_telemetry.py') and '_fail_in_stt' in top[0]['location']
+    print(f"✅ 501 errors stored as {len(tracker.stack_records)} stacks: {top[0]['location']}")
+
+    stack = tracker.get_stack_trace(top[0]['fingerprint'])
+    assert 'raise TimeoutError("speech deadline exceeded")' in stack['stack_trace']
+    assert tracker.get_stack_trace('missing') is None
+    untraced = tracker.get_top_stacks()[1]
+    assert 'test_error_stack_deduplication' in untraced['location']
+
+    print("✅ Stack formatted on request; unraised errors fingerprinted at the tracking call")
+
+    summary = tracker.get_error_summary(1)
+    assert summary['total_errors'] == 501
+    assert dict(summary['top_error_types'])['api_timeout'] == 501
+    assert len(summary['recent_errors']) == 10
+    assert summary['recent_errors'][0]['stack_fingerprint'] == top[0]['fingerprint']
+    assert len(tracker.error_events.events(3600)) <= tracker.error_events.max_events_per_bucket * 2
+    print("✅ Summary counts every error from bucket totals")
+
+    # Through the module-level helper too, and from an explicit frame
+    with mock.patch('src.utils.error_tracker.error_tracker', tracker):
+        for _ in range(2):
+            track_error('Response_Delivery_Timeout', Exception("Processing timeout after 16s"))
+    helper = tracker.get_top_stacks()[1]
+    assert helper['count'] == 2 and 'in test_error_stack_deduplication' in helper['location'], helper
+    tracker.track_error('Response_Delivery_Timeout', Exception("Processing timeout"), frame=_caller_frame())
+    assert any('in _caller_frame' in stack['location'] for stack in tracker.get_top_stacks())
+    print("✅ Helper calls fingerprinted at their caller; explicit frames honoured")
+
+
+def test_error_tracking_cost_flat():
+    """Tracking cost does not grow with the number of stored errors"""
+    print("🧪 Testing error tracking cost")
+
+    tracker = ErrorTracker()
+    error = ValueError("invalid content chunk")
+
+    def track(count):
+        start = time.perf_counter()
+        for _ in range(count):
+            tracker.track_error('RAG_Processing', error)
+        return (time.perf_counter() - start) / count
+
+    import logging
+    logging.disable(logging.ERROR)
+    try:
+        first = track(2000)
+        for _ in range(5):
+            track(2000)
+        last = track(2000)
+    finally:
+        logging.disable(logging.NOTSET)
+
+    summary_start = time.perf_counter()
+    tracker.get_error_summary(24)
+    summary_time = time.perf_counter() - summary_start
+    assert last < first * 3, (first, last)
+    assert summary_time < 0.5
+    print(f"✅ {first * 1e6:.1f}µs per error at start, {last * 1e6:.1f}µs after 12000; "
+          f"summary in {summary_time * 1000:.1f}ms")
+
+
+def main():
+    """Run bounded telemetry tests"""
+    tests = [
+        test_time_bucketed_log,
+        test_alert_storage_bounded,
+        test_error_stack_deduplication,
+        test_error_tracking_cost_flat,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} bounded telemetry tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
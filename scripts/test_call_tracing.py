@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Test Call Tracing
+Tests span nesting, the trace ring buffer, OTLP export and tracing of an IVR call
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.ivr.ivr_handler import IVRHandler
+from src.ivr.processing_pipeline import ProcessingResult
+from src.utils.call_tracer import CallTracer, call_tracer
+from src.utils.performance_decorators import PipelineTracker
+from pipeline_fakes import isolated_storage
+
+
+def test_span_nesting():
+    """Spans started inside another span on the same thread become its children"""
+    print("🧪 Testing span nesting")
+
+    tracer = CallTracer(max_traces=10)
+    with tracer.activate('session_a'):
+        with tracer.span('background.process_question') as parent:
+            with tracer.span('retrieval', detail_level='simple') as child:
+                pass
+            try:
+                with tracer.span('llm'):
+                    raise RuntimeError("quota exceeded")
+            except RuntimeError:
+                pass
+
+    # Nothing is recorded outside an activated session
+    assert tracer.start_span('orphan') is None
+
+    trace = tracer.get_trace('session_a')
+    spans = {span['name']: span for span in trace['spans']}
+    assert child.parent_id == parent.span_id
+    assert spans['retrieval']['attributes']['detail_level'] == 'simple'
+    assert spans['llm']['success'] is False and spans['llm']['attributes']['error'] == 'quota exceeded'
+    assert spans['background.process_question']['parent_id'] is None
+    print(f"✅ {trace['span_count']} spans recorded with parents and failure status")
+
+
+def test_ring_buffer_and_export():
+    """Old traces are evicted and exported; finished traces are written as OTLP/JSON lines"""
+    print("🧪 Testing trace ring buffer and OTLP export")
+
+    with tempfile.TemporaryDirectory() as directory:
+        export_path = os.path.join(directory, 'traces.otlp.jsonl')
+        tracer = CallTracer(max_traces=2, max_spans_per_trace=3, export_path=export_path)
+
+        for session in ('s1', 's2', 's3'):
+            tracer.record_span('webhook.incoming_call', 100.0, 100.5, session)
+        tracer.annotate('s3', alias='CA123', call_sid='CA123')
+        for _ in range(5):
+            tracer.record_span('webhook.response_delivery', 101.0, 101.1, 's3')
+
+        assert tracer.get_trace('s1') is None
+        assert [trace['session_id'] for trace in tracer.list_traces()] == ['s3', 's2']
+        trace = tracer.get_trace('CA123')
+        assert trace['span_count'] == 3 and trace['dropped_spans'] == 3
+        print("✅ Oldest trace evicted, CallSid alias resolved, span cap enforced")
+
+        tracer.finish_trace('s3')
+        tracer.finish_trace('s3')
+        with open(export_path) as export_file:
+            lines = [json.loads(line) for line in export_file]
+        assert len(lines) == 2  # evicted s1, finished s3
+
+        spans = lines[1]['resourceSpans'][0]['scopeSpans'][0]['spans']
+        assert all(len(span['traceId']) == 32 and len(span['spanId']) == 16 for span in spans)
+        assert spans[0]['startTimeUnixNano'] == str(int(100.0 * 1e9))
+        attributes = {item['key']: item['value'] for item in spans[0]['attributes']}
+        assert attributes['session.id'] == {'stringValue': 's3'}
+        assert attributes['call_sid'] == {'stringValue': 'CA123'}
+        print(f"✅ {len(lines)} traces exported as OTLP/JSON lines")
+
+    disabled = CallTracer(max_traces=0)
+    assert disabled.start_span('webhook.incoming_call', 's1') is None
+
+
+def test_concurrent_reads_and_updates():
+    """Traces can be read and exported while other threads update their spans"""
+    print("🧪 Testing trace reads during span updates")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracer = CallTracer(max_traces=10, export_path=os.path.join(tmp, 'traces.jsonl'))
+        stop = threading.Event()
+
+        def writer(worker):
+            count = 0
+            with tracer.activate('session_busy'):
+                while not stop.is_set():
+                    with tracer.span(f"stage_{worker}"):
+                        tracer.set_span_attributes(**{f"key_{worker}_{count % 50}": count})
+                    count += 1
+
+        writers = [threading.Thread(target=writer, args=(i,)) for i in range(4)]
+        for thread in writers:
+            thread.start()
+        try:
+            deadline = time.time() + 0.5
+            reads = 0
+            while time.time() < deadline:
+                assert tracer.list_traces()[0]['session_id'] == 'session_busy'
+                assert tracer.get_trace('session_busy')['span_count'] > 0
+                reads += 1
+            tracer.finish_trace('session_busy')
+        finally:
+            stop.set()
+            for thread in writers:
+                thread.join()
+        with open(os.path.join(tmp, 'traces.jsonl')) as f:
+            assert json.loads(f.readline())['resourceSpans']
+    print(f"✅ {reads} reads and an export while 4 threads updated span attributes")
+
+
+def test_pipeline_stages_traced():
+    """PipelineTracker stages become child spans of the pipeline span"""
+    print("🧪 Testing pipeline stage spans")
+
+    tracer_session = f"pipeline_{time.time()}"
+    with call_tracer.activate(tracer_session):
+        with PipelineTracker("question_processing", "+910000000000") as tracker:
+            tracker.start_stage("stt_processing")
+            tracker.end_stage("stt_processing", True)
+            tracker.start_stage("tts_processing")
+
+    spans = {span['name']: span for span in call_tracer.get_trace(tracer_session)['spans']}
+    pipeline = spans['question_processing']
+    assert spans['question_processing.stt_processing']['parent_id'] == pipeline['span_id']
+    assert spans['question_processing.stt_processing']['success'] is True
+    assert spans['question_processing.tts_processing']['success'] is False
+    print("✅ Stages nested under pipeline; unfinished stage marked failed")
+
+
+class _FakePipeline:
+    """Processing pipeline double that runs the tracked stages without external services"""
+
+    def __init__(self, config):
+        self.config = config
+
+    def process_question_sync(self, recording_url, language, phone_number, progress_callback=None, deadline=None):
+        with PipelineTracker("question_processing", phone_number) as tracker:
+            for stage in ("audio_download", "stt_processing", "rag_processing", "tts_processing", "audio_upload"):
+                tracker.start_stage(stage)
+                tracker.end_stage(stage, True)
+        return ProcessingResult(success=True, question_text="What is refraction?",
+                                response_text="Bending of light.",
+                                response_audio_url="http://localhost/audio/response.wav")
+
+
+def test_ivr_call_trace():
+    """Webhook hops, queue wait and background stages share one trace per call"""
+    print("🧪 Testing IVR call trace")
+
+    from app import app
+    from src.session.session_manager import session_manager
+
+    with isolated_storage():
+        with mock.patch('src.ivr.ivr_handler.IVRProcessingPipeline', _FakePipeline):
+            handler = IVRHandler(session_manager)
+
+        caller = {'From': '+919999900034', 'CallSid': f"CA{int(time.time() * 1000)}"}
+        handler.handle_incoming_call(caller)
+        handler.handle_question_recording({**caller, 'RecordingUrl': 'https://example.com/q.wav',
+                                           'RecordingDuration': '4'})
+        for _ in range(50):
+            if session_manager.get_session(caller['From']).processing_status == 'ready':
+                break
+            handler.handle_response_delivery(caller)
+            time.sleep(0.05)
+        handler.handle_response_delivery(caller)
+        handler.handle_call_end(caller)
+
+        client = app.test_client()
+        response = client.get(f"/api/traces/{caller['CallSid']}")
+        assert response.status_code == 200
+        trace = response.get_json()
+        names = [span['name'] for span in trace['spans']]
+        for expected in ('webhook.incoming_call', 'webhook.question_recording',
+                         'background.process_question.queue_wait', 'background.process_question',
+                         'pipeline_attempt', 'question_processing.stt_processing',
+                         'webhook.response_delivery', 'webhook.call_end'):
+            assert expected in names, (expected, names)
+        assert trace['finished'] is True
+        assert any(gap['after'] == 'webhook.question_recording' for gap in trace['webhook_gaps'])
+
+        spans = {span['name']: span for span in trace['spans']}
+        assert spans['pipeline_attempt']['parent_id'] == spans['background.process_question']['span_id']
+        assert spans['question_processing']['parent_id'] == spans['pipeline_attempt']['span_id']
+        print(f"✅ {trace['span_count']} spans across {len(trace['webhook_gaps']) + 1} webhook hops")
+
+        otlp = client.get(f"/api/traces/{trace['session_id']}?format=otlp").get_json()
+        assert otlp['resourceSpans'][0]['scopeSpans'][0]['spans'][0]['traceId'] == trace['trace_id']
+        assert client.get('/api/traces/unknown-session').status_code == 404
+        print("✅ Trace served by session ID, CallSid and as OTLP/JSON")
+
+
+def main():
+    """Run call tracing tests"""
+    tests = [
+        test_span_nesting,
+        test_ring_buffer_and_export,
+        test_concurrent_reads_and_updates,
+        test_pipeline_stages_traced,
+        test_ivr_call_trace,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} call tracing tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
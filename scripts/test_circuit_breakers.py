@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Test Circuit Breakers
+Tests per-dependency breaker states, latency tripping and the fast-fail fallbacks
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import openai
+
+from src.audio.audio_processor import AudioProcessingResult
+from src.ivr.processing_pipeline import ProcessingResult
+from src.rag.response_generator import ResponseGenerator, recent_answers
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, circuit_breakers
+from pipeline_fakes import FakeAudioProcessor, fake_pipeline
+from config import Config
+
+
+def test_breaker_states():
+    """Consecutive failures open the breaker; one probe after the timeout closes or re-opens it"""
+    print("🧪 Testing breaker states")
+
+    breaker = CircuitBreaker('google_tts', failure_threshold=3, recovery_timeout=0.05)
+    for _ in range(3):
+        breaker.record_failure(RuntimeError("503 Service Unavailable"))
+    assert breaker.state == 'open' and breaker.is_open and not breaker.allow_request()
+
+    time.sleep(0.06)
+    assert breaker.allow_request() and breaker.state == 'half_open'
+    assert not breaker.allow_request()  # Only one probe at a time
+    breaker.record_failure(RuntimeError("still down"))
+    assert breaker.state == 'open'
+    print("✅ Opened after 3 failures; failed probe re-opened it")
+
+    time.sleep(0.06)
+    assert breaker.allow_request()
+    breaker.record_success(0.3)
+    assert breaker.state == 'closed' and breaker.snapshot()['rejected_calls'] == 2
+    print("✅ Successful probe closed the breaker")
+
+
+def test_latency_tripping():
+    """A dependency that answers slowly opens its breaker without failing"""
+    print("🧪 Testing latency-based tripping")
+
+    breaker = CircuitBreaker('llm:openai', latency_threshold=12.0, window_size=10, min_calls=5)
+    for latency in (2.0, 14.0, 3.0, 15.0):
+        breaker.record_success(latency)
+    assert breaker.state == 'closed'
+    breaker.record_success(16.0)  # 3 of 5 recent calls slower than 12s
+    assert breaker.state == 'open'
+    print(f"✅ Opened with {breaker.snapshot()['slow_calls']} slow calls out of 5")
+
+    guarded = CircuitBreaker('google_stt', failure_threshold=1)
+    try:
+        with guarded.guard(ignore=(ValueError,)):
+            raise ValueError("invalid audio encoding")
+    except ValueError:
+        pass
+    assert guarded.state == 'closed'
+    try:
+        with guarded.guard():
+            raise TimeoutError("deadline exceeded")
+    except TimeoutError:
+        pass
+    try:
+        with guarded.guard():
+            raise AssertionError("block must not run while open")
+    except CircuitOpenError as e:
+        assert e.dependency == 'google_stt'
+    print("✅ Input errors ignored, outages counted, open breaker skips the call")
+
+
+class _FakeOpenAIClient:
+    def __init__(self, **kwargs):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Refraction is the bending of light."))],
+            usage=SimpleNamespace(total_tokens=120, prompt_tokens=90)
+        )
+
+
+def _context(question):
+    return {
+        'question': question, 'language': 'English', 'detail_level': 'simple',
+        'search_results': {'found_relevant_content': True, 'source_chunks': []},
+        'context_quality': {'score': 0.8}, 'formatted_context': 'Light bends when it changes medium.'
+    }
+
+
+def test_llm_open_serves_cached_answer():
+    """With the LLM circuit open, a recent answer is served and other questions fail fast"""
+    print("🧪 Testing LLM fallback while open")
+
+    with mock.patch.object(openai, 'OpenAI', _FakeOpenAIClient), \
+            mock.patch.object(Config, 'USE_GEMINI', False):
+        generator = ResponseGenerator(Config())
+    try:
+        first = generator.generate_response(_context("What is refraction?"))
+        assert first['success'] and generator.openai_client.calls == 1
+
+        for _ in range(generator.circuit_breaker.failure_threshold):
+            generator.circuit_breaker.record_failure(openai.APITimeoutError(request=None))
+
+        cached = generator.generate_response(_context("what is  REFRACTION?"))
+        assert cached['served_from_cache'] and cached['response_text'] == first['response_text']
+        assert cached['tokens_used'] == 0 and cached['cached_tokens'] == 0
+
+        # Answers are shared by every generator in the process
+        with mock.patch.object(openai, 'OpenAI', _FakeOpenAIClient), \
+                mock.patch.object(Config, 'USE_GEMINI', False):
+            other = ResponseGenerator(Config())
+        assert other.generate_response(_context("What is refraction?"))['served_from_cache']
+
+        started = time.perf_counter()
+        fallback = generator.generate_response(_context("What is a concave mirror?"))
+        assert not fallback['success'] and fallback['circuit_open']
+        assert time.perf_counter() - started < 0.1  # No retries or backoff sleeps
+        assert generator.openai_client.calls == 1
+        print("✅ Cached answer served; uncached question got the fallback immediately")
+    finally:
+        circuit_breakers.reset()
+        recent_answers.clear()
+
+
+def test_tts_open_delivers_text():
+    """With TTS open the pipeline succeeds with a text answer for <Say> and does not retry"""
+    print("🧪 Testing TTS fallback while open")
+
+    pipeline = fake_pipeline(audio_processor=FakeAudioProcessor(tts_result=AudioProcessingResult(
+        success=False, error_message="google_tts unavailable (circuit open)", circuit_open=True
+    )))
+    try:
+        result = pipeline.process_question_sync('https://example.com/question.wav', 'english', '+919999900039')
+    finally:
+        pipeline.cleanup()
+
+    assert result.success and result.response_audio_url == ""
+    assert result.response_text == "Light bends when it changes medium."
+    assert pipeline.audio_processor.tts_calls == 1
+    print("✅ Text answer returned after a single fast-failed TTS call")
+
+    from src.ivr.ivr_handler import IVRHandler
+    handler = IVRHandler.__new__(IVRHandler)
+    xml = handler._generate_audio_error_xml('english', result.response_text)
+    assert '<Say' in xml and result.response_text in xml
+    print("✅ Answer read to the caller with <Say>")
+
+
+class _UnavailablePipeline:
+    def __init__(self, config):
+        self.calls = 0
+
+    def process_question_sync(self, recording_url, language, phone_number, progress_callback=None, deadline=None):
+        self.calls += 1
+        return ProcessingResult(success=False, error_message="STT unavailable",
+                                unavailable_dependency='google_stt')
+
+
+def test_open_circuit_not_retried():
+    """The IVR background worker does not retry a question that failed on an open circuit"""
+    print("🧪 Testing no pipeline retry on open circuit")
+
+    from src.ivr.ivr_handler import IVRHandler
+    from src.session.session_manager import session_manager
+
+    with mock.patch('src.ivr.ivr_handler.IVRProcessingPipeline', _UnavailablePipeline):
+        handler = IVRHandler(session_manager)
+
+    phone_number = '+919999900139'
+    session_manager.create_session(phone_number)
+    started = time.perf_counter()
+    handler._process_question_background_with_error_handling(phone_number, 'https://example.com/q.wav', 'english')
+    assert handler.processing_pipeline.calls == 1
+    assert time.perf_counter() - started < 0.5
+    assert session_manager.get_session(phone_number).processing_status == 'error'
+    print("✅ Failed once, no retry sleep, caller answered with the error message")
+
+
+def main():
+    """Run circuit breaker tests"""
+    tests = [
+        test_breaker_states,
+        test_latency_tripping,
+        test_llm_open_serves_cached_answer,
+        test_tts_open_delivers_text,
+        test_open_circuit_not_retried,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} circuit breaker tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
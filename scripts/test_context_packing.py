@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Test Context Packing
+Tests token-budgeted packing of retrieved chunks: overlap removal, boilerplate filtering and budgets
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.content.content_processor import ContentChunk
+from src.rag.context_builder import ContextBuilder
+from src.rag.context_packer import ContextPacker
+from src.rag.semantic_search import SemanticSearchEngine
+from src.utils import token_counter
+from src.utils.token_counter import count_tokens, load_tokenizer
+from config import Config
+
+
+def _section_text(topic, sentences=50):
+    return ' '.join(f"Sentence {i} explains how {topic} number {i} behaves at the surface of the glass slab."
+                    for i in range(sentences))
+
+
+def _chunks(section, text, chunk_size=300, overlap=50):
+    """Split text the way the content processor does"""
+    words = text.split()
+    pieces, start = [], 0
+    while start < len(words):
+        end = min(start + chunk_size, len(words))
+        pieces.append(' '.join(words[start:end]))
+        if end == len(words):
+            break
+        start = end - overlap
+    return [
+        ContentChunk(id=f"{section}-{i}", chapter_name="Light - Reflection and Refraction", section_name=section,
+                     content_text=piece, subject="Physics", grade=10, language="English",
+                     word_count=len(piece.split()), chunk_index=i, total_chunks=len(pieces), metadata={})
+        for i, piece in enumerate(pieces)
+    ]
+
+
+def test_overlap_removed():
+    """Neighbouring chunks are joined without repeating the words they share"""
+    print("🧪 Testing overlap removal")
+
+    text = _section_text("light ray")
+    chunks = _chunks("10.3 Refraction of Light", text)
+    assert len(chunks) == 3
+    results = [(chunks[1], 0.9), (chunks[0], 0.8), (chunks[2], 0.7), (chunks[1], 0.6)]
+
+    packed = ContextPacker(overlap_words=50).pack(results, token_budget=5000)
+    assert packed['context_text'] == f"[10.3 Refraction of Light]\n{text}"
+    assert len(packed['source_chunks']) == 3 and packed['dropped']['duplicate'] == 1
+    naive_tokens = count_tokens('\n\n'.join(chunk.content_text for chunk, _ in results))
+    print(f"✅ 4 overlapping chunks packed as one passage: {packed['total_tokens']} tokens instead of {naive_tokens}")
+
+
+def test_boilerplate_dropped():
+    """Exercise sections and print footers are not sent to the model"""
+    print("🧪 Testing boilerplate removal")
+
+    explanation = _chunks("10.2 Spherical Mirrors", "A concave mirror curves inwards. Reprint 2024-25 " +
+                          _section_text("mirror", 5))[0]
+    exercises = _chunks("Exercises", "1. Define the principal focus of a concave mirror. " * 10)[0]
+    packed = ContextPacker().pack([(exercises, 0.95), (explanation, 0.8)], token_budget=1000)
+    assert packed['dropped']['boilerplate'] == 1
+    assert [source['section'] for source in packed['source_chunks']] == ["10.2 Spherical Mirrors"]
+    assert 'Reprint' not in packed['context_text'] and 'Define the principal focus' not in packed['context_text']
+    print("✅ Exercise section and reprint footer dropped")
+
+
+def test_token_budget():
+    """Content is packed by relevance within the budget, trimming the last chunk to whole sentences"""
+    print("🧪 Testing token budgets")
+
+    refraction = _chunks("10.3 Refraction of Light", _section_text("light ray"))
+    mirrors = _chunks("10.2 Spherical Mirrors", _section_text("mirror"))
+    results = [(mirrors[0], 0.9), (refraction[0], 0.8), (refraction[1], 0.7)]
+    packer = ContextPacker()
+
+    for budget in (120, 500, 900):
+        packed = packer.pack(results, token_budget=budget)
+        assert packed['total_tokens'] <= budget, (budget, packed['total_tokens'])
+        assert packed['source_chunks'][0]['section'] == "10.2 Spherical Mirrors"
+        assert packed['context_text'].endswith('.')
+        print(f"✅ Budget {budget}: {packed['total_tokens']} tokens from {len(packed['source_chunks'])} chunks")
+
+    assert packer.pack(results, token_budget=20)['source_chunks'] == []
+    print("✅ A budget too small for one sentence packs nothing")
+
+
+class _FakeSearchEngine(SemanticSearchEngine):
+    """Search engine returning fixed results without a knowledge base"""
+
+    def __init__(self, config, results):
+        self.context_packer = ContextPacker(config.CONTENT_OVERLAP)
+        self.results = results
+
+    def search(self, question, subject_filter=None, top_k=None, min_similarity=None):
+        return self.results
+
+
+def test_prompt_context_per_detail_level():
+    """Simple answers get a smaller context than detailed ones, without source or score listings"""
+    print("🧪 Testing prompt context per detail level")
+
+    config = Config()
+    chunks = _chunks("10.3 Refraction of Light", _section_text("light ray", 60))
+    builder = ContextBuilder.__new__(ContextBuilder)
+    builder.config = config
+    builder.token_budgets = {'simple': config.CONTEXT_TOKEN_BUDGET_SIMPLE,
+                             'detailed': config.CONTEXT_TOKEN_BUDGET_DETAILED}
+    builder.search_engine = _FakeSearchEngine(config, [(chunk, 0.8) for chunk in chunks])
+
+    simple = builder.build_context("What is refraction?", detail_level="simple")
+    detailed = builder.build_context("What is refraction?", detail_level="detailed")
+    simple_tokens = count_tokens(simple['formatted_context'])
+    detailed_tokens = count_tokens(detailed['formatted_context'])
+    assert simple['search_results']['total_tokens'] <= config.CONTEXT_TOKEN_BUDGET_SIMPLE
+    assert detailed['search_results']['total_tokens'] <= config.CONTEXT_TOKEN_BUDGET_DETAILED
+    assert simple_tokens < detailed_tokens
+    assert 'SOURCES' not in detailed['formatted_context'] and 'confidence' not in detailed['formatted_context'].lower()
+    assert simple['context_quality']['score'] >= 0.6
+    print(f"✅ Prompt context: {simple_tokens} tokens simple, {detailed_tokens} tokens detailed")
+
+
+def test_tokenizer_loaded_at_startup():
+    """The tokenizer is fetched once by load_tokenizer, not while counting prompts"""
+    print("🧪 Testing tokenizer loading")
+
+    fake_tiktoken = mock.Mock()
+    fake_tiktoken.get_encoding.return_value = SimpleNamespace(encode=lambda text, disallowed_special: text.split())
+    with mock.patch.object(token_counter, 'TIKTOKEN_AVAILABLE', True), \
+            mock.patch.object(token_counter, 'tiktoken', fake_tiktoken):
+        assert load_tokenizer('test_encoding')
+        assert count_tokens("light bends at the surface", encoding='test_encoding') == 5
+        fake_tiktoken.get_encoding.assert_called_once_with('test_encoding')
+
+        fake_tiktoken.get_encoding.side_effect = OSError("download failed")
+        assert not load_tokenizer('missing_encoding')
+        assert count_tokens("light bends", encoding='missing_encoding') == 3  # Estimated from characters
+    token_counter._encoding.cache_clear()
+    print("✅ Encoding fetched once at load; failures fall back to estimates")
+
+
+def main():
+    """Run context packing tests"""
+    tests = [
+        test_overlap_removed,
+        test_boilerplate_dropped,
+        test_token_budget,
+        test_prompt_context_per_detail_level,
+        test_tokenizer_loaded_at_startup,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} context packing tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Test Deadline Propagation
+Tests per-question deadlines bounding timeouts and retries, and cancellation of abandoned questions
+"""
+
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import openai
+
+from src.ivr.ivr_handler import IVRHandler
+from src.ivr.processing_pipeline import IVRProcessingPipeline, ProcessingResult
+from src.rag.response_generator import ResponseGenerator
+from src.utils.circuit_breaker import circuit_breakers
+from src.utils.deadline import Deadline, DeadlineExceeded, current_deadline
+from pipeline_fakes import fake_pipeline, isolated_storage
+from config import Config
+
+
+def test_deadline_budget():
+    """Timeouts shrink with the remaining budget; retries that cannot finish are skipped"""
+    print("🧪 Testing deadline budget")
+
+    deadline = Deadline(2.0)
+    assert deadline.timeout(15) <= 2.0 and deadline.timeout(0.5) == 0.5
+    assert not deadline.wait_for_retry(1.0, min_attempt=1.5)  # 2.5s needed, returns without sleeping
+    assert current_deadline().remaining() == float('inf')
+    with deadline.leaving(1.5).activate() as stage_deadline:
+        assert current_deadline() is stage_deadline and stage_deadline.remaining() <= 0.5
+    print("✅ 15s timeout cut to the 2s budget; stage leaves 1.5s for later stages")
+
+    deadline = Deadline(10.0)
+    child = deadline.leaving(0.0)
+    threading.Timer(0.05, deadline.cancel, args=("call ended",)).start()
+    started = time.perf_counter()
+    assert not child.wait_for_retry(0.5, min_attempt=0.1)
+    assert time.perf_counter() - started < 0.4 and child.expired
+    try:
+        child.check("tts_processing")
+        raise AssertionError("cancelled deadline must stop the next stage")
+    except DeadlineExceeded as e:
+        assert e.stage == "tts_processing" and e.reason == "call ended"
+    print("✅ Cancelling the question wakes a retry backoff and stops the next stage")
+
+
+class _TimingOutClient:
+    def __init__(self, **kwargs):
+        self.timeouts = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.timeouts.append(kwargs['timeout'])
+        raise openai.APITimeoutError(request=None)
+
+
+def test_llm_retries_bounded():
+    """LLM calls take their timeout from the deadline and skip retries that cannot finish"""
+    print("🧪 Testing LLM timeout and retries under a deadline")
+
+    with mock.patch.object(openai, 'OpenAI', _TimingOutClient), \
+            mock.patch.object(Config, 'USE_GEMINI', False):
+        generator = ResponseGenerator(Config())
+    context = {
+        'question': "What is refraction?", 'language': 'English', 'detail_level': 'simple',
+        'search_results': {'found_relevant_content': True, 'source_chunks': []},
+        'context_quality': {'score': 0.8}, 'formatted_context': 'Light bends when it changes medium.'
+    }
+    try:
+        started = time.perf_counter()
+        with Deadline(1.5).activate():
+            result = generator.generate_response(context)
+        elapsed = time.perf_counter() - started
+    finally:
+        circuit_breakers.reset()
+
+    assert not result['success']
+    assert len(generator.openai_client.timeouts) == 1 and generator.openai_client.timeouts[0] <= 1.5
+    assert elapsed < 0.5, elapsed
+    print(f"✅ One attempt with a {generator.openai_client.timeouts[0]:.1f}s timeout; "
+          f"no retry sleeps ({elapsed * 1000:.0f}ms)")
+
+
+def test_pipeline_stages_bounded():
+    """Generation leaves time for TTS; optional work is skipped when the budget is short"""
+    print("🧪 Testing pipeline stage budgets")
+
+    pipeline = fake_pipeline()
+    try:
+        with mock.patch.object(pipeline, '_upload_audio_for_ivr', return_value='http://localhost/audio/r.wav'):
+            result = pipeline.process_question_sync('https://example.com/q.wav', 'english', '+919999900040',
+                                                    deadline=Deadline(4.0))
+            assert result.success and result.detailed_response_text == result.response_text
+            budgets = pipeline.response_generator.budgets
+            assert len(budgets) == 1 and budgets[0] <= 4.0 - IVRProcessingPipeline.TTS_RESERVE
+            print(f"✅ Answer generated with {budgets[0]:.1f}s of a 4s budget; detailed answer skipped")
+
+            unbounded = pipeline.process_question_sync('https://example.com/q.wav', 'english', '+919999900040')
+            assert unbounded.success and len(budgets) == 3
+            print("✅ Without a deadline the detailed answer is still generated")
+    finally:
+        pipeline.cleanup()
+
+
+def test_cancelled_question_abandoned():
+    """A question cancelled mid-pipeline stops before the next stage"""
+    print("🧪 Testing cancellation between stages")
+
+    pipeline = fake_pipeline()
+    deadline = Deadline(15.0)
+    pipeline.audio_processor.on_stt = lambda: deadline.cancel("call ended")
+    try:
+        result = pipeline.process_question_sync('https://example.com/q.wav', 'english', '+919999900041',
+                                                deadline=deadline)
+    finally:
+        pipeline.cleanup()
+
+    assert not result.success and result.deadline_exceeded
+    assert pipeline.response_generator.budgets == []
+    print(f"✅ Abandoned after STT: {result.error_message}")
+
+
+class _SlowPipeline:
+    """Pipeline double that works until its question is cancelled"""
+
+    def __init__(self, config):
+        self.cancelled_after = None
+
+    def process_question_sync(self, recording_url, language, phone_number, progress_callback=None, deadline=None):
+        started = time.perf_counter()
+        while not deadline.cancelled and time.perf_counter() - started < 5.0:
+            time.sleep(0.01)
+        self.cancelled_after = time.perf_counter() - started
+        return ProcessingResult(success=True, question_text="What is refraction?",
+                                response_text="Bending of light.",
+                                response_audio_url="http://localhost/audio/late.wav")
+
+
+def test_timed_out_caller_cancels_work():
+    """Once the caller is told the question timed out, its background work stops and is discarded"""
+    print("🧪 Testing cancellation on caller timeout")
+
+    from src.session.session_manager import session_manager
+
+    with isolated_storage():
+        with mock.patch('src.ivr.ivr_handler.IVRProcessingPipeline', _SlowPipeline):
+            handler = IVRHandler(session_manager)
+        handler.config.QUESTION_DEADLINE = 0.2
+
+        caller = {'From': '+919999900042', 'CallSid': f"CA{int(time.time() * 1000)}"}
+        handler.handle_incoming_call(caller)
+        handler.handle_question_recording({**caller, 'RecordingUrl': 'https://example.com/q.wav',
+                                           'RecordingDuration': '4'})
+        assert b'<Redirect' in handler.handle_response_delivery(caller).data  # Still within the deadline
+        time.sleep(0.3)
+        handler.handle_response_delivery(caller)  # Deadline passed: caller gets the timeout message
+        assert handler.question_deadlines == {}
+
+        for _ in range(50):
+            if handler.processing_pipeline.cancelled_after is not None:
+                break
+            time.sleep(0.02)
+        time.sleep(0.05)
+        assert handler.processing_pipeline.cancelled_after < 1.0
+        assert session_manager.get_session(caller['From']).processing_status == 'error'
+        assert session_manager.get_current_response_data(caller['From']) is None
+        handler.handle_call_end(caller)
+        print(f"✅ Work cancelled {handler.processing_pipeline.cancelled_after:.2f}s in; late answer discarded")
+
+
+def main():
+    """Run deadline propagation tests"""
+    tests = [
+        test_deadline_budget,
+        test_llm_retries_bounded,
+        test_pipeline_stages_bounded,
+        test_cancelled_question_abandoned,
+        test_timed_out_caller_cancels_work,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} deadline propagation tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Test FAQ Matcher
+Tests lexical matching of reworded questions against demo and answer-bank questions
+"""
+
+import os
+import sys
+import time
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.rag.answer_bank import BankedAnswer
+from src.session.session_manager import SessionManager
+from src.utils.faq_matcher import FAQMatcher, faq_matcher, normalize_text
+
+
+def _demo_matcher():
+    matcher = FAQMatcher(threshold=0.8)
+    for question, answer in SessionManager().get_demo_qa_pairs():
+        matcher.add(question, answer, 'demo')
+    return matcher
+
+
+def test_normalization():
+    """Punctuation, stopwords, plurals and Telugu script variants are normalized away; question words are kept"""
+    print("🧪 Testing question normalization")
+
+    assert normalize_text("What is the Reflection of light?!") == ['reflection', 'light']
+    assert normalize_text("How do electric motors work") == ['how', 'electric', 'motor', 'work']
+    assert normalize_text("Explain Ohm's law") == ['ohm', 'law']
+    assert normalize_text("What is a concave lens?") == ['concave', 'lens']
+    assert normalize_text("కాంతి‌ పరావర్తనం అంటే ఏమిటి?") == ['కాంతి', 'పరావర్తనం']
+    assert normalize_text("కాంతి పరావర్తనం ఎలా జరుగుతుంది") == ['కాంతి', 'పరావర్తనం', 'ఎలా', 'జరుగుతుంది']
+    assert normalize_text("౧౦వ తరగతి") == normalize_text("10వ తరగతి")
+    print("✅ Normalized English and Telugu questions to content words")
+
+
+def test_reworded_questions():
+    """Transcripts worded differently from a stored question match it; different questions do not"""
+    print("🧪 Testing reworded question matching")
+
+    matcher = _demo_matcher()
+    match = matcher.match("what is the reflection of light")
+    assert match.question == "What is reflection of light?" and match.score == 1.0
+    assert matcher.match("how do the electric motors work").question == "How do electric motors work?"
+    assert matcher.match("what is reflection of light rays").score >= matcher.threshold
+
+    # Look-alike terms and unrelated questions are not matched
+    assert matcher.match("What is refraction of light").question == "What is refraction of light?"
+    assert matcher.match("What is a concave lens?") is None
+    assert matcher.match("Explain reflection of light").question == "What is reflection of light?"
+
+    # Questions about the same topic asking something else are not matched
+    assert matcher.match("How is reflection of light useful") is None
+    assert matcher.match("When does refraction of light happen") is None
+    assert matcher.match("Random question that should not be cached") is None
+    assert matcher.match("the of is?") is None
+
+    questions = ["what is the reflection of light", "explain ohms law", "What is a concave lens?"] * 200
+    started = time.perf_counter()
+    for question in questions:
+        matcher.match(question)
+    per_lookup = (time.perf_counter() - started) / len(questions)
+    assert per_lookup < 0.002, per_lookup
+    print(f"✅ Reworded questions matched, look-alikes rejected; {per_lookup * 1e6:.0f}µs per lookup")
+
+
+def test_languages_and_sources():
+    """Matches respect language and source, and a source's questions can be replaced"""
+    print("🧪 Testing languages and sources")
+
+    matcher = _demo_matcher()
+    banked = BankedAnswer("కాంతి పరావర్తనం అంటే ఏమిటి?", 'telugu', 'Light', '10.2', 'సరళ సమాధానం', 'వివరమైన సమాధానం')
+    matcher.replace_source('answer_bank', [(banked.question, banked, banked.language)])
+
+    match = matcher.match("కాంతి  పరావర్తనం ఏమిటి", 'Telugu')
+    assert match.source == 'answer_bank' and match.answer is banked
+    assert match.answer_text == 'సరళ సమాధానం' and match.detailed_text == 'వివరమైన సమాధానం'
+    assert matcher.match("కాంతి పరావర్తనం", 'english') is None
+    assert matcher.match("what is reflection of light", 'english', source='answer_bank') is None
+
+    demo = matcher.match("what is reflection of light", 'english')
+    assert demo.source == 'demo' and demo.answer_text == demo.detailed_text == demo.answer
+
+    matcher.replace_source('answer_bank', [])
+    assert matcher.match("కాంతి పరావర్తనం ఏమిటి") is None
+    assert matcher.get_status()['by_source'] == {'demo': 20}
+    print("✅ Telugu banked question matched in Telugu only; replaced sources drop their questions")
+
+
+def test_endpoints_check_matcher_first():
+    """The demo and text answer endpoints answer matched questions without RAG"""
+    print("🧪 Testing endpoints use the matcher")
+
+    from app import app
+    client = app.test_client()
+
+    response = client.post('/api/demo/response', json={'question': "what is the reflection of light"})
+    body = response.get_json()
+    assert body['cached'] and body['matched_question'] == "What is reflection of light?"
+    assert body['source'] == 'demo' and body['response'].startswith("Reflection of light")
+
+    with mock.patch('src.rag.context_builder.ContextBuilder', side_effect=AssertionError("RAG used")):
+        response = client.post('/api/answer-question', json={'question': "How do plants make food",
+                                                             'language': 'english'})
+    body = response.get_json()
+    assert response.status_code == 200 and body['method'] == 'faq', body
+    assert body['matched_question'] == "How do plants make their food?"
+    assert faq_matcher.get_status()['by_source'].get('demo') == 20
+    print(f"✅ Both endpoints answered from the matcher (score {body['match_score']})")
+
+
+def main():
+    """Run FAQ matcher tests"""
+    tests = [
+        test_normalization,
+        test_reworded_questions,
+        test_languages_and_sources,
+        test_endpoints_check_matcher_first,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} FAQ matcher tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Test Hybrid Retrieval
+Tests the BM25 lexical index, its fusion with vector search and the lexical-only fallback
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.content.content_processor import ContentChunk
+from src.content.knowledge_base import NCERTKnowledgeBase
+from src.content.lexical_index import BM25Index, reciprocal_rank_fusion
+from src.content.vector_database import OPENAI_EMBEDDING_MODEL, FAISSVectorDatabase, SemanticSearchEngine
+from config import Config
+
+TEXTS = [
+    ('10.1 Reflection of Light', "Light bounces back from a polished surface such as a mirror. This is reflection."),
+    ('10.2 Spherical Mirrors', "A concave mirror curves inwards and converges light rays to its principal focus."),
+    ('10.3 Refraction of Light', "Light bends when it travels obliquely from air into water or glass. This is refraction."),
+    ('10.4 Refraction by Lenses', "A convex lens converges light rays; a concave lens diverges them."),
+    ('11.1 The Human Eye', "The eye lens forms an image on the retina. The ciliary muscles change its focal length."),
+    ('12.1 Electric Current', "Electric current is the rate of flow of charge through a conductor, measured in amperes."),
+]
+
+
+def _one_hot(position, dimension=1536):
+    vector = np.zeros(dimension)
+    vector[position] = 1.0
+    return vector
+
+
+def _chunks():
+    return [
+        ContentChunk(id=f"c{i}", chapter_name=section.split()[0], section_name=section, content_text=text,
+                     subject='Physics', grade=10, language='english', word_count=len(text.split()),
+                     chunk_index=i, total_chunks=len(TEXTS), metadata={}, embedding=_one_hot(i))
+        for i, (section, text) in enumerate(TEXTS)
+    ]
+
+
+def _knowledge_base(embed):
+    """Knowledge base over the test chunks (not saved) with a fake embeddings API"""
+    config = Config()
+    knowledge_base = NCERTKnowledgeBase.__new__(NCERTKnowledgeBase)
+    knowledge_base.config = config
+    knowledge_base.embedding_model = OPENAI_EMBEDDING_MODEL
+    knowledge_base.openai_client = SimpleNamespace(embeddings=SimpleNamespace(create=embed))
+    knowledge_base.search_engine = SemanticSearchEngine.__new__(SemanticSearchEngine)
+    knowledge_base.search_engine.config = config
+    knowledge_base.search_engine.vector_db = FAISSVectorDatabase(config)
+    knowledge_base.search_engine.vector_db.add_chunks(_chunks())
+    knowledge_base.query_cache = {}
+    knowledge_base.cache_max_size = 100
+    return knowledge_base
+
+
+def test_bm25_index():
+    """BM25 ranks chunks by shared words; fusion favours ids ranked well by both lists"""
+    print("🧪 Testing BM25 index and rank fusion")
+
+    index = BM25Index()
+    index.build([{'section_name': section, 'content_text': text} for section, text in TEXTS])
+    assert len(index) == len(TEXTS)
+
+    results = index.search("How does light bend in water?", top_k=3)
+    assert results[0][0] == 2 and 0 < results[0][1] <= 1.0, results
+    assert index.search("What is electric current?")[0] == (5, 1.0)
+    assert index.search("What is it?") == [] and index.search("photosynthesis") == []
+
+    assert reciprocal_rank_fusion([['a', 'b', 'c', 'd'], ['d', 'b']]) == ['b', 'd', 'a', 'c']
+    assert reciprocal_rank_fusion([['a', 'b'], []], limit=1) == ['a']
+    print("✅ Refraction question found the refraction chunk; fusion ranks shared ids first")
+
+
+def test_unusable_embeddings_match_nothing():
+    """Zero vectors and vectors of another size return no vector results instead of failing"""
+    print("🧪 Testing unusable query embeddings")
+
+    database = FAISSVectorDatabase(Config())
+    database.add_chunks(_chunks())
+    assert database.search(_one_hot(2))[0][0].id == 'c2'
+    assert database.search(np.zeros(1536)) == []
+    assert database.search(_one_hot(2, dimension=768)) == []
+    assert database.lexical_search("concave mirror focus", top_k=1)[0][0].section_name == '10.2 Spherical Mirrors'
+
+    database.clear_database()
+    assert database.lexical_search("concave mirror") == []
+    print("✅ Zero and 768-dimension embeddings return nothing; lexical index follows the chunks")
+
+
+def test_lexical_fallback():
+    """Failed or slow embeddings fall back to lexical search, quickly and without caching"""
+    print("🧪 Testing lexical-only fallback")
+
+    timeouts = []
+
+    def failing_embed(**kwargs):
+        timeouts.append(kwargs['timeout'])
+        raise TimeoutError("Request timed out")
+
+    knowledge_base = _knowledge_base(failing_embed)
+    assert knowledge_base.generate_query_embedding("Why does light bend in water?") is None
+    assert timeouts[0] <= knowledge_base.config.EMBEDDING_TIMEOUT
+
+    results = knowledge_base.search_relevant_content("Why does light bend in water?", top_k=2)
+    assert results[0][0].id == 'c2' and results[0][1] >= 0.5, results
+    assert knowledge_base.query_cache == {}
+
+    # Gemini reports failures as 768-dimension zero vectors
+    gemini = _knowledge_base(lambda **kwargs: SimpleNamespace(data=[SimpleNamespace(embedding=[0.0] * 768)]))
+    assert gemini.generate_query_embedding("What is a concave lens?") is None
+    assert gemini.search_relevant_content("What is a concave lens?")[0][0].id == 'c3'
+
+    vector_db = knowledge_base.search_engine.vector_db
+    questions = ["Why does light bend in water?", "What does the eye lens do?", "What is electric current?"] * 100
+    started = time.perf_counter()
+    for question in questions:
+        vector_db.lexical_index.search(question, top_k=6)
+    per_search = (time.perf_counter() - started) / len(questions)
+    assert per_search < 0.001, per_search
+    print(f"✅ Lexical results without embeddings; {per_search * 1e6:.0f}µs per lexical search")
+
+
+def test_hybrid_fusion():
+    """With embeddings, vector and lexical results are fused and vector scores kept"""
+    print("🧪 Testing hybrid retrieval")
+
+    # The embedding points at the human eye chunk; the words point at lenses
+    knowledge_base = _knowledge_base(
+        lambda **kwargs: SimpleNamespace(data=[SimpleNamespace(embedding=list(_one_hot(4)))])
+    )
+    results = knowledge_base.search_relevant_content("How does a convex lens converge rays?", top_k=3)
+    ids = [chunk.id for chunk, _ in results]
+    assert ids[0] in ('c3', 'c4') and {'c3', 'c4'} <= set(ids), ids
+    assert dict((chunk.id, score) for chunk, score in results)['c4'] == 1.0
+    assert len(knowledge_base.query_cache) == 1
+
+    only_vector = knowledge_base.search_engine.search_content(_one_hot(4), top_k=3)
+    assert [chunk.id for chunk, _ in only_vector] == ['c4']
+    print(f"✅ Fused ranking {ids} keeps the lexical match the embedding missed")
+
+
+def main():
+    """Run hybrid retrieval tests"""
+    tests = [
+        test_bm25_index,
+        test_unusable_embeddings_match_nothing,
+        test_lexical_fallback,
+        test_hybrid_fusion,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} hybrid retrieval tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
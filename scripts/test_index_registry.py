@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Test Index Registry
+Tests per-model vector indexes with manifests, query routing and background index builds
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from types import SimpleNamespace
+from unittest import mock
+
+import faiss
+import numpy as np
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.content.content_processor import ContentChunk
+from src.content.knowledge_base import NCERTKnowledgeBase
+from src.content.vector_database import (
+    GEMINI_EMBEDDING_MODEL, OPENAI_EMBEDDING_MODEL, EmbeddingModel, FAISSVectorDatabase, IndexRegistry,
+    SemanticSearchEngine, active_embedding_model, index_version
+)
+from config import Config
+
+TEXTS = [
+    ('10.1 Reflection of Light', "Light bounces back from a polished surface such as a mirror."),
+    ('10.2 Spherical Mirrors', "A concave mirror converges light rays to its principal focus."),
+    ('10.3 Refraction of Light', "Light bends when it travels obliquely from air into water."),
+    ('12.1 Electric Current', "Electric current is the rate of flow of charge through a conductor."),
+]
+
+
+def _one_hot(position, dimension):
+    vector = np.zeros(dimension)
+    vector[position] = 1.0
+    return vector
+
+
+def _save_openai_database(db_dir):
+    """Save the test chunks with OpenAI-sized vectors, as the content processor would"""
+    database = FAISSVectorDatabase(Config(), OPENAI_EMBEDDING_MODEL, db_dir)
+    database.add_chunks([
+        ContentChunk(id=f"c{i}", chapter_name='Light', section_name=section, content_text=text, subject='Physics',
+                     grade=10, language='english', word_count=len(text.split()), chunk_index=i,
+                     total_chunks=len(TEXTS), metadata={}, embedding=_one_hot(i, 1536))
+        for i, (section, text) in enumerate(TEXTS)
+    ])
+    database.save_database()
+    return database
+
+
+def _gemini_embed(text):
+    """768-dimension embedding pointing at the chunk whose section words appear in the text"""
+    for position, (_, chunk_text) in enumerate(TEXTS):
+        if text == chunk_text or text.split()[-1].rstrip('?') in chunk_text:
+            return _one_hot(position, 768)
+    return _one_hot(100, 768)
+
+
+def test_manifest_per_model():
+    """Each model's vectors are saved with a manifest and only loaded by that model"""
+    print("🧪 Testing per-model index manifests")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _save_openai_database(tmp)
+        with open(os.path.join(tmp, 'indexes', 'text-embedding-3-small', 'manifest.json')) as f:
+            manifest = json.load(f)
+        assert manifest['model'] == 'text-embedding-3-small' and manifest['dimension'] == 1536
+        assert manifest['chunks'] == 4 and manifest['index_version'] == index_version(tmp)
+
+        openai_db = FAISSVectorDatabase(Config(), OPENAI_EMBEDDING_MODEL, tmp)
+        assert openai_db.load_database() and openai_db.has_vectors
+
+        # Another model shares the chunks (and lexical search) but has no vectors yet
+        gemini_db = FAISSVectorDatabase(Config(), GEMINI_EMBEDDING_MODEL, tmp)
+        assert not gemini_db.load_database() and not gemini_db.has_vectors
+        assert gemini_db.get_database_stats()['total_chunks'] == 4
+        assert gemini_db.lexical_search("concave mirror")[0][0].id == 'c1'
+
+        # A manifest naming another model with the same dimension is not trusted
+        impostor = EmbeddingModel('other-embedding-model', 1536)
+        os.rename(os.path.join(tmp, 'indexes', 'text-embedding-3-small'), os.path.join(tmp, 'indexes', impostor.name))
+        assert not FAISSVectorDatabase(Config(), impostor, tmp).load_database()
+        os.rename(os.path.join(tmp, 'indexes', impostor.name), os.path.join(tmp, 'indexes', 'text-embedding-3-small'))
+
+        # Vectors built from older chunk metadata are not loaded
+        with open(os.path.join(tmp, 'chunk_metadata.json'), 'a', encoding='utf-8') as f:
+            f.write('\n')
+        stale = FAISSVectorDatabase(Config(), OPENAI_EMBEDDING_MODEL, tmp)
+        assert not stale.load_database() and len(stale.chunk_metadata) == 4
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Index saved before per-model indexes: accepted only by a model of its dimension
+        _save_openai_database(tmp)
+        os.rename(os.path.join(tmp, 'indexes', 'text-embedding-3-small', 'faiss_index.bin'),
+                  os.path.join(tmp, 'faiss_index.bin'))
+        os.remove(os.path.join(tmp, 'indexes', 'text-embedding-3-small', 'manifest.json'))
+        assert FAISSVectorDatabase(Config(), OPENAI_EMBEDDING_MODEL, tmp).load_database()
+        assert not FAISSVectorDatabase(Config(), GEMINI_EMBEDDING_MODEL, tmp).load_database()
+    print("✅ Manifest records model, dimension and chunk version; mismatched vectors are left out")
+
+
+def test_background_build():
+    """A missing index is built once in the background and saved for the next start"""
+    print("🧪 Testing background index builds")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _save_openai_database(tmp)
+        registry = IndexRegistry(Config(), tmp)
+        release = threading.Event()
+        embedded = []
+
+        def slow_embed(text):
+            release.wait(5)
+            embedded.append(text)
+            return _gemini_embed(text)
+
+        assert registry.build_in_background(GEMINI_EMBEDDING_MODEL, slow_embed)
+        assert not registry.build_in_background(GEMINI_EMBEDDING_MODEL, slow_embed)
+        assert registry.get_status()['text-embedding-004']['building']
+        assert not registry.database(GEMINI_EMBEDDING_MODEL).has_vectors
+        assert not registry.build_in_background(OPENAI_EMBEDDING_MODEL, slow_embed)
+
+        release.set()
+        registry._builds['text-embedding-004'].join(5)
+        status = registry.get_status()['text-embedding-004']
+        assert status == {'dimension': 768, 'chunks': 4, 'vector_chunks': 4, 'ready': True, 'building': False}, status
+        assert len(embedded) == 4
+
+        reloaded = IndexRegistry(Config(), tmp).database(GEMINI_EMBEDDING_MODEL)
+        assert reloaded.has_vectors and faiss.read_index(reloaded.index_path).d == 768
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _save_openai_database(tmp)
+        registry = IndexRegistry(Config(), tmp)
+        registry.EMBED_RETRY_DELAY = 0
+        attempts = []
+
+        def failing(text):
+            # Gemini reports failures as zero vectors
+            attempts.append(text)
+            return np.zeros(768) if 'water' in text else _gemini_embed(text)
+
+        registry.build_in_background(GEMINI_EMBEDDING_MODEL, failing)
+        registry._builds['text-embedding-004'].join(5)
+        assert not registry.database(GEMINI_EMBEDDING_MODEL).has_vectors
+        assert not os.path.exists(registry.database(GEMINI_EMBEDDING_MODEL).index_path)
+        assert sum('water' in text for text in attempts) == registry.EMBED_ATTEMPTS
+
+        # A failure that clears on retry still builds the index
+        failed = []
+
+        def flaky(text):
+            if 'water' in text and not failed:
+                failed.append(text)
+                return None
+            return _gemini_embed(text)
+
+        registry.build_in_background(GEMINI_EMBEDDING_MODEL, flaky)
+        registry._builds['text-embedding-004'].join(5)
+        assert failed and registry.database(GEMINI_EMBEDDING_MODEL).has_vectors
+    print("✅ Gemini index built once in the background and reloaded; failed embeddings retried, "
+          "a failed build saves nothing")
+
+
+def test_one_builder_across_workers():
+    """Workers missing the same index build it once; the others load it and shared files are not rewritten"""
+    print("🧪 Testing index builds across workers")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _save_openai_database(tmp)
+        metadata_path = os.path.join(tmp, 'chunk_metadata.json')
+        metadata_mtime = os.stat(metadata_path).st_mtime_ns
+        # Each registry stands in for a worker process (flock locks are per open file)
+        workers = [IndexRegistry(Config(), tmp), IndexRegistry(Config(), tmp)]
+        building, release = threading.Event(), threading.Event()
+        embedded = []
+
+        def slow_embed(text):
+            building.set()
+            release.wait(5)
+            embedded.append(text)
+            return _gemini_embed(text)
+
+        assert workers[0].build_in_background(GEMINI_EMBEDDING_MODEL, slow_embed)
+        assert building.wait(5)
+        assert workers[1].build_in_background(GEMINI_EMBEDDING_MODEL, slow_embed)
+        release.set()
+        for worker in workers:
+            worker._builds['text-embedding-004'].join(5)
+            assert worker.database(GEMINI_EMBEDDING_MODEL).has_vectors
+
+        assert len(embedded) == len(TEXTS)
+        assert os.stat(metadata_path).st_mtime_ns == metadata_mtime
+        leftovers = [name for _, _, names in os.walk(tmp) for name in names if name.endswith('.tmp')]
+        assert leftovers == [], leftovers
+    print(f"✅ 2 workers, {len(embedded)} chunk embeddings; chunk metadata untouched, no temporary files left")
+
+
+def test_queries_routed_to_active_model():
+    """Queries use the index of the active embedder, lexically until it is built"""
+    print("🧪 Testing query routing")
+
+    config = Config()
+    gemini_config = SimpleNamespace(USE_GEMINI=True, GOOGLE_GEMINI_API_KEY='key')
+    assert active_embedding_model(gemini_config) == GEMINI_EMBEDDING_MODEL
+    assert active_embedding_model(SimpleNamespace(USE_GEMINI=True, GOOGLE_GEMINI_API_KEY='')) == OPENAI_EMBEDDING_MODEL
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _save_openai_database(tmp)
+        registry = IndexRegistry(config, tmp)
+        with mock.patch('src.content.vector_database.shared_index_registry', return_value=registry):
+            engine = SemanticSearchEngine(config, GEMINI_EMBEDDING_MODEL)
+
+        query_embeddings = []
+        task_types = []
+
+        def embed(model, input, **kwargs):
+            query_embeddings.append(input)
+            task_types.append(kwargs.get('task_type'))
+            return SimpleNamespace(data=[SimpleNamespace(embedding=list(_gemini_embed(input)))])
+
+        knowledge_base = NCERTKnowledgeBase.__new__(NCERTKnowledgeBase)
+        knowledge_base.config = config
+        knowledge_base.embedding_model = GEMINI_EMBEDDING_MODEL
+        knowledge_base.openai_client = SimpleNamespace(embeddings=SimpleNamespace(create=embed))
+        knowledge_base.search_engine = engine
+        knowledge_base.query_cache = {}
+        knowledge_base.cache_max_size = 100
+
+        # The OpenAI index exists, so the knowledge base is up; Gemini queries search lexically meanwhile
+        with mock.patch.object(registry, 'build_in_background') as build:
+            knowledge_base.initialize_knowledge_base()
+            build.assert_called_once_with(GEMINI_EMBEDDING_MODEL, knowledge_base._embed_chunk)
+        results = knowledge_base.search_relevant_content("How does light bend in water?")
+        assert results[0][0].id == 'c2' and query_embeddings == []
+
+        knowledge_base.initialize_knowledge_base()
+        registry._builds['text-embedding-004'].join(5)
+        assert engine.vector_db.has_vectors and len(query_embeddings) == 4
+        assert task_types == ['retrieval_document'] * 4, task_types
+
+        results = knowledge_base.search_relevant_content("What is a Current?")
+        assert query_embeddings[-1] == "What is a Current?" and task_types[-1] is None
+        assert results[0] == (results[0][0], 1.0) and results[0][0].id == 'c3', results
+        assert knowledge_base.get_knowledge_base_stats()['indexes']['text-embedding-004']['ready']
+    print("✅ Lexical answers while the Gemini index builds, vector search on it afterwards")
+
+
+def test_gemini_document_embeddings():
+    """Gemini chunks are embedded as documents; indexes of query-embedded chunks are rebuilt"""
+    print("🧪 Testing Gemini embedding task types")
+
+    from src.utils import gemini_adapter
+    with mock.patch.object(gemini_adapter, 'GEMINI_AVAILABLE', True), \
+            mock.patch.object(gemini_adapter, 'genai') as genai:
+        genai.embed_content.return_value = {'embedding': [0.5] * 768}
+        client = gemini_adapter.GeminiOpenAIClient('test-key')
+        client.embeddings.create(model='text-embedding-004', input="Light bends in water.",
+                                 task_type='retrieval_document')
+        client.embeddings.create(model='text-embedding-004', input="Why does light bend?", timeout=2.0)
+    calls = [(c.kwargs['model'], c.kwargs['task_type']) for c in genai.embed_content.call_args_list]
+    assert calls == [('models/text-embedding-004', 'retrieval_document'),
+                     ('models/text-embedding-004', 'retrieval_query')], calls
+    print("✅ Adapter passes the model and task type to Gemini")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _save_openai_database(tmp)
+        gemini_db = FAISSVectorDatabase(Config(), GEMINI_EMBEDDING_MODEL, tmp)
+        gemini_db.load_database()
+        gemini_db.set_embeddings(np.array([_gemini_embed(text) for _, text in TEXTS]))
+        gemini_db.save_index()
+        manifest_path = os.path.join(tmp, 'indexes', 'text-embedding-004', 'manifest.json')
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        assert manifest['document_task'] == 'retrieval_document'
+        assert FAISSVectorDatabase(Config(), GEMINI_EMBEDDING_MODEL, tmp).load_database()
+
+        # Built before chunks were embedded as documents
+        del manifest['document_task']
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f)
+        assert not FAISSVectorDatabase(Config(), GEMINI_EMBEDDING_MODEL, tmp).load_database()
+    print("✅ Manifest records the document task type; query-embedded indexes are not loaded")
+
+
+def main():
+    """Run index registry tests"""
+    tests = [
+        test_manifest_per_model,
+        test_background_build,
+        test_one_builder_across_workers,
+        test_queries_routed_to_active_model,
+        test_gemini_document_embeddings,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} index registry tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Test Latency Histograms
+Tests bucket accuracy, percentile windows and tracker integration
+"""
+
+import os
+import random
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+import openai
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.latency_histogram import (
+    NUM_BUCKETS, LatencyHistogram, WindowedLatencyHistogram, bucket_bounds, bucket_index
+)
+from src.audio.audio_processor import AudioProcessor, Language, TTSConfig
+from src.rag.response_generator import ResponseGenerator
+from src.utils.circuit_breaker import circuit_breakers
+from src.utils.performance_tracker import PerformanceTracker
+from config import Config
+
+
+def test_bucket_bounds():
+    """Every value falls inside its bucket and bucket width stays within 1/16"""
+    print("🧪 Testing histogram bucket bounds")
+
+    for value in list(range(0, 200)) + [1_000, 12_345, 999_999, 2_500_000, (1 << 28) - 1]:
+        index = bucket_index(value)
+        low, high = bucket_bounds(index)
+        assert 0 <= index < NUM_BUCKETS
+        assert low <= value < high, (value, low, high)
+        assert (high - low) <= max(1, low / 16)
+
+    assert bucket_index(10 ** 12) == NUM_BUCKETS - 1
+    print(f"✅ {NUM_BUCKETS} buckets cover 1µs to ~268s within 6.25%")
+
+
+def test_percentile_accuracy():
+    """Percentiles match exact values within bucket error and histograms merge"""
+    print("🧪 Testing percentile accuracy")
+
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(-1.0, 0.8) for _ in range(20000)]
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for i, sample in enumerate(samples):
+        (first if i % 2 else second).record(sample)
+
+    merged = LatencyHistogram().merge(first).merge(second)
+    assert merged.count == len(samples)
+
+    ordered = sorted(samples)
+    percentiles = merged.percentiles()
+    for label, percentile in (('p50', 50), ('p95', 95), ('p99', 99)):
+        exact = ordered[int(percentile / 100 * len(ordered)) - 1]
+        assert abs(percentiles[label] - exact) / exact < 0.05, (label, percentiles[label], exact)
+        print(f"✅ {label}: {percentiles[label]:.4f}s (exact {exact:.4f}s)")
+
+    assert abs(merged.summary()['max'] - max(samples)) < 1e-5
+    assert LatencyHistogram().percentiles()['p99'] == 0.0
+
+
+def test_sliding_windows():
+    """Samples age out of shorter windows but stay in the cumulative view"""
+    print("🧪 Testing sliding percentile windows")
+
+    histogram = WindowedLatencyHistogram()
+    start = 1_700_000_000.0
+    for _ in range(100):
+        histogram.record(2.0, now=start)
+    for _ in range(100):
+        histogram.record(0.2, now=start + 240)
+
+    summary = histogram.summary(now=start + 240)
+    assert summary['all']['count'] == 200
+    assert summary['1m']['count'] == 100 and summary['1m']['p99'] < 0.25
+    assert summary['5m']['count'] == 200 and summary['5m']['p99'] > 1.9
+    print("✅ 1m window saw only recent samples, 5m window saw both")
+
+    # Slot reuse after the ring wraps drops samples older than the longest window
+    histogram.record(0.5, now=start + 3600)
+    assert histogram.window(60, now=start + 3600).count == 101
+    print("✅ Reused slot cleared after an hour")
+
+
+def test_tracker_records_latency():
+    """Performance tracker records components, API services and pipeline stages"""
+    print("🧪 Testing tracker latency percentiles")
+
+    tracker = PerformanceTracker()
+    for duration in (0.1, 0.2, 0.3, 1.5):
+        token = tracker.start_component_timing('rag_engine')
+        tracker.end_component_timing(token._replace(start_time=token.start_time - duration))
+    tracker.track_api_usage('openai_gpt', True, tokens_used=50, latency=0.8)
+    tracker.record_latency('pipeline_stages', 'question_processing.stt_processing', 1.2)
+
+    percentiles = tracker.get_latency_percentiles()
+    rag = percentiles['components']['rag_engine']['5m']
+    assert rag['count'] == 4 and rag['p99'] > 1.4
+    assert percentiles['api_services']['openai_gpt']['all']['count'] == 1
+    assert 'question_processing.stt_processing' in tracker.get_latency_percentiles('pipeline_stages')['pipeline_stages']
+
+    component = tracker.get_performance_summary()['component_metrics']['rag_engine']
+    assert component['latency_percentiles']['5m']['count'] == 4
+    print(f"✅ rag_engine p50 {rag['p50']:.3f}s, p99 {rag['p99']:.3f}s")
+
+    tracker.reset_metrics()
+    assert tracker.get_latency_percentiles('components')['components'] == {}
+    print("✅ Reset cleared latency histograms")
+
+
+class _FakeOpenAIClient:
+    def __init__(self, **kwargs):
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Light bends when it changes medium."))],
+            usage=SimpleNamespace(total_tokens=120, prompt_tokens=90)
+        )
+
+
+def test_app_serves_audio_and_llm_latency():
+    """STT, TTS and LLM calls show up in the latency percentiles app.py serves"""
+    print("🧪 Testing STT, TTS and LLM latency in the app's tracker")
+
+    from app import app
+
+    processor = AudioProcessor.__new__(AudioProcessor)
+    processor.config = Config()
+    processor.logger = mock.Mock()
+    processor.vad = None
+    processor.stt_configs = {Language.ENGLISH: None}
+    processor.tts_configs = {Language.ENGLISH: TTSConfig(language_code=Language.ENGLISH.value)}
+    transcript = SimpleNamespace(alternatives=[SimpleNamespace(transcript="what is refraction", confidence=0.9)])
+    processor.stt_client = SimpleNamespace(recognize=lambda config, audio, timeout: SimpleNamespace(
+        results=[transcript]))
+    processor.tts_client = SimpleNamespace(
+        synthesize_speech=lambda input, voice, audio_config, timeout: SimpleNamespace(audio_content=b'RIFF'))
+    with mock.patch.object(openai, 'OpenAI', _FakeOpenAIClient), \
+            mock.patch.object(Config, 'USE_GEMINI', False):
+        generator = ResponseGenerator(Config())
+    context = {
+        'question': "What makes light bend?", 'language': 'English', 'detail_level': 'simple',
+        'search_results': {'found_relevant_content': True, 'source_chunks': []},
+        'context_quality': {'score': 0.8}, 'formatted_context': 'Light bends when it changes medium.'
+    }
+    try:
+        assert processor.speech_to_text(b'\x00' * 3200, Language.ENGLISH).success
+        assert processor.text_to_speech("Light bends.", Language.ENGLISH).success
+        assert generator.generate_response(context)['success']
+    finally:
+        circuit_breakers.reset()
+
+    percentiles = app.test_client().get('/api/performance/components').get_json()['latency_percentiles']
+    for component in ('STT_Processing', 'TTS_Processing', 'OpenAI_Response_Generation'):
+        assert percentiles['components'][component]['all']['count'] >= 1, component
+    for service in ('google_stt', 'google_tts', 'openai_gpt'):
+        assert percentiles['api_services'][service]['all']['count'] >= 1, service
+    print("✅ /api/performance/components reports STT, TTS and LLM percentiles")
+
+
+def main():
+    """Run latency histogram tests"""
+    tests = [
+        test_bucket_bounds,
+        test_percentile_accuracy,
+        test_sliding_windows,
+        test_tracker_records_latency,
+        test_app_serves_audio_and_llm_latency,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} latency histogram tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
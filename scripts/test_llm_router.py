@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test LLM Router
+Tests latency-aware provider selection, hedged requests, failover and per-provider concurrency caps
+"""
+
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import openai
+
+from src.rag.llm_router import AllProvidersBusyError, LLMRouter, llm_provider_stats
+from src.utils.circuit_breaker import circuit_breakers
+from config import Config
+
+MESSAGES = [{"role": "user", "content": "What is refraction?"}]
+
+
+class _FakeClient:
+    """Chat client double answering after a configurable delay"""
+
+    def __init__(self, name, latency, error=None):
+        self.name = name
+        self.latency = latency
+        self.error = error
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latency)
+            if self.error:
+                raise self.error
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=f"answer from {self.name}"))],
+                                   usage=SimpleNamespace(total_tokens=100, prompt_tokens=80))
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+def _router(*clients, caps=None, hedging=True, hedge_min_delay=0.05):
+    model = f"test-{time.monotonic_ns()}"  # Fresh statistics for every router
+    providers = [
+        LLMRouter._provider(client.name, client, model, 300, 0.3, (caps or {}).get(client.name, 4))
+        for client in clients
+    ]
+    return LLMRouter(providers, hedging=hedging, hedge_min_delay=hedge_min_delay)
+
+
+def test_routes_to_fastest():
+    """Each provider is measured, then requests go to the fastest one"""
+    print("🧪 Testing latency-aware routing")
+
+    slow, fast = _FakeClient('slowllm', 0.25), _FakeClient('fastllm', 0.12)  # Above EXPLORE_LATENCY
+    router = _router(slow, fast, hedging=False)
+    winners = [router.complete(MESSAGES, timeout=5)[1].name for _ in range(12)]
+    assert winners[:2] == ['slowllm', 'fastllm'], winners
+    assert winners[2:] == ['fastllm'] * 10, winners
+    assert router.get_status()['order'][0].startswith('fastllm')
+    print(f"✅ Both providers measured once, then {winners.count('fastllm')} of 12 requests sent to the faster one")
+
+
+def test_hedged_request():
+    """A request slower than its provider's p90 is hedged and the first answer wins"""
+    print("🧪 Testing hedged requests")
+
+    primary, backup = _FakeClient('primaryllm', 0.02), _FakeClient('backupllm', 0.05)
+    router = _router(primary, backup)
+    for provider, latency in zip(router.providers, (0.02, 0.05)):
+        for _ in range(10):
+            provider.stats.record_success(latency)
+
+    primary.latency = 0.6  # Stalls on this request
+    started = time.perf_counter()
+    response, provider = router.complete(MESSAGES, timeout=5)
+    elapsed = time.perf_counter() - started
+    assert provider.name == 'backupllm' and response.choices[0].message.content == "answer from backupllm"
+    assert elapsed < 0.3 and primary.calls == 1 and backup.calls == 1, elapsed
+    print(f"✅ Hedged after the 0.05s p90; answered in {elapsed:.2f}s instead of 0.6s")
+
+    time.sleep(0.7)
+    assert router.providers[0].stats.in_flight == 0  # The losing request released its slot
+    print("✅ Losing request released its concurrency slot when it finished")
+
+
+def test_failover_on_error():
+    """A failing provider fails over at once and is ranked down by its error rate"""
+    print("🧪 Testing failover")
+
+    broken, healthy = _FakeClient('brokenllm', 0.01, error=RuntimeError("503 Service Unavailable")), \
+        _FakeClient('healthyllm', 0.03)
+    router = _router(broken, healthy, hedging=False)
+    try:
+        for _ in range(3):
+            _, provider = router.complete(MESSAGES, timeout=5)
+            assert provider.name == 'healthyllm'
+        assert broken.calls == 1 and healthy.calls == 3
+        assert router.ranked_providers()[0].name == 'healthyllm'
+
+        bad_request = openai.BadRequestError("invalid", response=mock.Mock(status_code=400, request=None), body=None)
+        healthy.error = bad_request
+        try:
+            router.complete(MESSAGES, timeout=5)
+            raise AssertionError("a rejected request must not be retried on another provider")
+        except openai.BadRequestError:
+            pass
+        assert broken.calls == 1
+        print("✅ Error failed over within the request; broken provider ranked last; bad requests not failed over")
+    finally:
+        circuit_breakers.reset()
+
+
+def test_concurrency_caps():
+    """A provider at its cap is skipped; requests fail fast when every provider is at its cap"""
+    print("🧪 Testing per-provider concurrency caps")
+
+    first, second = _FakeClient('capllm', 0.2), _FakeClient('overflowllm', 0.2)
+    router = _router(first, second, caps={'capllm': 2, 'overflowllm': 1}, hedging=False)
+    results = []
+
+    def request():
+        try:
+            results.append(router.complete(MESSAGES, timeout=5)[1].name)
+        except AllProvidersBusyError:
+            results.append('busy')
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+    assert first.max_in_flight <= 2 and second.max_in_flight <= 1
+    assert sorted(results) == ['busy', 'capllm', 'capllm', 'overflowllm'], results
+    print(f"✅ Requests spread within caps: {sorted(results)}")
+
+
+def test_providers_from_config():
+    """Every provider with a key is used; the configured preference decides the initial order"""
+    print("🧪 Testing provider configuration")
+
+    class _Config(Config):
+        OPENAI_API_KEY = 'sk-test'
+        GOOGLE_GEMINI_API_KEY = 'gemini-test'
+        USE_GEMINI = False
+
+    with mock.patch.object(openai, 'OpenAI', lambda **kwargs: _FakeClient('openai', 0.0)), \
+            mock.patch('src.utils.gemini_adapter.GeminiOpenAIClient', lambda **kwargs: _FakeClient('gemini', 0.0)):
+        router = LLMRouter.from_config(_Config)
+    assert [provider.name for provider in router.providers] == ['openai', 'gemini']
+    assert router.primary.max_tokens == max(300, _Config.OPENAI_MAX_TOKENS)
+    assert router.providers[1].stats.max_concurrent == _Config.GEMINI_MAX_CONCURRENT
+    status = router.get_status()
+    assert set(status['providers']) == {f"openai:{_Config.OPENAI_MODEL}", f"gemini:{_Config.GEMINI_MODEL}"}
+    llm_provider_stats.reset()
+    print(f"✅ Providers: {status['order']}")
+
+
+def main():
+    """Run LLM router tests"""
+    tests = [
+        test_routes_to_fastest,
+        test_hedged_request,
+        test_failover_on_error,
+        test_concurrency_caps,
+        test_providers_from_config,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} LLM router tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Test Metrics Exposition
+Tests OpenMetrics rendering, multiprocess aggregation and the /metrics endpoint
+"""
+
+import multiprocessing
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+# Add project root to path for imports
+PROJECT_ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, PROJECT_ROOT)
+
+from src.utils.metrics_registry import MetricFamily, MetricsRegistry, _MmapValues
+
+
+def _define_metrics(registry):
+    return (
+        registry.counter('test_requests', 'Requests handled', ['route']),
+        registry.gauge('test_in_flight', 'Requests in flight'),
+        registry.histogram('test_latency_seconds', 'Request latency', ['route'], buckets=(0.1, 1.0)),
+    )
+
+
+def _sample_lines(text):
+    return [line for line in text.splitlines() if line and not line.startswith('#')]
+
+
+def test_openmetrics_format():
+    """Counters, gauges and cumulative histogram buckets render as OpenMetrics"""
+    print("🧪 Testing OpenMetrics rendering")
+
+    registry = MetricsRegistry()
+    requests, in_flight, latency = _define_metrics(registry)
+    requests.inc(route='ask')
+    requests.inc(2, route='ask')
+    in_flight.set(3)
+    for value in (0.05, 0.5, 0.5, 4.0):
+        latency.observe(value, route='ask')
+    registry.register_collector(lambda: [MetricFamily('test_sessions', 'gauge', 'Sessions').add(2, state='active')])
+
+    text = registry.render(openmetrics=True)
+    lines = _sample_lines(text)
+    assert '# TYPE test_requests counter' in text
+    assert 'test_requests_total{route="ask"} 3' in lines
+    assert 'test_in_flight 3' in lines
+    assert 'test_latency_seconds_bucket{route="ask",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{route="ask",le="1.0"} 3' in lines
+    assert 'test_latency_seconds_bucket{route="ask",le="+Inf"} 4' in lines
+    assert 'test_latency_seconds_count{route="ask"} 4' in lines
+    assert 'test_latency_seconds_sum{route="ask"} 5.05' in lines
+    assert 'test_sessions{state="active"} 2' in lines
+    assert text.endswith('# EOF\n')
+    print("✅ Cumulative buckets, _total counters and collector gauges rendered")
+
+    text = registry.render(openmetrics=False)
+    assert '# TYPE test_requests_total counter' in text
+    assert '# EOF' not in text
+    print("✅ Prometheus text format names counter families with _total")
+
+    try:
+        requests.inc(route='ask', method='GET')
+        assert False, "unexpected label accepted"
+    except ValueError:
+        print("✅ Unknown labels rejected")
+
+
+def _child_worker(directory, ready, release):
+    registry = MetricsRegistry(multiprocess_dir=directory)
+    requests, in_flight, latency = _define_metrics(registry)
+    requests.inc(5, route='ask')
+    in_flight.inc(2)
+    latency.observe(2.0, route='ask')
+    ready.set()
+    release.wait(10)
+
+
+def test_multiprocess_aggregation():
+    """Values written by several processes are summed on scrape"""
+    print("🧪 Testing multiprocess aggregation")
+
+    context = multiprocessing.get_context('fork')
+    with tempfile.TemporaryDirectory() as directory:
+        registry = MetricsRegistry(multiprocess_dir=directory)
+        requests, in_flight, latency = _define_metrics(registry)
+        requests.inc(route='ask')
+        in_flight.inc()
+        latency.observe(0.05, route='ask')
+
+        ready, release = context.Event(), context.Event()
+        child = context.Process(target=_child_worker, args=(directory, ready, release))
+        child.start()
+        assert ready.wait(10)
+
+        lines = _sample_lines(registry.render())
+        assert 'test_requests_total{route="ask"} 6' in lines
+        assert 'test_in_flight 3' in lines
+        assert 'test_latency_seconds_count{route="ask"} 2' in lines
+        print("✅ Live worker values summed across processes")
+
+        release.set()
+        child.join(10)
+
+        lines = _sample_lines(registry.render())
+        assert 'test_requests_total{route="ask"} 6' in lines
+        assert 'test_in_flight 1' in lines
+        assert 'test_latency_seconds_bucket{route="ask",le="+Inf"} 2' in lines
+        files = sorted(os.listdir(directory))
+        assert f"counter_{child.pid}.db" not in files and 'counter_archive.db' in files
+        assert f"gauge_{child.pid}.db" not in files
+        print("✅ Exited worker counters archived and its gauges dropped")
+
+
+def test_stale_gauge_files():
+    """Gauges of a previous process with a reused PID, or of a retired worker, are not reported"""
+    print("🧪 Testing stale gauge files")
+
+    with tempfile.TemporaryDirectory() as directory:
+        # A previous process with this PID left a gauge file behind
+        previous = MetricsRegistry(multiprocess_dir=directory)
+        _define_metrics(previous)[1].inc(4)
+        previous._reset_stores()
+
+        registry = MetricsRegistry(multiprocess_dir=directory)
+        requests, in_flight, _ = _define_metrics(registry)
+        in_flight.inc()
+        assert 'test_in_flight 1' in _sample_lines(registry.render())
+        print("✅ A reused PID starts with empty gauges")
+
+        # Files of a worker whose PID is live again (here: the parent process)
+        worker_pid = os.getppid()
+        worker = MetricsRegistry(multiprocess_dir=directory)
+        worker._stores = {kind: _MmapValues(os.path.join(directory, f"{kind}_{worker_pid}.db"))
+                          for kind in ('counter', 'gauge')}
+        worker_requests, worker_in_flight, _ = _define_metrics(worker)
+        worker_requests.inc(3, route='ask')
+        worker_in_flight.inc(7)
+        assert 'test_in_flight 8' in _sample_lines(registry.render())
+
+        registry.mark_process_dead(worker_pid)
+        lines = _sample_lines(registry.render())
+        assert 'test_in_flight 1' in lines and 'test_requests_total{route="ask"} 3' in lines
+        assert sorted(os.listdir(directory)) == sorted([
+            'archive.lock', 'counter_archive.db', f"counter_{os.getpid()}.db", f"gauge_{os.getpid()}.db"
+        ])
+        print("✅ Retired worker's gauges dropped and counters archived")
+
+        shutil.copyfile(os.path.join(directory, f"gauge_{os.getpid()}.db"),
+                        os.path.join(directory, f"gauge_{worker_pid}.db"))
+        assert 'test_in_flight 2' in _sample_lines(registry.render())
+        registry.remove_stale_gauges()
+        assert 'test_in_flight 1' in _sample_lines(registry.render())
+        print("✅ Gauge files of other processes removed when the master starts")
+
+
+# Imports every module that records metrics through track_performance or the performance tracker
+_IMPORT_ROOTS_SCRIPT = """
+import sys
+sys.path.insert(0, '.')
+import src.audio.audio_processor, src.rag.rag_engine, src.rag.response_generator, src.session.session_manager
+import src.utils.performance_tracker
+print(sorted(name for name in sys.modules if name == 'utils' or name.startswith('utils.')))
+print(sys.modules['src.session.session_manager'].performance_tracker is src.utils.performance_tracker.performance_tracker)
+"""
+
+
+def test_single_import_root():
+    """Modules record metrics through the src.utils registry that /metrics serves, never a utils.* copy"""
+    print("🧪 Testing metrics import roots")
+
+    with tempfile.TemporaryDirectory() as directory:
+        environment = dict(os.environ, METRICS_MULTIPROC_DIR=directory)
+        completed = subprocess.run([sys.executable, '-c', _IMPORT_ROOTS_SCRIPT], cwd=PROJECT_ROOT, env=environment,
+                                   capture_output=True, text=True, timeout=120)
+        assert completed.returncode == 0, completed.stderr[-2000:]
+        utils_modules, shared_tracker = completed.stdout.strip().splitlines()[-2:]
+    # A second root would build a second registry writing the same counter_<pid>.db
+    assert utils_modules == '[]', utils_modules
+    assert shared_tracker == 'True'
+    print("✅ Audio, RAG and session modules share the src.utils registry and tracker")
+
+
+def test_metrics_endpoint():
+    """The app serves /metrics with content negotiation"""
+    print("🧪 Testing /metrics endpoint")
+
+    from app import app
+    from src.utils.performance_decorators import track_performance
+
+    @track_performance("Metrics_Test_Component", track_api_usage=True, service_name="openai_gpt")
+    def answer():
+        return {'success': True, 'tokens_used': 12}
+
+    answer()
+    client = app.test_client()
+
+    response = client.get('/metrics', headers={'Accept': 'application/openmetrics-text; version=1.0.0'})
+    assert response.status_code == 200
+    assert response.content_type.startswith('application/openmetrics-text')
+    body = response.get_data(as_text=True)
+    assert 'vidyavani_component_duration_seconds_count{component="Metrics_Test_Component",outcome="success"}' in body
+    assert 'vidyavani_api_tokens_total{service="openai_gpt"}' in body
+    assert 'vidyavani_sessions{state="active"}' in body
+    assert body.endswith('# EOF\n')
+    print("✅ OpenMetrics response includes component, API and session metrics")
+
+    response = client.get('/metrics')
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    print("✅ Plain scrape falls back to Prometheus text format")
+
+
+def main():
+    """Run metrics exposition tests"""
+    tests = [
+        test_openmetrics_format,
+        test_multiprocess_aggregation,
+        test_stale_gauge_files,
+        test_single_import_root,
+        test_metrics_endpoint,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} metrics exposition tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Test Performance Instrumentation
+Tests sharded metric recording under concurrency and success-path logging
+"""
+
+import logging
+import os
+import sys
+import threading
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.utils.performance_decorators import track_performance
+from src.utils.performance_tracker import RECENT_RESPONSE_LIMIT, PerformanceTracker, performance_tracker
+
+
+@track_performance("Instrumented_Component", track_api_usage=True, service_name="openai_gpt")
+def _instrumented(fail: bool = False):
+    return {'success': not fail, 'tokens_used': 5}
+
+
+class _RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.DEBUG)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_concurrent_recording():
+    """Calls recorded from many threads are all counted on read"""
+    print("🧪 Testing concurrent sharded recording")
+
+    performance_tracker.reset_metrics()
+    threads, calls = 16, 500
+
+    def worker():
+        for i in range(calls):
+            _instrumented(fail=(i % 10 == 0))
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+
+    summary = performance_tracker.get_performance_summary()
+    component = summary['component_metrics']['Instrumented_Component']
+    assert component['total_calls'] == threads * calls
+    assert abs(component['success_rate'] - 90.0) < 1e-9
+    assert summary['api_metrics']['openai_gpt']['total_requests'] == threads * calls
+    assert summary['api_metrics']['openai_gpt']['total_tokens_used'] == threads * calls * 5
+    assert component['latency_percentiles']['all']['count'] == threads * calls
+    print(f"✅ {threads * calls} calls from {threads} threads counted without loss")
+
+    # Shards of exited threads are folded into one retired shard on read
+    assert len(performance_tracker._shards) <= 1
+    again = performance_tracker.get_performance_summary()['component_metrics']['Instrumented_Component']
+    assert again['total_calls'] == threads * calls
+    print("✅ Exited thread shards retired with counts preserved")
+
+
+def test_timing_token_by_value():
+    """Timing tokens carry their own start time and need no registry"""
+    print("🧪 Testing timing tokens")
+
+    tracker = PerformanceTracker(log_success=False)
+    token = tracker.start_component_timing('stt_processing')
+    assert token.component == 'stt_processing'
+
+    # The same token can be ended from another thread
+    durations = []
+    thread = threading.Thread(target=lambda: durations.append(tracker.end_component_timing(token)))
+    thread.start()
+    thread.join()
+
+    assert durations[0] >= 0
+    assert tracker.get_performance_summary()['component_metrics']['stt_processing']['total_calls'] == 1
+    print(f"✅ Token ended on another thread after {durations[0] * 1e6:.1f}µs")
+
+
+def test_recent_response_times_bounded():
+    """Merged recent response times keep only the latest calls across shards"""
+    print("🧪 Testing merged recent response times")
+
+    tracker = PerformanceTracker(log_success=False)
+
+    def worker(duration):
+        for _ in range(RECENT_RESPONSE_LIMIT):
+            token = tracker.start_component_timing('rag_engine')
+            tracker.end_component_timing(token._replace(start_time=token.start_time - duration))
+
+    # The second thread's calls finish last, so only they are recent
+    for duration in (1.0, 2.0):
+        thread = threading.Thread(target=worker, args=(duration,))
+        thread.start()
+        thread.join()
+
+    recent = tracker._collect().components['rag_engine'].recent_response_times
+    assert len(recent) == RECENT_RESPONSE_LIMIT
+    assert all(1.99 < duration < 2.1 for _, duration in recent)
+    assert [finished for finished, _ in recent] == sorted(finished for finished, _ in recent)
+    assert 1.99 < tracker.get_performance_summary()['component_metrics']['rag_engine']['recent_average_response_time'] < 2.1
+    print(f"✅ {2 * RECENT_RESPONSE_LIMIT} calls from two shards merged into the latest {len(recent)}")
+
+
+def test_success_path_not_logged():
+    """Successful calls do not log by default; failures and slow calls still alert"""
+    print("🧪 Testing success-path logging")
+
+    tracker = PerformanceTracker(log_success=False)
+    handler = _RecordingHandler()
+    tracker_logger = logging.getLogger('src.utils.performance_tracker')
+    tracker_logger.addHandler(handler)
+    previous_level = tracker_logger.level
+    tracker_logger.setLevel(logging.DEBUG)
+    try:
+        tracker.end_component_timing(tracker.start_component_timing('rag_engine'))
+        tracker.track_api_usage('openai_gpt', True, tokens_used=10)
+        tracker.track_cache_usage('response_cache', True)
+        assert handler.records == [], [record.getMessage() for record in handler.records]
+        print("✅ No log records for successful calls")
+
+        token = tracker.start_component_timing('rag_engine')
+        tracker.end_component_timing(token, success=False, error_message="timeout")
+        slow = tracker.start_component_timing('tts_processing')
+        tracker.end_component_timing(slow._replace(start_time=slow.start_time - 13.0))
+        assert any('FAILED: timeout' in record.getMessage() for record in handler.records)
+
+        alert_types = {alert['type'] for alert in tracker.get_performance_summary()['recent_alerts']}
+        assert 'success_rate_critical' in alert_types
+        assert 'response_time_critical' in alert_types
+        print(f"✅ Failures logged and alerts raised: {sorted(alert_types)}")
+    finally:
+        tracker_logger.removeHandler(handler)
+        tracker_logger.setLevel(previous_level)
+
+
+def main():
+    """Run performance instrumentation tests"""
+    tests = [
+        test_concurrent_recording,
+        test_timing_token_by_value,
+        test_recent_response_times_bounded,
+        test_success_path_not_logged,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} performance instrumentation tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
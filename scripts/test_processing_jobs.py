@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Test Question Processing Jobs
+Tests async job submission, stage progress events and SSE streaming
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.ivr.job_manager import JobManager, format_sse
+from src.ivr.processing_pipeline import ProcessingResult
+
+
+class StagedPipeline:
+    """Pipeline stand-in that reports stages and can be held mid-run"""
+
+    def __init__(self, success: bool = True):
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.release = threading.Event()
+        self.success = success
+
+    def submit_question(self, recording_url, language, phone_number, progress_callback=None, session_id=None):
+        return self.executor.submit(self._run, progress_callback)
+
+    def _run(self, progress_callback):
+        for stage in ("audio_download", "stt_processing", "rag_processing", "tts_processing"):
+            progress_callback(stage, 'started', 0.0)
+            if stage == "stt_processing":
+                self.release.wait(5)
+            progress_callback(stage, 'completed' if self.success else 'failed', 0.01)
+        return ProcessingResult(
+            success=self.success,
+            question_text="What is photosynthesis?",
+            response_text="Plants make food from sunlight.",
+            error_message="" if self.success else "Could not understand your question clearly"
+        )
+
+
+def _store_path():
+    return os.path.join(tempfile.mkdtemp(), 'jobs.sqlite')
+
+
+def test_job_lifecycle():
+    """Jobs report queued, running, stage progress and the final result"""
+    print("🧪 Testing question job lifecycle")
+
+    manager = JobManager(max_pending=5, store_path=_store_path())
+    pipeline = StagedPipeline()
+    job = manager.submit(pipeline, "http://example.com/q.wav", "english", "+919876543210", "session_1",
+                         on_complete=lambda result: {'success': result.success, 'response_text': result.response_text})
+
+    assert job is not None
+    events = manager.iter_events(job.job_id, heartbeat_seconds=1.0)
+    first = [next(events) for _ in range(5)]
+    assert [event['event'] for event in first] == ['status', 'status', 'stage', 'stage', 'stage']
+    assert manager.get_job_status(job.job_id)['current_stage'] == 'stt_processing'
+    print("✅ Job reported running stt_processing while held")
+
+    pipeline.release.set()
+    remaining = [event for event in events if event is not None]
+    result = remaining[-1]
+    assert result['event'] == 'result'
+    assert result['data']['status'] == 'completed'
+    assert result['data']['response_text'] == "Plants make food from sunlight."
+    assert manager.get_job_status(job.job_id)['status'] == 'completed'
+    print(f"✅ Job completed after {len(first) + len(remaining)} events")
+
+    # Reconnecting with Last-Event-ID resumes after that event
+    resumed = list(manager.iter_events(job.job_id, last_event_id=result['id'] - 1))
+    assert resumed == [result]
+    assert format_sse(result).startswith(f"id: {result['id']}\nevent: result\ndata: ")
+    print("✅ Stream resumed from Last-Event-ID")
+
+
+def test_failed_job_and_backpressure():
+    """Failed results are reported and submissions beyond the bound are rejected"""
+    print("🧪 Testing failed jobs and pending bound")
+
+    manager = JobManager(max_pending=1, store_path=_store_path())
+    pipeline = StagedPipeline(success=False)
+    job = manager.submit(pipeline, "http://example.com/q.wav", "telugu", "+919876543211", "session_2")
+    assert job is not None
+    assert manager.submit(pipeline, "http://example.com/q.wav", "telugu", "+919876543212", "session_3") is None
+    print("✅ Second job rejected while one is pending")
+
+    pipeline.release.set()
+    final = [event for event in manager.iter_events(job.job_id) if event is not None][-1]
+    assert final['data']['status'] == 'failed'
+    assert manager.get_stats()['active_jobs'] == 0
+    assert manager.submit(pipeline, "http://example.com/q.wav", "telugu", "+919876543212", "session_3") is not None
+    print("✅ Failed job finished and capacity was released")
+
+
+def test_jobs_shared_across_workers():
+    """A job run by one worker is visible to, and streamed by, another"""
+    print("🧪 Testing job state shared between workers")
+
+    store_path = _store_path()
+    running_worker = JobManager(max_pending=5, store_path=store_path)
+    other_worker = JobManager(max_pending=5, store_path=store_path)
+    pipeline = StagedPipeline()
+    job = running_worker.submit(pipeline, "http://example.com/q.wav", "english", "+919876543214", "session_5",
+                                on_complete=lambda result: {'success': result.success})
+
+    events = other_worker.iter_events(job.job_id, heartbeat_seconds=1.0)
+    assert [next(events)['event'] for _ in range(5)] == ['status', 'status', 'stage', 'stage', 'stage']
+    assert other_worker.get_job_status(job.job_id)['current_stage'] == 'stt_processing'
+    assert other_worker.get_stats()['active_jobs'] == 0
+
+    pipeline.release.set()
+    assert [event for event in events if event is not None][-1]['data']['status'] == 'completed'
+    assert other_worker.get_job_status(job.job_id)['result'] == {'success': True}
+    print("✅ Second worker streamed the job to completion")
+
+    # A job left running by a worker that exited is reported failed
+    held = StagedPipeline()
+    orphan = running_worker.submit(held, "http://example.com/q.wav", "english", "+919876543215", "session_6")
+    running_worker._db().execute("UPDATE jobs SET worker_pid = ? WHERE job_id = ?", (2 ** 22 + 1, orphan.job_id))
+    status = other_worker.get_job_status(orphan.job_id)
+    assert status['status'] == 'failed' and status['result']['success'] is False
+    assert list(other_worker.iter_events(orphan.job_id))[-1]['event'] == 'result'
+    held.release.set()
+    print("✅ Job of an exited worker reported as failed")
+
+
+def test_store_written_outside_condition():
+    """A slow store write does not hold the condition stream readers wait on"""
+    print("🧪 Testing job store writes outside the condition")
+
+    store_path = _store_path()
+    manager = JobManager(max_pending=5, store_path=store_path)
+    pipeline = StagedPipeline()
+    job = manager.submit(pipeline, "http://example.com/q.wav", "english", "+919876543214", "session_5")
+    for event in manager.iter_events(job.job_id):
+        if event and event['data'].get('stage') == 'stt_processing':
+            break
+
+    blocker = sqlite3.connect(store_path, isolation_level=None)
+    blocker.execute('BEGIN IMMEDIATE')  # Next event write waits on the store lock
+    pipeline.release.set()
+    threading.Event().wait(0.3)
+    acquired = manager._condition.acquire(timeout=1.0)
+    if acquired:
+        manager._condition.release()
+    blocker.execute('COMMIT')
+    assert acquired, "Condition held during the store write"
+    print("✅ Condition free while an event write waited on the store")
+
+    events = [event for event in manager.iter_events(job.job_id) if event is not None]
+    assert [event['id'] for event in events] == list(range(len(events)))
+    assert events[-1]['data']['status'] == 'completed'
+    print(f"✅ All {len(events)} events saved in order")
+
+
+def test_job_endpoints():
+    """Status and SSE endpoints expose job progress"""
+    print("🧪 Testing job API endpoints")
+
+    from app import app
+    from src.ivr.job_manager import job_manager
+
+    pipeline = StagedPipeline()
+    pipeline.release.set()
+    job = job_manager.submit(pipeline, "http://example.com/q.wav", "english", "+919876543213", "session_4")
+    client = app.test_client()
+
+    response = client.get(f"/api/jobs/{job.job_id}/events")
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert "event: stage" in body and "event: result" in body
+    response.close()
+    assert job_manager.get_stats()['open_streams'] == 0
+    print("✅ SSE stream delivered stage and result events")
+
+    while job_manager.open_stream():
+        pass
+    try:
+        busy = client.get(f"/api/jobs/{job.job_id}/events")
+        assert busy.status_code == 429 and busy.headers['Retry-After'] == '2'
+        assert busy.get_json()['status_url'] == f"/api/jobs/{job.job_id}"
+    finally:
+        for _ in range(job_manager.max_streams):
+            job_manager.close_stream()
+    print("✅ Streams past the per-worker cap refused with 429 and the status URL")
+
+    status = client.get(f"/api/jobs/{job.job_id}").get_json()
+    assert status['status'] == 'completed'
+    assert len(status['stages']) == 8
+    assert client.get("/api/jobs/unknown").status_code == 404
+    print("✅ Job status endpoint returned completed job")
+
+
+def main():
+    """Run processing job tests"""
+    tests = [
+        test_job_lifecycle,
+        test_failed_job_and_backpressure,
+        test_jobs_shared_across_workers,
+        test_store_written_outside_condition,
+        test_job_endpoints,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} processing job tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Test Prompt Caching
+Tests memoized system prompts, prefix-stable message order and cached-token accounting
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import openai
+
+from src.rag.response_generator import ResponseGenerator, VidyaPersona
+from src.utils.gemini_adapter import GeminiChatCompletion
+from src.utils.performance_tracker import performance_tracker
+from config import Config
+
+CONTEXT = "NCERT content:\n[10.3 Refraction of Light]\nLight bends when it passes from one medium into another."
+
+
+def test_system_prompt_memoized():
+    """The system prompt is built once per language and detail level"""
+    print("🧪 Testing system prompt memoization")
+
+    VidyaPersona._build_system_prompt.cache_clear()
+    first = VidyaPersona.get_system_prompt("English", "simple", 110)
+    again = VidyaPersona.get_system_prompt("english", "simple", 110)
+    telugu = VidyaPersona.get_system_prompt("Telugu", "simple", 110)
+
+    assert again is first and telugu != first
+    info = VidyaPersona._build_system_prompt.cache_info()
+    assert info.misses == 2 and info.hits == 1
+    assert "Use at most 110 words" in first and "NCERT content followed by their question" in first
+    print(f"✅ {info.misses} prompts built for {info.misses + info.hits} calls")
+
+
+def test_messages_prefix_stable():
+    """Static instructions lead, the retrieved context follows and the question comes last"""
+    print("🧪 Testing prompt message order")
+
+    refraction = VidyaPersona.build_messages("What is refraction?", CONTEXT, "English", "simple", 110)
+    bending = VidyaPersona.build_messages("Why does light bend in water?", CONTEXT, "English", "simple", 110)
+
+    assert [message['role'] for message in refraction] == ['system', 'user']
+    assert refraction[0] == bending[0]
+    assert refraction[1]['content'].startswith(CONTEXT) and bending[1]['content'].startswith(CONTEXT)
+    assert refraction[1]['content'].endswith("Student Question: What is refraction?")
+    assert "What is refraction?" not in refraction[0]['content']
+    print("✅ Two questions on the same content share the system prompt and context as a prefix")
+
+
+class _CachingClient:
+    """Chat client reporting part of the prompt as served from the provider's cache"""
+
+    CACHED_TOKENS = 1024
+
+    def __init__(self, **kwargs):
+        self.messages = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.messages.append(kwargs['messages'])
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Light bends when it enters water."),
+                                     finish_reason='stop')],
+            usage=SimpleNamespace(total_tokens=1300, prompt_tokens=1280,
+                                  prompt_tokens_details=SimpleNamespace(cached_tokens=self.CACHED_TOKENS))
+        )
+
+
+def _context(question):
+    return {
+        'question': question, 'language': 'English', 'detail_level': 'simple',
+        'search_results': {'found_relevant_content': True, 'source_chunks': []},
+        'context_quality': {'score': 0.8}, 'formatted_context': CONTEXT
+    }
+
+
+def test_cached_tokens_recorded():
+    """Cached prompt tokens reported by the provider show up in the API metrics and /metrics"""
+    print("🧪 Testing cached token accounting")
+
+    with mock.patch.object(openai, 'OpenAI', _CachingClient), \
+            mock.patch.object(Config, 'USE_GEMINI', False):
+        generator = ResponseGenerator(Config())
+
+    performance_tracker.reset_metrics()
+    result = generator.generate_response(_context("What is refraction of light?"))
+    generator.generate_response(_context("Why does a straw look bent in water?"))
+
+    assert result['success'] and result['cached_tokens'] == _CachingClient.CACHED_TOKENS
+    # Read back through the endpoints app.py serves
+    from app import app
+    client = app.test_client()
+    api = client.get('/api/performance/metrics').get_json()['api_metrics']['openai_gpt']
+    assert api['cached_tokens'] == 2 * _CachingClient.CACHED_TOKENS
+    assert 'vidyavani_api_cached_tokens_total{service="openai_gpt"}' in client.get('/metrics').get_data(as_text=True)
+    first, second = generator.openai_client.messages
+    assert first[0] == second[0]
+
+    # The Gemini adapter reports the same usage fields
+    gemini = GeminiChatCompletion("answer", "gemini-2.5-flash", 1300, prompt_tokens=1280, cached_tokens=1024)
+    assert gemini.usage.prompt_tokens == 1280 and gemini.usage.prompt_tokens_details.cached_tokens == 1024
+    print(f"✅ {api['cached_tokens']} cached prompt tokens recorded for openai_gpt")
+
+
+def main():
+    """Run prompt caching tests"""
+    tests = [
+        test_system_prompt_memoized,
+        test_messages_prefix_stable,
+        test_cached_tokens_recorded,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} prompt caching tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
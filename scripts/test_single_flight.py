@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Test Single-Flight Coalescing
+Tests that identical concurrent questions, embeddings and TTS requests are computed once and shared
+"""
+
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import openai
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.audio.audio_processor import AudioProcessingResult, AudioProcessor, Language
+from src.content.knowledge_base import NCERTKnowledgeBase
+from src.content.vector_database import OPENAI_EMBEDDING_MODEL
+from src.rag.response_generator import ResponseGenerator, recent_answers
+from src.utils.circuit_breaker import circuit_breakers
+from src.utils.deadline import Deadline, DeadlineExceeded
+from src.utils.single_flight import SingleFlight
+from pipeline_fakes import FakeAudioProcessor, FakeResponseGenerator, fake_pipeline
+from config import Config
+
+
+def _run_concurrently(target, count):
+    """Start count threads calling target(index) together and return their results in order"""
+    results = [None] * count
+    start = threading.Barrier(count)
+
+    def run(index):
+        start.wait()
+        results[index] = target(index)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_single_flight():
+    """Concurrent calls with one key run once; results and errors are shared, nothing is kept afterwards"""
+    print("🧪 Testing single-flight groups")
+
+    flights = SingleFlight('test')
+    calls = []
+
+    def work(value):
+        calls.append(value)
+        time.sleep(0.1)
+        return value * 2
+
+    results = _run_concurrently(lambda i: flights.do('same', work, 21), 5)
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert all(result == 42 for result, _ in results)
+    assert flights.do('same', work, 4) == (8, False) and len(calls) == 2
+    print("✅ 5 concurrent calls ran the work once; a later call ran it again")
+
+    def fail():
+        time.sleep(0.1)
+        raise RuntimeError("503 Service Unavailable")
+
+    def call_failing(_):
+        try:
+            flights.do('failing', fail)
+        except RuntimeError as e:
+            return str(e)
+
+    assert _run_concurrently(call_failing, 3) == ["503 Service Unavailable"] * 3
+    assert flights.get_status() == {'in_flight': 0, 'shared_calls': 6}
+    print("✅ The leader's error was raised in every waiter")
+
+
+def test_abandoned_leader():
+    """A waiter takes over work abandoned by the leader's caller, and stops waiting at its own deadline"""
+    print("🧪 Testing deadlines of waiting callers")
+
+    flights = SingleFlight('test')
+    leader_deadline = Deadline(10.0)
+    runs = []
+
+    def work():
+        runs.append(threading.current_thread().name)
+        time.sleep(0.1)
+        if len(runs) == 1:
+            leader_deadline.cancel("call ended")
+            leader_deadline.check("tts_processing")
+        return "answer"
+
+    def leader():
+        with leader_deadline.activate():
+            try:
+                flights.do('question', work)
+            except DeadlineExceeded:
+                return "abandoned"
+
+    def waiter():
+        time.sleep(0.02)
+        with Deadline(5.0).activate():
+            return flights.do('question', work)
+
+    results = _run_concurrently(lambda i: leader() if i == 0 else waiter(), 2)
+    assert results == ["abandoned", ("answer", False)] and len(runs) == 2
+    print("✅ Leader's caller hung up; the waiting caller re-ran the work and got the answer")
+
+    slow = threading.Thread(target=flights.do, args=('slow', time.sleep, 1.0))
+    slow.start()
+    time.sleep(0.02)
+    started = time.perf_counter()
+    try:
+        with Deadline(0.2).activate():
+            flights.do('slow', time.sleep, 1.0)
+        raise AssertionError("waiter must give up at its deadline")
+    except DeadlineExceeded:
+        waited = time.perf_counter() - started
+    slow.join()
+    assert waited < 0.5, waited
+    print(f"✅ Waiter gave up after {waited:.2f}s at its own deadline")
+
+
+def test_pipeline_shares_answer():
+    """Callers asking the same question at once share one answer, audio included"""
+    print("🧪 Testing coalescing of identical questions in the pipeline")
+
+    pipeline = fake_pipeline(
+        audio_processor=FakeAudioProcessor(tts_delay=0.05),
+        response_generator=FakeResponseGenerator("Light bends when it changes medium ({detail_level}).", delay=0.2)
+    )
+    uploads = []
+
+    def upload(audio_data, filename):
+        uploads.append(filename)
+        return f"http://localhost/audio/{filename}.wav"
+
+    try:
+        with mock.patch.object(pipeline, '_upload_audio_for_ivr', side_effect=upload):
+            results = _run_concurrently(
+                lambda i: pipeline.process_question_sync('https://example.com/q.wav', 'english', f"+91999990{i:04d}"),
+                4
+            )
+            assert all(result.success for result in results)
+            assert pipeline.response_generator.calls == 2  # One simple and one detailed answer
+            assert len(pipeline.audio_processor.tts_texts) == 2 and len(uploads) == 2
+            assert len({result.response_audio_url for result in results}) == 1
+            assert len({result.detailed_audio_url for result in results}) == 1
+            print(f"✅ 4 callers, 2 LLM requests, 2 TTS requests; all got {results[0].response_audio_url}")
+
+            pipeline.process_question_sync('https://example.com/q.wav', 'telugu', '+919999900099')
+            assert pipeline.response_generator.calls == 4
+            print("✅ Same question in another language answered separately")
+    finally:
+        pipeline.cleanup()
+
+
+def test_embeddings_and_tts_shared():
+    """Identical embedding and synthesis requests in flight reach the API once"""
+    print("🧪 Testing coalescing of embeddings and TTS")
+
+    embedding_calls = []
+
+    def embed(**kwargs):
+        embedding_calls.append(kwargs['input'])
+        time.sleep(0.1)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.1] * 1536)])
+
+    knowledge_base = NCERTKnowledgeBase.__new__(NCERTKnowledgeBase)
+    knowledge_base.config = Config()
+    knowledge_base.embedding_model = OPENAI_EMBEDDING_MODEL
+    knowledge_base.openai_client = SimpleNamespace(embeddings=SimpleNamespace(create=embed))
+    embeddings = _run_concurrently(lambda i: knowledge_base.generate_query_embedding("What is refraction? "), 5)
+    assert embedding_calls == ["What is refraction?"]
+    assert all(embedding.shape == (1536,) for embedding in embeddings)
+    print("✅ 5 identical queries, 1 embeddings request")
+
+    tts_calls = []
+
+    def synthesize(text, language):
+        tts_calls.append((text, language))
+        time.sleep(0.1)
+        return AudioProcessingResult(success=True, audio_data=b'RIFF' + text.encode())
+
+    processor = AudioProcessor.__new__(AudioProcessor)
+    processor.logger = mock.Mock()
+    processor.text_to_speech = synthesize
+    processor.optimize_audio_for_ivr = lambda audio_data: audio_data
+    texts = ["Refraction is the bending of light."] * 4 + ["A concave mirror curves inwards."]
+    results = _run_concurrently(lambda i: processor.generate_response_audio(texts[i], Language.ENGLISH), 5)
+    assert len(tts_calls) == 2 and all(result.success for result in results)
+    assert results[0].audio_data == results[3].audio_data != results[4].audio_data
+    print("✅ 4 identical answers and 1 other, 2 TTS requests")
+
+
+class _SlowOpenAIClient:
+    def __init__(self, **kwargs):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        time.sleep(0.2)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="Refraction is the bending of light."))],
+            usage=SimpleNamespace(total_tokens=120, prompt_tokens=90)
+        )
+
+
+def test_flights_shared_across_instances():
+    """Generators and pipelines in one process share flights; followers report no tokens"""
+    print("🧪 Testing coalescing across generator and pipeline instances")
+
+    with mock.patch.object(openai, 'OpenAI', _SlowOpenAIClient), \
+            mock.patch.object(Config, 'USE_GEMINI', False):
+        generators = [ResponseGenerator(Config()), ResponseGenerator(Config())]
+    context = {
+        'question': "What is refraction?", 'language': 'English', 'detail_level': 'simple',
+        'search_results': {'found_relevant_content': True, 'source_chunks': []},
+        'context_quality': {'score': 0.8}, 'formatted_context': 'Light bends when it changes medium.'
+    }
+    try:
+        results = _run_concurrently(lambda i: generators[i].generate_response(dict(context)), 2)
+        assert sum(generator.openai_client.calls for generator in generators) == 1
+        leader, follower = sorted(results, key=lambda result: result.get('coalesced', False))
+        assert leader['success'] and leader['tokens_used'] == 120 and not leader.get('coalesced')
+        assert follower['coalesced'] and follower['response_text'] == leader['response_text']
+        assert follower['tokens_used'] == 0 and follower['prompt_tokens'] == 0 and follower['cached_tokens'] == 0
+        print("✅ 2 generators, 1 LLM request; the follower reported 0 tokens")
+    finally:
+        circuit_breakers.reset()
+        recent_answers.clear()
+
+    generator = FakeResponseGenerator(delay=0.2)
+    pipelines = [fake_pipeline(response_generator=generator) for _ in range(2)]
+    try:
+        for pipeline in pipelines:
+            pipeline._upload_audio_for_ivr = lambda audio_data, filename: f"http://localhost/audio/{filename}.wav"
+        results = _run_concurrently(
+            lambda i: pipelines[i].process_question_sync('https://example.com/q.wav', 'english', f"+91999991{i:04d}"),
+            2
+        )
+        assert all(result.success for result in results) and generator.calls == 2  # Simple and detailed, once
+        print("✅ 2 pipelines, one answer computed for both callers")
+    finally:
+        for pipeline in pipelines:
+            pipeline.cleanup()
+
+
+def main():
+    """Run single-flight tests"""
+    tests = [
+        test_single_flight,
+        test_abandoned_leader,
+        test_pipeline_shares_answer,
+        test_embeddings_and_tts_shared,
+        test_flights_shared_across_instances,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} single-flight tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test Slow Call Capture
+Tests threshold capture, the bounded on-disk store and recorded pipeline inputs
+"""
+
+import os
+import sys
+import tempfile
+import time
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.audio.audio_processor import AudioProcessingResult
+from src.utils.call_tracer import call_tracer
+from src.utils.slow_call_store import SlowCallStore
+from pipeline_fakes import FakeAudioProcessor, FakeContextBuilder, FakeResponseGenerator, fake_pipeline
+
+
+def _trace_question(session_id: str):
+    with call_tracer.activate(session_id):
+        with call_tracer.span('question_processing.stt_processing'):
+            call_tracer.set_span_attributes(audio_bytes=32000, transcript_chars=25)
+        with call_tracer.span('llm'):
+            call_tracer.set_span_attributes(prompt_tokens=640, answer_chars=300, llm_attempts=2)
+
+
+def test_threshold_and_bounded_store():
+    """Only questions over the threshold are captured and old captures are pruned"""
+    print("🧪 Testing slow call store")
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SlowCallStore(directory, threshold_seconds=5.0, max_captures=3)
+        session_ids = [f"slow_store_{time.time()}_{i}" for i in range(5)]
+        for session_id in session_ids:
+            _trace_question(session_id)
+
+        assert store.capture_if_slow(session_ids[0], 4.9) is None
+        assert store.capture_if_slow('untraced_session', 9.0) is None
+        capture_ids = [store.capture_if_slow(session_id, 6.0 + i) for i, session_id in enumerate(session_ids)]
+        assert all(capture_ids)
+
+        files = sorted(os.listdir(directory))
+        assert len(files) == 3 and all(name.endswith('.json') for name in files)
+        captures = store.list_captures()
+        assert [capture['session_id'] for capture in captures] == session_ids[:1:-1]
+        print(f"✅ {len(capture_ids)} slow calls captured, {len(files)} kept on disk")
+
+        capture = store.load(capture_ids[-1])
+        assert capture['elapsed_seconds'] == 10.0 and capture['threshold_seconds'] == 5.0
+        assert capture['inputs']['audio_bytes'] == [32000]
+        assert capture['inputs']['prompt_tokens'] == [640]
+        assert capture['inputs']['llm_retries'] == 1
+        assert [stage['name'] for stage in capture['stages']] == ['question_processing.stt_processing', 'llm']
+        assert capture['trace']['session_id'] == session_ids[-1]
+        assert store.load('../' + capture_ids[-1]) is None
+        print("✅ Capture holds stage breakdown, inputs and the full trace")
+
+    disabled = SlowCallStore(tempfile.gettempdir(), threshold_seconds=0.0, max_captures=0)
+    assert disabled.capture_if_slow(session_ids[-1], 60.0) is None
+
+
+def test_inputs_scoped_to_question():
+    """Retries and sizes of earlier questions in the same call are not counted"""
+    print("🧪 Testing per-question input summaries")
+
+    session_id = f"slow_scoped_{time.time()}"
+    question_spans = []
+    with call_tracer.activate(session_id):
+        for attempts, audio_bytes in ((3, 16000), (2, 8000)):
+            with call_tracer.span('background.process_question') as question:
+                for attempt in range(attempts):
+                    with call_tracer.span('pipeline_attempt', attempt=attempt + 1):
+                        with call_tracer.span('question_processing.stt_processing'):
+                            call_tracer.set_span_attributes(audio_bytes=audio_bytes)
+            question_spans.append(question)
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SlowCallStore(directory, threshold_seconds=0.0)
+        capture = store.load(store.capture_if_slow(session_id, 1.0, question_spans[1]))
+        assert capture['question_span_id'] == question_spans[1].span_id
+        assert capture['inputs']['pipeline_retries'] == 1
+        assert capture['inputs']['audio_bytes'] == [8000, 8000]
+        assert len(capture['trace']['spans']) == 2 + 5 * 2
+
+        whole_call = store.load(store.capture_if_slow(session_id, 1.0))
+        assert whole_call['inputs']['pipeline_retries'] == 4
+    print("✅ Second question's capture counts 1 retry, not the 3 attempts of the first question")
+
+
+def test_pipeline_inputs_captured():
+    """A slow job records sizes, chunk scores and retries from every pipeline stage"""
+    print("🧪 Testing pipeline input capture")
+
+    pipeline = fake_pipeline(
+        audio_processor=FakeAudioProcessor(
+            tts_results=[AudioProcessingResult(success=False, error_message="TTS quota exceeded")],
+            tts_result=AudioProcessingResult(success=True, audio_data=b'\x00' * 4800)
+        ),
+        context_builder=FakeContextBuilder([
+            {'chunk_id': 'physics_ch10_003', 'similarity_score': 0.81234},
+            {'chunk_id': 'physics_ch10_007', 'similarity_score': 0.7},
+        ]),
+        response_generator=FakeResponseGenerator(tokens_used=900, prompt_tokens=812, attempt_number=1)
+    )
+    pipeline._upload_audio_for_ivr = lambda audio_data, filename: f"http://localhost/audio/{filename}.wav"
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SlowCallStore(directory, threshold_seconds=0.0, max_captures=10)
+        session_id = f"slow_pipeline_{time.time()}"
+        try:
+            with mock.patch('src.ivr.processing_pipeline.slow_call_store', store):
+                result = pipeline.submit_question('https://example.com/question.wav', 'english',
+                                                  '+919999900035', session_id=session_id).result(30)
+        finally:
+            pipeline.cleanup()
+        assert result.success
+
+        captures = store.list_captures()
+        assert len(captures) == 1 and captures[0]['details'] == {'source': 'job', 'language': 'english'}
+        inputs = store.load(captures[0]['capture_id'])['inputs']
+        assert inputs['audio_bytes'][0] > 0
+        assert inputs['transcript_chars'] == [len("Why does a pencil look bent in water?")]
+        assert inputs['chunk_ids'] == [['physics_ch10_003', 'physics_ch10_007']] * 2
+        assert inputs['chunk_scores'][0] == [0.8123, 0.7]
+        assert inputs['prompt_tokens'] == [812, 812]
+        assert inputs['tts_bytes'] == [4800, 4800]
+        assert inputs['tts_retries'] == 1 and inputs['pipeline_retries'] == 0
+        print(f"✅ Inputs captured: {sorted(inputs)}")
+
+    names = [span['name'] for span in call_tracer.get_trace(session_id)['spans']]
+    assert names[:2] == ['job.queue_wait', 'job.process_question']
+    assert 'question_processing.audio_upload' in names
+    print(f"✅ Job trace has {len(names)} spans")
+
+
+def main():
+    """Run slow call capture tests"""
+    tests = [
+        test_threshold_and_bounded_store,
+        test_inputs_scoped_to_question,
+        test_pipeline_inputs_captured,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} slow call capture tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
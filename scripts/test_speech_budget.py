@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Test Speech Budget
+Tests generation limits derived from spoken length and sentence-boundary truncation
+"""
+
+import os
+import sys
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import openai
+
+from src.audio.audio_processor import AudioProcessor, Language, TTSConfig
+from src.rag.response_generator import ResponseGenerator
+from src.utils import gemini_adapter
+from src.utils.speech_budget import SpeechBudget, estimate_speech_time, truncate_at_sentence
+from config import Config
+
+LONG_ANSWER = ' '.join(f"Light ray number {i} bends when it passes from air into water." for i in range(60))
+
+
+def test_budget_per_level_and_language():
+    """Limits follow the target duration and each language's speaking rate"""
+    print("🧪 Testing speech budgets")
+
+    config = Config()
+    english = SpeechBudget.for_answer(config, 'English', 'simple')
+    detailed = SpeechBudget.for_answer(config, 'English', 'detailed')
+    telugu = SpeechBudget.for_answer(config, Language.TELUGU, 'simple')
+
+    assert english.target_seconds == config.SPEECH_TARGET_SECONDS_SIMPLE
+    assert detailed.max_words > english.max_words and detailed.max_tokens > english.max_tokens
+    assert telugu.max_words < english.max_words  # Telugu is spoken in fewer, longer words
+    assert telugu.max_tokens > english.max_tokens  # ... each taking more tokens
+    assert abs(estimate_speech_time(' '.join(['word'] * english.max_words), 'English') - english.target_seconds) < 1.0
+    print(f"✅ English simple {english.max_words} words / {english.max_tokens} tokens, "
+          f"detailed {detailed.max_words} / {detailed.max_tokens}, Telugu simple {telugu.max_words} / {telugu.max_tokens}")
+
+
+def test_truncate_at_sentence():
+    """Text is cut after the last whole sentence that fits"""
+    print("🧪 Testing sentence-boundary truncation")
+
+    text = "Light travels in straight lines. It bends in water. This is called refraction."
+    assert truncate_at_sentence(text, max_words=11) == "Light travels in straight lines. It bends in water."
+    assert truncate_at_sentence(text, max_words=100) == text
+    assert truncate_at_sentence(text, max_words=3) == "Light travels in"
+
+    telugu = "వెలుతురు ఒక శక్తి రూపం. " * 200
+    cut = truncate_at_sentence(telugu, max_bytes=5000)
+    assert len(cut.encode('utf-8')) <= 5000 and cut.endswith('.')
+    print("✅ Cut at sentence boundaries by words and by UTF-8 bytes")
+
+
+class _LengthLimitedClient:
+    """Chat client that answers at length and stops at max_tokens like the API"""
+
+    def __init__(self, **kwargs):
+        self.max_tokens = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.max_tokens.append(kwargs['max_tokens'])
+        words = LONG_ANSWER.split()[:int(kwargs['max_tokens'] / 1.3)]
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=' '.join(words)), finish_reason='length')],
+            usage=SimpleNamespace(total_tokens=kwargs['max_tokens'] + 200, prompt_tokens=200)
+        )
+
+
+def _context(detail_level, language='English'):
+    return {
+        'question': f"What is refraction? ({detail_level}, {language})", 'language': language,
+        'detail_level': detail_level,
+        'search_results': {'found_relevant_content': True, 'source_chunks': []},
+        'context_quality': {'score': 0.8}, 'formatted_context': 'Light bends when it changes medium.'
+    }
+
+
+def test_generation_limited():
+    """Generation is capped at the spoken length and a cut-off answer ends on a whole sentence"""
+    print("🧪 Testing generation limits")
+
+    with mock.patch.object(openai, 'OpenAI', _LengthLimitedClient), \
+            mock.patch.object(Config, 'USE_GEMINI', False):
+        generator = ResponseGenerator(Config())
+    simple = generator.generate_response(_context('simple'))
+    detailed = generator.generate_response(_context('detailed'))
+    generator.generate_response(_context('simple', 'Telugu'))
+    simple_limit, detailed_limit, telugu_limit = generator.openai_client.max_tokens
+
+    budget = SpeechBudget.for_answer(generator.config, 'English', 'simple')
+    assert simple_limit == budget.max_tokens < detailed_limit and telugu_limit > simple_limit
+    assert simple['success'] and simple['response_text'].endswith('water.')
+    assert simple['word_count'] <= budget.max_words and simple['within_time_limit']
+    assert detailed['word_count'] > simple['word_count']
+    print(f"✅ max_tokens {simple_limit} simple, {detailed_limit} detailed, {telugu_limit} Telugu; "
+          f"simple answer {simple['word_count']} words, ~{simple['estimated_speech_time']:.0f}s, ends on a sentence")
+
+
+def test_gemini_cut_off_reported():
+    """Gemini answers stopped at the token limit are reported like OpenAI's, after room for thinking"""
+    print("🧪 Testing Gemini finish reasons")
+
+    def generate_content(prompt, generation_config, safety_settings):
+        reason, answer_tokens = replies.pop(0)
+        return SimpleNamespace(
+            candidates=[SimpleNamespace(content=SimpleNamespace(parts=[SimpleNamespace(text=LONG_ANSWER)]),
+                                        finish_reason=SimpleNamespace(name=reason))],
+            usage_metadata=SimpleNamespace(prompt_token_count=200, cached_content_token_count=0,
+                                           candidates_token_count=answer_tokens, total_token_count=900)
+        )
+
+    replies = [('MAX_TOKENS', 120), ('STOP', 160), ('STOP', 90)]
+    with mock.patch.object(gemini_adapter, 'GEMINI_AVAILABLE', True), \
+            mock.patch.object(gemini_adapter, 'genai') as genai:
+        genai.GenerativeModel.return_value.generate_content.side_effect = generate_content
+        adapter = gemini_adapter.GeminiAdapter('test-key', 'gemini-2.5-flash')
+        messages = [{'role': 'user', 'content': 'What is refraction?'}]
+        reasons = [adapter.chat_completions_create('gemini-2.5-flash', messages, max_tokens=150)
+                   .choices[0].finish_reason for _ in range(3)]
+        limit = genai.types.GenerationConfig.call_args.kwargs['max_output_tokens']
+    assert limit == 150 + gemini_adapter.THINKING_HEADROOM_TOKENS, limit
+    assert reasons == ['length', 'length', 'stop'], reasons
+    print(f"✅ max_output_tokens {limit} for a 150-token answer; MAX_TOKENS and over-long answers reported as 'length'")
+
+
+def test_tts_keeps_budgeted_answer():
+    """TTS speaks a full detailed answer and cuts longer text at a sentence boundary"""
+    print("🧪 Testing TTS input length")
+
+    spoken = []
+
+    def synthesize_speech(input, voice, audio_config, timeout):
+        spoken.append(input.text)
+        return SimpleNamespace(audio_content=b'RIFF')
+
+    processor = AudioProcessor.__new__(AudioProcessor)
+    processor.config = Config()
+    processor.logger = mock.Mock()
+    processor.tts_configs = {Language.ENGLISH: TTSConfig(language_code=Language.ENGLISH.value)}
+    processor.tts_client = SimpleNamespace(synthesize_speech=synthesize_speech)
+
+    max_words = SpeechBudget.for_answer(processor.config, 'English', 'detailed').max_words
+    answer = truncate_at_sentence(LONG_ANSWER, max_words=max_words)
+    assert len(answer) > 500
+    assert processor.text_to_speech(answer, Language.ENGLISH).success and spoken[-1] == answer
+
+    processor.text_to_speech(LONG_ANSWER, Language.ENGLISH)
+    assert spoken[-1] == answer and spoken[-1].endswith('.')
+    print(f"✅ {len(answer)}-character answer spoken whole; longer text cut to it at a sentence boundary")
+
+
+def main():
+    """Run speech budget tests"""
+    tests = [
+        test_budget_per_level_and_language,
+        test_truncate_at_sentence,
+        test_generation_limited,
+        test_gemini_cut_off_reported,
+        test_tts_keeps_budgeted_answer,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} speech budget tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
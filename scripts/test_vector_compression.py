@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Test Vector Compression
+Tests compressed FAISS indexes, exact re-ranking from memory-mapped vectors and the recall evaluation
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from unittest import mock
+
+import numpy as np
+
+# Add project root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.content.content_processor import ContentChunk
+from src.content.vector_compression import evaluate_recall, normalize_in_place
+from src.content.vector_database import OPENAI_EMBEDDING_MODEL, FAISSVectorDatabase
+from config import Config
+
+
+def _clustered_vectors(count=400, dimension=1536, clusters=40, seed=1):
+    """Embedding-like vectors: topics (cluster centres) with per-chunk variation"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dimension))
+    vectors = centres[rng.integers(clusters, size=count)] + 0.6 * rng.normal(size=(count, dimension))
+    return normalize_in_place(vectors.astype('float32'))
+
+
+def _config(compression):
+    config = Config()
+    config.VECTOR_INDEX_COMPRESSION = compression
+    config.VECTOR_RERANK_CANDIDATES = 20
+    return config
+
+
+def _chunks(vectors, start=0):
+    return [
+        ContentChunk(id=f"c{i}", chapter_name='Light', section_name=f"Section {i}", content_text=f"Chunk {i}",
+                     subject='Physics', grade=10, language='english', word_count=2, chunk_index=i,
+                     total_chunks=len(vectors), metadata={}, embedding=vector)
+        for i, vector in enumerate(vectors, start=start)
+    ]
+
+
+def test_recall_evaluation():
+    """Re-ranking restores flat-index recall for every compression"""
+    print("🧪 Testing recall@k of compressed indexes")
+
+    report = evaluate_recall(_clustered_vectors(), k=5, queries=100, rerank_candidates=50)
+    assert report['flat']['recall_at_k'] == 1.0 and report['flat']['bytes_per_vector'] == 6144
+    assert report['fp16']['bytes_per_vector'] == 3072 and report['sq8']['bytes_per_vector'] == 1536
+    assert report['pq']['bytes_per_vector'] == 72  # 6-bit codes: 400 vectors train 64 centroids per sub-vector
+    assert report['fp16']['recall_at_k'] >= 0.99 and report['sq8']['recall_at_k'] >= 0.95
+    for compression, row in report.items():
+        assert row['reranked_recall_at_k'] >= 0.98, (compression, row)
+    print("✅ " + ", ".join(f"{c} {row['bytes_per_vector']}B recall {row['recall_at_k']:.2f}"
+                             f"->{row['reranked_recall_at_k']:.2f}" for c, row in report.items()))
+
+
+def test_compressed_search_matches_flat():
+    """Compressed databases return the flat results and exact scores, from memory-mapped vectors after a reload"""
+    print("🧪 Testing compressed search with exact re-ranking")
+
+    vectors = _clustered_vectors(count=120, seed=2)
+    queries = vectors[:10] + 0.05 * np.random.default_rng(3).normal(size=(10, 1536)).astype('float32')
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = FAISSVectorDatabase(_config('flat'), OPENAI_EMBEDDING_MODEL, os.path.join(tmp, 'flat'))
+        flat.add_chunks(_chunks(vectors))
+        expected = [[(chunk.id, round(score, 4)) for chunk, score in flat.search(q, top_k=3)] for q in queries]
+
+        for compression in ('fp16', 'sq8', 'pq'):
+            db_dir = os.path.join(tmp, compression)
+            database = FAISSVectorDatabase(_config(compression), OPENAI_EMBEDDING_MODEL, db_dir)
+            # Added in two batches: the quantizer is retrained with the second
+            database.add_chunks(_chunks(vectors[:60]))
+            database.add_chunks(_chunks(vectors[60:], start=60))
+            database.save_database()
+            with open(os.path.join(database.index_dir, 'manifest.json')) as f:
+                assert json.load(f)['compression'] == compression
+
+            reloaded = FAISSVectorDatabase(_config(compression), OPENAI_EMBEDDING_MODEL, db_dir)
+            assert reloaded.load_database() and isinstance(reloaded.full_vectors, np.memmap)
+            results = [[(chunk.id, round(score, 4)) for chunk, score in reloaded.search(q, top_k=3)] for q in queries]
+            assert results == expected, (compression, results[:2], expected[:2])
+
+            stats = reloaded.get_database_stats()
+            assert stats['compression'] == compression and stats['index_bytes'] < 120 * 6144
+    print("✅ fp16, sq8 and pq searches return the flat top 3 with exact scores after reloading")
+
+
+def test_conversion_and_copies():
+    """Saved indexes convert to the configured compression; normalization does not copy vectors"""
+    print("🧪 Testing compression changes and build copies")
+
+    vectors = _clustered_vectors(count=50, seed=4)
+    assert np.shares_memory(normalize_in_place(vectors), vectors)
+    database = FAISSVectorDatabase(_config('flat'), OPENAI_EMBEDDING_MODEL, '/tmp')
+    float32 = vectors.copy()
+    assert np.shares_memory(database.normalize_embeddings(float32), float32)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = FAISSVectorDatabase(_config('flat'), OPENAI_EMBEDDING_MODEL, tmp)
+        flat.add_chunks(_chunks(vectors))
+        flat.save_database()
+        assert not os.path.exists(flat.vectors_path)
+
+        sq8 = FAISSVectorDatabase(_config('sq8'), OPENAI_EMBEDDING_MODEL, tmp)
+        assert sq8.load_database() and sq8.has_vectors and isinstance(sq8.full_vectors, np.memmap)
+        assert os.path.exists(sq8.vectors_path)
+        assert sq8.get_database_stats()['index_bytes'] == 50 * 1536
+        assert sq8.search(vectors[7], top_k=1)[0][0].id == 'c7'
+        sq8.save_database()
+
+        pq = FAISSVectorDatabase(_config('pq'), OPENAI_EMBEDDING_MODEL, tmp)
+        assert pq.load_database() and isinstance(pq.full_vectors, np.memmap)
+        assert pq.search(vectors[7], top_k=1)[0][0].id == 'c7'
+
+        back = FAISSVectorDatabase(_config('flat'), OPENAI_EMBEDDING_MODEL, tmp)
+        assert back.load_database() and back.full_vectors is None and back.search(vectors[9])[0][0].id == 'c9'
+        back.save_database()
+        assert not os.path.exists(back.vectors_path)
+
+        with mock.patch.object(sys, 'argv', ['evaluate_vector_index.py', '--db-dir', tmp, '--model',
+                                             'text-embedding-3-small', '-k', '3', '--queries', '20']):
+            sys.path.insert(0, os.path.dirname(__file__))
+            import evaluate_vector_index
+            output = io.StringIO()
+            with redirect_stdout(output):
+                assert evaluate_vector_index.main() == 0
+        assert 'sq8' in output.getvalue() and 'recall@3' in output.getvalue()
+
+    try:
+        FAISSVectorDatabase(_config('ivf'), OPENAI_EMBEDDING_MODEL, '/tmp')
+        assert False, "Unknown compression accepted"
+    except ValueError:
+        pass
+    print("✅ flat -> sq8 -> pq/flat conversions on load re-rank from memory-mapped vectors; "
+          "evaluation command reports recall")
+
+
+def main():
+    """Run vector compression tests"""
+    tests = [
+        test_recall_evaluation,
+        test_compressed_search_matches_flat,
+        test_conversion_and_copies,
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"❌ {test.__name__} failed: {e}")
+
+    print(f"\n{passed}/{len(tests)} vector compression tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -11,7 +11,12 @@ from .audio_utils import (
     AudioCodec,
     AudioQualityChecker,
     AudioFormat,
-    create_test_audio_file
+    VoiceActivityDetector,
+    VADResult,
+    create_test_audio_file,
+    read_wav,
+    write_wav,
+    resample_poly
 )
 from .language_detector import (
     LanguageDetector,
@@ -29,9 +34,14 @@ __all__ = [
     'AudioCodec',
     'AudioQualityChecker',
     'AudioFormat',
+    'VoiceActivityDetector',
+    'VADResult',
     'LanguageDetector',
     'LanguageDetectionResult',
     'AccentType',
     'AccentHandler',
-    'create_test_audio_file'
+    'create_test_audio_file',
+    'read_wav',
+    'write_wav',
+    'resample_poly'
 ]
\ No newline at end of file
@@ -6,7 +6,6 @@ with support for English and Telugu languages, optimized for IVR platform compat
 """
 
 import logging
-import time
 from typing import Optional
 from dataclasses import dataclass
 from enum import Enum
@@ -22,17 +21,23 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 from config import Config
 
-# Add src to path for utils import
-sys.path.insert(0, str(Path(__file__).parent.parent))
-from utils.logging_config import setup_logging
-from utils.performance_decorators import track_performance, track_cache_usage
-from utils.error_tracker import error_tracker
+from src.utils.logging_config import setup_logging
+from src.utils.performance_decorators import track_performance, track_cache_usage
+from src.utils.error_tracker import error_tracker
+from src.utils.circuit_breaker import CircuitOpenError, circuit_breakers
+from src.utils.deadline import DeadlineExceeded, current_deadline
+from src.utils.single_flight import SingleFlight
+from src.utils.speech_budget import TTS_MAX_BYTES, TTS_SPEAKING_RATE, SpeechBudget, truncate_at_sentence
 from .language_detector import LanguageDetector
 from .language_types import Language
+from .audio_utils import VoiceActivityDetector, AudioCodec, AudioFormat
 
 
 _LOGGING_CONFIGURED = False
 
+# Shared by all processors: identical answers being synthesized at once are synthesized once
+_tts_flights = SingleFlight('tts')
+
 
 class VoiceGender(Enum):
     """Voice gender options for TTS"""
@@ -50,6 +55,8 @@ class AudioProcessingResult:
     error_message: Optional[str] = None
     confidence: Optional[float] = None
     detected_language: Optional[str] = None
+    speech_duration: Optional[float] = None
+    circuit_open: bool = False  # Failed fast because the Google service's circuit is open
 
 
 @dataclass
@@ -100,6 +107,15 @@ class AudioProcessor:
                 detector_error,
             )
         
+        # Local voice activity detection so silent recordings never reach the STT API
+        self.vad = None
+        if getattr(self.config, 'VAD_ENABLED', True):
+            self.vad = VoiceActivityDetector(
+                energy_threshold_db=getattr(self.config, 'VAD_ENERGY_THRESHOLD_DB', -45.0),
+                hangover_ms=getattr(self.config, 'VAD_HANGOVER_MS', 200),
+                min_speech_ms=getattr(self.config, 'VAD_MIN_SPEECH_MS', 300)
+            )
+        
         # Language configurations for STT
         self.stt_configs = {
             Language.ENGLISH: speech.RecognitionConfig(
@@ -126,13 +142,13 @@ class AudioProcessor:
                 language_code=Language.ENGLISH.value,
                 voice_name="en-IN-Wavenet-A",  # Indian English female voice
                 gender=VoiceGender.FEMALE,
-                speaking_rate=0.9,  # Slightly slower for clarity
+                speaking_rate=TTS_SPEAKING_RATE,  # Slightly slower for clarity
             ),
             Language.TELUGU: TTSConfig(
                 language_code=Language.TELUGU.value,
                 voice_name="te-IN-Standard-A",  # Telugu female voice
                 gender=VoiceGender.FEMALE,
-                speaking_rate=0.9,
+                speaking_rate=TTS_SPEAKING_RATE,
             )
         }
         
@@ -166,6 +182,28 @@ class AudioProcessor:
             AudioProcessingResult with transcribed text or error information
         """
         last_error = None
+        speech_duration = None
+        deadline = current_deadline()
+        
+        if self.vad is not None:
+            vad_result = self.vad.analyze(audio_data)
+            if vad_result is not None:
+                speech_duration = vad_result.speech_duration
+                if not vad_result.has_speech:
+                    self.logger.info(
+                        f"VAD rejected recording: {vad_result.speech_duration:.2f}s speech "
+                        f"in {vad_result.total_duration:.2f}s audio, skipping STT"
+                    )
+                    return AudioProcessingResult(
+                        success=False,
+                        error_message=self.fallback_messages["unclear_speech"][language],
+                        speech_duration=0.0
+                    )
+                self.logger.debug(
+                    f"VAD trimmed audio to {vad_result.speech_start:.2f}s-{vad_result.speech_end:.2f}s "
+                    f"of {vad_result.total_duration:.2f}s"
+                )
+                audio_data = vad_result.trimmed_audio
         
         for attempt in range(max_retries + 1):
             try:
@@ -176,15 +214,18 @@ class AudioProcessor:
                 self.logger.info(f"Starting STT processing for {language.value} (attempt {attempt + 1})")
                 
                 # Perform speech recognition with timeout
-                response = self.stt_client.recognize(config=config, audio=audio, timeout=10)
+                with circuit_breakers.get('google_stt').guard(ignore=(google_exceptions.InvalidArgument,)):
+                    response = self.stt_client.recognize(config=config, audio=audio,
+                                                         timeout=deadline.timeout(10))
                 
                 if not response.results:
                     self.logger.warning(f"No speech detected in audio (attempt {attempt + 1})")
-                    if attempt < max_retries:
+                    if attempt < max_retries and deadline.wait_for_retry(0.0):
                         continue
                     return AudioProcessingResult(
                         success=False,
-                        error_message=self.fallback_messages["unclear_speech"][language]
+                        error_message=self.fallback_messages["unclear_speech"][language],
+                        speech_duration=speech_duration
                     )
                 
                 # Get the best transcription result
@@ -197,19 +238,29 @@ class AudioProcessor:
                 # Check confidence threshold with retry logic
                 if confidence < 0.5:  # Lower threshold for retries
                     self.logger.warning(f"Low confidence transcription on attempt {attempt + 1}: {confidence:.2f}")
-                    if attempt < max_retries:
-                        time.sleep(0.5)  # Brief delay before retry
+                    if attempt < max_retries and deadline.wait_for_retry(0.5):  # Brief delay before retry
                         continue
                     return AudioProcessingResult(
                         success=False,
-                        error_message=self.fallback_messages["unclear_speech"][language]
+                        error_message=self.fallback_messages["unclear_speech"][language],
+                        speech_duration=speech_duration
                     )
                 
                 return AudioProcessingResult(
                     success=True,
                     content=transcript.strip(),
                     confidence=confidence,
-                    detected_language=language.value
+                    detected_language=language.value,
+                    speech_duration=speech_duration
+                )
+                
+            except CircuitOpenError as e:
+                self.logger.warning(f"Skipping STT: {e}")
+                return AudioProcessingResult(
+                    success=False,
+                    error_message=self.fallback_messages["processing_error"][language],
+                    speech_duration=speech_duration,
+                    circuit_open=True
                 )
                 
             except google_exceptions.InvalidArgument as e:
@@ -221,23 +272,23 @@ class AudioProcessor:
             except google_exceptions.DeadlineExceeded as e:
                 self.logger.error(f"STT timeout on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(1.0)  # Longer delay for timeout
+                if attempt < max_retries and deadline.wait_for_retry(1.0):  # Longer delay for timeout
                     continue
+                break
                     
             except google_exceptions.ResourceExhausted as e:
                 self.logger.error(f"STT quota exceeded on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(2.0)  # Longer delay for quota issues
+                if attempt < max_retries and deadline.wait_for_retry(2.0):  # Longer delay for quota issues
                     continue
+                break
                     
             except Exception as e:
                 self.logger.error(f"STT processing failed on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(0.5)
+                if attempt < max_retries and deadline.wait_for_retry(0.5):
                     continue
+                break
         
         # All attempts failed
         self.logger.error(f"STT failed after {max_retries + 1} attempts")
@@ -270,12 +321,16 @@ class AudioProcessor:
                 error_message="No text provided for speech synthesis"
             )
         
-        # Truncate text if too long (for demo reliability)
-        if len(text) > 500:
-            text = text[:497] + "..."
-            self.logger.warning(f"Text truncated to 500 characters for TTS")
+        # Answers are generated to fit their spoken length; cut anything longer than the
+        # longest answer at a sentence boundary, within the API's input limit
+        max_words = SpeechBudget.for_answer(self.config, language, 'detailed').max_words
+        fitted = truncate_at_sentence(text, max_words=max_words, max_bytes=TTS_MAX_BYTES)
+        if fitted != text.strip():
+            self.logger.warning(f"Text cut from {len(text.split())} to {len(fitted.split())} words for TTS")
+        text = fitted
         
         last_error = None
+        deadline = current_deadline()
         
         for attempt in range(max_retries + 1):
             try:
@@ -304,12 +359,13 @@ class AudioProcessor:
                 self.logger.info(f"Starting TTS processing for {language.value} (attempt {attempt + 1})")
                 
                 # Perform text-to-speech synthesis with timeout
-                response = self.tts_client.synthesize_speech(
-                    input=synthesis_input,
-                    voice=voice,
-                    audio_config=audio_config,
-                    timeout=15  # 15 second timeout
-                )
+                with circuit_breakers.get('google_tts').guard(ignore=(google_exceptions.InvalidArgument,)):
+                    response = self.tts_client.synthesize_speech(
+                        input=synthesis_input,
+                        voice=voice,
+                        audio_config=audio_config,
+                        timeout=deadline.timeout(15)  # At most 15s, less if the caller's deadline is closer
+                    )
                 
                 self.logger.info(f"TTS synthesis completed successfully on attempt {attempt + 1}")
                 
@@ -318,6 +374,14 @@ class AudioProcessor:
                     audio_data=response.audio_content
                 )
                 
+            except CircuitOpenError as e:
+                self.logger.warning(f"Skipping TTS: {e}")
+                return AudioProcessingResult(
+                    success=False,
+                    error_message=str(e),
+                    circuit_open=True
+                )
+                
             except google_exceptions.InvalidArgument as e:
                 self.logger.error(f"Invalid TTS parameters on attempt {attempt + 1}: {e}")
                 last_error = e
@@ -327,23 +391,23 @@ class AudioProcessor:
             except google_exceptions.DeadlineExceeded as e:
                 self.logger.error(f"TTS timeout on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(1.0)
+                if attempt < max_retries and deadline.wait_for_retry(1.0):
                     continue
+                break
                     
             except google_exceptions.ResourceExhausted as e:
                 self.logger.error(f"TTS quota exceeded on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(2.0)  # Longer delay for quota issues
+                if attempt < max_retries and deadline.wait_for_retry(2.0):  # Longer delay for quota issues
                     continue
+                break
                     
             except Exception as e:
                 self.logger.error(f"TTS processing failed on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(0.5)
+                if attempt < max_retries and deadline.wait_for_retry(0.5):
                     continue
+                break
         
         # All attempts failed
         self.logger.error(f"TTS failed after {max_retries + 1} attempts")
@@ -415,6 +479,9 @@ class AudioProcessor:
         """
         Optimize audio data for IVR platform compatibility
         
+        Normalizes loudness, downmixes and resamples to the IVR sample rate and
+        encodes with the configured telephony codec (16-bit PCM or 8-bit G.711).
+        
         Args:
             audio_data: Raw audio data
             
@@ -422,12 +489,25 @@ class AudioProcessor:
             Optimized audio data for IVR platforms
         """
         try:
-            # For now, return the audio as-is since Google Cloud TTS
-            # already provides optimized output for telephony
-            # Future enhancement: Add codec conversion (PCMU/PCMA) if needed
+            try:
+                output_format = AudioFormat[getattr(self.config, 'AUDIO_IVR_ENCODING', 'LINEAR16').upper()]
+            except KeyError:
+                output_format = AudioFormat.LINEAR16
             
-            self.logger.info("Audio optimization completed")
-            return audio_data
+            normalized = AudioCodec.normalize_audio_volume(
+                audio_data,
+                target_db=getattr(self.config, 'AUDIO_NORMALIZE_TARGET_DB', -16.0)
+            )
+            optimized = AudioCodec.convert_to_ivr_format(
+                normalized,
+                target_rate=self.config.AUDIO_IVR_SAMPLE_RATE,
+                output_format=output_format
+            )
+            
+            self.logger.info(
+                f"Audio optimization completed: {len(audio_data)} -> {len(optimized)} bytes ({output_format.value})"
+            )
+            return optimized
             
         except Exception as e:
             self.logger.error(f"Audio optimization failed: {e}")
@@ -474,8 +554,8 @@ class AudioProcessor:
                 self.logger.info(f"Question processed successfully in {target_language.value}")
                 return result
             else:
-                # Try alternative language if detection was used
-                if not preferred_language:
+                # Try alternative language if detection was used (pointless when VAD found no speech)
+                if not preferred_language and result.speech_duration != 0.0 and not result.circuit_open:
                     alt_language = Language.TELUGU if target_language == Language.ENGLISH else Language.ENGLISH
                     alt_result = self.speech_to_text(audio_data, alt_language)
                     
@@ -503,6 +583,19 @@ class AudioProcessor:
         Returns:
             AudioProcessingResult with optimized audio data
         """
+        try:
+            result, _ = _tts_flights.do((language, response_text), self._synthesize_response_audio,
+                                        response_text, language)
+            return result
+        except DeadlineExceeded as e:
+            self.logger.warning(f"Gave up waiting for response audio: {e}")
+            return AudioProcessingResult(
+                success=False,
+                error_message=str(e)
+            )
+
+    def _synthesize_response_audio(self, response_text: str, language: Language) -> AudioProcessingResult:
+        """Synthesize and optimize one response for IVR delivery"""
         try:
             # Convert text to speech
             tts_result = self.text_to_speech(response_text, language)
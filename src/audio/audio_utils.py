@@ -4,10 +4,15 @@ Audio utility functions for format conversion and IVR optimization
 
 import io
 import wave
+import struct
 import logging
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Tuple
 from enum import Enum
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,6 +24,228 @@ class AudioFormat(Enum):
     WAV = "WAV"           # WAV container format
 
 
+def _decode_pcm_frames(frames: bytes, sample_width: int, channels: int) -> np.ndarray:
+    """
+    Decode raw PCM frames into a float32 array in [-1, 1] with shape (samples, channels)
+    
+    Args:
+        frames: Raw PCM bytes (8-bit unsigned or 16-bit signed little-endian)
+        sample_width: Bytes per sample
+        channels: Number of interleaved channels
+        
+    Returns:
+        Float32 sample matrix
+    """
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(frames, dtype='<i2').astype(np.float32) / 32768.0
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width}")
+    
+    usable = len(samples) - (len(samples) % channels)
+    return samples[:usable].reshape(-1, channels)
+
+
+def _encode_pcm_frames(samples: np.ndarray) -> bytes:
+    """Encode float samples in [-1, 1] as 16-bit signed little-endian PCM"""
+    return np.clip(np.round(samples * 32767.0), -32768, 32767).astype('<i2').tobytes()
+
+
+def _build_ulaw_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """Build G.711 μ-law encode (65536 entries, indexed by uint16 view) and decode (256 entries) tables"""
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 2
+    mask = np.where(pcm >= 0, 0xFF, 0x7F)
+    magnitude = np.minimum(np.abs(pcm), 8159) + 0x21
+    segment = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude)
+    encoded = np.where(segment >= 8, 0x7F, (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)) ^ mask
+    # Reorder so the table can be indexed directly by int16.view(uint16)
+    encode_table = np.roll(encoded.astype(np.uint8), -32768)
+    
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (codes >> 4) & 0x07
+    magnitude = (((codes & 0x0F) << 3) + 0x84) << exponent
+    decode_table = np.where(codes & 0x80, 0x84 - magnitude, magnitude - 0x84).astype(np.int16)
+    return encode_table, decode_table
+
+
+def _build_alaw_tables() -> Tuple[np.ndarray, np.ndarray]:
+    """Build G.711 A-law encode (65536 entries, indexed by uint16 view) and decode (256 entries) tables"""
+    pcm = np.arange(-32768, 32768, dtype=np.int32) >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    magnitude = np.where(pcm >= 0, pcm, -pcm - 1)
+    segment = np.searchsorted(np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF]), magnitude)
+    shift = np.where(segment < 2, 1, segment)
+    encoded = (segment << 4) | ((magnitude >> shift) & 0x0F)
+    encoded = np.where(segment >= 8, 0x7F, encoded) ^ mask
+    encode_table = np.roll(encoded.astype(np.uint8), -32768)
+    
+    codes = np.arange(256, dtype=np.int32) ^ 0x55
+    segment = (codes & 0x70) >> 4
+    magnitude = ((codes & 0x0F) << 4) + np.where(segment == 0, 8, 0x108)
+    magnitude = np.where(segment > 1, magnitude << np.maximum(segment - 1, 0), magnitude)
+    decode_table = np.where(codes & 0x80, magnitude, -magnitude).astype(np.int16)
+    return encode_table, decode_table
+
+
+_ULAW_ENCODE, _ULAW_DECODE = _build_ulaw_tables()
+_ALAW_ENCODE, _ALAW_DECODE = _build_alaw_tables()
+
+# WAVE format tags for the formats we write
+_WAVE_FORMAT_TAGS = {
+    AudioFormat.LINEAR16: 0x0001,
+    AudioFormat.PCMA: 0x0006,
+    AudioFormat.PCMU: 0x0007,
+}
+
+
+def _kaiser_lowpass(up: int, down: int, half_len_factor: int = 10, beta: float = 5.0) -> np.ndarray:
+    """Design the anti-aliasing FIR used by polyphase resampling (gain scaled by the upsampling factor)"""
+    max_rate = max(up, down)
+    half_len = half_len_factor * max_rate
+    cutoff = 1.0 / max_rate
+    taps = np.arange(-half_len, half_len + 1, dtype=np.float64)
+    return (cutoff * np.sinc(cutoff * taps) * np.kaiser(len(taps), beta) * up).astype(np.float32)
+
+
+# Output samples computed per matrix row: enough for BLAS to beat per-tap loops
+_RESAMPLE_BLOCK = 32
+
+
+@lru_cache(maxsize=16)
+def _resample_plan(up: int, down: int) -> Tuple[np.ndarray, int, int, int]:
+    """
+    Block Toeplitz form of the polyphase filter for one rate pair
+    
+    Consecutive output blocks of `up * repeats` samples read windows of the
+    input that start `down * repeats` samples apart, so a whole resample is
+    one matrix product of the overlapping input windows with this matrix.
+    
+    Returns:
+        (weights of shape (span, block), first input offset, span, input step)
+    """
+    h = _kaiser_lowpass(up, down)
+    half_len = (len(h) - 1) // 2
+    repeats = max(1, _RESAMPLE_BLOCK // up)
+    block = up * repeats
+    # Output n is sum over inputs j of x[j] * h[n * down + half_len - j * up]
+    first = -((len(h) - 1 - half_len) // up)
+    last = ((block - 1) * down + half_len) // up
+    inputs = np.arange(first, last + 1)
+    taps = (np.arange(block) * down + half_len)[None, :] - inputs[:, None] * up
+    valid = (taps >= 0) & (taps < len(h))
+    weights = np.where(valid, h[np.clip(taps, 0, len(h) - 1)], 0).astype(np.float32)
+    return weights, first, len(inputs), down * repeats
+
+
+def resample_poly(samples: np.ndarray, input_rate: int, output_rate: int) -> np.ndarray:
+    """
+    Resample mono samples with a polyphase windowed-sinc filter
+    
+    Only the output samples are computed: the input is viewed (without
+    copying) as overlapping windows, one per block of output samples, and
+    multiplied by the rate pair's precomputed filter matrix in a single
+    BLAS call.
+    
+    Args:
+        samples: Mono float samples
+        input_rate: Input sample rate in Hz
+        output_rate: Output sample rate in Hz
+        
+    Returns:
+        Resampled float32 samples
+    """
+    if input_rate == output_rate or len(samples) == 0:
+        return samples.astype(np.float32, copy=False)
+    
+    g = int(np.gcd(input_rate, output_rate))
+    up, down = output_rate // g, input_rate // g
+    weights, first, span, step = _resample_plan(up, down)
+    
+    n_out = -(-len(samples) * up // down)
+    n_blocks = -(-n_out // weights.shape[1])
+    padded = np.zeros(n_blocks * step + span, dtype=np.float32)
+    padded[-first:-first + len(samples)] = samples
+    windows = np.lib.stride_tricks.as_strided(
+        padded, shape=(n_blocks, span), strides=(step * padded.itemsize, padded.itemsize), writeable=False
+    )
+    return (windows @ weights).reshape(-1)[:n_out]
+
+
+def write_wav(samples: np.ndarray, sample_rate: int,
+              audio_format: AudioFormat = AudioFormat.LINEAR16) -> bytes:
+    """
+    Write mono float samples to a WAV container
+    
+    Args:
+        samples: Mono float samples in [-1, 1]
+        sample_rate: Sample rate in Hz
+        audio_format: LINEAR16 for 16-bit PCM, PCMU/PCMA for 8-bit G.711
+        
+    Returns:
+        WAV file bytes
+    """
+    if audio_format in (AudioFormat.LINEAR16, AudioFormat.WAV):
+        output_io = io.BytesIO()
+        with wave.open(output_io, 'wb') as output_wav:
+            output_wav.setnchannels(1)
+            output_wav.setsampwidth(2)
+            output_wav.setframerate(sample_rate)
+            output_wav.writeframes(_encode_pcm_frames(samples))
+        return output_io.getvalue()
+    
+    payload = AudioCodec.encode_g711(samples, audio_format)
+    # Non-PCM formats need the extended fmt chunk (cbSize) and a fact chunk
+    fmt_chunk = struct.pack('<HHIIHHH', _WAVE_FORMAT_TAGS[audio_format], 1, sample_rate,
+                            sample_rate, 1, 8, 0)
+    fact_chunk = struct.pack('<I', len(payload))
+    pad = b'\x00' if len(payload) % 2 else b''
+    body = (b'WAVE'
+            + b'fmt ' + struct.pack('<I', len(fmt_chunk)) + fmt_chunk
+            + b'fact' + struct.pack('<I', len(fact_chunk)) + fact_chunk
+            + b'data' + struct.pack('<I', len(payload)) + payload + pad)
+    return b'RIFF' + struct.pack('<I', len(body)) + body
+
+
+def read_wav(audio_data: bytes) -> Tuple[np.ndarray, int]:
+    """
+    Read a PCM or G.711 WAV into mono float samples
+    
+    Args:
+        audio_data: WAV file bytes
+        
+    Returns:
+        Tuple of (mono float32 samples, sample rate)
+    """
+    if audio_data[:4] != b'RIFF' or audio_data[8:12] != b'WAVE':
+        raise ValueError("Not a RIFF/WAVE file")
+    
+    offset = 12
+    format_tag = channels = sample_rate = bits = None
+    while offset + 8 <= len(audio_data):
+        chunk_id = audio_data[offset:offset + 4]
+        chunk_size = struct.unpack('<I', audio_data[offset + 4:offset + 8])[0]
+        chunk = audio_data[offset + 8:offset + 8 + chunk_size]
+        if chunk_id == b'fmt ':
+            format_tag, channels, sample_rate = struct.unpack('<HHI', chunk[:8])
+            bits = struct.unpack('<H', chunk[14:16])[0]
+        elif chunk_id == b'data':
+            if format_tag is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            if format_tag == _WAVE_FORMAT_TAGS[AudioFormat.PCMU]:
+                samples = AudioCodec.decode_g711(chunk, AudioFormat.PCMU)
+            elif format_tag == _WAVE_FORMAT_TAGS[AudioFormat.PCMA]:
+                samples = AudioCodec.decode_g711(chunk, AudioFormat.PCMA)
+            elif format_tag in (0x0001, 0xFFFE):
+                return _decode_pcm_frames(chunk, bits // 8, channels).mean(axis=1), sample_rate
+            else:
+                raise ValueError(f"Unsupported WAV format tag: {format_tag:#x}")
+            return samples.reshape(-1, channels).mean(axis=1) if channels > 1 else samples, sample_rate
+        offset += 8 + chunk_size + (chunk_size % 2)
+    
+    raise ValueError("WAV file has no data chunk")
+
+
 class AudioCodec:
     """Audio codec utilities for IVR platform compatibility"""
     
@@ -64,54 +291,75 @@ class AudioCodec:
             return False
 
     @staticmethod
-    def convert_to_ivr_format(audio_data: bytes, target_rate: int = 8000) -> bytes:
+    def encode_g711(samples: np.ndarray, audio_format: AudioFormat = AudioFormat.PCMU) -> bytes:
         """
-        Convert audio to IVR-compatible format (8kHz, 16-bit, mono)
+        Encode float samples to 8-bit G.711 using vectorized lookup tables
+        
+        Args:
+            samples: Mono float samples in [-1, 1]
+            audio_format: PCMU (μ-law) or PCMA (A-law)
+            
+        Returns:
+            Encoded G.711 bytes, one byte per sample
+        """
+        table = _ULAW_ENCODE if audio_format == AudioFormat.PCMU else _ALAW_ENCODE
+        pcm = np.clip(np.round(samples * 32767.0), -32768, 32767).astype(np.int16)
+        return table[pcm.view(np.uint16)].tobytes()
+
+    @staticmethod
+    def decode_g711(encoded: bytes, audio_format: AudioFormat = AudioFormat.PCMU) -> np.ndarray:
+        """
+        Decode 8-bit G.711 bytes to float samples
+        
+        Args:
+            encoded: G.711 encoded bytes
+            audio_format: PCMU (μ-law) or PCMA (A-law)
+            
+        Returns:
+            Float32 samples in [-1, 1]
+        """
+        table = _ULAW_DECODE if audio_format == AudioFormat.PCMU else _ALAW_DECODE
+        return table[np.frombuffer(encoded, dtype=np.uint8)].astype(np.float32) / 32768.0
+
+    @staticmethod
+    def convert_to_ivr_format(audio_data: bytes, target_rate: int = 8000,
+                              output_format: AudioFormat = AudioFormat.LINEAR16) -> bytes:
+        """
+        Convert audio to IVR-compatible format (8kHz, mono, 16-bit PCM or 8-bit G.711)
         
         Args:
             audio_data: Input audio data
             target_rate: Target sample rate (default 8000 Hz for IVR)
+            output_format: LINEAR16 for 16-bit PCM, PCMU/PCMA for 8-bit G.711 WAV
             
         Returns:
             Converted audio data
         """
         try:
-            # Parse input audio
-            input_io = io.BytesIO(audio_data)
+            samples, input_rate = read_wav(audio_data)
             
-            with wave.open(input_io, 'rb') as input_wav:
-                # Get input parameters
-                input_channels = input_wav.getnchannels()
-                input_width = input_wav.getsampwidth()
-                input_rate = input_wav.getframerate()
-                input_frames = input_wav.readframes(input_wav.getnframes())
-                
-                logger.info(f"Converting from {input_rate}Hz to {target_rate}Hz")
-                
-                # Create output buffer
-                output_io = io.BytesIO()
-                
-                with wave.open(output_io, 'wb') as output_wav:
-                    # Set output parameters (IVR optimized)
-                    output_wav.setnchannels(1)  # Mono
-                    output_wav.setsampwidth(2)  # 16-bit
-                    output_wav.setframerate(target_rate)
-                    
-                    # Simple resampling (for production, use proper resampling library)
-                    if input_rate == target_rate and input_channels == 1 and input_width == 2:
-                        # Already in correct format
-                        output_wav.writeframes(input_frames)
-                    else:
-                        # Basic conversion - in production, use scipy.signal.resample
-                        # For now, just write the frames (Google Cloud TTS already provides good format)
-                        output_wav.writeframes(input_frames)
-                
-                return output_io.getvalue()
+            if input_rate == target_rate and output_format == AudioFormat.LINEAR16 \
+                    and AudioCodec._is_mono_pcm16(audio_data):
+                # Already in correct format
+                return audio_data
+            
+            logger.debug(f"Converting from {input_rate}Hz to {target_rate}Hz {output_format.value}")
+            resampled = resample_poly(samples, input_rate, target_rate)
+            return write_wav(resampled, target_rate, output_format)
                 
         except Exception as e:
             logger.error(f"Audio format conversion failed: {e}")
             return audio_data  # Return original if conversion fails
 
+    @staticmethod
+    def _is_mono_pcm16(audio_data: bytes) -> bool:
+        """Check whether WAV bytes are already mono 16-bit PCM"""
+        try:
+            with wave.open(io.BytesIO(audio_data), 'rb') as wav_file:
+                return wav_file.getnchannels() == 1 and wav_file.getsampwidth() == 2
+        except Exception:
+            return False
+
     @staticmethod
     def add_silence_padding(audio_data: bytes, padding_ms: int = 500) -> bytes:
         """
@@ -158,28 +406,211 @@ class AudioCodec:
             return audio_data
 
     @staticmethod
-    def normalize_audio_volume(audio_data: bytes, target_db: float = -12.0) -> bytes:
+    def normalize_audio_volume(audio_data: bytes, target_db: float = -12.0,
+                               peak_ceiling_db: float = -1.0, max_gain_db: float = 20.0) -> bytes:
         """
         Normalize audio volume for consistent IVR playback
         
+        Applies a single RMS gain towards target_db, limited so the peak stays
+        below peak_ceiling_db and quiet noise is not boosted by more than max_gain_db.
+        
         Args:
             audio_data: Input audio data
-            target_db: Target volume level in dB
+            target_db: Target RMS level in dBFS
+            peak_ceiling_db: Maximum allowed peak level in dBFS
+            max_gain_db: Maximum gain applied to quiet audio
             
         Returns:
-            Volume-normalized audio data
+            Volume-normalized audio data (same container format as the input)
         """
         try:
-            # For now, return original audio since Google Cloud TTS
-            # provides well-normalized output
-            # Future enhancement: Implement proper volume normalization
-            logger.info("Audio volume normalization completed")
-            return audio_data
+            samples, rate = read_wav(audio_data)
+            
+            rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+            peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+            if rms < 1e-6:
+                return audio_data  # Silence, nothing to normalize
+            
+            gain_db = min(target_db - 20.0 * np.log10(rms), max_gain_db,
+                          peak_ceiling_db - 20.0 * np.log10(peak))
+            if abs(gain_db) < 0.5:
+                return audio_data
+            
+            normalized = samples * np.float32(10.0 ** (gain_db / 20.0))
+            logger.debug(f"Audio volume normalized with {gain_db:+.1f} dB gain")
+            return write_wav(normalized, rate, AudioCodec.get_wav_format(audio_data))
             
         except Exception as e:
             logger.error(f"Audio volume normalization failed: {e}")
             return audio_data
 
+    @staticmethod
+    def get_wav_format(audio_data: bytes) -> AudioFormat:
+        """
+        Identify the sample encoding of WAV bytes
+        
+        Args:
+            audio_data: WAV file bytes
+            
+        Returns:
+            PCMU or PCMA for G.711 WAVs, LINEAR16 otherwise
+        """
+        format_tag = struct.unpack('<H', audio_data[20:22])[0] if len(audio_data) >= 22 else 0x0001
+        for audio_format, tag in _WAVE_FORMAT_TAGS.items():
+            if tag == format_tag:
+                return audio_format
+        return AudioFormat.LINEAR16
+
+
+@dataclass
+class VADResult:
+    """Result of voice activity detection on a recording"""
+    has_speech: bool
+    speech_duration: float
+    total_duration: float
+    speech_start: float = 0.0
+    speech_end: float = 0.0
+    trimmed_audio: bytes = b''
+
+
+class VoiceActivityDetector:
+    """
+    Energy and zero-crossing based voice activity detection for IVR recordings
+    
+    All per-frame statistics are computed with NumPy in a single pass, so a
+    15 second telephony recording is analysed in well under a millisecond.
+    """
+    
+    def __init__(self, frame_ms: int = 20, energy_threshold_db: float = -45.0,
+                 noise_margin_db: float = 10.0, zcr_threshold: float = 0.25,
+                 hangover_ms: int = 200, min_speech_ms: int = 300):
+        """
+        Initialize voice activity detector
+        
+        Args:
+            frame_ms: Analysis frame length in milliseconds
+            energy_threshold_db: Absolute energy floor (dBFS) below which frames are silence
+            noise_margin_db: Margin above the estimated noise floor required for speech
+            zcr_threshold: Zero-crossing rate above which quieter frames count as unvoiced speech
+            hangover_ms: Padding kept around detected speech so word edges are not clipped
+            min_speech_ms: Minimum total speech needed to treat the recording as speech
+        """
+        self.frame_ms = frame_ms
+        self.energy_threshold_db = energy_threshold_db
+        self.noise_margin_db = noise_margin_db
+        self.zcr_threshold = zcr_threshold
+        self.hangover_ms = hangover_ms
+        self.min_speech_ms = min_speech_ms
+    
+    def detect_speech_frames(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Classify fixed-length frames of mono samples as speech or silence
+        
+        Args:
+            samples: Mono float samples in [-1, 1]
+            sample_rate: Sample rate in Hz
+            
+        Returns:
+            Boolean mask with one entry per frame
+        """
+        frame_len = max(1, int(sample_rate * self.frame_ms / 1000))
+        n_frames = len(samples) // frame_len
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+        
+        frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+        
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        energy_db = 20.0 * np.log10(rms + 1e-10)
+        
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / frame_len
+        
+        # Adaptive threshold: above the noise floor, but never above the loudest
+        # frames so a recording that is speech throughout is not rejected
+        noise_floor = np.percentile(energy_db, 10)
+        peak = energy_db.max()
+        threshold = max(self.energy_threshold_db,
+                        min(noise_floor + self.noise_margin_db, peak - self.noise_margin_db))
+        
+        voiced = energy_db > threshold
+        unvoiced = (energy_db > threshold - self.noise_margin_db / 2) & (zcr > self.zcr_threshold) \
+            & (energy_db > self.energy_threshold_db)
+        return voiced | unvoiced
+    
+    def analyze(self, audio_data: bytes) -> Optional[VADResult]:
+        """
+        Detect speech in a WAV recording and trim leading/trailing silence
+        
+        Args:
+            audio_data: WAV audio bytes
+            
+        Returns:
+            VADResult, or None if the audio could not be decoded (caller should
+            pass the original audio through unchanged)
+        """
+        try:
+            with wave.open(io.BytesIO(audio_data), 'rb') as wav_file:
+                channels = wav_file.getnchannels()
+                width = wav_file.getsampwidth()
+                rate = wav_file.getframerate()
+                frames = wav_file.readframes(wav_file.getnframes())
+        except Exception as e:
+            logger.debug(f"VAD skipped, audio is not a readable WAV: {e}")
+            return None
+        
+        try:
+            samples = _decode_pcm_frames(frames, width, channels).mean(axis=1)
+        except ValueError as e:
+            logger.debug(f"VAD skipped: {e}")
+            return None
+        
+        total_duration = len(samples) / rate if rate else 0.0
+        speech_mask = self.detect_speech_frames(samples, rate)
+        
+        frame_seconds = self.frame_ms / 1000.0
+        speech_duration = float(np.count_nonzero(speech_mask)) * frame_seconds
+        
+        if speech_duration * 1000 < self.min_speech_ms:
+            return VADResult(
+                has_speech=False,
+                speech_duration=speech_duration,
+                total_duration=total_duration
+            )
+        
+        # Dilate the mask by the hangover so word onsets/tails survive trimming
+        hangover_frames = int(self.hangover_ms / self.frame_ms)
+        if hangover_frames > 0:
+            kernel = np.ones(2 * hangover_frames + 1, dtype=np.int32)
+            padded_mask = np.convolve(speech_mask.astype(np.int32), kernel, mode='same') > 0
+        else:
+            padded_mask = speech_mask
+        
+        speech_indices = np.flatnonzero(padded_mask)
+        first_frame = int(speech_indices[0])
+        last_frame = int(speech_indices[-1]) + 1
+        
+        frame_len = max(1, int(rate * self.frame_ms / 1000))
+        block_align = channels * width
+        start_byte = first_frame * frame_len * block_align
+        end_byte = len(frames) if last_frame >= len(speech_mask) else last_frame * frame_len * block_align
+        
+        output_io = io.BytesIO()
+        with wave.open(output_io, 'wb') as output_wav:
+            output_wav.setnchannels(channels)
+            output_wav.setsampwidth(width)
+            output_wav.setframerate(rate)
+            output_wav.writeframes(frames[start_byte:end_byte])
+        
+        return VADResult(
+            has_speech=True,
+            speech_duration=speech_duration,
+            total_duration=total_duration,
+            speech_start=first_frame * frame_seconds,
+            speech_end=min(total_duration, last_frame * frame_seconds),
+            trimmed_audio=output_io.getvalue()
+        )
+
 
 class AudioQualityChecker:
     """Audio quality assessment for IVR compatibility"""
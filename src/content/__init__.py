@@ -6,13 +6,15 @@ and semantic search capabilities for the VidyaVani IVR learning system.
 """
 
 from .content_processor import NCERTContentProcessor, ContentChunk
-from .vector_database import FAISSVectorDatabase, SemanticSearchEngine
+from .vector_database import EmbeddingModel, FAISSVectorDatabase, IndexRegistry, SemanticSearchEngine
 from .knowledge_base import NCERTKnowledgeBase
 
 __all__ = [
     'NCERTContentProcessor',
     'ContentChunk',
+    'EmbeddingModel',
     'FAISSVectorDatabase', 
+    'IndexRegistry',
     'SemanticSearchEngine',
     'NCERTKnowledgeBase'
 ]
\ No newline at end of file
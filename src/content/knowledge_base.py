@@ -15,16 +15,27 @@ import openai
 import numpy as np
 
 from .content_processor import NCERTContentProcessor, ContentChunk
-from .vector_database import SemanticSearchEngine
+from .vector_database import OPENAI_EMBEDDING_MODEL, SemanticSearchEngine, active_embedding_model
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from config import Config
+from src.utils.circuit_breaker import CircuitOpenError, circuit_breakers
+from src.utils.deadline import DeadlineExceeded, current_deadline
+from src.utils.metrics_registry import metrics_registry
+from src.utils.single_flight import SingleFlight
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared by all knowledge base instances: identical queries in flight are embedded once
+_embedding_flights = SingleFlight('embeddings')
+
+_content_searches = metrics_registry.counter(
+    'vidyavani_content_searches', 'Content searches by retrieval used (lexical only when embeddings failed)', ['retrieval']
+)
+
 
 class NCERTKnowledgeBase:
     """
@@ -49,10 +60,7 @@ class NCERTKnowledgeBase:
         # Initialize AI client for embeddings
         if config.USE_GEMINI and config.GOOGLE_GEMINI_API_KEY:
             # Use Gemini with OpenAI-compatible interface
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-            from utils.gemini_adapter import GeminiOpenAIClient
+            from src.utils.gemini_adapter import GeminiOpenAIClient
             self.openai_client = GeminiOpenAIClient(
                 api_key=config.GOOGLE_GEMINI_API_KEY,
                 model=config.GEMINI_MODEL
@@ -68,9 +76,10 @@ class NCERTKnowledgeBase:
             self.openai_client = openai.OpenAI(**client_kwargs)
             logger.info("Using OpenAI for embeddings")
         
-        # Initialize components
+        # Initialize components (the search engine uses the index of the model queries are embedded with)
+        self.embedding_model = active_embedding_model(config)
         self.content_processor = NCERTContentProcessor(config)
-        self.search_engine = SemanticSearchEngine(config)
+        self.search_engine = SemanticSearchEngine(config, self.embedding_model)
         
         # Cache for recent queries (simple in-memory cache)
         self.query_cache: Dict[str, List[Tuple[ContentChunk, float]]] = {}
@@ -90,6 +99,7 @@ class NCERTKnowledgeBase:
         
         if stats['total_chunks'] > 0 and not force_rebuild:
             logger.info(f"Knowledge base already initialized with {stats['total_chunks']} chunks")
+            self._ensure_vectors()
             return
         
         if force_rebuild:
@@ -100,13 +110,20 @@ class NCERTKnowledgeBase:
         logger.info("Processing NCERT content...")
         chunks = self.content_processor.process_all_content()
         
-        # Add to search engine (even if embeddings failed)
+        # Add to the index of the model the content processor embeds with (even if embeddings failed)
         logger.info("Adding content to vector database...")
-        self.search_engine.add_content(chunks)
+        processed_db = self.search_engine.registry.database(OPENAI_EMBEDDING_MODEL)
+        processed_db.clear_database()
+        processed_db.add_chunks(chunks)
         
         # Force save the database even with zero embeddings
         logger.info("Saving vector database...")
-        self.search_engine.vector_db.save_database()
+        processed_db.save_database()
+        
+        if processed_db is not self.search_engine.vector_db:
+            # Queries use another model: pick up the new chunks and embed them for it
+            self.search_engine.vector_db.load_database()
+            self._ensure_vectors()
         
         # Display final statistics
         final_stats = self.search_engine.get_stats()
@@ -115,7 +132,25 @@ class NCERTKnowledgeBase:
         logger.info(f"Subjects: {list(final_stats['subjects'].keys())}")
         logger.info(f"Chapters: {list(final_stats['chapters'].keys())}")
     
-    def generate_query_embedding(self, query_text: str) -> np.ndarray:
+    def _ensure_vectors(self) -> None:
+        """Build the query embedding model's index in the background if it is missing or stale"""
+        if not self.search_engine.vector_db.has_vectors:
+            self.search_engine.registry.build_in_background(self.embedding_model, self._embed_chunk)
+    
+    def _embed_chunk(self, text: str) -> Optional[np.ndarray]:
+        """Embed one chunk text for a background index build, None on failure"""
+        task_kwargs = {}
+        if self.embedding_model.document_task:
+            task_kwargs['task_type'] = self.embedding_model.document_task
+        try:
+            response = self.openai_client.embeddings.create(model=self.embedding_model.name, input=text,
+                                                            **task_kwargs)
+            return np.array(response.data[0].embedding)
+        except Exception as e:
+            logger.error(f"Failed to embed chunk for the {self.embedding_model.name} index: {e}")
+            return None
+    
+    def generate_query_embedding(self, query_text: str) -> Optional[np.ndarray]:
         """
         Generate embedding for a query text using OpenAI
         
@@ -123,22 +158,42 @@ class NCERTKnowledgeBase:
             query_text: Question or query text
             
         Returns:
-            Query embedding vector
+            Query embedding vector, or None if the embeddings API failed or
+            took longer than EMBEDDING_TIMEOUT (search then falls back to
+            lexical matching)
         """
+        query_text = query_text.strip()
         try:
-            response = self.openai_client.embeddings.create(
-                model="text-embedding-3-small",
-                input=query_text.strip()
-            )
+            embedding, _ = _embedding_flights.do(query_text, self._embed_query, query_text)
+            return embedding
+        except DeadlineExceeded as e:
+            logger.warning(f"Gave up waiting for query embedding: {e}")
+            return None
+    
+    def _embed_query(self, query_text: str) -> Optional[np.ndarray]:
+        """Call the embeddings API for one query, None on failure"""
+        try:
+            with circuit_breakers.get('embeddings').guard(ignore=(openai.BadRequestError,)):
+                response = self.openai_client.embeddings.create(
+                    model=self.embedding_model.name,
+                    input=query_text,
+                    timeout=current_deadline().timeout(self.config.EMBEDDING_TIMEOUT)
+                )
             
             embedding = np.array(response.data[0].embedding)
+            if not np.any(embedding):
+                # The Gemini adapter reports its failures as zero vectors
+                logger.warning(f"Embeddings API returned a zero vector for query: '{query_text[:50]}...'")
+                return None
             logger.debug(f"Generated embedding for query: '{query_text[:50]}...'")
             return embedding
             
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping query embedding: {e}")
+            return None
         except Exception as e:
             logger.error(f"Failed to generate query embedding: {e}")
-            # Return zero vector as fallback
-            return np.zeros(1536)
+            return None
     
     def search_relevant_content(self, question: str, 
                               subject_filter: Optional[str] = None,
@@ -166,18 +221,22 @@ class NCERTKnowledgeBase:
         
         logger.info(f"Searching for content relevant to: '{question[:100]}...'")
         
-        # Generate query embedding
-        query_embedding = self.generate_query_embedding(question)
+        # Generate query embedding (not needed while the model's index is being built)
+        query_embedding = None
+        if self.search_engine.vector_db.has_vectors:
+            query_embedding = self.generate_query_embedding(question)
         
-        # Search in vector database
+        # Search in vector and lexical indexes (lexical only without an embedding)
         results = self.search_engine.search_content(
             query_embedding=query_embedding,
             subject_filter=subject_filter,
-            top_k=top_k
+            top_k=top_k,
+            query_text=question
         )
+        _content_searches.inc(retrieval='hybrid' if query_embedding is not None else 'lexical')
         
-        # Cache the results
-        if use_cache:
+        # Cache the results (not those of a failed embedding)
+        if use_cache and query_embedding is not None:
             self._add_to_cache(cache_key, results)
         
         logger.info(f"Found {len(results)} relevant content chunks")
@@ -286,8 +345,9 @@ class NCERTKnowledgeBase:
                 'chunk_size': self.config.CONTENT_CHUNK_SIZE,
                 'overlap_size': self.config.CONTENT_OVERLAP,
                 'top_k_retrieval': self.config.TOP_K_RETRIEVAL,
-                'embedding_model': 'text-embedding-3-small'
-            }
+                'embedding_model': self.embedding_model.name
+            },
+            'indexes': self.search_engine.registry.get_status()
         }
     
     def test_search_functionality(self) -> None:
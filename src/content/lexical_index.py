@@ -0,0 +1,108 @@
+"""
+BM25 Lexical Index
+
+This module keeps a word-level BM25 inverted index over the chunk metadata
+saved with the FAISS index. It needs no embeddings, so retrieval still works
+(in well under a millisecond) when the embeddings API is failing, slow or
+returns vectors of the wrong size, and it is fused with vector search results
+otherwise.
+"""
+
+import math
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.utils.faq_matcher import normalize_text
+
+# Reciprocal rank fusion constant: damps the weight of the very first ranks
+RRF_K = 60
+
+
+class BM25Index:
+    """Inverted word index over chunk texts, ranked with BM25"""
+
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self):
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}  # word -> [(chunk position, count)]
+        self._lengths: List[int] = []
+        self._average_length = 0.0
+
+    def build(self, chunk_metadata: Sequence[Dict]) -> None:
+        """
+        Index chunk metadata, replacing anything indexed before
+
+        Positions in search results are positions in chunk_metadata, the same
+        positions FAISS uses for the chunk vectors.
+        """
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = []
+        for position, metadata in enumerate(chunk_metadata):
+            # Section names carry the topic; index them with the text
+            words = normalize_text(f"{metadata.get('section_name', '')} {metadata.get('content_text', '')}")
+            for word, count in Counter(words).items():
+                postings.setdefault(word, []).append((position, count))
+            lengths.append(len(words))
+
+        self._postings = postings
+        self._lengths = lengths
+        self._average_length = sum(lengths) / len(lengths) if lengths else 0.0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def _idf(self, word: str) -> float:
+        posting = self._postings.get(word)
+        if not posting:
+            return 0.0
+        total = len(self._lengths)
+        return math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """
+        Chunks sharing words with a query
+
+        Args:
+            query: Question text
+            top_k: Number of results to return
+
+        Returns:
+            List of (chunk position, relevance) ordered by BM25 score. Relevance
+            is the share of the query's word weight (IDF) found in the chunk,
+            from 0 to 1, so it can stand in for a similarity score.
+        """
+        words = set(normalize_text(query))
+        weights = {word: self._idf(word) for word in words}
+        query_weight = sum(weights.values())
+        if not query_weight:
+            return []
+
+        scores: Dict[int, float] = {}
+        matched: Dict[int, float] = {}
+        for word, idf in weights.items():
+            for position, count in self._postings.get(word, ()):
+                norm = self.K1 * (1 - self.B + self.B * self._lengths[position] / self._average_length)
+                scores[position] = scores.get(position, 0.0) + idf * count * (self.K1 + 1) / (count + norm)
+                matched[position] = matched.get(position, 0.0) + idf
+
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [(position, matched[position] / query_weight) for position in ranked]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], k: int = RRF_K,
+                           limit: Optional[int] = None) -> List[str]:
+    """
+    Merge ranked lists of ids into one ranking
+
+    Each id scores sum(1 / (k + rank)) over the lists it appears in, so ids
+    ranked well by several retrievers rise to the top without having to make
+    their raw scores comparable.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    fused = sorted(scores, key=scores.get, reverse=True)
+    return fused[:limit] if limit is not None else fused
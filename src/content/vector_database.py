@@ -6,9 +6,14 @@ of NCERT content chunks using OpenAI embeddings.
 """
 
 import os
+import fcntl
 import pickle
+import hashlib
 import logging
-from typing import List, Tuple, Optional, Dict, Any
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Tuple, Optional, Dict, Any
 import json
 
 import faiss
@@ -19,46 +24,156 @@ import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from config import Config
+from .lexical_index import BM25Index, reciprocal_rank_fusion
+from .vector_compression import COMPRESSIONS, build_index, normalize_in_place, rerank
+from src.utils.metrics_registry import metrics_registry
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Where the FAISS indexes and their chunk metadata are saved
+VECTOR_DB_DIR = "data/ncert/vector_db"
+
+_index_builds = metrics_registry.counter(
+    'vidyavani_index_builds', 'Background vector index builds by embedding model and outcome', ['model', 'outcome']
+)
+
+
+@dataclass(frozen=True)
+class EmbeddingModel:
+    """Embedding model a vector index was built with"""
+    name: str
+    dimension: int
+    document_task: Optional[str] = None  # Task type chunks are embedded with, for models that take one
+
+
+OPENAI_EMBEDDING_MODEL = EmbeddingModel('text-embedding-3-small', 1536)
+GEMINI_EMBEDDING_MODEL = EmbeddingModel('text-embedding-004', 768, document_task='retrieval_document')
+
+
+def active_embedding_model(config: Config) -> EmbeddingModel:
+    """Embedding model queries are embedded with under this configuration"""
+    if config.USE_GEMINI and config.GOOGLE_GEMINI_API_KEY:
+        return GEMINI_EMBEDDING_MODEL
+    return OPENAI_EMBEDDING_MODEL
+
+def _write_atomically(path: str, write: Callable[[str], None]) -> None:
+    """Write a file through a temporary path beside it, so other workers never read it half written"""
+    temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        write(temporary_path)
+        os.replace(temporary_path, path)
+    finally:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+
+
+def _write_json(data: Any, indent: int = 2) -> Callable[[str], None]:
+    def write(path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+    return write
+
+
+# metadata path -> ((mtime, size), version), so unchanged files are not hashed again
+_index_versions: Dict[str, Tuple[Tuple[int, int], str]] = {}
+
+
+def index_version(db_dir: str = VECTOR_DB_DIR) -> str:
+    """
+    Version of the saved index: a digest of its chunk metadata
+    
+    Anything derived from the index (such as precomputed answers) records this
+    version, so it can tell when the content it was built from has changed.
+    
+    Returns:
+        12-character hex digest, or "" if no index is saved
+    """
+    metadata_path = os.path.join(db_dir, "chunk_metadata.json")
+    try:
+        stat = os.stat(metadata_path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = _index_versions.get(metadata_path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        with open(metadata_path, 'rb') as f:
+            version = hashlib.sha256(f.read()).hexdigest()[:12]
+    except OSError:
+        return ""
+    _index_versions[metadata_path] = (signature, version)
+    return version
+
 
 class FAISSVectorDatabase:
-    """FAISS-based vector database for semantic search of NCERT content"""
+    """
+    FAISS-based vector database for semantic search of NCERT content
+    
+    Chunk metadata is shared by every embedding model; the vectors are saved
+    per model (indexes/<model>/faiss_index.bin) with a manifest naming the
+    model, its dimension and the chunk metadata version they were built from.
     
-    def __init__(self, config: Config, embedding_dimension: int = 1536):
+    With VECTOR_INDEX_COMPRESSION other than 'flat' the index holds compressed
+    codes only; the full-precision vectors are saved next to it (vectors.npy),
+    memory-mapped, and used to re-rank the approximate candidates exactly.
+    """
+    
+    def __init__(self, config: Config, embedding_model: EmbeddingModel = OPENAI_EMBEDDING_MODEL,
+                 db_dir: str = VECTOR_DB_DIR):
         """
         Initialize FAISS vector database
         
         Args:
             config: Application configuration
-            embedding_dimension: Dimension of OpenAI embeddings (1536 for text-embedding-3-small)
+            embedding_model: Model the vectors are embedded with
+            db_dir: Directory holding the chunk metadata and per-model indexes
         """
         self.config = config
-        self.embedding_dimension = embedding_dimension
+        self.embedding_model = embedding_model
+        self.embedding_dimension = embedding_model.dimension
+        self.compression = config.VECTOR_INDEX_COMPRESSION
+        self.rerank_candidates = config.VECTOR_RERANK_CANDIDATES
+        if self.compression not in COMPRESSIONS:
+            raise ValueError(f"VECTOR_INDEX_COMPRESSION must be one of {COMPRESSIONS}, got '{self.compression}'")
         
         # Initialize FAISS index (Inner Product for cosine similarity)
-        self.index = faiss.IndexFlatIP(embedding_dimension)
+        self.index = faiss.IndexFlatIP(self.embedding_dimension)
+        # Normalized full-precision vectors behind a compressed index (None for flat indexes)
+        self.full_vectors: Optional[np.ndarray] = None
         
         # Store metadata separately (FAISS only stores vectors)
         self.chunk_metadata: List[Dict[str, Any]] = []
         self.chunk_id_to_index: Dict[str, int] = {}
         
+        # Lexical index over the same chunks, rebuilt whenever they change
+        self.lexical_index = BM25Index()
+        
         # Database file paths
-        self.db_dir = "data/ncert/vector_db"
-        self.index_path = os.path.join(self.db_dir, "faiss_index.bin")
+        self.db_dir = db_dir
         self.metadata_path = os.path.join(self.db_dir, "chunk_metadata.json")
         self.id_mapping_path = os.path.join(self.db_dir, "id_mapping.json")
+        self.index_dir = os.path.join(self.db_dir, "indexes", embedding_model.name)
+        self.index_path = os.path.join(self.index_dir, "faiss_index.bin")
+        self.manifest_path = os.path.join(self.index_dir, "manifest.json")
+        self.vectors_path = os.path.join(self.index_dir, "vectors.npy")
+        # Index saved before indexes were kept per model (no manifest)
+        self.legacy_index_path = os.path.join(self.db_dir, "faiss_index.bin")
         
         # Ensure database directory exists
         os.makedirs(self.db_dir, exist_ok=True)
     
+    @property
+    def has_vectors(self) -> bool:
+        """Whether every chunk has a vector from this database's embedding model"""
+        return self.index.ntotal > 0 and self.index.ntotal == len(self.chunk_metadata)
+    
     def normalize_embeddings(self, embeddings: np.ndarray) -> np.ndarray:
         """
         Normalize embeddings for cosine similarity using Inner Product
         
+        Float32 arrays are normalized in place, so building an index does not
+        hold yet another copy of every vector.
+        
         Args:
             embeddings: Array of embeddings to normalize
             
@@ -66,9 +181,21 @@ class FAISSVectorDatabase:
             Normalized embeddings
         """
         # Normalize to unit vectors for cosine similarity
-        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
-        norms[norms == 0] = 1  # Avoid division by zero
-        return embeddings / norms
+        if embeddings.dtype != np.float32:
+            embeddings = embeddings.astype('float32')
+        return normalize_in_place(embeddings)
+    
+    def stored_vectors(self) -> np.ndarray:
+        """Normalized vectors of every chunk (memory-mapped behind a saved compressed index)"""
+        if self.full_vectors is not None:
+            return self.full_vectors
+        return self.index.reconstruct_n(0, self.index.ntotal)
+    
+    def _install_vectors(self, vectors: np.ndarray) -> None:
+        """Index normalized vectors with the configured compression, keeping them for re-ranking"""
+        index = build_index(vectors, self.compression)
+        self.full_vectors = vectors if self.compression != 'flat' else None
+        self.index = index
     
     def add_chunks(self, chunks: List[ContentChunk]) -> None:
         """
@@ -88,8 +215,8 @@ class FAISSVectorDatabase:
         metadata = []
         
         for chunk in chunks:
-            if chunk.embedding is None:
-                logger.warning(f"Chunk {chunk.id} has no embedding, using zero vector")
+            if chunk.embedding is None or np.size(chunk.embedding) != self.embedding_dimension:
+                logger.warning(f"Chunk {chunk.id} has no {self.embedding_model.name} embedding, using zero vector")
                 # Create zero vector for chunks without embeddings
                 chunk.embedding = np.zeros(self.embedding_dimension)
             
@@ -116,18 +243,23 @@ class FAISSVectorDatabase:
             return
         
         # Convert to numpy array and normalize
-        embeddings_array = np.array(embeddings).astype('float32')
+        embeddings_array = np.asarray(embeddings, dtype='float32')
         normalized_embeddings = self.normalize_embeddings(embeddings_array)
         
         # Add to FAISS index
         start_index = self.index.ntotal
-        self.index.add(normalized_embeddings)
+        if self.compression == 'flat':
+            self.index.add(normalized_embeddings)
+        else:
+            # Quantizers are trained on every vector, so the index is rebuilt with the new ones
+            self._install_vectors(np.concatenate([self.stored_vectors(), normalized_embeddings]))
         
         # Update metadata and ID mapping
         for i, chunk_meta in enumerate(metadata):
             faiss_index = start_index + i
             self.chunk_metadata.append(chunk_meta)
             self.chunk_id_to_index[chunk_meta['id']] = faiss_index
+        self.lexical_index.build(self.chunk_metadata)
         
         logger.info(f"Successfully added {len(embeddings)} chunks to database. Total chunks: {self.index.ntotal}")
     
@@ -144,68 +276,74 @@ class FAISSVectorDatabase:
         Returns:
             List of tuples (ContentChunk, similarity_score)
         """
-        if self.index.ntotal == 0:
+        index, full_vectors = self.index, self.full_vectors
+        if index.ntotal == 0:
             logger.warning("Vector database is empty")
             return []
         
+        if query_embedding.size != index.d or not np.any(query_embedding):
+            # A failed embedding (zeros) or one from a model of another size matches nothing
+            logger.warning(f"Unusable query embedding ({query_embedding.size} dimensions, index has {index.d})")
+            return []
+        
         # Normalize query embedding
         query_embedding = query_embedding.reshape(1, -1).astype('float32')
         normalized_query = self.normalize_embeddings(query_embedding)
         
         # Search in FAISS index
-        similarities, indices = self.index.search(normalized_query, min(top_k, self.index.ntotal))
+        if full_vectors is None:
+            similarities, indices = index.search(normalized_query, min(top_k, index.ntotal))
+            hits = zip(indices[0], similarities[0])
+        else:
+            # Approximate candidates from the compressed codes, re-ranked with the full vectors
+            candidates = min(index.ntotal, max(self.rerank_candidates, top_k))
+            _, indices = index.search(normalized_query, candidates)
+            hits = rerank(full_vectors, normalized_query[0], indices[0], top_k)
         
         # Convert results to ContentChunk objects
         results = []
-        for similarity, idx in zip(similarities[0], indices[0]):
+        for idx, similarity in hits:
             if similarity < min_similarity:
                 continue
             
-            if idx < len(self.chunk_metadata):
-                metadata = self.chunk_metadata[idx]
-                
-                # Reconstruct ContentChunk (without embedding to save memory)
-                chunk = ContentChunk(
-                    id=metadata['id'],
-                    chapter_name=metadata['chapter_name'],
-                    section_name=metadata['section_name'],
-                    content_text=metadata['content_text'],
-                    subject=metadata['subject'],
-                    grade=metadata['grade'],
-                    language=metadata['language'],
-                    word_count=metadata['word_count'],
-                    chunk_index=metadata['chunk_index'],
-                    total_chunks=metadata['total_chunks'],
-                    metadata=metadata['metadata'],
-                    embedding=None  # Don't load embedding for search results
-                )
-                
-                results.append((chunk, float(similarity)))
+            if 0 <= idx < len(self.chunk_metadata):
+                results.append((self._chunk_at(idx), float(similarity)))
         
         logger.info(f"Found {len(results)} similar chunks for query (top_k={top_k})")
         return results
     
-    def get_chunk_by_id(self, chunk_id: str) -> Optional[ContentChunk]:
+    def set_embeddings(self, embeddings: np.ndarray) -> None:
         """
-        Retrieve a specific chunk by its ID
+        Replace the vectors of the chunks already in the database
         
         Args:
-            chunk_id: Unique chunk identifier
-            
-        Returns:
-            ContentChunk object or None if not found
+            embeddings: One embedding per chunk, in chunk order
         """
-        if chunk_id not in self.chunk_id_to_index:
-            return None
-        
-        faiss_index = self.chunk_id_to_index[chunk_id]
-        if faiss_index >= len(self.chunk_metadata):
-            return None
+        expected = (len(self.chunk_metadata), self.embedding_dimension)
+        if embeddings.shape != expected:
+            raise ValueError(f"Expected embeddings of shape {expected}, got {embeddings.shape}")
         
-        metadata = self.chunk_metadata[faiss_index]
+        self._install_vectors(self.normalize_embeddings(np.ascontiguousarray(embeddings, dtype='float32')))
+        logger.info(f"Replaced {self.embedding_model.name} vectors for {self.index.ntotal} chunks")
+    
+    def lexical_search(self, query_text: str, top_k: int = 3) -> List[Tuple[ContentChunk, float]]:
+        """
+        Search for chunks sharing words with the query (no embedding needed)
         
-        # Reconstruct ContentChunk
-        chunk = ContentChunk(
+        Args:
+            query_text: Question text
+            top_k: Number of top results to return
+            
+        Returns:
+            List of tuples (ContentChunk, relevance) with relevance from 0 to 1
+        """
+        return [(self._chunk_at(position), relevance)
+                for position, relevance in self.lexical_index.search(query_text, top_k)]
+    
+    def _chunk_at(self, idx: int) -> ContentChunk:
+        """Reconstruct the ContentChunk stored at a FAISS position (without its embedding)"""
+        metadata = self.chunk_metadata[idx]
+        return ContentChunk(
             id=metadata['id'],
             chapter_name=metadata['chapter_name'],
             section_name=metadata['section_name'],
@@ -217,46 +355,98 @@ class FAISSVectorDatabase:
             chunk_index=metadata['chunk_index'],
             total_chunks=metadata['total_chunks'],
             metadata=metadata['metadata'],
-            embedding=None
+            embedding=None  # Don't load embedding for search results
         )
+    
+    def get_chunk_by_id(self, chunk_id: str) -> Optional[ContentChunk]:
+        """
+        Retrieve a specific chunk by its ID
         
-        return chunk
+        Args:
+            chunk_id: Unique chunk identifier
+            
+        Returns:
+            ContentChunk object or None if not found
+        """
+        if chunk_id not in self.chunk_id_to_index:
+            return None
+        
+        faiss_index = self.chunk_id_to_index[chunk_id]
+        if faiss_index >= len(self.chunk_metadata):
+            return None
+        
+        return self._chunk_at(faiss_index)
     
     def save_database(self) -> None:
-        """Save FAISS index and metadata to disk"""
+        """Save the chunk metadata shared by every model and this model's index to disk"""
         try:
-            # Save FAISS index
-            faiss.write_index(self.index, self.index_path)
-            
-            # Save metadata
-            with open(self.metadata_path, 'w', encoding='utf-8') as f:
-                json.dump(self.chunk_metadata, f, indent=2, ensure_ascii=False)
-            
-            # Save ID mapping
-            with open(self.id_mapping_path, 'w', encoding='utf-8') as f:
-                json.dump(self.chunk_id_to_index, f, indent=2)
-            
-            logger.info(f"Saved vector database to {self.db_dir}")
+            _write_atomically(self.metadata_path, _write_json(self.chunk_metadata))
+            _write_atomically(self.id_mapping_path, _write_json(self.chunk_id_to_index))
+            self.save_index()
+            logger.info(f"Saved vector database to {self.db_dir} ({self.embedding_model.name} index)")
             
         except Exception as e:
             logger.error(f"Failed to save vector database: {e}")
             raise
     
+    def save_index(self) -> None:
+        """
+        Save this model's index, full-precision vectors and manifest
+        
+        Each file is written beside the old one and renamed over it, so other
+        workers (and memory maps of the old vectors) never see a partial file.
+        The manifest goes last: until it names the new chunk version, loaders
+        leave the index out.
+        """
+        os.makedirs(self.index_dir, exist_ok=True)
+        _write_atomically(self.index_path, lambda path: faiss.write_index(self.index, path))
+        if self.full_vectors is not None:
+            self._map_full_vectors()
+        elif os.path.exists(self.vectors_path):
+            os.remove(self.vectors_path)
+        manifest = {
+            'model': self.embedding_model.name,
+            'document_task': self.embedding_model.document_task,
+            'dimension': self.embedding_dimension,
+            'compression': self.compression if self.full_vectors is not None else 'flat',
+            'chunks': self.index.ntotal,
+            'index_version': index_version(self.db_dir),
+            'built_at': time.time()
+        }
+        _write_atomically(self.manifest_path, _write_json(manifest))
+    
+    def _map_full_vectors(self) -> None:
+        """Save the full-precision vectors and memory-map them in place of the in-memory copy"""
+        vectors = np.asarray(self.full_vectors, dtype='float32')
+        
+        def write_vectors(path: str) -> None:
+            with open(path, 'wb') as f:
+                np.save(f, vectors)
+        
+        os.makedirs(self.index_dir, exist_ok=True)
+        _write_atomically(self.vectors_path, write_vectors)
+        self.full_vectors = np.load(self.vectors_path, mmap_mode='r')
+    
+    def reload_index(self) -> bool:
+        """Load this model's index if one matching the loaded chunks has been saved (e.g. by another worker)"""
+        return self._load_index() is None
+    
     def load_database(self) -> bool:
         """
-        Load FAISS index and metadata from disk
+        Load chunk metadata and this model's FAISS index from disk
+        
+        The chunk metadata (and so lexical search) is loaded even when the
+        vectors are missing or were built by another model or from other
+        content; those vectors are left out and need to be rebuilt.
         
         Returns:
-            True if successfully loaded, False otherwise
+            True if the chunks and their vectors were loaded, False otherwise
         """
         try:
-            if not all(os.path.exists(path) for path in [self.index_path, self.metadata_path, self.id_mapping_path]):
+            if not all(os.path.exists(path) for path in [self.metadata_path, self.id_mapping_path]):
                 logger.info("Vector database files not found, starting with empty database")
                 return False
             
-            # Load FAISS index
-            self.index = faiss.read_index(self.index_path)
-            
             # Load metadata
             with open(self.metadata_path, 'r', encoding='utf-8') as f:
                 self.chunk_metadata = json.load(f)
@@ -265,17 +455,80 @@ class FAISSVectorDatabase:
             with open(self.id_mapping_path, 'r', encoding='utf-8') as f:
                 self.chunk_id_to_index = json.load(f)
             
-            logger.info(f"Loaded vector database with {self.index.ntotal} chunks from {self.db_dir}")
+            self.lexical_index.build(self.chunk_metadata)
+            self.index = faiss.IndexFlatIP(self.embedding_dimension)
+            self.full_vectors = None
+            
+            problem = self._load_index()
+            if problem:
+                logger.warning(f"No usable {self.embedding_model.name} index in {self.db_dir} ({problem}); "
+                               f"{len(self.chunk_metadata)} chunks available for lexical search only")
+                return False
+            
+            logger.info(f"Loaded vector database with {self.index.ntotal} chunks from {self.db_dir} "
+                        f"({self.embedding_model.name})")
             return True
             
         except Exception as e:
             logger.error(f"Failed to load vector database: {e}")
             # Reset to empty database
             self.index = faiss.IndexFlatIP(self.embedding_dimension)
+            self.full_vectors = None
             self.chunk_metadata = []
             self.chunk_id_to_index = {}
+            self.lexical_index.build(self.chunk_metadata)
             return False
     
+    def _load_index(self) -> Optional[str]:
+        """Load this model's vectors if they match the chunks, returning why not otherwise"""
+        compression = 'flat'
+        if os.path.exists(self.index_path):
+            if not os.path.exists(self.manifest_path):
+                return "manifest missing"
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            if manifest.get('model') != self.embedding_model.name:
+                return f"index built with {manifest.get('model')}"
+            if manifest.get('document_task') != self.embedding_model.document_task:
+                return f"chunks embedded as {manifest.get('document_task') or 'queries'}"
+            if manifest.get('index_version') != index_version(self.db_dir):
+                return "chunks changed since the index was built"
+            compression = manifest.get('compression', 'flat')
+            index = faiss.read_index(self.index_path)
+        elif os.path.exists(self.legacy_index_path):
+            # Older layout: the model is unknown, so trust only a matching dimension
+            index = faiss.read_index(self.legacy_index_path)
+        else:
+            return "not built yet"
+        
+        if index.d != self.embedding_dimension:
+            return f"{index.d}-dimension vectors, {self.embedding_model.name} has {self.embedding_dimension}"
+        if index.ntotal != len(self.chunk_metadata):
+            return f"{index.ntotal} vectors for {len(self.chunk_metadata)} chunks"
+        
+        full_vectors = None
+        if compression != 'flat':
+            if not os.path.exists(self.vectors_path):
+                return "full-precision vectors missing"
+            full_vectors = np.load(self.vectors_path, mmap_mode='r')
+            if full_vectors.shape != (index.ntotal, self.embedding_dimension):
+                return f"full-precision vectors of shape {full_vectors.shape}"
+        
+        if compression == self.compression:
+            self.full_vectors = full_vectors
+            self.index = index
+        else:
+            # Saved with another compression: re-index the vectors (written that way on the next save)
+            logger.info(f"Converting {self.embedding_model.name} index from {compression} to {self.compression}")
+            vectors = np.array(full_vectors) if full_vectors is not None else index.reconstruct_n(0, index.ntotal)
+            self._install_vectors(vectors)
+            # Re-rank from vectors on disk, not the copy the index was built from
+            if self.full_vectors is not None and full_vectors is not None:
+                self.full_vectors = full_vectors
+            elif self.full_vectors is not None:
+                self._map_full_vectors()
+        return None
+    
     def get_database_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the vector database
@@ -284,9 +537,14 @@ class FAISSVectorDatabase:
             Dictionary with database statistics
         """
         stats = {
-            'total_chunks': self.index.ntotal,
+            'total_chunks': len(self.chunk_metadata),
+            'vector_chunks': self.index.ntotal,
+            'embedding_model': self.embedding_model.name,
             'embedding_dimension': self.embedding_dimension,
             'index_type': type(self.index).__name__,
+            'compression': self.compression,
+            'index_bytes': getattr(self.index, 'code_size', 4 * self.embedding_dimension) * self.index.ntotal,
+            'lexical_chunks': len(self.lexical_index),
             'subjects': {},
             'chapters': {},
             'languages': {}
@@ -311,26 +569,187 @@ class FAISSVectorDatabase:
     def clear_database(self) -> None:
         """Clear all data from the vector database"""
         self.index = faiss.IndexFlatIP(self.embedding_dimension)
+        self.full_vectors = None
         self.chunk_metadata = []
         self.chunk_id_to_index = {}
+        self.lexical_index.build(self.chunk_metadata)
         logger.info("Cleared vector database")
 
 
+class IndexRegistry:
+    """
+    Vector indexes of the same chunks, one per embedding model
+    
+    Queries go to the index of the model they were embedded with. When that
+    index is missing or out of date it is built in a background thread from
+    the shared chunk metadata, and searches are lexical only until it is ready,
+    so switching embedding providers needs neither a restart nor downtime.
+    
+    A lock file in the model's index directory lets one worker build at a
+    time; the others wait for it and load the index it saved.
+    """
+    
+    # Embedding attempts per chunk during a build, and the first retry delay (doubled each retry)
+    EMBED_ATTEMPTS = 3
+    EMBED_RETRY_DELAY = 1.0
+    
+    def __init__(self, config: Config, db_dir: str = VECTOR_DB_DIR):
+        """
+        Initialize index registry
+        
+        Args:
+            config: Application configuration
+            db_dir: Directory holding the chunk metadata and per-model indexes
+        """
+        self.config = config
+        self.db_dir = db_dir
+        self._databases: Dict[str, FAISSVectorDatabase] = {}
+        self._builds: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+    
+    def database(self, model: EmbeddingModel) -> FAISSVectorDatabase:
+        """Database for an embedding model, loaded from disk on first use"""
+        with self._lock:
+            database = self._databases.get(model.name)
+            if database is None:
+                database = FAISSVectorDatabase(self.config, model, self.db_dir)
+                database.load_database()
+                self._databases[model.name] = database
+            return database
+    
+    def is_building(self, model: EmbeddingModel) -> bool:
+        """Whether a background build of a model's index is running"""
+        build = self._builds.get(model.name)
+        return build is not None and build.is_alive()
+    
+    def build_in_background(self, model: EmbeddingModel,
+                            embed: Callable[[str], Optional[np.ndarray]]) -> bool:
+        """
+        Start building a model's index unless it is ready or already building
+        
+        Args:
+            model: Embedding model to build the index for
+            embed: Embeds one chunk text with that model, None on failure
+            
+        Returns:
+            True if a build was started
+        """
+        database = self.database(model)
+        with self._lock:
+            if database.has_vectors or not database.chunk_metadata or self.is_building(model):
+                return False
+            build = threading.Thread(target=self._build, args=(database, embed),
+                                     name=f"index-build-{model.name}", daemon=True)
+            self._builds[model.name] = build
+        build.start()
+        logger.info(f"Building {model.name} index for {len(database.chunk_metadata)} chunks in the background")
+        return True
+    
+    def _build(self, database: FAISSVectorDatabase, embed: Callable[[str], Optional[np.ndarray]]) -> None:
+        """Embed every chunk with the database's model and save its index, unless another worker has"""
+        model = database.embedding_model
+        
+        try:
+            os.makedirs(database.index_dir, exist_ok=True)
+            with open(os.path.join(database.index_dir, 'build.lock'), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)  # Released when the file is closed
+                if database.reload_index():
+                    logger.info(f"Loaded the {model.name} index another worker built")
+                    _index_builds.inc(model=model.name, outcome='loaded')
+                    return
+                outcome = self._embed_and_save(database, embed)
+        except Exception as e:
+            logger.error(f"{model.name} index build failed: {e}")
+            outcome = 'failed'
+        _index_builds.inc(model=model.name, outcome=outcome)
+    
+    def _embed_and_save(self, database: FAISSVectorDatabase,
+                        embed: Callable[[str], Optional[np.ndarray]]) -> str:
+        """Embed every chunk and save the model's index files, returning the build outcome"""
+        model = database.embedding_model
+        version = index_version(self.db_dir)
+        chunk_ids = [metadata['id'] for metadata in database.chunk_metadata]
+        texts = [metadata['content_text'] for metadata in database.chunk_metadata]
+        started = time.time()
+        
+        embeddings = np.zeros((len(texts), model.dimension), dtype='float32')
+        for i, text in enumerate(texts):
+            embedding = self._embed_with_retry(embed, text, model)
+            if embedding is None:
+                # A partial index would rank the missing chunks last; keep searching lexically instead
+                logger.error(f"{model.name} index build stopped: no usable embedding for chunk {chunk_ids[i]}")
+                return 'failed'
+            embeddings[i] = embedding
+        
+        if ([metadata['id'] for metadata in database.chunk_metadata] != chunk_ids
+                or index_version(self.db_dir) != version):
+            logger.warning(f"Chunks changed while building the {model.name} index; discarding it")
+            return 'stale'
+        
+        database.set_embeddings(embeddings)
+        database.save_index()
+        logger.info(f"Built {model.name} index for {len(texts)} chunks in {time.time() - started:.1f}s")
+        return 'built'
+    
+    def _embed_with_retry(self, embed: Callable[[str], Optional[np.ndarray]], text: str,
+                          model: EmbeddingModel) -> Optional[np.ndarray]:
+        """Embedding of a chunk text, retried with exponential backoff; None if every attempt failed"""
+        for attempt in range(self.EMBED_ATTEMPTS):
+            embedding = embed(text)
+            # Gemini reports failures as zero vectors
+            if embedding is not None and np.size(embedding) == model.dimension and np.any(embedding):
+                return embedding
+            if attempt + 1 < self.EMBED_ATTEMPTS:
+                time.sleep(self.EMBED_RETRY_DELAY * 2 ** attempt)
+        return None
+    
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Loaded indexes by model name, for monitoring"""
+        with self._lock:
+            databases = list(self._databases.values())
+        return {
+            database.embedding_model.name: {
+                'dimension': database.embedding_dimension,
+                'chunks': len(database.chunk_metadata),
+                'vector_chunks': database.index.ntotal,
+                'ready': database.has_vectors,
+                'building': self.is_building(database.embedding_model)
+            }
+            for database in databases
+        }
+
+
+# db_dir -> registry shared by every search engine in the process
+_registries: Dict[str, IndexRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def shared_index_registry(config: Config, db_dir: str = VECTOR_DB_DIR) -> IndexRegistry:
+    """Process-wide index registry for a database directory"""
+    with _registries_lock:
+        registry = _registries.get(db_dir)
+        if registry is None:
+            registry = _registries[db_dir] = IndexRegistry(config, db_dir)
+        return registry
+
+
 class SemanticSearchEngine:
     """High-level semantic search engine using FAISS vector database"""
     
-    def __init__(self, config: Config):
+    def __init__(self, config: Config, embedding_model: Optional[EmbeddingModel] = None):
         """
         Initialize semantic search engine
         
         Args:
             config: Application configuration
+            embedding_model: Model queries are embedded with (default: the configured provider's)
         """
         self.config = config
-        self.vector_db = FAISSVectorDatabase(config)
+        self.embedding_model = embedding_model or active_embedding_model(config)
         
-        # Try to load existing database
-        self.vector_db.load_database()
+        # Load (or share) the index matching the query embedder
+        self.registry = shared_index_registry(config)
+        self.vector_db = self.registry.database(self.embedding_model)
     
     def add_content(self, chunks: List[ContentChunk]) -> None:
         """
@@ -342,24 +761,44 @@ class SemanticSearchEngine:
         self.vector_db.add_chunks(chunks)
         self.vector_db.save_database()
     
-    def search_content(self, query_embedding: np.ndarray, 
+    def search_content(self, query_embedding: Optional[np.ndarray],
                       subject_filter: Optional[str] = None,
                       chapter_filter: Optional[str] = None,
-                      top_k: int = 3) -> List[Tuple[ContentChunk, float]]:
+                      top_k: int = 3,
+                      query_text: Optional[str] = None) -> List[Tuple[ContentChunk, float]]:
         """
         Search for relevant content chunks
         
+        With both a query embedding and the query text, vector and lexical
+        results are merged with reciprocal rank fusion. With only the text
+        (the embedding failed or timed out) the search is lexical only.
+        
         Args:
-            query_embedding: Query embedding vector
+            query_embedding: Query embedding vector, or None if unavailable
             subject_filter: Optional subject filter (Physics, Chemistry, Biology)
             chapter_filter: Optional chapter name filter
             top_k: Number of results to return
+            query_text: Question text for the lexical search
             
         Returns:
-            List of tuples (ContentChunk, similarity_score)
+            List of tuples (ContentChunk, similarity_score); chunks found only
+            lexically score the share of the question's word weight they contain
         """
-        # Get initial results from vector database
-        results = self.vector_db.search(query_embedding, top_k * 2)  # Get more for filtering
+        # Get more results than needed for filtering (no vector search while the index is being built)
+        use_vectors = query_embedding is not None and self.vector_db.has_vectors
+        vector_results = self.vector_db.search(query_embedding, top_k * 2) if use_vectors else []
+        lexical_results = self.vector_db.lexical_search(query_text, top_k * 2) if query_text else []
+        
+        if vector_results and lexical_results:
+            chunks = {chunk.id: (chunk, score) for chunk, score in lexical_results}
+            chunks.update({chunk.id: (chunk, score) for chunk, score in vector_results})
+            fused = reciprocal_rank_fusion([
+                [chunk.id for chunk, _ in vector_results],
+                [chunk.id for chunk, _ in lexical_results]
+            ])
+            results = [chunks[chunk_id] for chunk_id in fused]
+        else:
+            results = vector_results or lexical_results
         
         # Apply filters if specified
         filtered_results = []
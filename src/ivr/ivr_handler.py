@@ -3,6 +3,7 @@ IVR Handler for VidyaVani Learning System
 Handles Exotel webhook endpoints and XML response generation
 """
 
+import functools
 import logging
 from typing import Dict, Any, Optional
 from flask import request, Response
@@ -17,19 +18,64 @@ from src.ivr.error_recovery_handler import IVRErrorRecoveryHandler
 from src.utils.error_handler import error_handler, ErrorType, with_retry, RetryConfig
 from src.utils.error_tracker import error_tracker
 from src.utils.call_recorder import call_recorder
+from src.utils.call_tracer import call_tracer
+from src.utils.deadline import Deadline
+from src.utils.slow_call_store import slow_call_store
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+def _traced_webhook(hop: str, finishes_trace: bool = False):
+    """
+    Record a webhook handler as a span in the caller's trace
+    
+    The session is resolved after the handler runs so that the incoming-call
+    hop lands in the trace of the session it creates. With finishes_trace the
+    trace is closed and exported once the hop is recorded.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request_data: Dict[str, Any]) -> Response:
+            start_time = time.time()
+            response = None
+            try:
+                response = handler(self, request_data)
+                return response
+            finally:
+                end_time = time.time()
+                session = self.session_manager.get_session(request_data.get('From', ''))
+                if session is not None:
+                    call_sid = request_data.get('CallSid', '') or getattr(session, 'call_sid', '')
+                    if call_sid:
+                        call_tracer.annotate(session.session_id, alias=call_sid, call_sid=call_sid)
+                    call_tracer.record_span(
+                        f"webhook.{hop}", start_time, end_time, session.session_id,
+                        success=response is not None,
+                        http_status=getattr(response, 'status_code', 0),
+                        menu_state=session.current_menu or '',
+                        processing_status=session.processing_status or ''
+                    )
+                    if finishes_trace:
+                        call_tracer.finish_trace(session.session_id)
+        return wrapper
+    return decorator
+
 class IVRHandler:
     """Handles IVR call flows and XML response generation"""
     
+    # Seconds of the caller's deadline a whole pipeline retry needs to be worth starting
+    PIPELINE_RETRY_MIN_BUDGET = 5.0
+    
     def __init__(self, session_manager):
         self.session_manager = session_manager
         self.config = Config()
         self.processing_pipeline = IVRProcessingPipeline(self.config)
         self.error_recovery_handler = IVRErrorRecoveryHandler(session_manager)
         
+        # Phone number -> deadline of the question being processed for that caller
+        self.question_deadlines: Dict[str, Deadline] = {}
+        self._deadlines_lock = threading.Lock()
+        
         # Menu states
         self.MENU_STATES = {
             'welcome': 'welcome',
@@ -56,6 +102,7 @@ class IVRHandler:
             '9': 'main_menu'
         }
     
+    @_traced_webhook('incoming_call')
     def handle_incoming_call(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle incoming call webhook from Exotel with enhanced error handling
@@ -116,6 +163,7 @@ class IVRHandler:
             logger.error(f"Error handling incoming call from {from_number}: {error_response}")
             return self._generate_error_xml(error_response['message'])
     
+    @_traced_webhook('language_selection')
     def handle_language_selection(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle language selection via DTMF with enhanced error handling
@@ -182,6 +230,7 @@ class IVRHandler:
             
             return self._generate_error_xml(error_response['message'])
     
+    @_traced_webhook('grade_confirmation')
     def handle_grade_confirmation(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle grade confirmation and proceed to interaction mode
@@ -213,6 +262,7 @@ class IVRHandler:
             logger.error(f"Error handling grade confirmation: {str(e)}")
             return self._generate_error_xml("Sorry, there was an error. Please try again.")
     
+    @_traced_webhook('interaction_mode_selection')
     def handle_interaction_mode_selection(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle interaction mode selection (ask question directly)
@@ -258,6 +308,7 @@ class IVRHandler:
             logger.error(f"Error handling interaction mode selection: {str(e)}")
             return self._generate_error_xml("Sorry, there was an error. Please try again.")
     
+    @_traced_webhook('question_recording')
     def handle_question_recording(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle recorded question from user with enhanced validation and error handling
@@ -324,11 +375,15 @@ class IVRHandler:
             # Update menu state and processing status
             self.session_manager.update_session_menu(from_number, self.MENU_STATES['processing_question'])
             self.session_manager.update_processing_status(from_number, 'processing_audio')
+            deadline = self._start_question_deadline(from_number)
             
             # Start processing pipeline in background thread with error handling
             processing_thread = threading.Thread(
-                target=self._process_question_background_with_error_handling,
-                args=(from_number, recording_url, session.language)
+                target=self._run_in_call_trace,
+                args=('background.process_question', session.session_id, time.time(),
+                      self._process_question_background_with_error_handling,
+                      from_number, recording_url, session.language, deadline),
+                kwargs={'capture_slow': True}
             )
             processing_thread.daemon = True
             processing_thread.start()
@@ -353,6 +408,48 @@ class IVRHandler:
             
             return self._generate_error_xml(error_response['message'])
     
+    def _start_question_deadline(self, phone_number: str) -> Deadline:
+        """Start the deadline of a newly recorded question, cancelling work on the caller's previous one"""
+        deadline = Deadline(self.config.QUESTION_DEADLINE)
+        with self._deadlines_lock:
+            previous = self.question_deadlines.get(phone_number)
+            self.question_deadlines[phone_number] = deadline
+        if previous is not None:
+            previous.cancel("superseded by a new question")
+        return deadline
+    
+    def _cancel_question_deadline(self, phone_number: str, reason: str):
+        """Cancel background work on the caller's question, e.g. after a timeout or hang-up"""
+        with self._deadlines_lock:
+            deadline = self.question_deadlines.pop(phone_number, None)
+        if deadline is not None:
+            deadline.cancel(reason)
+    
+    def _finish_question_deadline(self, phone_number: str, deadline: Deadline):
+        """Forget a question's deadline once its processing has finished"""
+        with self._deadlines_lock:
+            if self.question_deadlines.get(phone_number) is deadline:
+                del self.question_deadlines[phone_number]
+    
+    def _run_in_call_trace(self, span_name: str, session_id: str, enqueued_at: float, target, *args,
+                           capture_slow: bool = False):
+        """
+        Run a background task inside the call's trace
+        
+        Args:
+            span_name: Name of the span covering the task
+            session_id: Session whose trace receives the spans
+            enqueued_at: Time the task was handed to its thread, to record queue wait
+            target: Task to run with *args
+            capture_slow: Save the trace if the task finishes later than the slow call threshold
+        """
+        call_tracer.record_span(f"{span_name}.queue_wait", enqueued_at, time.time(), session_id)
+        with call_tracer.activate(session_id), call_tracer.span(span_name) as span:
+            target(*args)
+        
+        if capture_slow:
+            slow_call_store.capture_if_slow(session_id, time.time() - enqueued_at, span, source='ivr')
+    
     def _process_question_background(self, phone_number: str, recording_url: str, language: str):
         """
         Process question in background thread
@@ -413,7 +510,8 @@ class IVRHandler:
             logger.error(f"Background processing failed for {phone_number}: {e}")
             self.session_manager.update_processing_status(phone_number, 'error')
     
-    def _process_question_background_with_error_handling(self, phone_number: str, recording_url: str, language: str):
+    def _process_question_background_with_error_handling(self, phone_number: str, recording_url: str, language: str,
+                                                          deadline: Optional[Deadline] = None):
         """
         Process question in background thread with enhanced error handling
         
@@ -421,7 +519,9 @@ class IVRHandler:
             phone_number: User's phone number
             recording_url: URL of recorded question
             language: User's language preference
+            deadline: Time the caller waits for the answer; bounds the pipeline and its retries
         """
+        deadline = deadline or Deadline(self.config.QUESTION_DEADLINE)
         try:
             logger.info(f"Background processing started for {phone_number}")
             
@@ -434,7 +534,16 @@ class IVRHandler:
             
             for attempt in range(max_retries):
                 try:
-                    result = self.processing_pipeline.process_question_sync(recording_url, language, phone_number)
+                    with call_tracer.span("pipeline_attempt", attempt=attempt + 1) as attempt_span:
+                        result = self.processing_pipeline.process_question_sync(recording_url, language, phone_number,
+                                                                                deadline=deadline)
+                        if attempt_span:
+                            attempt_span.success = result.success
+                    
+                    if deadline.cancelled:
+                        # The caller timed out, hung up or asked another question: nobody wants this answer
+                        logger.info(f"Discarding processing result for {phone_number}: {deadline.cancel_reason}")
+                        return
                     
                     if result.success:
                         # Store response data in session
@@ -461,8 +570,11 @@ class IVRHandler:
                         logger.warning(f"Processing failed for {phone_number} on attempt {attempt + 1}: {result.error_message}")
                         last_error = Exception(result.error_message)
                         
-                        if attempt < max_retries - 1:
-                            time.sleep(1.0)  # Brief delay before retry
+                        if result.unavailable_dependency or result.deadline_exceeded:
+                            # Circuit open or out of time: a retry cannot help, so answer the caller now
+                            break
+                        if attempt < max_retries - 1 and deadline.wait_for_retry(
+                                1.0, min_attempt=self.PIPELINE_RETRY_MIN_BUDGET):  # Brief delay before retry
                             continue
                         else:
                             break
@@ -471,12 +583,16 @@ class IVRHandler:
                     logger.error(f"Processing attempt {attempt + 1} failed for {phone_number}: {e}")
                     last_error = e
                     
-                    if attempt < max_retries - 1:
-                        time.sleep(1.0)  # Brief delay before retry
+                    if attempt < max_retries - 1 and deadline.wait_for_retry(
+                            1.0, min_attempt=self.PIPELINE_RETRY_MIN_BUDGET):  # Brief delay before retry
                         continue
                     else:
                         break
             
+            if deadline.cancelled:
+                logger.info(f"Discarding failed processing for {phone_number}: {deadline.cancel_reason}")
+                return
+            
             # All attempts failed
             logger.error(f"All processing attempts failed for {phone_number}")
             
@@ -520,7 +636,10 @@ class IVRHandler:
             )
             
             self.session_manager.update_processing_status(phone_number, 'error')
+        finally:
+            self._finish_question_deadline(phone_number, deadline)
     
+    @_traced_webhook('response_delivery')
     def handle_response_delivery(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle delivery of AI-generated response with enhanced error handling
@@ -553,8 +672,10 @@ class IVRHandler:
             elif session.processing_status in ['processing_audio', 'generating_response']:
                 # Still processing, check how long it's been
                 processing_time = (datetime.now() - session.last_activity).total_seconds()
+                deadline = self.question_deadlines.get(from_number)
+                timed_out = deadline.expired if deadline else processing_time > self.config.QUESTION_DEADLINE
                 
-                if processing_time > 15:  # Extended timeout for demo reliability
+                if timed_out:
                     logger.error(f"Processing timeout for {from_number} after {processing_time}s")
                     
                     # Track timeout error
@@ -565,6 +686,7 @@ class IVRHandler:
                         recovery_action='Redirect to timeout error handling'
                     )
                     
+                    self._cancel_question_deadline(from_number, "caller timed out")
                     self.session_manager.update_processing_status(from_number, 'error')
                     return self._generate_timeout_error_xml(session.language)
                 else:
@@ -634,6 +756,7 @@ class IVRHandler:
             logger.error(f"Error in response delivery for {from_number}: {error_response}")
             return self._generate_error_xml(error_response['message'])
     
+    @_traced_webhook('follow_up_menu')
     def handle_follow_up_menu(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle follow-up menu selection after response delivery
@@ -669,8 +792,10 @@ class IVRHandler:
                     xml_response = self._generate_processing_detailed_xml(session.language)
                     # Start background processing for detailed explanation (async)
                     detailed_thread = threading.Thread(
-                        target=self._generate_detailed_explanation_background,
-                        args=(from_number, response_data)
+                        target=self._run_in_call_trace,
+                        args=('background.detailed_explanation', session.session_id, time.time(),
+                              self._generate_detailed_explanation_background,
+                              from_number, response_data)
                     )
                     detailed_thread.daemon = True
                     detailed_thread.start()
@@ -762,6 +887,7 @@ class IVRHandler:
         except Exception as e:
             logger.error(f"Failed to generate detailed explanation for {phone_number}: {e}")
     
+    @_traced_webhook('error_recovery')
     def handle_error_recovery(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle error recovery menu selections
@@ -774,6 +900,7 @@ class IVRHandler:
         """
         return self.error_recovery_handler.handle_error_recovery(request_data)
     
+    @_traced_webhook('call_end', finishes_trace=True)
     def handle_call_end(self, request_data: Dict[str, Any]) -> Response:
         """
         Handle call end webhook
@@ -790,7 +917,8 @@ class IVRHandler:
             
             logger.info(f"Call ended: {from_number}, CallSid: {call_sid}")
             
-            # End session
+            # Stop work on an unanswered question and end session
+            self._cancel_question_deadline(from_number, "call ended")
             self.session_manager.end_session(from_number)
             
             # End call recording
@@ -0,0 +1,443 @@
+"""
+Question Processing Jobs for VidyaVani
+Runs questions on the shared pipeline executor and publishes stage progress,
+through a store shared by all workers, for polling clients and Server-Sent
+Events streams
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Terminal job states
+_FINISHED_STATUSES = ('completed', 'failed')
+
+
+@dataclass
+class ProcessingJob:
+    """State and progress events of one submitted question"""
+    job_id: str
+    phone_number: str
+    session_id: str
+    language: str
+    status: str = 'queued'  # queued, running, completed, failed
+    current_stage: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in _FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job summary for status responses"""
+        return {
+            'job_id': self.job_id,
+            'phone_number': self.phone_number,
+            'session_id': self.session_id,
+            'language': self.language,
+            'status': self.status,
+            'current_stage': self.current_stage,
+            'stages': [event for event in self.events if event['event'] == 'stage'],
+            'result': self.result,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """
+    Format a job event as a Server-Sent Events message
+
+    Args:
+        event: Job event with 'id', 'event' and 'data' keys
+
+    Returns:
+        SSE wire format message
+    """
+    return f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    phone_number TEXT NOT NULL,
+    session_id TEXT,
+    language TEXT,
+    status TEXT NOT NULL,
+    current_stage TEXT,
+    result TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL,
+    worker_pid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished_at ON jobs (finished_at);
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    event TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (job_id, id)
+);
+"""
+
+
+class JobManager:
+    """
+    Tracks question processing jobs submitted to the pipeline executor
+
+    Job state and events are kept in a SQLite file shared by every worker
+    on the host, so status requests and event streams can be served by any
+    worker, not only the one running the job. Streams in the running worker
+    are woken as events are written; other workers poll the store.
+    Event streams hold a request thread each, so only a few may be open per
+    worker; clients turned away poll the job status instead.
+
+    The number of queued plus running jobs of this worker is bounded so a
+    burst of submissions is rejected up front instead of piling up behind
+    its executor. Finished jobs are kept for a short retention period so
+    late status requests and reconnecting streams still see the result.
+    """
+
+    # Seconds between store reads while following a job run by another worker
+    POLL_INTERVAL = 0.2
+
+    def __init__(self, max_pending: int = 20, retention_seconds: int = 600, max_jobs: int = 500,
+                 store_path: Optional[str] = None, max_streams: int = 2):
+        """
+        Initialize job manager
+
+        Args:
+            max_pending: Maximum queued plus running jobs in this worker
+            retention_seconds: How long finished jobs remain queryable
+            max_jobs: Maximum finished jobs kept (oldest dropped first)
+            store_path: SQLite file shared by all workers (defaults to JOB_STORE_PATH)
+            max_streams: Maximum event streams open in this worker
+        """
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self.max_jobs = max_jobs
+        self.store_path = store_path or Config.JOB_STORE_PATH
+        self.jobs: Dict[str, ProcessingJob] = {}  # Jobs running in this worker
+        self.max_streams = max_streams
+        self._active_count = 0
+        self._stream_count = 0
+        self._condition = threading.Condition()
+        self._write_lock = threading.Lock()  # Orders event writes; held without the condition
+        self._local = threading.local()
+
+        store_dir = os.path.dirname(os.path.abspath(self.store_path))
+        os.makedirs(store_dir, exist_ok=True)
+        db = self._db()
+        db.execute('PRAGMA journal_mode=WAL')
+        db.executescript(_SCHEMA)
+
+    def _db(self) -> sqlite3.Connection:
+        """This thread's connection to the job store (reopened after a fork)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.store_path, timeout=5.0, isolation_level=None)
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection, self._local.pid = connection, os.getpid()
+        return connection
+
+    def submit(self, pipeline, recording_url: str, language: str, phone_number: str,
+               session_id: str,
+               on_complete: Optional[Callable[[Any], Optional[Dict[str, Any]]]] = None) -> Optional[ProcessingJob]:
+        """
+        Submit a question to the pipeline executor
+
+        Args:
+            pipeline: IVRProcessingPipeline providing submit_question
+            recording_url: URL of the recorded question
+            language: User's language preference
+            phone_number: Caller phone number
+            session_id: Session identifier
+            on_complete: Called in the worker thread with the ProcessingResult;
+                returns the result payload published to clients
+
+        Returns:
+            The queued job, or None if too many jobs are already pending
+        """
+        self._prune()
+        with self._condition:
+            if self._active_count >= self.max_pending:
+                logger.warning(f"Rejecting question job for {phone_number}: {self._active_count} jobs pending")
+                return None
+
+            job = ProcessingJob(
+                job_id=uuid.uuid4().hex,
+                phone_number=phone_number,
+                session_id=session_id,
+                language=language
+            )
+            self.jobs[job.job_id] = job
+            self._active_count += 1
+
+        with self._write_lock:
+            self._db().execute(
+                "INSERT INTO jobs (job_id, phone_number, session_id, language, status, created_at, worker_pid) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job.job_id, phone_number, session_id, language, job.status, job.created_at, os.getpid())
+            )
+            self._append_event(job, 'status', {'status': 'queued'})
+
+        def progress(stage: str, status: str, duration: float):
+            with self._write_lock:
+                if job.status == 'queued':
+                    with self._condition:
+                        job.status = 'running'
+                    self._append_event(job, 'status', {'status': 'running'})
+                with self._condition:
+                    job.current_stage = stage if status == 'started' else None
+                self._append_event(job, 'stage', {
+                    'stage': stage,
+                    'status': status,
+                    'duration': round(duration, 3),
+                })
+
+        try:
+            future = pipeline.submit_question(recording_url, language, phone_number,
+                                              progress_callback=progress, session_id=session_id)
+        except Exception as e:
+            logger.error(f"Failed to submit question job {job.job_id}: {e}")
+            self._finish(job, False, {'success': False, 'error_message': 'Failed to start processing'})
+            return job
+
+        future.add_done_callback(lambda f: self._on_future_done(job, f, on_complete))
+        logger.info(f"Question job {job.job_id} submitted for {phone_number}")
+        return job
+
+    def _on_future_done(self, job: ProcessingJob, future, on_complete):
+        """Record the pipeline outcome once the executor finishes the job"""
+        try:
+            result = future.result()
+            payload = on_complete(result) if on_complete else None
+            if payload is None:
+                payload = {'success': bool(getattr(result, 'success', False))}
+            self._finish(job, bool(payload.get('success')), payload)
+        except Exception as e:
+            logger.error(f"Question job {job.job_id} failed: {e}")
+            self._finish(job, False, {'success': False, 'error_message': 'Failed to process question'})
+
+    def _finish(self, job: ProcessingJob, success: bool, payload: Dict[str, Any]):
+        with self._write_lock:
+            with self._condition:
+                if job.finished:
+                    return
+                job.status = 'completed' if success else 'failed'
+                job.current_stage = None
+                job.result = payload
+                job.finished_at = time.time()
+                self._active_count -= 1
+                self.jobs.pop(job.job_id, None)
+            self._append_event(job, 'result', dict(payload, status=job.status))
+
+    def _append_event(self, job: ProcessingJob, event_type: str, data: Dict[str, Any]):
+        """
+        Append an event, saving it with the job's state in one transaction
+        (so a reader seeing a finished job also sees its result event), and
+        wake stream readers. Caller holds the write lock, which keeps events
+        in order; the store is written without the condition so status
+        requests and streams are not held up behind it.
+        """
+        event = {
+            'id': len(job.events),
+            'event': event_type,
+            'data': dict(data, job_id=job.job_id, timestamp=time.time()),
+        }
+        db = self._db()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute("INSERT INTO job_events (job_id, id, event, data) VALUES (?, ?, ?, ?)",
+                       (job.job_id, event['id'], event_type, json.dumps(event['data'])))
+            db.execute("UPDATE jobs SET status = ?, current_stage = ?, result = ?, finished_at = ? WHERE job_id = ?",
+                       (job.status, job.current_stage, json.dumps(job.result) if job.result is not None else None,
+                        job.finished_at, job.job_id))
+            db.execute('COMMIT')
+        except sqlite3.Error as e:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            logger.error(f"Failed to save event of question job {job.job_id}: {e}")
+        with self._condition:
+            job.events.append(event)
+            self._condition.notify_all()
+
+    def _prune(self):
+        """Drop finished jobs past retention, and the oldest finished jobs over the size cap"""
+        db = self._db()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute(
+                "DELETE FROM jobs WHERE finished_at < ? OR job_id IN (SELECT job_id FROM jobs "
+                "WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT -1 OFFSET ?)",
+                (time.time() - self.retention_seconds, self.max_jobs)
+            )
+            db.execute("DELETE FROM job_events WHERE job_id NOT IN (SELECT job_id FROM jobs)")
+            db.execute('COMMIT')
+        except sqlite3.Error as e:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            logger.error(f"Failed to prune question jobs: {e}")
+
+    def _load(self, job_id: str, events_from: int = 0) -> Optional[ProcessingJob]:
+        """
+        Read a job and its events from index events_from onwards
+
+        The job row is read before its events: a job read as finished
+        therefore comes with its result event.
+        """
+        db = self._db()
+        row = db.execute(
+            "SELECT phone_number, session_id, language, status, current_stage, result, created_at, "
+            "finished_at, worker_pid FROM jobs WHERE job_id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        phone_number, session_id, language, status, stage, result, created_at, finished_at, pid = row
+        if status not in _FINISHED_STATUSES and pid != os.getpid() and not _pid_alive(pid):
+            self._fail_orphan(job_id)
+            return self._load(job_id, events_from)
+
+        job = ProcessingJob(job_id=job_id, phone_number=phone_number, session_id=session_id, language=language,
+                            status=status, current_stage=stage, result=json.loads(result) if result else None,
+                            created_at=created_at, finished_at=finished_at)
+        job.events = [
+            {'id': event_id, 'event': event, 'data': json.loads(data)}
+            for event_id, event, data in db.execute(
+                "SELECT id, event, data FROM job_events WHERE job_id = ? AND id >= ? ORDER BY id",
+                (job_id, events_from)
+            )
+        ]
+        return job
+
+    def _fail_orphan(self, job_id: str):
+        """Fail a job whose worker exited (e.g. was recycled) before finishing it"""
+        payload = {'success': False, 'error_message': 'Processing was interrupted, please ask again'}
+        now = time.time()
+        db = self._db()
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            updated = db.execute(
+                "UPDATE jobs SET status = 'failed', current_stage = NULL, result = ?, finished_at = ? "
+                "WHERE job_id = ? AND status NOT IN (?, ?)",
+                (json.dumps(payload), now, job_id) + _FINISHED_STATUSES
+            ).rowcount
+            if updated:
+                next_id = db.execute("SELECT COALESCE(MAX(id) + 1, 0) FROM job_events WHERE job_id = ?",
+                                     (job_id,)).fetchone()[0]
+                db.execute("INSERT INTO job_events (job_id, id, event, data) VALUES (?, ?, 'result', ?)",
+                           (job_id, next_id, json.dumps(dict(payload, status='failed', job_id=job_id,
+                                                             timestamp=now))))
+            db.execute('COMMIT')
+            if updated:
+                logger.warning(f"Question job {job_id} failed: its worker exited")
+        except sqlite3.Error as e:
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+            logger.error(f"Failed to fail orphaned question job {job_id}: {e}")
+
+    def get_job(self, job_id: str) -> Optional[ProcessingJob]:
+        """Get a job by ID, from any worker"""
+        with self._condition:
+            job = self.jobs.get(job_id)
+        return job or self._load(job_id)
+
+    def get_job_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a consistent snapshot of a job's status, from any worker"""
+        job = self._load(job_id)
+        return job.to_dict() if job else None
+
+    def iter_events(self, job_id: str, last_event_id: int = -1,
+                    heartbeat_seconds: float = 15.0) -> Iterator[Optional[Dict[str, Any]]]:
+        """
+        Yield job events as they happen until the job finishes
+
+        Args:
+            job_id: Job to follow
+            last_event_id: Resume after this event ID (SSE Last-Event-ID)
+            heartbeat_seconds: Yield None after this long without events so
+                callers can send a keep-alive
+
+        Yields:
+            Job events, or None as a heartbeat
+        """
+        next_index = last_event_id + 1
+        quiet_since = time.monotonic()
+        while True:
+            job = self._load(job_id, events_from=next_index)
+            if job is None:
+                return
+
+            for event in job.events:
+                yield event
+            next_index += len(job.events)
+            if job.finished:
+                return
+
+            if job.events:
+                quiet_since = time.monotonic()
+            elif time.monotonic() - quiet_since >= heartbeat_seconds:
+                quiet_since = time.monotonic()
+                yield None
+
+            with self._condition:
+                local = self.jobs.get(job_id)
+                if local is None or len(local.events) <= next_index:
+                    self._condition.wait(self.POLL_INTERVAL)
+
+    def open_stream(self) -> bool:
+        """Take one of this worker's event stream slots, or return False if all are in use"""
+        with self._condition:
+            if self._stream_count >= self.max_streams:
+                return False
+            self._stream_count += 1
+            return True
+
+    def close_stream(self):
+        """Return a slot taken by open_stream"""
+        with self._condition:
+            self._stream_count = max(0, self._stream_count - 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get this worker's active jobs and stored job counts by status"""
+        try:
+            counts = dict(self._db().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        except sqlite3.Error as e:
+            logger.error(f"Failed to count question jobs: {e}")
+            counts = {}
+        with self._condition:
+            active, streams = self._active_count, self._stream_count
+        return {
+            'active_jobs': active,
+            'max_pending': self.max_pending,
+            'open_streams': streams,
+            'max_streams': self.max_streams,
+            'jobs_by_status': counts,
+        }
+
+
+# Global job manager instance
+job_manager = JobManager(max_pending=Config.JOB_MAX_PENDING, max_streams=Config.JOB_MAX_STREAMS)
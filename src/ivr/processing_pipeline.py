@@ -7,21 +7,41 @@ import logging
 import asyncio
 import requests
 import time
-from typing import Optional, Dict, Any
-from dataclasses import dataclass
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional, Dict, Any
+from dataclasses import dataclass, replace
 import tempfile
 import os
 
-from src.audio.audio_processor import AudioProcessor, Language
+from src.audio.audio_processor import AudioProcessor, AudioProcessingResult, Language
+from src.content.vector_database import index_version
+from src.rag.answer_bank import shared_answer_bank
 from src.rag.context_builder import ContextBuilder
-from src.rag.response_generator import ResponseGenerator
+from src.rag.response_generator import ResponseGenerator, normalize_question
 from src.session.session_manager import ResponseData
 from src.utils.performance_decorators import track_performance, track_session_activity, PipelineTracker
 from src.utils.error_tracker import error_tracker
+from src.utils.call_tracer import call_tracer
+from src.utils.circuit_breaker import CircuitOpenError, circuit_breakers
+from src.utils.deadline import Deadline, DeadlineExceeded, current_deadline
+from src.utils.faq_matcher import FAQMatch, faq_matcher
+from src.utils.metrics_registry import metrics_registry
+from src.utils.single_flight import SingleFlight
+from src.utils.slow_call_store import slow_call_store
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+_deadline_exceeded = metrics_registry.counter(
+    'vidyavani_question_deadline_exceeded', 'Questions abandoned because the caller deadline passed', ['stage']
+)
+_faq_lookups = metrics_registry.counter(
+    'vidyavani_faq_lookups', 'Questions looked up among demo and banked questions, by source matched', ['outcome']
+)
+
+# Callers asking the same question at the same time share one answer, across pipeline instances
+_question_flights = SingleFlight('question_answer')
+
 @dataclass
 class ProcessingResult:
     """Result of the complete processing pipeline"""
@@ -33,16 +53,34 @@ class ProcessingResult:
     detailed_audio_url: str = ""
     error_message: str = ""
     processing_time: float = 0.0
+    unavailable_dependency: str = ""  # Set when a dependency's circuit is open; retrying will not help
+    deadline_exceeded: bool = False  # Caller's deadline passed or the work was cancelled
 
 class IVRProcessingPipeline:
     """Complete processing pipeline for IVR questions"""
     
+    # Seconds of the caller's deadline kept for TTS and upload while retrieving and generating
+    TTS_RESERVE = 2.5
+    # Seconds retrieval and generation of the detailed answer need on top of the reserve
+    DETAILED_RESPONSE_MIN_BUDGET = 3.0
+    
     def __init__(self, config: Config):
         self.config = config
         self.audio_processor = AudioProcessor(config)
         self.context_builder = ContextBuilder(config)
         self.response_generator = ResponseGenerator(config)
         
+        self.answer_flights = _question_flights
+        
+        # Precomputed answers to likely questions, served without retrieval, LLM or TTS requests
+        self.answer_bank = shared_answer_bank(config.ANSWER_BANK_PATH, index_version())
+        
+        # Bounded executor shared by all background question processing
+        self.executor = ThreadPoolExecutor(
+            max_workers=config.MAX_CONCURRENT_CALLS,
+            thread_name_prefix="ivr-pipeline"
+        )
+        
         # Create temp directory for audio files
         self.temp_dir = tempfile.mkdtemp(prefix="vidyavani_audio_")
         logger.info(f"Processing pipeline initialized with temp dir: {self.temp_dir}")
@@ -64,8 +102,9 @@ class IVRProcessingPipeline:
                 # Return demo audio data for testing
                 return self._get_demo_audio_data()
             
-            response = requests.get(audio_url, timeout=30)
-            response.raise_for_status()
+            with circuit_breakers.get('recording_download').guard():
+                response = requests.get(audio_url, timeout=current_deadline().timeout(30))
+                response.raise_for_status()
             
             # Validate content type
             content_type = response.headers.get('content-type', '')
@@ -75,6 +114,9 @@ class IVRProcessingPipeline:
             logger.info(f"Downloaded {len(response.content)} bytes of audio data")
             return response.content
             
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping download of {audio_url}: {e}")
+            return None
         except requests.exceptions.Timeout:
             logger.error(f"Timeout downloading audio from {audio_url}")
             return self._get_demo_audio_data()
@@ -292,9 +334,52 @@ class IVRProcessingPipeline:
                 processing_time=processing_time
             )
     
+    def submit_question(self, recording_url: str, language: str, phone_number: str,
+                        progress_callback: Optional[Callable[[str, str, float], None]] = None,
+                        session_id: Optional[str] = None) -> Future:
+        """
+        Run process_question_sync on the pipeline's bounded executor
+        
+        Args:
+            recording_url: URL of the recorded question
+            language: User's language preference
+            phone_number: Phone number for session tracking
+            progress_callback: Called with (stage, status, duration) as pipeline stages start and finish
+            session_id: Session whose call trace records the processing; slow questions are captured
+            
+        Returns:
+            Future resolving to the ProcessingResult
+        """
+        if not session_id:
+            return self.executor.submit(
+                self.process_question_sync, recording_url, language, phone_number,
+                progress_callback=progress_callback
+            )
+        return self.executor.submit(
+            self._process_question_traced, session_id, time.time(),
+            recording_url, language, phone_number, progress_callback
+        )
+    
+    def _process_question_traced(self, session_id: str, enqueued_at: float, recording_url: str,
+                                 language: str, phone_number: str,
+                                 progress_callback: Optional[Callable[[str, str, float], None]]) -> ProcessingResult:
+        """Run process_question_sync inside the session's trace and capture it if slow"""
+        call_tracer.record_span("job.queue_wait", enqueued_at, time.time(), session_id)
+        with call_tracer.activate(session_id), call_tracer.span("job.process_question") as span:
+            result = self.process_question_sync(recording_url, language, phone_number,
+                                                progress_callback=progress_callback)
+            if span:
+                span.success = result.success
+        
+        slow_call_store.capture_if_slow(session_id, time.time() - enqueued_at, span,
+                                        source='job', language=language)
+        return result
+    
     @track_session_activity(session_id_param='phone_number', phone_param='phone_number')
     @track_performance("Complete_Processing_Pipeline")
-    def process_question_sync(self, recording_url: str, language: str, phone_number: str) -> ProcessingResult:
+    def process_question_sync(self, recording_url: str, language: str, phone_number: str,
+                              progress_callback: Optional[Callable[[str, str, float], None]] = None,
+                              deadline: Optional[Deadline] = None) -> ProcessingResult:
         """
         Synchronously process question with enhanced error handling and fallbacks
         
@@ -302,36 +387,64 @@ class IVRProcessingPipeline:
             recording_url: URL of the recorded question
             language: User's language preference  
             phone_number: Phone number for session tracking
+            progress_callback: Optional stage progress callback (stage, status, duration)
+            deadline: Caller's deadline; bounds every stage's timeouts and retries (unbounded if None)
             
         Returns:
             ProcessingResult with generated response
         """
         import time
         start_time = time.time()
+        deadline = deadline or Deadline.unbounded()
         
         try:
             logger.info(f"Starting synchronous processing for {phone_number}")
             
-            with PipelineTracker("question_processing", phone_number) as tracker:
+            with deadline.activate(), \
+                    PipelineTracker("question_processing", phone_number, stage_callback=progress_callback) as tracker:
                 # Step 1: Download and validate audio
                 tracker.start_stage("audio_download")
                 audio_data = self._download_audio_from_url(recording_url)
+                call_tracer.set_span_attributes(audio_bytes=len(audio_data or b''))
                 tracker.end_stage("audio_download", audio_data is not None)
                 
                 if not audio_data:
+                    download_breaker = circuit_breakers.get('recording_download')
                     return ProcessingResult(
                         success=False,
                         error_message="Failed to download audio recording",
-                        processing_time=time.time() - start_time
+                        processing_time=time.time() - start_time,
+                        unavailable_dependency='recording_download' if download_breaker.is_open else ""
                     )
             
                 # Step 2: Process speech to text with fallbacks
+                deadline.check("stt_processing")
                 tracker.start_stage("stt_processing")
                 language_enum = self._language_str_to_enum(language)
                 stt_result = self.audio_processor.process_question_audio(audio_data, language_enum)
                 
                 if not stt_result.success:
+                    if stt_result.circuit_open:
+                        tracker.end_stage("stt_processing", False)
+                        return ProcessingResult(
+                            success=False,
+                            error_message=stt_result.error_message,
+                            processing_time=time.time() - start_time,
+                            unavailable_dependency='google_stt'
+                        )
+                    
+                    if stt_result.speech_duration == 0.0:
+                        # VAD found no speech; another language will not help
+                        logger.info(f"No speech detected in recording from {phone_number}")
+                        tracker.end_stage("stt_processing", False)
+                        return ProcessingResult(
+                            success=False,
+                            error_message=stt_result.error_message or "Could not understand your question clearly",
+                            processing_time=time.time() - start_time
+                        )
+                    
                     # Try with noise handling fallback
+                    deadline.check("stt_fallback")
                     logger.warning(f"Initial STT failed for {phone_number}, trying fallback")
                     fallback_result = self._handle_unclear_audio_fallback(audio_data, language_enum, phone_number)
                     if fallback_result.success:
@@ -345,6 +458,7 @@ class IVRProcessingPipeline:
                         )
                 
                 question_text = stt_result.content.strip()
+                call_tracer.set_span_attributes(transcript_chars=len(question_text))
                 tracker.end_stage("stt_processing", True)
                 logger.info(f"STT successful for {phone_number}: '{question_text[:50]}...'")
                 
@@ -354,101 +468,35 @@ class IVRProcessingPipeline:
                     tracker.end_stage("question_validation", False)
                     return self._handle_invalid_question(question_text, language, phone_number, start_time)
                 tracker.end_stage("question_validation", True)
-            
-                # Step 4: Build context and generate response
-                tracker.start_stage("rag_processing")
-                try:
-                    context = self.context_builder.build_context(
-                        question=question_text,
-                        language=language,
-                        detail_level="simple"
-                    )
-                    
-                    response_result = self.response_generator.generate_response(context)
-                    
-                    if not response_result['success']:
-                        tracker.end_stage("rag_processing", False)
-                        return self._handle_rag_failure(question_text, language, phone_number, start_time)
-                    
-                    response_text = response_result['response_text']
-                    tracker.end_stage("rag_processing", True)
-                    logger.info(f"Response generated for {phone_number}: {len(response_text)} characters")
-                    
-                except Exception as rag_error:
-                    tracker.end_stage("rag_processing", False)
-                    logger.error(f"RAG processing failed for {phone_number}: {rag_error}")
-                    error_tracker.track_error('RAG_Processing', rag_error,
-                                             phone_number=phone_number,
-                                             recovery_action='Fallback to error response')
-                    return self._handle_rag_failure(question_text, language, phone_number, start_time)
-            
-                # Step 5: Generate detailed response (optional)
-                tracker.start_stage("detailed_response")
-                detailed_response_text = response_text  # Default to simple response
-                try:
-                    detailed_context = self.context_builder.build_context(
-                        question=question_text,
-                        language=language,
-                        detail_level="detailed"
-                    )
-                    
-                    detailed_result = self.response_generator.generate_response(detailed_context)
-                    if detailed_result['success']:
-                        detailed_response_text = detailed_result['response_text']
-                        tracker.end_stage("detailed_response", True)
-                    else:
-                        tracker.end_stage("detailed_response", False)
-                        
-                except Exception as detailed_error:
-                    tracker.end_stage("detailed_response", False)
-                    logger.warning(f"Detailed response generation failed for {phone_number}: {detailed_error}")
-                    # Continue with simple response
-            
-                # Step 6: Convert responses to audio with retries
-                tracker.start_stage("tts_processing")
-                response_audio_result = self._generate_audio_with_retry(response_text, language_enum, phone_number)
-                if not response_audio_result.success:
-                    tracker.end_stage("tts_processing", False)
-                    return ProcessingResult(
-                        success=False,
-                        question_text=question_text,
-                        response_text=response_text,
-                        error_message="Failed to generate audio response",
-                        processing_time=time.time() - start_time
-                    )
                 
-                # Generate detailed audio (best effort)
-                detailed_audio_result = self._generate_audio_with_retry(detailed_response_text, language_enum, phone_number, is_detailed=True)
-                tracker.end_stage("tts_processing", True)
-            
-                # Step 7: Upload audio files for IVR access
-                tracker.start_stage("audio_upload")
-                response_audio_url = self._upload_audio_for_ivr(
-                    response_audio_result.audio_data, 
-                    f"response_{phone_number}_{int(start_time)}"
-                )
-                
-                detailed_audio_url = ""
-                if detailed_audio_result.success:
-                    detailed_audio_url = self._upload_audio_for_ivr(
-                        detailed_audio_result.audio_data,
-                        f"detailed_{phone_number}_{int(start_time)}"
-                    )
-                tracker.end_stage("audio_upload", True)
-                
-                processing_time = time.time() - start_time
-                
-                logger.info(f"Processing completed successfully in {processing_time:.2f}s for {phone_number}")
-                
-                return ProcessingResult(
-                    success=True,
-                    question_text=question_text,
-                    response_text=response_text,
-                    response_audio_url=response_audio_url,
-                    detailed_response_text=detailed_response_text,
-                    detailed_audio_url=detailed_audio_url,
-                    processing_time=processing_time
+                # Demo and banked questions, however worded, are answered without retrieval or LLM
+                match = faq_matcher.match(question_text, language)
+                _faq_lookups.inc(outcome=match.source if match else 'miss')
+                if match is not None:
+                    return self._serve_faq_answer(match, question_text, language_enum, phone_number,
+                                                  start_time, tracker)
+            
+                # Steps 4-7: Answer the question, once for all callers asking it at the same time
+                answer_key = (normalize_question(question_text), language.lower())
+                result, shared = self.answer_flights.do(
+                    answer_key, self._answer_question,
+                    question_text, language, language_enum, phone_number, start_time, tracker, deadline
                 )
+                if shared:
+                    logger.info(f"Shared the in-flight answer to '{question_text[:50]}' with {phone_number}")
+                    result = replace(result, question_text=question_text, processing_time=time.time() - start_time)
+                return result
+            
+        except DeadlineExceeded as e:
+            processing_time = time.time() - start_time
+            logger.warning(f"Abandoned processing for {phone_number} after {processing_time:.2f}s: {e}")
+            _deadline_exceeded.inc(stage=e.stage)
+            return ProcessingResult(
+                success=False,
+                error_message=str(e),
+                processing_time=processing_time,
+                deadline_exceeded=True
+            )
             
         except Exception as e:
             processing_time = time.time() - start_time
@@ -465,6 +513,209 @@ class IVRProcessingPipeline:
                 processing_time=processing_time
             )
     
+    def _answer_question(self, question_text: str, language: str, language_enum: Language, phone_number: str,
+                         start_time: float, tracker: PipelineTracker, deadline: Deadline) -> ProcessingResult:
+        """
+        Retrieve, generate, synthesize and upload the answer to a transcribed question
+        
+        Runs on the thread of the first caller asking the question; callers asking the
+        same question while it runs receive the same result.
+        
+        Raises:
+            DeadlineExceeded: if the caller's deadline passes between stages
+        """
+        # Step 4: Build context and generate response
+        deadline.check("rag_processing")
+        tracker.start_stage("rag_processing")
+        try:
+            with deadline.leaving(self.TTS_RESERVE).activate():
+                with call_tracer.span("retrieval", detail_level="simple"):
+                    context = self.context_builder.build_context(
+                        question=question_text,
+                        language=language,
+                        detail_level="simple"
+                    )
+                    self._trace_retrieval(context)
+        
+                with call_tracer.span("llm", detail_level="simple"):
+                    response_result = self.response_generator.generate_response(context)
+                    self._trace_generation(response_result)
+        
+            if not response_result['success']:
+                tracker.end_stage("rag_processing", False)
+                result = self._handle_rag_failure(question_text, language, phone_number, start_time)
+                if response_result.get('circuit_open'):
+                    result.unavailable_dependency = 'llm'
+                return result
+        
+            response_text = response_result['response_text']
+            tracker.end_stage("rag_processing", True)
+            logger.info(f"Response generated for {phone_number}: {len(response_text)} characters")
+        
+        except Exception as rag_error:
+            tracker.end_stage("rag_processing", False)
+            logger.error(f"RAG processing failed for {phone_number}: {rag_error}")
+            error_tracker.track_error('RAG_Processing', rag_error,
+                                     phone_number=phone_number,
+                                     recovery_action='Fallback to error response')
+            return self._handle_rag_failure(question_text, language, phone_number, start_time)
+        
+        # Step 5: Generate detailed response (optional)
+        tracker.start_stage("detailed_response")
+        detailed_response_text = response_text  # Default to simple response
+        try:
+            if not deadline.can_fit(self.TTS_RESERVE + self.DETAILED_RESPONSE_MIN_BUDGET):
+                raise DeadlineExceeded("detailed_response", f"{deadline.remaining():.1f}s left")
+        
+            with deadline.leaving(self.TTS_RESERVE).activate():
+                with call_tracer.span("retrieval", detail_level="detailed"):
+                    detailed_context = self.context_builder.build_context(
+                        question=question_text,
+                        language=language,
+                        detail_level="detailed"
+                    )
+                    self._trace_retrieval(detailed_context)
+        
+                with call_tracer.span("llm", detail_level="detailed"):
+                    detailed_result = self.response_generator.generate_response(detailed_context)
+                    self._trace_generation(detailed_result)
+            if detailed_result['success']:
+                detailed_response_text = detailed_result['response_text']
+                tracker.end_stage("detailed_response", True)
+            else:
+                tracker.end_stage("detailed_response", False)
+        
+        except DeadlineExceeded as skipped:
+            tracker.end_stage("detailed_response", False)
+            logger.info(f"Skipping detailed response for {phone_number}: {skipped}")
+        
+        except Exception as detailed_error:
+            tracker.end_stage("detailed_response", False)
+            logger.warning(f"Detailed response generation failed for {phone_number}: {detailed_error}")
+            # Continue with simple response
+        
+        # Step 6: Convert responses to audio with retries
+        deadline.check("tts_processing")
+        tracker.start_stage("tts_processing")
+        with call_tracer.span("tts", detail_level="simple"):
+            response_audio_result = self._generate_audio_with_retry(response_text, language_enum, phone_number)
+        if response_audio_result.circuit_open:
+            # TTS is down: deliver the answer as text, read out by the telephony platform
+            tracker.end_stage("tts_processing", False)
+            logger.warning(f"TTS unavailable, delivering text answer to {phone_number}")
+            return ProcessingResult(
+                success=True,
+                question_text=question_text,
+                response_text=response_text,
+                detailed_response_text=detailed_response_text,
+                processing_time=time.time() - start_time
+            )
+        if not response_audio_result.success:
+            tracker.end_stage("tts_processing", False)
+            return ProcessingResult(
+                success=False,
+                question_text=question_text,
+                response_text=response_text,
+                error_message="Failed to generate audio response",
+                processing_time=time.time() - start_time
+            )
+        
+        # Generate detailed audio (best effort, only if the caller would still be waiting)
+        if deadline.can_fit(self.TTS_RESERVE):
+            with call_tracer.span("tts", detail_level="detailed"):
+                detailed_audio_result = self._generate_audio_with_retry(detailed_response_text, language_enum, phone_number, is_detailed=True)
+        else:
+            logger.info(f"Skipping detailed audio for {phone_number}: {deadline.remaining():.1f}s left")
+            detailed_audio_result = AudioProcessingResult(success=False, error_message="No time left for detailed audio")
+        tracker.end_stage("tts_processing", True)
+        
+        # Step 7: Upload audio files for IVR access
+        deadline.check("audio_upload")
+        tracker.start_stage("audio_upload")
+        response_audio_url = self._upload_audio_for_ivr(
+            response_audio_result.audio_data, 
+            f"response_{phone_number}_{int(start_time)}"
+        )
+        
+        detailed_audio_url = ""
+        if detailed_audio_result.success:
+            detailed_audio_url = self._upload_audio_for_ivr(
+                detailed_audio_result.audio_data,
+                f"detailed_{phone_number}_{int(start_time)}"
+            )
+        tracker.end_stage("audio_upload", True)
+        
+        processing_time = time.time() - start_time
+        
+        logger.info(f"Processing completed successfully in {processing_time:.2f}s for {phone_number}")
+        
+        return ProcessingResult(
+            success=True,
+            question_text=question_text,
+            response_text=response_text,
+            response_audio_url=response_audio_url,
+            detailed_response_text=detailed_response_text,
+            detailed_audio_url=detailed_audio_url,
+            processing_time=processing_time
+        )
+    
+    def _serve_faq_answer(self, match: FAQMatch, question_text: str, language_enum: Language,
+                          phone_number: str, start_time: float, tracker: PipelineTracker) -> ProcessingResult:
+        """
+        Answer a question matching a demo or banked question
+        
+        Banked audio is pinned in audio storage. Demo answers, which have none,
+        and banked answers whose file has gone (e.g. storage was wiped after the
+        bank was built) are synthesized once and pinned under a key of their
+        text and voice, so later calls on any worker reuse the file.
+        """
+        from src.storage.audio_storage import audio_storage
+        
+        tracker.start_stage("faq_answer")
+        audio_urls, urls_by_text = {}, {}
+        for detail_level, text, filename in (
+                ('simple', match.answer_text, getattr(match.answer, 'simple_audio', '')),
+                ('detailed', match.detailed_text, getattr(match.answer, 'detailed_audio', ''))):
+            if filename and audio_storage.get_audio_file_path(filename):
+                audio_urls[detail_level] = audio_storage.get_public_url(filename)
+            elif text in urls_by_text:
+                audio_urls[detail_level] = urls_by_text[text]
+            else:
+                if filename:
+                    logger.warning(f"Banked {detail_level} audio missing for '{match.question}', synthesizing it")
+                audio_urls[detail_level] = self._pinned_answer_audio(text, language_enum, phone_number,
+                                                                     is_detailed=detail_level == 'detailed')
+            urls_by_text[text] = audio_urls[detail_level]
+        tracker.end_stage("faq_answer", True)
+        
+        processing_time = time.time() - start_time
+        logger.info(f"Answered {phone_number} from {match.source} question '{match.question}' "
+                    f"(score {match.score}) in {processing_time:.2f}s")
+        return ProcessingResult(
+            success=True,
+            question_text=question_text,
+            response_text=match.answer_text,
+            response_audio_url=audio_urls['simple'],
+            detailed_response_text=match.detailed_text,
+            detailed_audio_url=audio_urls['detailed'],
+            processing_time=processing_time
+        )
+    
+    def _pinned_answer_audio(self, text: str, language_enum: Language, phone_number: str,
+                             is_detailed: bool) -> str:
+        """URL of pinned audio for a stored answer's text, synthesizing and storing it if no worker has"""
+        from src.storage.audio_storage import audio_storage
+        
+        voice = getattr(self.audio_processor, 'tts_configs', {}).get(language_enum) or language_enum.value
+        key = f"{text}|{voice}"
+        audio_url = audio_storage.get_keyed_audio_url(key, 'faq')
+        if audio_url:
+            return audio_url
+        audio_result = self._generate_audio_with_retry(text, language_enum, phone_number, is_detailed=is_detailed)
+        if not audio_result.success:
+            return ""
+        return audio_storage.store_audio(audio_result.audio_data, 'faq', pinned=True, key=key)
+    
     def _handle_unclear_audio_fallback(self, audio_data: bytes, language: Language, phone_number: str):
         """
         Handle unclear audio with fallback strategies
@@ -503,6 +754,23 @@ class IVRProcessingPipeline:
                 error_message=self.audio_processor.get_fallback_message("processing_error", language)
             )
     
+    def _trace_retrieval(self, context: Dict[str, Any]):
+        """Record retrieved chunk IDs and scores on the current trace span"""
+        source_chunks = context.get('search_results', {}).get('source_chunks', [])
+        call_tracer.set_span_attributes(
+            chunk_ids=[chunk['chunk_id'] for chunk in source_chunks],
+            chunk_scores=[round(chunk['similarity_score'], 4) for chunk in source_chunks]
+        )
+    
+    def _trace_generation(self, response_result: Dict[str, Any]):
+        """Record prompt size, answer length and attempts on the current trace span"""
+        call_tracer.set_span_attributes(
+            prompt_tokens=response_result.get('prompt_tokens', 0),
+            tokens_used=response_result.get('tokens_used', 0),
+            answer_chars=len(response_result.get('response_text', '')),
+            llm_attempts=response_result.get('attempt_number', 1)
+        )
+    
     def _is_valid_question(self, question_text: str) -> bool:
         """
         Validate if the question is appropriate for the system
@@ -609,24 +877,29 @@ class IVRProcessingPipeline:
         Returns:
             AudioProcessingResult
         """
+        deadline = current_deadline()
         for attempt in range(max_retries + 1):
+            call_tracer.set_span_attributes(tts_attempts=attempt + 1)
             try:
                 result = self.audio_processor.generate_response_audio(text, language)
                 if result.success:
+                    call_tracer.set_span_attributes(tts_bytes=len(result.audio_data or b''))
+                    return result
+                if result.circuit_open:
                     return result
                 
                 if attempt < max_retries:
+                    if not deadline.wait_for_retry(0.5):  # Brief delay before retry
+                        break
                     logger.warning(f"TTS attempt {attempt + 1} failed for {phone_number}, retrying...")
-                    time.sleep(0.5)  # Brief delay before retry
                 
             except Exception as e:
                 logger.error(f"TTS attempt {attempt + 1} failed for {phone_number}: {e}")
-                if attempt < max_retries:
-                    time.sleep(0.5)
+                if attempt < max_retries and not deadline.wait_for_retry(0.5):
+                    break
         
         # All retries failed
         logger.error(f"All TTS attempts failed for {phone_number}")
-        from src.audio.audio_processor import AudioProcessingResult
         return AudioProcessingResult(
             success=False,
             error_message="Failed to generate audio after multiple attempts"
@@ -634,6 +907,9 @@ class IVRProcessingPipeline:
 
     def cleanup(self):
         """Clean up temporary files"""
+        executor = getattr(self, 'executor', None)
+        if executor is not None:
+            executor.shutdown(wait=False)
         try:
             import shutil
             if os.path.exists(self.temp_dir):
@@ -7,13 +7,19 @@ IVR learning system, including semantic search, context building, and response g
 
 from .semantic_search import SemanticSearchEngine
 from .context_builder import ContextBuilder
+from .llm_router import LLMRouter
 from .response_generator import ResponseGenerator, VidyaPersona
 from .rag_engine import RAGEngine
+from .answer_bank import AnswerBank, AnswerBankBuilder, BankedAnswer
 
 __all__ = [
     'SemanticSearchEngine',
     'ContextBuilder', 
+    'LLMRouter',
     'ResponseGenerator',
     'VidyaPersona',
-    'RAGEngine'
+    'RAGEngine',
+    'AnswerBank',
+    'AnswerBankBuilder',
+    'BankedAnswer'
 ]
\ No newline at end of file
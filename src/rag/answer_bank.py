@@ -0,0 +1,362 @@
+"""
+Precomputed answer bank for the NCERT syllabus
+
+Most calls ask a small set of textbook questions. The answer bank holds, for
+each likely question, the simple and detailed answers with their audio already
+synthesized, so workers answer those calls with no retrieval, LLM or TTS
+request; only the question itself still has to be transcribed.
+
+The bank is built offline by AnswerBankBuilder (scripts/build_answer_bank.py):
+for every section of the saved index it asks the LLM for questions students
+are likely to ask in each language, answers each through the normal RAG path
+and stores the TTS audio pinned in audio storage. Answers are appended to a
+JSON lines file as they complete, so an interrupted build resumes where it
+stopped, and each records the index version it was built from.
+"""
+
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.rag.context_packer import BOILERPLATE_SECTIONS
+from src.rag.response_generator import normalize_question
+from src.utils.faq_matcher import FAQMatcher, faq_matcher
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = ('english', 'telugu')
+DETAIL_LEVELS = ('simple', 'detailed')
+
+
+@dataclass
+class BankedAnswer:
+    """Precomputed answers to one question in one language"""
+    question: str
+    language: str  # 'english' or 'telugu'
+    chapter: str
+    section: str
+    simple_text: str
+    detailed_text: str
+    simple_audio: str = ""  # Stored audio filenames
+    detailed_audio: str = ""
+    index_version: str = ""  # Version of the index the answers were retrieved from
+    built_at: str = ""
+
+
+class AnswerBank:
+    """
+    Answers indexed by normalized question and language, backed by a JSON lines file
+
+    Later lines for the same question replace earlier ones, so rebuilt answers
+    are simply appended.
+    """
+
+    def __init__(self, path: str, index_version: Optional[str] = None, matcher: Optional[FAQMatcher] = None):
+        """
+        Args:
+            path: JSON lines file holding the answers
+            index_version: Serve only answers built from this index version (None serves all)
+            matcher: FAQ matcher to register the questions with, for differently worded lookups
+        """
+        self.path = path
+        self.index_version = index_version
+        self.matcher = matcher
+        self.answers: Dict[Tuple[str, str], BankedAnswer] = {}
+        self.stale_answers = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(question: str, language: str) -> Tuple[str, str]:
+        return (normalize_question(question), language.lower())
+
+    def load(self) -> int:
+        """
+        Load the answers from disk
+
+        Returns:
+            Number of answers loaded
+        """
+        answers, stale = {}, 0
+        if os.path.exists(self.path):
+            names = {f.name for f in fields(BankedAnswer)}
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line_number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        record = json.loads(line)
+                        answer = BankedAnswer(**{k: v for k, v in record.items() if k in names})
+                    except (ValueError, TypeError) as e:
+                        # A build killed mid-write leaves a partial last line
+                        logger.warning(f"Skipping unreadable answer bank line {line_number}: {e}")
+                        continue
+                    key = self._key(answer.question, answer.language)
+                    if self.index_version is not None and answer.index_version != self.index_version:
+                        answers.pop(key, None)
+                        stale += 1
+                        continue
+                    answers[key] = answer
+
+        with self._lock:
+            self.answers = answers
+            self.stale_answers = stale
+        if self.matcher is not None:
+            self.matcher.replace_source('answer_bank', [(a.question, a, a.language) for a in answers.values()])
+        if stale:
+            logger.warning(f"Answer bank: skipped {stale} answers built from another index version "
+                           f"(current {self.index_version or 'none'})")
+        logger.info(f"Answer bank loaded {len(answers)} answers from {self.path}")
+        return len(answers)
+
+    def lookup(self, question: str, language: str) -> Optional[BankedAnswer]:
+        """Banked answer to exactly this question (ignoring case and spacing), or None"""
+        return self.answers.get(self._key(question, language))
+
+    def __contains__(self, key: Tuple[str, str]) -> bool:
+        return self._key(*key) in self.answers
+
+    def __len__(self) -> int:
+        return len(self.answers)
+
+    def add(self, answer: BankedAnswer):
+        """Append an answer to the file and the index"""
+        line = json.dumps(asdict(answer), ensure_ascii=False)
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+                f.flush()
+            self.answers[self._key(answer.question, answer.language)] = answer
+        if self.matcher is not None:
+            self.matcher.add(answer.question, answer, 'answer_bank', answer.language)
+
+    def get_status(self) -> Dict[str, Any]:
+        """Size of the bank by language, for monitoring"""
+        by_language: Dict[str, int] = {}
+        for _, language in self.answers:
+            by_language[language] = by_language.get(language, 0) + 1
+        return {
+            'path': self.path,
+            'answers': len(self.answers),
+            'by_language': by_language,
+            'index_version': self.index_version,
+            'stale_answers': self.stale_answers
+        }
+
+
+_shared_banks: Dict[Tuple[str, str], AnswerBank] = {}
+_shared_banks_lock = threading.Lock()
+
+
+def shared_answer_bank(path: str, index_version: str) -> AnswerBank:
+    """
+    The process-wide bank at path, loaded on first use and registered with faq_matcher
+
+    Loaded again only when the index version changes.
+    """
+    with _shared_banks_lock:
+        bank = _shared_banks.get((path, index_version))
+        if bank is None:
+            bank = AnswerBank(path, index_version=index_version, matcher=faq_matcher)
+            bank.load()
+            _shared_banks.clear()
+            _shared_banks[(path, index_version)] = bank
+        return bank
+
+
+@dataclass
+class _Section:
+    """Textbook section of the saved index"""
+    chapter: str
+    section: str
+    text: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.chapter} / {self.section}"
+
+
+class AnswerBankBuilder:
+    """
+    Offline job filling an AnswerBank with answers for every section of the index
+
+    Questions and answers are generated in parallel. Generated questions are
+    saved next to the bank, and answers already banked for the current index
+    version are skipped, so the job can be stopped and rerun at any time.
+    """
+
+    # Words of section text shown to the LLM when asking for questions
+    SECTION_WORDS = 600
+    # Seconds allowed for each LLM request while building
+    LLM_TIMEOUT = 60.0
+
+    def __init__(self, bank: AnswerBank, context_builder, response_generator, audio_processor, storage,
+                 index_version: str, questions_per_section: int = 5, workers: int = 4,
+                 languages: Tuple[str, ...] = LANGUAGES):
+        """
+        Args:
+            bank: Bank to fill; its answers built from index_version are kept
+            context_builder: ContextBuilder retrieving answer context
+            response_generator: ResponseGenerator answering questions and writing them
+            audio_processor: AudioProcessor synthesizing answer audio
+            storage: AudioStorageService keeping the audio pinned
+            index_version: Version of the index answers are built from
+            questions_per_section: Questions generated per section and language
+            workers: Questions processed at once
+            languages: Languages to build answers in
+        """
+        self.bank = bank
+        self.context_builder = context_builder
+        self.response_generator = response_generator
+        self.audio_processor = audio_processor
+        self.storage = storage
+        self.index_version = index_version
+        self.questions_per_section = questions_per_section
+        self.workers = max(1, workers)
+        self.languages = languages
+        self.questions_path = f"{os.path.splitext(bank.path)[0]}.questions.json"
+
+    @staticmethod
+    def load_sections(metadata_path: str) -> List[_Section]:
+        """
+        Explanatory sections of the saved index, in index order
+
+        Args:
+            metadata_path: chunk_metadata.json of the saved index
+        """
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            chunk_metadata = json.load(f)
+
+        sections: Dict[Tuple[str, str], List[str]] = {}
+        for chunk in sorted(chunk_metadata, key=lambda c: c.get('chunk_index', 0)):
+            section_name = chunk.get('section_name') or ''
+            if BOILERPLATE_SECTIONS.match(section_name):
+                continue
+            sections.setdefault((chunk.get('chapter_name', ''), section_name), []).append(chunk['content_text'])
+        return [_Section(chapter, section, ' '.join(texts)) for (chapter, section), texts in sections.items()]
+
+    def build(self, sections: List[_Section]) -> Dict[str, int]:
+        """
+        Bank answers to likely questions about each section
+
+        Returns:
+            Counts of built, already banked and failed questions
+        """
+        questions = self._load_questions()
+        missing = [(section, language) for section in sections for language in self.languages
+                   if not questions.get(section.key, {}).get(language)]
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="answer-bank") as executor:
+            for (section, language), generated in zip(missing, executor.map(
+                    lambda task: self._generate_questions(*task), missing)):
+                if generated:
+                    questions.setdefault(section.key, {})[language] = generated
+                    self._save_questions(questions)
+
+            tasks = []
+            counts = {'built': 0, 'already_banked': 0, 'failed': 0}
+            for section in sections:
+                for language in self.languages:
+                    for question in questions.get(section.key, {}).get(language, []):
+                        if (question, language) in self.bank:
+                            counts['already_banked'] += 1
+                        else:
+                            tasks.append((section, language, question))
+
+            logger.info(f"Answer bank: {len(tasks)} questions to answer, {counts['already_banked']} already banked")
+            for answer in executor.map(lambda task: self._build_answer(*task), tasks):
+                counts['built' if answer else 'failed'] += 1
+
+        logger.info(f"Answer bank build finished: {counts}")
+        return counts
+
+    def _generate_questions(self, section: _Section, language: str) -> List[str]:
+        """Questions students are likely to ask about a section, in the language they ask them"""
+        excerpt = ' '.join(section.text.split()[:self.SECTION_WORDS])
+        messages = [
+            {"role": "system", "content": "You write the questions 10th-grade students in rural India ask "
+                                          "about their NCERT Science textbook when they phone a tutor."},
+            {"role": "user", "content": f"Section: {section.section} ({section.chapter})\n\n{excerpt}\n\n"
+                                        f"Write {self.questions_per_section} short questions a student might ask "
+                                        f"about this section, in {language.title()}, as they would say them. "
+                                        f"One question per line, without numbering."}
+        ]
+        try:
+            response, _ = self.response_generator.router.complete(messages, timeout=self.LLM_TIMEOUT)
+        except Exception as e:
+            logger.error(f"Question generation failed for {section.key} ({language}): {e}")
+            return []
+
+        questions, seen = [], set()
+        for line in (response.choices[0].message.content or '').splitlines():
+            question = re.sub(r'^\s*(?:[-*•]|\d+[.)])\s*', '', line).strip()
+            key = normalize_question(question)
+            if len(question.split()) >= 3 and key not in seen:
+                seen.add(key)
+                questions.append(question)
+        return questions[:self.questions_per_section]
+
+    def _build_answer(self, section: _Section, language: str, question: str) -> Optional[BankedAnswer]:
+        """Answer a question at both detail levels, synthesize the audio and bank it"""
+        from src.audio.audio_processor import Language
+        language_enum = Language.TELUGU if language == 'telugu' else Language.ENGLISH
+
+        texts, audio = {}, {}
+        try:
+            for detail_level in DETAIL_LEVELS:
+                context = self.context_builder.build_context(question=question, language=language.title(),
+                                                             detail_level=detail_level)
+                result = self.response_generator.generate_response(context)
+                if not result['success']:
+                    # Fallback text ("no content", "technical error") must not be served as an answer
+                    logger.warning(f"No {detail_level} answer to '{question}': {result.get('fallback_type')}")
+                    return None
+                texts[detail_level] = result['response_text']
+
+                speech = self.audio_processor.generate_response_audio(result['response_text'], language_enum)
+                url = self.storage.store_audio(speech.audio_data, f"bank_{detail_level}", pinned=True) \
+                    if speech.success else ""
+                if not url:
+                    logger.warning(f"No {detail_level} audio for '{question}': {speech.error_message}")
+                    return None
+                audio[detail_level] = url.rsplit('/', 1)[-1]
+        except Exception as e:
+            logger.error(f"Answer bank build failed for '{question}': {e}")
+            return None
+
+        answer = BankedAnswer(
+            question=question,
+            language=language,
+            chapter=section.chapter,
+            section=section.section,
+            simple_text=texts['simple'],
+            detailed_text=texts['detailed'],
+            simple_audio=audio['simple'],
+            detailed_audio=audio['detailed'],
+            index_version=self.index_version,
+            built_at=datetime.now().isoformat(timespec='seconds')
+        )
+        self.bank.add(answer)
+        return answer
+
+    def _load_questions(self) -> Dict[str, Dict[str, List[str]]]:
+        if not os.path.exists(self.questions_path):
+            return {}
+        with open(self.questions_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_questions(self, questions: Dict[str, Dict[str, List[str]]]):
+        """Write the generated questions atomically, so a killed build never leaves them truncated"""
+        directory = os.path.dirname(self.questions_path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(questions, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.questions_path)
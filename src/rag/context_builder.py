@@ -36,7 +36,10 @@ class ContextBuilder:
         self.search_engine = SemanticSearchEngine(config)
         
         # Context parameters
-        self.max_context_words = 800  # Maximum words in context
+        self.token_budgets = {  # Maximum prompt tokens of retrieved content per detail level
+            'simple': config.CONTEXT_TOKEN_BUDGET_SIMPLE,
+            'detailed': config.CONTEXT_TOKEN_BUDGET_DETAILED
+        }
         self.max_sources = 3  # Maximum number of sources to include
         
         logger.info("Context builder initialized")
@@ -65,7 +68,7 @@ class ContextBuilder:
         search_context = self.search_engine.get_search_context(
             question=question,
             subject_filter=subject_filter,
-            max_context_words=self.max_context_words
+            token_budget=self.token_budgets.get(detail_level, self.token_budgets['simple'])
         )
         
         # Build complete context
@@ -107,6 +110,7 @@ class ContextBuilder:
         confidence = search_context['confidence']
         num_sources = len(search_context['source_chunks'])
         total_words = search_context['total_words']
+        budget_filled = search_context['total_tokens'] / max(search_context['token_budget'], 1)
         
         # Calculate quality score (0.0 to 1.0)
         score = 0.0
@@ -138,9 +142,9 @@ class ContextBuilder:
             recommendations.append("Question might be too specific or not covered in curriculum")
         
         # Content completeness component (30% of score)
-        if total_words >= 400:
+        if budget_filled >= 0.75:
             score += 0.3
-        elif total_words >= 200:
+        elif budget_filled >= 0.4:
             score += 0.2
         else:
             score += 0.1
@@ -163,6 +167,7 @@ class ContextBuilder:
             'confidence': confidence,
             'num_sources': num_sources,
             'total_words': total_words,
+            'total_tokens': search_context['total_tokens'],
             'issues': issues,
             'recommendations': recommendations
         }
@@ -182,31 +187,8 @@ class ContextBuilder:
         if not search_results['found_relevant_content']:
             return "No relevant content found in NCERT curriculum for this question."
         
-        # Build formatted context
-        parts = []
-        
-        # Add context header
-        parts.append("=== RELEVANT NCERT CONTENT ===")
-        
-        # Add retrieved content
-        parts.append(search_results['context_text'])
-        
-        # Add source information
-        parts.append("\n=== SOURCES ===")
-        for i, source in enumerate(search_results['source_chunks'], 1):
-            chapter = source.get('chapter', 'Unknown Chapter')
-            section = source.get('section', 'Unknown Section')
-            confidence = source.get('similarity_score', 0.0)
-            source_info = f"{i}. {chapter} - {section} (Confidence: {confidence:.2f})"
-            parts.append(source_info)
-        
-        # Add context metadata
-        parts.append(f"\n=== CONTEXT INFO ===")
-        parts.append(f"Total content words: {search_results['total_words']}")
-        parts.append(f"Overall confidence: {search_results['confidence']:.2f}")
-        parts.append(f"Number of sources: {len(search_results['source_chunks'])}")
-        
-        return "\n".join(parts)
+        # Retrieved content only; source names and scores do not help the model answer
+        return f"NCERT content:\n{search_results['context_text']}"
     
     def get_fallback_context(self, question: str, language: str = "English") -> Dict[str, Any]:
         """
@@ -229,7 +211,8 @@ class ContextBuilder:
                 'source_chunks': [],
                 'confidence': 0.0,
                 'found_relevant_content': False,
-                'total_words': 0
+                'total_words': 0,
+                'total_tokens': 0
             },
             'context_quality': {
                 'score': 0.0,
@@ -0,0 +1,191 @@
+"""
+Token-budgeted context packing for the LLM prompt
+
+Retrieved chunks are packed into the prompt by relevance until the detail
+level's token budget is spent. Prompt tokens drive both LLM latency and cost
+on every question, so the packer:
+
+- counts real tokens (see utils.token_counter), not whitespace words
+- drops boilerplate: exercise and activity sections, reprint footers
+- removes the words neighbouring chunks share (chunks of a section overlap
+  by CONTENT_OVERLAP words) and joins them into one passage
+- trims the last chunk that does not fit to whole sentences
+"""
+
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.content.content_processor import ContentChunk
+from src.utils.token_counter import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Sections that carry no explanation: exercises, activities, chapter summaries
+BOILERPLATE_SECTIONS = re.compile(
+    r'^\s*(\d+(\.\d+)*\s+)?(exercises?|questions|what you have learnt|activity|group activity|'
+    r'think and act|more to know)\b',
+    re.IGNORECASE
+)
+# Print artefacts left inside chunk text
+BOILERPLATE_TEXT = re.compile(
+    r'\b(reprint|rationalised)\s+\d{4}-\d{2,4}\b|\bnot to be republished\b',
+    re.IGNORECASE
+)
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+@dataclass
+class _Passage:
+    """Contiguous text from one section, built from one or more neighbouring chunks"""
+    chunk: ContentChunk
+    words: List[str]
+    sources: List[Tuple[ContentChunk, float, int]] = field(default_factory=list)  # (chunk, score, words used)
+
+    @property
+    def header(self) -> str:
+        return f"[{self.chunk.section_name}]"
+
+    def render(self) -> str:
+        return f"{self.header}\n{' '.join(self.words)}"
+
+
+class ContextPacker:
+    """Packs retrieved chunks into a token budget by relevance"""
+
+    # Fewest shared words treated as chunk overlap rather than coincidence
+    MIN_OVERLAP_WORDS = 8
+    # Smallest remainder of the budget worth filling with a trimmed chunk
+    MIN_PARTIAL_TOKENS = 40
+
+    def __init__(self, overlap_words: int = 50):
+        """
+        Args:
+            overlap_words: Words neighbouring chunks share (Config.CONTENT_OVERLAP)
+        """
+        self.overlap_words = max(overlap_words, self.MIN_OVERLAP_WORDS)
+
+    def pack(self, results: List[Tuple[ContentChunk, float]], token_budget: int) -> Dict[str, Any]:
+        """
+        Pack chunks into the prompt context
+
+        Args:
+            results: (chunk, similarity) pairs, most relevant first
+            token_budget: Most tokens the packed context may take
+
+        Returns:
+            Dictionary with context_text, source_chunks, total_tokens, total_words and dropped counts
+        """
+        passages: List[_Passage] = []
+        used = 0
+        dropped = {'boilerplate': 0, 'duplicate': 0, 'budget': 0}
+
+        for index, (chunk, score) in enumerate(results):
+            if BOILERPLATE_SECTIONS.match(chunk.section_name or ''):
+                dropped['boilerplate'] += 1
+                continue
+
+            words = BOILERPLATE_TEXT.sub(' ', chunk.content_text).split()
+            passage, words, prepend = self._strip_overlap(chunk, words, passages)
+            if not words:
+                dropped['duplicate'] += 1
+                continue
+
+            separator = 0 if passage else (count_tokens(_Passage(chunk, []).header) + 2)
+            cost = separator + count_tokens(' '.join(words)) + (1 if passage else 0)
+            trimmed = used + cost > token_budget
+            if trimmed:
+                words = self._trim_to_sentences(words, token_budget - used - separator, from_end=prepend)
+                if not words:
+                    dropped['budget'] += len(results) - index
+                    break
+                cost = separator + count_tokens(' '.join(words)) + (1 if passage else 0)
+
+            if passage is None:
+                passage = _Passage(chunk, [])
+                passages.append(passage)
+            passage.words = words + passage.words if prepend else passage.words + words
+            passage.sources.append((chunk, score, len(words)))
+            used += cost
+
+            if trimmed:
+                dropped['budget'] += len(results) - index - 1
+                break
+
+        context_text = "\n\n".join(passage.render() for passage in passages)
+        source_chunks = [
+            {
+                'chunk_id': chunk.id,
+                'section': chunk.section_name,
+                'chapter': chunk.chapter_name,
+                'subject': chunk.subject,
+                'similarity_score': float(score),
+                'word_count': word_count,
+                'source_file': chunk.metadata.get('source_file', 'unknown')
+            }
+            for passage in passages for chunk, score, word_count in passage.sources
+        ]
+        total_tokens = count_tokens(context_text)
+        logger.debug(f"Packed {len(source_chunks)} of {len(results)} chunks into {total_tokens}/{token_budget} tokens "
+                     f"(dropped {dropped})")
+
+        return {
+            'context_text': context_text,
+            'source_chunks': source_chunks,
+            'total_tokens': total_tokens,
+            'total_words': sum(len(passage.words) for passage in passages),
+            'token_budget': token_budget,
+            'dropped': dropped
+        }
+
+    def _strip_overlap(self, chunk: ContentChunk, words: List[str],
+                       passages: List[_Passage]) -> Tuple[Optional[_Passage], List[str], bool]:
+        """
+        Remove text already packed
+
+        Returns:
+            (passage the words continue or None, remaining words, whether they go before the passage)
+        """
+        text = ' '.join(words)
+        for passage in passages:
+            if f" {text} " in f" {' '.join(passage.words)} ":
+                return passage, [], False
+            if passage.chunk.section_name != chunk.section_name or passage.chunk.chapter_name != chunk.chapter_name:
+                continue
+            shared = self._overlap(passage.words, words)
+            if shared:
+                return passage, words[shared:], False
+            shared = self._overlap(words, passage.words)
+            if shared:
+                return passage, words[:-shared], True
+        return None, words, False
+
+    def _overlap(self, first: List[str], second: List[str]) -> int:
+        """Number of words at the end of first that begin second (0 if fewer than MIN_OVERLAP_WORDS)"""
+        longest = min(len(first), len(second), self.overlap_words)
+        for size in range(longest, self.MIN_OVERLAP_WORDS - 1, -1):
+            if first[-size:] == second[:size]:
+                return size
+        return 0
+
+    def _trim_to_sentences(self, words: List[str], token_allowance: int, from_end: bool = False) -> List[str]:
+        """
+        Whole sentences of the words that fit the allowance, none if too little is left
+
+        Args:
+            from_end: Keep the last sentences instead of the first (text that leads into a packed passage)
+        """
+        if token_allowance < self.MIN_PARTIAL_TOKENS:
+            return []
+        sentences = SENTENCE_END.split(' '.join(words))
+        if from_end:
+            sentences.reverse()
+        kept = []
+        for sentence in sentences:
+            if count_tokens(' '.join(kept + [sentence])) > token_allowance:
+                break
+            kept.append(sentence)
+        if from_end:
+            kept.reverse()
+        return ' '.join(kept).split()
@@ -0,0 +1,401 @@
+"""
+Latency-aware LLM Router
+
+Routes each answer-generation request to the currently fastest healthy LLM
+provider (Gemini, OpenAI/OpenRouter). Every provider/model keeps live
+EWMAs of its latency and error rate and a window of recent latencies.
+Providers whose circuit is open or that are at their concurrency cap are
+skipped. A provider not measured within the last minute is ranked as fast
+so that it gets re-measured. If the chosen provider has not answered by its
+p90 latency, a hedge request goes to the next provider (or the same one if
+it is the only one) and whichever answers first wins; a request that fails
+outright fails over to the next provider straight away.
+
+Provider statistics live in a process-wide registry, like the circuit
+breakers, so every ResponseGenerator shares one view of provider health
+and one set of concurrency caps.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import openai
+
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+from config import Config
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, circuit_breakers
+from src.utils.metrics_registry import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+_latency_ewma = metrics_registry.gauge(
+    'vidyavani_llm_latency_ewma_seconds', 'Smoothed LLM response latency', ['provider']
+)
+_llm_requests = metrics_registry.counter(
+    'vidyavani_llm_requests', 'LLM requests by provider and outcome', ['provider', 'outcome']
+)
+_llm_hedges = metrics_registry.counter(
+    'vidyavani_llm_hedges', 'Hedge requests fired and won', ['outcome']
+)
+
+
+class ProviderStats:
+    """Live latency/error statistics and concurrency cap for one provider/model"""
+
+    # Latency window used for the hedge delay
+    WINDOW_SIZE = 50
+    # Latencies needed before a p90 is trusted enough to hedge on
+    MIN_HEDGE_SAMPLES = 10
+    # Latency assumed for a provider without a recent sample; low so that it gets measured
+    EXPLORE_LATENCY = 0.1
+    # Seconds after which a provider's latency counts as unknown again
+    STALE_AFTER = 60.0
+    # Seconds a failed attempt costs (the wasted call and the failover), weighted by the error rate
+    ERROR_PENALTY = 5.0
+    # Seconds for an error rate to halve while the provider is not being called
+    ERROR_HALF_LIFE = 60.0
+
+    def __init__(self, name: str, max_concurrent: int, alpha: float = 0.2):
+        """
+        Args:
+            name: Provider/model, e.g. 'gemini:gemini-2.5-flash'
+            max_concurrent: Requests allowed in flight at once
+            alpha: EWMA weight of the newest sample
+        """
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.alpha = alpha
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self._error_updated_at = time.monotonic()
+        self._sampled_at = float('-inf')
+        self._latencies: Deque[float] = deque(maxlen=self.WINDOW_SIZE)
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """Take a concurrency slot if the provider is under its cap"""
+        with self._lock:
+            if self.in_flight >= self.max_concurrent:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight = max(0, self.in_flight - 1)
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.successes += 1
+            self._sampled_at = time.monotonic()
+            self._latencies.append(latency)
+            if self.latency_ewma is None:
+                self.latency_ewma = latency
+            else:
+                self.latency_ewma += self.alpha * (latency - self.latency_ewma)
+            self._update_error_locked(0.0)
+            ewma = self.latency_ewma
+        _latency_ewma.set(round(ewma, 3), provider=self.name)
+        _llm_requests.inc(provider=self.name, outcome='success')
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._update_error_locked(1.0)
+        _llm_requests.inc(provider=self.name, outcome='error')
+
+    def _update_error_locked(self, sample: float):
+        self.error_ewma = self._decayed_error_locked(time.monotonic())
+        self.error_ewma += self.alpha * (sample - self.error_ewma)
+        self._error_updated_at = time.monotonic()
+
+    def _decayed_error_locked(self, now: float) -> float:
+        return self.error_ewma * 0.5 ** ((now - self._error_updated_at) / self.ERROR_HALF_LIFE)
+
+    def expected_latency(self) -> float:
+        """Smoothed latency plus the expected cost of an error: what sending a request here costs"""
+        now = time.monotonic()
+        with self._lock:
+            fresh = self.latency_ewma is not None and now - self._sampled_at < self.STALE_AFTER
+            latency = self.latency_ewma if fresh else self.EXPLORE_LATENCY
+            error_rate = self._decayed_error_locked(now)
+        return latency + error_rate * self.ERROR_PENALTY
+
+    def p90_latency(self) -> Optional[float]:
+        """90th percentile of recent latencies, None until there are enough samples"""
+        with self._lock:
+            if len(self._latencies) < self.MIN_HEDGE_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[math.ceil(0.9 * len(ordered)) - 1]
+
+    def snapshot(self) -> Dict[str, Any]:
+        p90 = self.p90_latency()
+        with self._lock:
+            return {
+                'latency_ewma': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                'p90_latency': round(p90, 3) if p90 is not None else None,
+                'error_rate': round(self._decayed_error_locked(time.monotonic()), 3),
+                'in_flight': self.in_flight,
+                'max_concurrent': self.max_concurrent,
+                'successes': self.successes,
+                'failures': self.failures,
+            }
+
+    def reset(self):
+        """Forget latencies and errors (requests in flight keep their slots)"""
+        with self._lock:
+            self.latency_ewma = None
+            self.error_ewma = 0.0
+            self._sampled_at = float('-inf')
+            self.successes = 0
+            self.failures = 0
+            self._latencies.clear()
+
+
+class ProviderStatsRegistry:
+    """Provider statistics by provider/model, created on first use"""
+
+    def __init__(self):
+        self._stats: Dict[str, ProviderStats] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, max_concurrent: int) -> ProviderStats:
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = ProviderStats(name, max_concurrent)
+            return stats
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: stats.snapshot() for name, stats in sorted(list(self._stats.items()))}
+
+    def reset(self):
+        """Forget the statistics of every provider"""
+        for stats in list(self._stats.values()):
+            stats.reset()
+
+
+# Global provider statistics shared by all routers in the process
+llm_provider_stats = ProviderStatsRegistry()
+
+
+@dataclass
+class LLMProvider:
+    """One configured chat completion backend"""
+    name: str  # 'gemini' or 'openai'
+    client: Any  # openai.OpenAI or GeminiOpenAIClient
+    model: str
+    max_tokens: int
+    temperature: float
+    stats: ProviderStats
+    breaker: CircuitBreaker
+
+
+class AllProvidersBusyError(Exception):
+    """Every healthy provider is at its concurrency cap"""
+
+
+class LLMRouter:
+    """Sends chat completions to the fastest healthy provider, hedging slow requests"""
+
+    def __init__(self, providers: List[LLMProvider], hedging: bool = True, hedge_min_delay: float = 0.5):
+        """
+        Args:
+            providers: Configured providers in order of preference when no latencies are known
+            hedging: Fire a second request when the first is slower than its provider's p90
+            hedge_min_delay: Shortest wait before hedging
+        """
+        if not providers:
+            raise ValueError("LLMRouter needs at least one provider")
+        self.providers = providers
+        self.hedging = hedging
+        self.hedge_min_delay = hedge_min_delay
+        self._executor = ThreadPoolExecutor(
+            max_workers=sum(provider.stats.max_concurrent for provider in providers),
+            thread_name_prefix="llm-router"
+        )
+
+    @classmethod
+    def from_config(cls, config: Config) -> 'LLMRouter':
+        """Build a router over every provider with credentials, preferred provider first"""
+        providers = []
+        if config.GOOGLE_GEMINI_API_KEY:
+            from src.utils.gemini_adapter import GeminiOpenAIClient
+            providers.append(cls._provider(
+                'gemini', GeminiOpenAIClient(api_key=config.GOOGLE_GEMINI_API_KEY, model=config.GEMINI_MODEL),
+                config.GEMINI_MODEL, config.GEMINI_MAX_TOKENS, config.GEMINI_TEMPERATURE,
+                config.GEMINI_MAX_CONCURRENT
+            ))
+        if config.OPENAI_API_KEY or not providers:
+            # OpenAI or OpenRouter
+            client_kwargs = {"api_key": config.OPENAI_API_KEY}
+            if getattr(config, 'OPENAI_BASE_URL', ''):
+                client_kwargs["base_url"] = config.OPENAI_BASE_URL
+                logger.info(f"Using custom OpenAI base URL: {config.OPENAI_BASE_URL}")
+            providers.append(cls._provider(
+                'openai', openai.OpenAI(**client_kwargs),
+                config.OPENAI_MODEL, config.OPENAI_MAX_TOKENS, config.OPENAI_TEMPERATURE,
+                config.OPENAI_MAX_CONCURRENT
+            ))
+        if not config.USE_GEMINI:
+            providers.sort(key=lambda provider: provider.name != 'openai')
+        return cls(providers, hedging=config.LLM_HEDGING, hedge_min_delay=config.LLM_HEDGE_MIN_DELAY)
+
+    @staticmethod
+    def _provider(name: str, client: Any, model: str, max_tokens: int, temperature: float,
+                  max_concurrent: int) -> LLMProvider:
+        return LLMProvider(
+            name=name, client=client, model=model,
+            max_tokens=max(300, max_tokens),  # Allow longer responses for education
+            temperature=temperature,
+            stats=llm_provider_stats.get(f"{name}:{model}", max_concurrent),
+            breaker=circuit_breakers.get(f"llm:{name}")
+        )
+
+    @property
+    def primary(self) -> LLMProvider:
+        """Provider preferred when nothing is known about latencies"""
+        return self.providers[0]
+
+    def ranked_providers(self) -> List[LLMProvider]:
+        """Providers whose circuit is not open, fastest expected first"""
+        healthy = [provider for provider in self.providers if not provider.breaker.is_open]
+        return sorted(healthy, key=lambda provider: provider.stats.expected_latency())
+
+    def complete(self, messages: List[Dict[str, str]], timeout: float, max_tokens: Optional[int] = None,
+                 **params) -> Tuple[Any, LLMProvider]:
+        """
+        Create a chat completion on the best provider
+
+        Args:
+            messages: Chat messages
+            timeout: Seconds the whole request may take
+            max_tokens: Answer length limit for this request (default: the provider's)
+            **params: Extra completion parameters (top_p, penalties, ...)
+
+        Returns:
+            (completion response, provider that produced it)
+
+        Raises:
+            CircuitOpenError: Every provider's circuit is open
+            AllProvidersBusyError: Every healthy provider is at its concurrency cap
+            Exception: The last provider error if no provider answered
+        """
+        candidates = self.ranked_providers()
+        if not candidates:
+            raise CircuitOpenError('llm')
+
+        started = time.monotonic()
+        expires_at = started + timeout
+        pending: Dict[Future, LLMProvider] = {}
+        untried = list(candidates)
+        last_error: Optional[BaseException] = None
+        hedge_at = math.inf
+        hedged = False
+
+        def launch(choices: List[LLMProvider]) -> Optional[Future]:
+            for provider in list(choices):
+                if provider.stats.try_acquire():
+                    if provider in untried:
+                        untried.remove(provider)
+                    remaining = max(0.1, expires_at - time.monotonic())
+                    future = self._executor.submit(self._call, provider, messages, remaining, max_tokens, params)
+                    pending[future] = provider
+                    return future
+            return None
+
+        primary_future = launch(untried)
+        if primary_future is None:
+            raise AllProvidersBusyError("All LLM providers are at their concurrency cap")
+        primary = pending[primary_future]
+        if self.hedging:
+            p90 = primary.stats.p90_latency()
+            if p90 is not None:
+                hedge_at = started + max(self.hedge_min_delay, p90)
+
+        while pending:
+            now = time.monotonic()
+            if now >= expires_at:
+                break
+            done, _ = wait(list(pending), timeout=min(hedge_at, expires_at) - now, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                provider = pending.pop(future)
+                error = future.exception()
+                if error is None:
+                    if hedged:
+                        _llm_hedges.inc(outcome='lost' if future is primary_future else 'won')
+                    return future.result(), provider
+                last_error = error
+                if isinstance(error, openai.BadRequestError):
+                    raise error  # The request itself is bad; another provider will not help
+
+            if done and not pending:
+                # Everything sent so far failed: fail over to the next provider
+                if launch(untried) is None:
+                    break
+            elif not done and not hedged and time.monotonic() >= hedge_at:
+                hedge = launch(untried) or launch([primary])
+                hedged = True
+                hedge_at = math.inf
+                if hedge is not None:
+                    _llm_hedges.inc(outcome='fired')
+                    logger.info(f"Hedging LLM request to {pending[hedge].name} after "
+                                f"{time.monotonic() - started:.2f}s on {primary.name}")
+
+        if pending or last_error is None:
+            raise openai.APITimeoutError(request=None)
+        raise last_error
+
+    def _call(self, provider: LLMProvider, messages: List[Dict[str, str]], timeout: float,
+              max_tokens: Optional[int], params: Dict[str, Any]) -> Any:
+        """Run one completion on a router thread, recording latency and errors"""
+        started = time.monotonic()
+        try:
+            with provider.breaker.guard(ignore=(openai.BadRequestError,)):
+                response = provider.client.chat.completions.create(
+                    model=provider.model,
+                    messages=messages,
+                    max_tokens=max_tokens or provider.max_tokens,
+                    temperature=provider.temperature,
+                    timeout=timeout,
+                    **params
+                )
+        except CircuitOpenError:
+            raise
+        except openai.BadRequestError:
+            provider.stats.record_success(time.monotonic() - started)  # Provider is up; the input was rejected
+            raise
+        except Exception:
+            provider.stats.record_failure()
+            raise
+        finally:
+            provider.stats.release()
+        provider.stats.record_success(time.monotonic() - started)
+        return response
+
+    def get_status(self) -> Dict[str, Any]:
+        """Routing order and statistics of every provider"""
+        return {
+            'hedging': self.hedging,
+            'order': [f"{provider.name}:{provider.model}" for provider in self.ranked_providers()],
+            'providers': {
+                f"{provider.name}:{provider.model}": {
+                    **provider.stats.snapshot(),
+                    'circuit': provider.breaker.snapshot()['state'],
+                }
+                for provider in self.providers
+            },
+        }
@@ -20,8 +20,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from config import Config
 
 # Add performance tracking
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.performance_decorators import track_performance, PipelineTracker
+from src.utils.performance_decorators import track_performance, PipelineTracker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -6,7 +6,10 @@ the "Vidya" AI tutor persona for rural Indian students.
 """
 
 import logging
-from typing import Dict, Any, Optional
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
 import time
 import json
 
@@ -18,39 +21,103 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from config import Config
 
 # Add performance tracking
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.performance_decorators import track_performance
-from utils.error_tracker import error_tracker
+from src.utils.performance_decorators import track_performance
+from src.utils.error_tracker import error_tracker
+from src.utils.circuit_breaker import CircuitOpenError
+from src.utils.deadline import DeadlineExceeded, current_deadline
+from src.utils.single_flight import SingleFlight
+from src.utils.speech_budget import SpeechBudget, estimate_speech_time
+from src.rag.llm_router import LLMRouter
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def normalize_question(question: str) -> str:
+    """Question text with case and spacing differences removed, for matching repeated questions"""
+    return ' '.join(question.lower().split())
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """Prompt tokens the provider served from its prompt cache (0 if it does not report them)"""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return getattr(details, 'cached_tokens', None) or 0
+
+
+class RecentAnswers:
+    """Latest generated answers by (question, language, detail level), served while the LLM circuit is open"""
+    
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._answers: 'OrderedDict[Tuple[str, str, str], Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple[str, str, str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._answers.get(key)
+    
+    def remember(self, key: Tuple[str, str, str], result: Dict[str, Any]):
+        with self._lock:
+            self._answers[key] = result
+            self._answers.move_to_end(key)
+            while len(self._answers) > self.max_size:
+                self._answers.popitem(last=False)
+    
+    def clear(self):
+        with self._lock:
+            self._answers.clear()
+    
+    def __len__(self) -> int:
+        return len(self._answers)
+
+
+# Shared by every ResponseGenerator in the process, like the circuit breakers whose
+# open state it covers for: an answer generated for one request serves all others
+recent_answers = RecentAnswers()
+
+# Identical questions generated at the same time share one LLM request, whichever
+# generator (IVR pipeline or web endpoint) they arrive through
+_answer_flights = SingleFlight('llm_answer')
+
+
 class VidyaPersona:
     """
     Defines the "Vidya" AI tutor persona and prompts
     """
     
     @staticmethod
-    def get_system_prompt(language: str = "English", detail_level: str = "simple") -> str:
+    def get_system_prompt(language: str = "English", detail_level: str = "simple",
+                          max_words: Optional[int] = None) -> str:
         """
         Get system prompt for Vidya persona
         
+        The prompt depends only on its arguments, so it is built once per
+        combination and is byte-identical across calls, which lets providers
+        with prompt caching reuse it.
+        
         Args:
             language: Response language (English/Telugu)
             detail_level: Level of detail (simple/detailed)
+            max_words: Longest answer that fits the detail level's spoken length
             
         Returns:
             System prompt string
         """
+        language = "telugu" if language.lower() == "telugu" else "english"
+        detail_level = "detailed" if detail_level == "detailed" else "simple"
+        return VidyaPersona._build_system_prompt(language, detail_level, max_words)
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _build_system_prompt(language: str, detail_level: str, max_words: Optional[int]) -> str:
         base_persona = """You are 'Vidya', a friendly AI tutor for 10th-grade students in rural India. 
 
 Your teaching style:
 - Use simple, clear language that rural students can understand
 - Explain concepts using everyday analogies from village life (cooking, farming, household items)
 - Be encouraging and patient, like a caring teacher
-- Keep responses under 90 seconds when spoken (approximately 200-250 words)
+- Keep responses short: they are read aloud to the student over a phone call
 - Focus on helping students understand, not just memorize
 
 Your knowledge:
@@ -59,7 +126,7 @@ Your knowledge:
 - If the content doesn't cover the question, say so honestly
 - Encourage students to ask follow-up questions"""
 
-        if language.lower() == "telugu":
+        if language == "telugu":
             language_instruction = """
 Response Language: Telugu
 - Respond in clear, simple Telugu that rural students understand
@@ -93,7 +160,15 @@ Detail Level: Simple Explanation
 - Perfect for quick understanding
 """
 
-        return f"{base_persona}\n\n{language_instruction}\n{detail_instruction}"
+        if max_words:
+            detail_instruction += f"- Use at most {max_words} words\n"
+
+        task_instruction = """
+Task:
+- The student's message gives NCERT content followed by their question
+- Answer the question from that content. If it does not fully cover the question, say so and answer what you can."""
+
+        return f"{base_persona}\n\n{language_instruction}\n{detail_instruction}{task_instruction}"
     
     @staticmethod
     def get_user_prompt_template() -> str:
@@ -103,18 +178,30 @@ Detail Level: Simple Explanation
         Returns:
             User prompt template
         """
-        return """Student Question: {question}
+        # Everything static lives in the system prompt. The retrieved content comes before the
+        # question so questions answered from the same chunks share the longer cached prefix.
+        return """{context}
 
-{context}
-
-Please answer the student's question based on the NCERT content provided above. Remember to:
-1. Use simple language and everyday analogies
-2. Be encouraging and supportive
-3. Keep the response under 90 seconds when spoken
-4. Base your answer on the provided NCERT content
-5. If the content doesn't fully answer the question, acknowledge this and provide what you can
-
-Answer:"""
+Student Question: {question}"""
+    
+    @staticmethod
+    def build_messages(question: str, context: str, language: str = "English",
+                       detail_level: str = "simple", max_words: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Chat messages for a question, ordered from most to least stable
+        
+        Providers cache prompts by prefix: the system prompt is the same for every
+        call at a language and detail level, the retrieved context for calls about
+        the same topic, and the question changes every time, so it comes last.
+        
+        Returns:
+            OpenAI-format message list
+        """
+        return [
+            {"role": "system", "content": VidyaPersona.get_system_prompt(language, detail_level, max_words)},
+            {"role": "user", "content": VidyaPersona.get_user_prompt_template().format(
+                context=context, question=question)}
+        ]
 
     @staticmethod
     def get_fallback_responses(language: str = "English") -> Dict[str, str]:
@@ -163,36 +250,21 @@ class ResponseGenerator:
         """
         self.config = config
         
-        # Choose AI provider based on configuration
-        if config.USE_GEMINI and config.GOOGLE_GEMINI_API_KEY:
-            # Use Gemini with OpenAI-compatible interface
-            import sys
-            import os
-            sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-            from utils.gemini_adapter import GeminiOpenAIClient
-            self.openai_client = GeminiOpenAIClient(
-                api_key=config.GOOGLE_GEMINI_API_KEY,
-                model=config.GEMINI_MODEL
-            )
-            self.model = config.GEMINI_MODEL
-            self.max_tokens = config.GEMINI_MAX_TOKENS
-            self.temperature = config.GEMINI_TEMPERATURE
-            logger.info(f"Using Google Gemini: {self.model}")
-        else:
-            # Use OpenAI or OpenRouter
-            client_kwargs = {"api_key": config.OPENAI_API_KEY}
-            if hasattr(config, 'OPENAI_BASE_URL') and config.OPENAI_BASE_URL:
-                client_kwargs["base_url"] = config.OPENAI_BASE_URL
-                logger.info(f"Using custom OpenAI base URL: {config.OPENAI_BASE_URL}")
-            
-            self.openai_client = openai.OpenAI(**client_kwargs)
-            self.model = config.OPENAI_MODEL
-            self.max_tokens = config.OPENAI_MAX_TOKENS
-            self.temperature = config.OPENAI_TEMPERATURE
-            logger.info(f"Using OpenAI/OpenRouter: {self.model}")
+        # Route requests across every configured provider (Gemini, OpenAI/OpenRouter)
+        self.router = LLMRouter.from_config(config)
+        primary = self.router.primary
+        self.openai_client = primary.client
+        self.model = primary.model
+        self.max_response_tokens = primary.max_tokens
+        self.temperature = primary.temperature
+        self.provider = primary.name
+        self.circuit_breaker = primary.breaker
+        logger.info(f"LLM providers: {', '.join(f'{p.name}:{p.model}' for p in self.router.providers)} "
+                    f"(hedging {'on' if self.router.hedging else 'off'})")
+        
+        self.recent_answers = recent_answers
         
-        # Adjust max_tokens for longer educational responses
-        self.max_response_tokens = max(300, self.max_tokens)  # Allow longer responses for education
+        self.answer_flights = _answer_flights
         
         logger.info(f"Response generator initialized with model: {self.model}")
     
@@ -208,6 +280,20 @@ class ResponseGenerator:
         Returns:
             Response dictionary with generated content and metadata
         """
+        key = self._answer_key(context['question'], context.get('language', 'English'),
+                               context.get('detail_level', 'simple'))
+        try:
+            result, shared = self.answer_flights.do(key, self._generate_response, context, max_retries)
+        except DeadlineExceeded as e:
+            logger.warning(f"Gave up waiting for in-flight response: {e}")
+            return self._generate_fallback_response(context, 'technical_error', error=str(e))
+        if shared:
+            # The leader's request is accounted once, by the leader
+            return {**result, 'coalesced': True, 'tokens_used': 0, 'prompt_tokens': 0, 'cached_tokens': 0}
+        return result
+    
+    def _generate_response(self, context: Dict[str, Any], max_retries: int) -> Dict[str, Any]:
+        """Generate the response for generate_response, retrying failed LLM requests"""
         start_time = time.time()
         
         question = context['question']
@@ -226,50 +312,51 @@ class ResponseGenerator:
             return self._generate_fallback_response(context, 'no_content')
         
         last_error = None
+        deadline = current_deadline()
+        # Generate no more than the answer's spoken length; longer text would never be played
+        speech_budget = SpeechBudget.for_answer(self.config, language, detail_level)
         
         for attempt in range(max_retries + 1):
             try:
-                # Build prompts
-                system_prompt = VidyaPersona.get_system_prompt(language, detail_level)
-                user_prompt = VidyaPersona.get_user_prompt_template().format(
-                    question=question,
-                    context=context['formatted_context']
-                )
+                # Build prompts, static persona first so providers can reuse the cached prefix
+                messages = VidyaPersona.build_messages(question, context['formatted_context'], language,
+                                                       detail_level, speech_budget.max_words)
                 
                 logger.info(f"OpenAI request attempt {attempt + 1} for question: {question[:30]}...")
                 
-                # Generate response using OpenAI with timeout
-                response = self.openai_client.chat.completions.create(
-                    model=self.model,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    max_tokens=self.max_response_tokens,
-                    temperature=self.temperature,
+                # Generate response on the fastest healthy provider, hedging if it is slow
+                response, provider = self.router.complete(
+                    messages=messages,
+                    timeout=deadline.timeout(15),  # At most 15s, less if the caller's deadline is closer
+                    max_tokens=speech_budget.max_tokens,
                     top_p=0.9,
                     frequency_penalty=0.1,
-                    presence_penalty=0.1,
-                    timeout=15  # 15 second timeout
+                    presence_penalty=0.1
                 )
                 
-                generated_text = response.choices[0].message.content.strip()
+                choice = response.choices[0]
+                generated_text = (choice.message.content or '').strip()
+                cut_off = getattr(choice, 'finish_reason', None) == 'length'
+                fitted_text = speech_budget.fit(generated_text, cut_off=cut_off)
+                if fitted_text != generated_text:
+                    logger.info(f"Answer cut to a sentence boundary: {len(generated_text.split())} -> "
+                                f"{len(fitted_text.split())} words (limit {speech_budget.max_words})")
+                    generated_text = fitted_text
                 
                 # Validate generated response
                 if not generated_text or len(generated_text.strip()) < 10:
                     logger.warning(f"Generated response too short on attempt {attempt + 1}")
-                    if attempt < max_retries:
-                        time.sleep(0.5)
+                    if attempt < max_retries and deadline.wait_for_retry(0.5):
                         continue
                     return self._generate_fallback_response(context, 'technical_error')
                 
                 # Calculate response metrics
                 generation_time = time.time() - start_time
                 word_count = len(generated_text.split())
-                estimated_speech_time = word_count / 2.5  # ~2.5 words per second
+                estimated_speech_time = estimate_speech_time(generated_text, language)
                 
-                # Check if response is within time limit (90 seconds)
-                within_time_limit = estimated_speech_time <= 90
+                # Check if response is within the detail level's spoken length
+                within_time_limit = estimated_speech_time <= speech_budget.target_seconds
                 
                 result = {
                     'response_text': generated_text,
@@ -281,43 +368,58 @@ class ResponseGenerator:
                     'within_time_limit': within_time_limit,
                     'context_quality': quality,
                     'source_chunks': context['search_results']['source_chunks'],
-                    'model_used': self.model,
+                    'model_used': provider.model,
+                    'provider': provider.name,
                     'tokens_used': response.usage.total_tokens,
+                    'prompt_tokens': getattr(response.usage, 'prompt_tokens', 0),
+                    'cached_tokens': cached_prompt_tokens(response.usage),
                     'success': True,
                     'attempt_number': attempt + 1
                 }
                 
                 logger.info(f"Response generated successfully on attempt {attempt + 1} in {generation_time:.3f}s ({word_count} words, ~{estimated_speech_time:.1f}s speech)")
                 
+                self._remember_answer(question, language, detail_level, result)
                 return result
                 
+            except CircuitOpenError as e:
+                logger.warning(f"Skipping response generation: {e}")
+                cached = self.recent_answers.get(self._answer_key(question, language, detail_level))
+                if cached is not None:
+                    # No request was made, so no tokens are spent or counted again
+                    return {**cached, 'generation_time': time.time() - start_time, 'served_from_cache': True,
+                            'tokens_used': 0, 'prompt_tokens': 0, 'cached_tokens': 0}
+                fallback = self._generate_fallback_response(context, 'technical_error', error=str(e))
+                fallback['circuit_open'] = True
+                return fallback
+                
             except openai.RateLimitError as e:
                 logger.error(f"OpenAI rate limit exceeded on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(2.0 ** attempt)  # Exponential backoff
+                if attempt < max_retries and deadline.wait_for_retry(2.0 ** attempt):  # Exponential backoff
                     continue
+                break
                     
             except openai.APITimeoutError as e:
                 logger.error(f"OpenAI timeout on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(1.0)
+                if attempt < max_retries and deadline.wait_for_retry(1.0):
                     continue
+                break
                     
             except openai.APIConnectionError as e:
                 logger.error(f"OpenAI connection error on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(1.0)
+                if attempt < max_retries and deadline.wait_for_retry(1.0):
                     continue
+                break
                     
             except Exception as e:
                 logger.error(f"Response generation failed on attempt {attempt + 1}: {e}")
                 last_error = e
-                if attempt < max_retries:
-                    time.sleep(0.5)
+                if attempt < max_retries and deadline.wait_for_retry(0.5):
                     continue
+                break
         
         # All attempts failed
         logger.error(f"Response generation failed after {max_retries + 1} attempts")
@@ -326,6 +428,14 @@ class ResponseGenerator:
         
         return self._generate_fallback_response(context, 'technical_error', error=str(last_error) if last_error else "Multiple attempts failed")
     
+    @staticmethod
+    def _answer_key(question: str, language: str, detail_level: str) -> Tuple[str, str, str]:
+        return (normalize_question(question), language.lower(), detail_level)
+    
+    def _remember_answer(self, question: str, language: str, detail_level: str, result: Dict[str, Any]):
+        """Keep a generated answer for serving while the LLM circuit is open"""
+        self.recent_answers.remember(self._answer_key(question, language, detail_level), result)
+    
     def _generate_fallback_response(self, context: Dict[str, Any], 
                                   fallback_type: str, 
                                   error: Optional[str] = None) -> Dict[str, Any]:
@@ -351,7 +461,7 @@ class ResponseGenerator:
             'detail_level': context.get('detail_level', 'simple'),
             'generation_time': 0.0,
             'word_count': len(response_text.split()),
-            'estimated_speech_time': len(response_text.split()) / 2.5,
+            'estimated_speech_time': estimate_speech_time(response_text, language),
             'within_time_limit': True,
             'context_quality': context.get('context_quality', {'score': 0.0}),
             'source_chunks': [],
@@ -19,6 +19,7 @@ sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
 from content import NCERTKnowledgeBase, ContentChunk
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from config import Config
+from .context_packer import ContextPacker
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -52,6 +53,7 @@ class SemanticSearchEngine:
         # Search parameters
         self.top_k = config.TOP_K_RETRIEVAL  # Default: 3
         self.min_similarity = 0.1  # Minimum similarity threshold
+        self.context_packer = ContextPacker(config.CONTENT_OVERLAP)
         
         logger.info("Semantic search engine initialized (knowledge base loading in background)")
     
@@ -130,14 +132,14 @@ class SemanticSearchEngine:
     
     def get_search_context(self, question: str,
                           subject_filter: Optional[str] = None,
-                          max_context_words: int = 800) -> Dict[str, Any]:
+                          token_budget: int = 900) -> Dict[str, Any]:
         """
         Get formatted search context for RAG processing
         
         Args:
             question: Student's question
             subject_filter: Optional subject filter
-            max_context_words: Maximum words in context
+            token_budget: Maximum prompt tokens of retrieved content
             
         Returns:
             Dictionary with search context and metadata
@@ -154,52 +156,33 @@ class SemanticSearchEngine:
                 'confidence': 0.0,
                 'found_relevant_content': False,
                 'search_time': time.time() - start_time,
-                'total_words': 0
+                'total_words': 0,
+                'total_tokens': 0,
+                'token_budget': token_budget
             }
         
-        # Build context from results
-        context_parts = []
-        source_chunks = []
-        total_words = 0
-        
-        for chunk, score in results:
-            chunk_words = len(chunk.content_text.split())
-            
-            # Check word limit
-            if total_words + chunk_words > max_context_words and context_parts:
-                break
-            
-            # Format context with source attribution
-            context_part = f"[From {chunk.section_name}]\n{chunk.content_text}"
-            context_parts.append(context_part)
-            
-            # Store chunk metadata
-            source_chunks.append({
-                'chunk_id': chunk.id,
-                'section': chunk.section_name,
-                'chapter': chunk.chapter_name,
-                'subject': chunk.subject,
-                'similarity_score': float(score),
-                'word_count': chunk_words,
-                'source_file': chunk.metadata.get('source_file', 'unknown')
-            })
-            
-            total_words += chunk_words
-        
-        context_text = "\n\n".join(context_parts)
+        # Pack the most relevant content into the token budget
+        packed = self.context_packer.pack(results, token_budget)
+        source_chunks = packed['source_chunks']
+        if not source_chunks:
+            logger.info(f"No usable content among {len(results)} chunks (dropped {packed['dropped']})")
+            return {
+                **packed,
+                'confidence': 0.0,
+                'found_relevant_content': False,
+                'search_time': time.time() - start_time
+            }
         
-        # Calculate overall confidence (average similarity)
-        confidence = sum(score for _, score in results[:len(source_chunks)]) / len(source_chunks)
+        # Calculate overall confidence (average similarity of the content used)
+        confidence = sum(source['similarity_score'] for source in source_chunks) / len(source_chunks)
         
         search_time = time.time() - start_time
         
         return {
-            'context_text': context_text,
-            'source_chunks': source_chunks,
+            **packed,
             'confidence': float(confidence),
             'found_relevant_content': True,
             'search_time': search_time,
-            'total_words': total_words,
             'question': question
         }
     
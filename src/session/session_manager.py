@@ -12,11 +12,9 @@ from threading import Lock
 import logging
 
 # Import performance tracking
-import sys
-import os
-sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
-from utils.performance_tracker import performance_tracker
-from utils.performance_decorators import track_cache_usage
+from src.utils.performance_tracker import performance_tracker
+from src.utils.performance_decorators import track_cache_usage
+from src.utils.faq_matcher import faq_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -145,6 +143,9 @@ class SessionManager:
             question_hash = self._get_question_hash(question)
             self.demo_cache[question_hash] = response
         
+        # Match differently worded questions too ("what is the reflection of light")
+        faq_matcher.replace_source('demo', [(question, response, 'english') for question, response in self._demo_qa_pairs])
+        
         logger.info(f"Demo cache initialized with {len(self.demo_cache)} question-response pairs")
     
     def _get_question_hash(self, question: str) -> str:
@@ -222,9 +223,12 @@ class SessionManager:
     
     @track_cache_usage("demo_cache")
     def get_cached_demo_response(self, question: str) -> Optional[str]:
-        """Get cached response for demo question"""
+        """Get cached response for demo question, matching differently worded questions"""
         question_hash = self._get_question_hash(question)
         result = self.demo_cache.get(question_hash)
+        if result is None:
+            match = faq_matcher.match(question, source='demo')
+            result = match.answer if match else None
         return (result, result is not None)  # Return (result, hit) tuple for cache tracking
     
     def cache_audio_response(self, text: str, audio_data: bytes, language: str = "english"):
@@ -3,15 +3,21 @@ Audio Storage Service for VidyaVani IVR
 Handles uploading and serving audio files for Exotel integration
 """
 
+import fcntl
 import io
 import logging
 import os
+import re
+import heapq
 import hashlib
+import tempfile
 import threading
 import time
 import wave
-from datetime import datetime, timedelta
-from typing import Optional
+import weakref
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional, Tuple
 
 from flask import Flask, abort, send_file
 
@@ -19,6 +25,54 @@ from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Stored filenames are {prefix}_{timestamp}_{content digest}.wav; the digest
+# picks the shard directory so any worker can locate a file from its name alone
+_FILENAME_PATTERN = re.compile(r'^[A-Za-z0-9_-]+_\d+_(?P<digest>[0-9a-f]{8,32})\.wav$')
+_DIGEST_LENGTH = 16
+
+# Filenames are content-hashed, so served audio never changes
+AUDIO_CACHE_MAX_AGE = 365 * 24 * 3600
+
+# Pinned audio (cached prompts, FAQ answers) lives under its own tree so the
+# pin survives restarts; it is never expired or evicted
+_PINNED_DIR = 'pinned'
+
+# Temp files older than this at startup were left by a crashed writer
+_STALE_TEMP_SECONDS = 300
+
+# Byte count of unpinned audio shared by all workers, updated under flock
+_USAGE_FILE = '.usage'
+_USAGE_WIDTH = 20
+
+# Quota eviction frees down to this fraction of the quota, so the directory
+# is rescanned once per several stores rather than on every store at quota
+_QUOTA_LOW_WATER = 0.9
+
+
+def _read_usage(fd: int) -> int:
+    try:
+        return int(os.pread(fd, _USAGE_WIDTH, 0) or 0)
+    except ValueError:
+        return 0
+
+
+def _write_usage(fd: int, total: int):
+    os.pwrite(fd, str(max(0, int(total))).encode().ljust(_USAGE_WIDTH), 0)
+
+
+# Services whose locks and cleanup threads are reset in forked children, so
+# each gunicorn worker forked from a preloaded master runs its own cleanup
+_services: 'weakref.WeakSet[AudioStorageService]' = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for service in list(_services):
+        service._reset_after_fork()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 class AudioStorageService:
     """
     Audio storage service that provides publicly accessible URLs for Exotel
@@ -31,57 +85,112 @@ class AudioStorageService:
         base_url: str = "http://localhost:5001",
         storage_dir: str = "audio_storage",
         sample_rate: int = 8000,
+        retention_seconds: int = 3600,
+        max_bytes: int = 0,
     ):
+        """
+        Initialize audio storage
+        
+        Args:
+            base_url: Public base URL for generated audio links
+            storage_dir: Root directory for stored audio
+            sample_rate: Sample rate used when wrapping raw PCM in WAV
+            retention_seconds: Lifetime of unpinned audio files
+            max_bytes: Byte quota for unpinned audio across all workers, evicted
+                least recently used first (0 disables)
+        """
         self.base_url = base_url.rstrip('/')
         self.storage_dir = storage_dir
         self.sample_rate = sample_rate
+        self.retention_seconds = retention_seconds
+        self.max_bytes = max_bytes
         self.audio_files = {}  # filename -> metadata
         self._lock = threading.Lock()
+        
+        # Expiry index: min-heap of (expires_at, filename) for expiry in
+        # O(expired log n). Quota and recency are shared through the disk
+        # instead: a byte count in .usage and each file's access time.
+        self._expiry_heap = []
+        self._expired_count = 0
+        self._evicted_count = 0
+        self._wakeup = threading.Event()
+        self.cleanup_thread = None
+        self._usage_path = os.path.join(self.storage_dir, _USAGE_FILE)
 
         # Create storage directory
         os.makedirs(self.storage_dir, exist_ok=True)
+        
+        # Track files written before this process started
+        self._reconcile_existing_files()
 
-        # Start cleanup thread
-        self.cleanup_thread = threading.Thread(target=self._cleanup_old_files, daemon=True)
-        self.cleanup_thread.start()
+        # The cleanup thread starts on first use, in the process serving
+        # requests (not in a preloading master, whose threads are not forked)
+        _services.add(self)
 
         logger.info(f"Audio storage initialized: {self.storage_dir} (base URL: {self.base_url})")
     
-    def store_audio(self, audio_data: bytes, filename_prefix: str = "audio") -> str:
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self.cleanup_thread = None
+    
+    def _ensure_cleanup_thread(self):
+        """Start this process's cleanup thread if it is not running"""
+        if self.cleanup_thread is not None and self.cleanup_thread.is_alive():
+            return
+        with self._lock:
+            if self.cleanup_thread is None or not self.cleanup_thread.is_alive():
+                self.cleanup_thread = threading.Thread(target=self._cleanup_old_files, daemon=True)
+                self.cleanup_thread.start()
+    
+    def store_audio(self, audio_data: bytes, filename_prefix: str = "audio", pinned: bool = False,
+                    key: Optional[str] = None) -> str:
         """
         Store audio data and return publicly accessible URL
         
         Args:
             audio_data: Raw audio data
             filename_prefix: Prefix for the generated filename
+            pinned: Exempt the file from expiry and quota eviction
+            key: Stable identity of the audio (e.g. prompt text, language and
+                voice). The file is named from the key rather than its content,
+                so any worker finds it again with get_keyed_audio_url.
             
         Returns:
             Public URL for the audio file
         """
         try:
+            self._ensure_cleanup_thread()
             processed_audio = self._ensure_wav_format(audio_data)
 
             # Generate unique filename
-            timestamp = int(time.time())
-            content_hash = hashlib.md5(processed_audio).hexdigest()[:8]
-            filename = f"{filename_prefix}_{timestamp}_{content_hash}.wav"
+            filename = self._filename(filename_prefix, processed_audio, key)
             
-            # Save to storage directory
-            file_path = os.path.join(self.storage_dir, filename)
+            # Write to a temp file in the shard and rename, so other workers
+            # never serve a partially written file
+            file_path = self._shard_path(filename, self.get_etag(filename), pinned)
+            shard_dir = os.path.dirname(file_path)
+            os.makedirs(shard_dir, exist_ok=True)
             
-            with open(file_path, 'wb') as f:
-                f.write(processed_audio)
+            fd, temp_path = tempfile.mkstemp(dir=shard_dir, suffix='.tmp')
+            try:
+                # mkstemp creates 0600 files; audio must stay readable by other users (static servers, sidecars)
+                os.fchmod(fd, 0o644)
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(processed_audio)
+                os.replace(temp_path, file_path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
             
             # Store metadata
-            with self._lock:
-                self.audio_files[filename] = {
-                    'created_at': datetime.now(),
-                    'size': len(processed_audio),
-                    'path': file_path,
-                }
+            self._register_file(filename, file_path, len(processed_audio), time.time(), pinned)
+            if not pinned:
+                self._account_unpinned(len(processed_audio), keep=filename)
             
             # Generate public URL
-            public_url = f"{self.base_url}/audio/{filename}"
+            public_url = self.get_public_url(filename)
             
             logger.info(
                 "Audio stored: %s (%d bytes raw -> %d bytes wav) -> %s",
@@ -96,25 +205,144 @@ class AudioStorageService:
             logger.error(f"Failed to store audio: {e}")
             return ""
     
+    @staticmethod
+    def _filename(filename_prefix: str, audio_data: bytes, key: Optional[str] = None) -> str:
+        """
+        Stored filename: {prefix}_{timestamp}_{content digest}.wav, or
+        {prefix}_0_{key digest}.wav for keyed audio
+        """
+        safe_prefix = re.sub(r'[^A-Za-z0-9_-]', '', filename_prefix) or "audio"
+        if key is not None:
+            return f"{safe_prefix}_0_{hashlib.md5(key.encode('utf-8')).hexdigest()[:_DIGEST_LENGTH]}.wav"
+        return f"{safe_prefix}_{int(time.time())}_{hashlib.md5(audio_data).hexdigest()[:_DIGEST_LENGTH]}.wav"
+    
+    def get_keyed_audio_url(self, key: str, filename_prefix: str = "audio") -> Optional[str]:
+        """
+        Public URL of audio stored with store_audio(key=...), if it is still stored
+        
+        Args:
+            key: Key the audio was stored under
+            filename_prefix: Prefix it was stored with
+            
+        Returns:
+            Public URL, or None if no worker has stored it (or it has expired)
+        """
+        filename = self._filename(filename_prefix, b'', key)
+        return self.get_public_url(filename) if self.get_audio_file_path(filename) else None
+    
+    def get_public_url(self, filename: str) -> str:
+        """Public URL serving a stored filename"""
+        return f"{self.base_url}/audio/{filename}"
+    
+    def _shard_path(self, filename: str, digest: str, pinned: bool = False) -> str:
+        """Sharded on-disk location for a stored filename"""
+        if pinned:
+            return os.path.join(self.storage_dir, _PINNED_DIR, digest[:2], filename)
+        return os.path.join(self.storage_dir, digest[:2], filename)
+    
+    @staticmethod
+    def get_etag(filename: str) -> Optional[str]:
+        """
+        Get the strong ETag for a stored file (its content digest)
+        
+        Args:
+            filename: Audio filename
+            
+        Returns:
+            Content digest, or None if the filename is not a valid stored name
+        """
+        match = _FILENAME_PATTERN.match(filename)
+        return match.group('digest') if match else None
+    
     def get_audio_file_path(self, filename: str) -> Optional[str]:
         """
         Get local file path for serving
         
+        The path is derived from the filename and checked on disk rather than
+        looked up in this process's metadata, so files stored by any worker
+        (or before a restart) can be served. Unpinned files have their access
+        time set, which orders quota eviction across workers.
+        
         Args:
             filename: Audio filename
             
         Returns:
             Local file path or None if not found
         """
-        with self._lock:
-            metadata = self.audio_files.get(filename)
-        if metadata:
-            file_path = metadata['path']
-            if os.path.exists(file_path):
-                return file_path
+        digest = self.get_etag(filename)
+        if not digest:
+            return None
+        self._ensure_cleanup_thread()
+        
+        # Files written before sharding live directly in the storage directory
+        candidates = (
+            (self._shard_path(filename, digest), False),
+            (self._shard_path(filename, digest, pinned=True), True),
+            (os.path.join(self.storage_dir, filename), False),
+        )
+        for file_path, pinned in candidates:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            if not pinned:
+                try:
+                    os.utime(file_path, ns=(time.time_ns(), stat.st_mtime_ns))
+                except OSError:
+                    pass
+            return file_path
         
         return None
     
+    def pin_audio(self, filename: str) -> bool:
+        """
+        Exempt a stored file from expiry and quota eviction
+        
+        Args:
+            filename: Audio filename to pin
+            
+        Returns:
+            True if the file is now pinned
+        """
+        return self._set_pinned(filename, True)
+    
+    def unpin_audio(self, filename: str) -> bool:
+        """
+        Return a pinned file to normal retention (expires one retention period from now)
+        
+        Args:
+            filename: Audio filename to unpin
+            
+        Returns:
+            True if the file is now unpinned
+        """
+        return self._set_pinned(filename, False)
+    
+    def _set_pinned(self, filename: str, pinned: bool) -> bool:
+        """Move a file between the pinned and regular trees and update the index"""
+        digest = self.get_etag(filename)
+        current_path = self.get_audio_file_path(filename)
+        if not digest or not current_path:
+            return False
+        
+        target_path = self._shard_path(filename, digest, pinned)
+        moved = current_path != target_path
+        try:
+            if moved:
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                os.replace(current_path, target_path)
+            size = os.path.getsize(target_path)
+        except OSError as e:
+            logger.error(f"Failed to {'pin' if pinned else 'unpin'} audio file {filename}: {e}")
+            return False
+        
+        self._register_file(filename, target_path, size, time.time(), pinned)
+        if moved and pinned:
+            self._add_usage(-size)
+        elif moved:
+            self._account_unpinned(size, keep=filename)
+        return True
+    
     def cleanup_file(self, filename: str) -> bool:
         """
         Remove audio file from storage
@@ -127,13 +355,10 @@ class AudioStorageService:
         """
         try:
             with self._lock:
-                metadata = self.audio_files.get(filename)
-                if not metadata:
-                    return False
-                file_path = metadata['path']
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                del self.audio_files[filename]
+                metadata = self._forget_locked(filename)
+            if not metadata:
+                return False
+            self._delete_files([metadata['path']], unpinned=not metadata['pinned'])
             logger.info(f"Cleaned up audio file: {filename}")
             return True
         except Exception as e:
@@ -141,41 +366,244 @@ class AudioStorageService:
         
         return False
     
+    def _register_file(self, filename: str, file_path: str, size: int, created_ts: float, pinned: bool):
+        """Add or replace a file in this process's expiry index"""
+        expires_at = None if pinned else created_ts + self.retention_seconds
+        with self._lock:
+            self._forget_locked(filename)
+            self.audio_files[filename] = {
+                'created_at': datetime.fromtimestamp(created_ts),
+                'size': size,
+                'path': file_path,
+                'pinned': pinned,
+                'expires_at': expires_at,
+            }
+            if not pinned:
+                was_idle = not self._expiry_heap
+                heapq.heappush(self._expiry_heap, (expires_at, filename))
+                if was_idle:
+                    self._wakeup.set()
+    
+    def _forget_locked(self, filename: str) -> Optional[dict]:
+        """Drop a file from the index; its heap entry is skipped lazily. Caller holds the lock."""
+        return self.audio_files.pop(filename, None)
+    
+    @contextmanager
+    def _usage_ledger(self):
+        """Exclusive (flock) access to the unpinned byte count shared by all workers"""
+        fd = os.open(self._usage_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            os.close(fd)  # Releases the lock
+    
+    def _add_usage(self, delta: int) -> int:
+        """Add to the shared unpinned byte count and return the new total"""
+        with self._usage_ledger() as fd:
+            total = max(0, _read_usage(fd) + delta)
+            _write_usage(fd, total)
+        return total
+    
+    def _account_unpinned(self, size: int, keep: Optional[str] = None):
+        """Count newly unpinned bytes and evict if the shared quota is exceeded"""
+        try:
+            total = self._add_usage(size)
+            if self.max_bytes and total > self.max_bytes:
+                self._evict_over_quota(keep)
+        except OSError as e:
+            logger.error(f"Failed to update audio storage quota: {e}")
+    
+    def _evict_over_quota(self, keep: Optional[str] = None):
+        """
+        Evict least recently accessed unpinned files (of every worker) until
+        under the low-water mark, recounting usage from disk
+        
+        Args:
+            keep: Filename never evicted, so a caller's URL stays valid even
+                when that one file is larger than the quota
+        """
+        evicted = []
+        with self._usage_ledger() as fd:
+            files, _ = self._scan_storage()
+            unpinned = sorted(
+                (stat.st_atime_ns, name, path, stat.st_size)
+                for name, path, stat, pinned in files if not pinned
+            )
+            total = sum(size for _, _, _, size in unpinned)
+            if total > self.max_bytes:
+                target = self.max_bytes * _QUOTA_LOW_WATER
+                for _, name, path, size in unpinned:
+                    if total <= target:
+                        break
+                    if name == keep:
+                        continue
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                    except OSError as e:
+                        logger.error(f"Failed to evict audio file {path}: {e}")
+                        continue
+                    total -= size
+                    evicted.append(name)
+            _write_usage(fd, total)
+        
+        with self._lock:
+            for name in evicted:
+                self._forget_locked(name)
+            self._evicted_count += len(evicted)
+        if evicted:
+            logger.info(f"Evicted {len(evicted)} audio files to stay within {self.max_bytes} byte quota")
+        if total > self.max_bytes and keep:
+            logger.warning(f"Keeping {keep} over the {self.max_bytes} byte audio quota until it expires")
+    
+    def _pop_expired(self, now: float) -> List[str]:
+        """Remove expired files from the index in O(expired log n) and return their paths"""
+        expired = []
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                expires_at, filename = heapq.heappop(self._expiry_heap)
+                metadata = self.audio_files.get(filename)
+                # Skip stale entries for files already removed, pinned or re-registered
+                if not metadata or metadata['expires_at'] != expires_at:
+                    continue
+                self._forget_locked(filename)
+                expired.append(metadata['path'])
+            self._expired_count += len(expired)
+        return expired
+    
+    def _delete_files(self, paths: List[str], unpinned: bool = True):
+        """
+        Delete files from disk, tolerating files already removed by another
+        worker; only bytes this call removed leave the shared usage count
+        """
+        freed = 0
+        for path in paths:
+            try:
+                size = os.stat(path).st_size
+                os.remove(path)
+                freed += size
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"Failed to delete audio file {path}: {e}")
+        if freed and unpinned:
+            try:
+                self._add_usage(-freed)
+            except OSError as e:
+                logger.error(f"Failed to update audio storage quota: {e}")
+    
+    def _scan_storage(self) -> Tuple[List[Tuple[str, str, os.stat_result, bool]], List[Tuple[str, float]]]:
+        """
+        List stored audio files on disk
+        
+        Returns:
+            ([(filename, path, stat, pinned)], [(temp file path, mtime)])
+        """
+        found, temps = [], []
+        
+        def scan(directory: str, pinned: bool, depth: int):
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                return
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if depth == 0 and entry.name == _PINNED_DIR:
+                        scan(entry.path, True, 0)
+                    elif depth == 0 and len(entry.name) == 2:
+                        scan(entry.path, pinned, 1)
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue  # Removed by another worker meanwhile
+                if entry.name.endswith('.tmp'):
+                    temps.append((entry.path, stat.st_mtime))
+                elif _FILENAME_PATTERN.match(entry.name):
+                    found.append((entry.name, entry.path, stat, pinned))
+        
+        scan(self.storage_dir, False, 0)
+        return found, temps
+    
+    def _reconcile_existing_files(self):
+        """
+        Index audio files already on disk (written before a restart or by
+        other workers) so they expire, and recount the shared quota usage
+        """
+        try:
+            found, temps = self._scan_storage()
+        except Exception as e:
+            logger.error(f"Failed to reconcile audio storage directory: {e}")
+            return
+        
+        stale_temp_cutoff = time.time() - _STALE_TEMP_SECONDS
+        self._delete_files([path for path, mtime in temps if mtime < stale_temp_cutoff], unpinned=False)
+        
+        for filename, path, stat, pinned in found:
+            self._register_file(filename, path, stat.st_size, stat.st_mtime, pinned)
+        
+        unpinned_bytes = sum(stat.st_size for _, _, stat, pinned in found if not pinned)
+        try:
+            # An empty store gets its ledger with the first stored file
+            if unpinned_bytes or os.path.exists(self._usage_path):
+                with self._usage_ledger() as fd:
+                    _write_usage(fd, unpinned_bytes)
+            if self.max_bytes and unpinned_bytes > self.max_bytes:
+                self._evict_over_quota()
+        except OSError as e:
+            logger.error(f"Failed to update audio storage quota: {e}")
+        
+        if found:
+            logger.info(f"Reconciled {len(found)} existing audio files")
+    
     def _cleanup_old_files(self):
         """
-        Background thread to cleanup old audio files
-        Removes files older than 1 hour
+        Background thread that deletes audio files as they expire
+        Sleeps until the earliest expiry rather than rescanning all files
         """
         while True:
+            # Cleared before looking at the heap, so a file registered after
+            # this point sets it again and the wait below returns at once
+            self._wakeup.clear()
             try:
-                cutoff_time = datetime.now() - timedelta(hours=1)
-                with self._lock:
-                    files_to_remove = [
-                        filename
-                        for filename, metadata in self.audio_files.items()
-                        if metadata['created_at'] < cutoff_time
-                    ]
-                
-                for filename in files_to_remove:
-                    self.cleanup_file(filename)
+                expired = self._pop_expired(time.time())
+                self._delete_files(expired)
                 
-                if files_to_remove:
-                    logger.info(f"Cleaned up {len(files_to_remove)} old audio files")
+                if expired:
+                    logger.info(f"Cleaned up {len(expired)} expired audio files")
                 
             except Exception as e:
                 logger.error(f"Error in audio cleanup thread: {e}")
             
-            # Sleep for 10 minutes before next cleanup
-            time.sleep(600)
+            with self._lock:
+                next_expiry = self._expiry_heap[0][0] if self._expiry_heap else None
+            timeout = 600 if next_expiry is None else min(600, max(1.0, next_expiry - time.time()))
+            self._wakeup.wait(timeout)
     
     def get_storage_stats(self) -> dict:
         """Get storage statistics"""
         with self._lock:
             total_files = len(self.audio_files)
             total_size = sum(metadata['size'] for metadata in self.audio_files.values())
+            pinned_files = sum(1 for metadata in self.audio_files.values() if metadata['pinned'])
+            expired_count = self._expired_count
+            evicted_count = self._evicted_count
+        try:
+            with self._usage_ledger() as fd:
+                unpinned_bytes = _read_usage(fd)
+        except OSError:
+            unpinned_bytes = None
         
         return {
             'total_files': total_files,
+            'pinned_files': pinned_files,
+            'unpinned_size_bytes': unpinned_bytes,
+            'quota_bytes': self.max_bytes,
+            'retention_seconds': self.retention_seconds,
+            'expired_files': expired_count,
+            'evicted_files': evicted_count,
             'total_size_bytes': total_size,
             'total_size_mb': round(total_size / (1024 * 1024), 2),
             'storage_directory': self.storage_dir
@@ -218,42 +646,59 @@ audio_storage = AudioStorageService(
     base_url=_config.AUDIO_STORAGE_BASE_URL,
     storage_dir=_config.AUDIO_STORAGE_DIR,
     sample_rate=_config.AUDIO_IVR_SAMPLE_RATE,
+    retention_seconds=_config.AUDIO_RETENTION_SECONDS,
+    max_bytes=_config.AUDIO_STORAGE_MAX_MB * 1024 * 1024,
 )
 
-def register_audio_routes(app: Flask):
+def register_audio_routes(app: Flask, storage: Optional[AudioStorageService] = None):
     """
     Register audio serving routes with Flask app
     
     Args:
         app: Flask application instance
+        storage: Storage service to serve from (defaults to the global instance)
     """
+    storage = storage or audio_storage
     
     @app.route('/audio/<filename>')
     def serve_audio(filename):
-        """Serve audio files for Exotel"""
-        file_path = audio_storage.get_audio_file_path(filename)
+        """
+        Serve audio files for Exotel
         
-        if file_path and os.path.exists(file_path):
-            logger.info(f"Serving audio file: {filename}")
-            try:
-                return send_file(
-                    file_path,
-                    mimetype='audio/wav',
-                    as_attachment=False,
-                    download_name=filename
-                )
-            except Exception as e:
-                logger.error(f"Error serving audio file {filename}: {e}")
-                abort(500)
-        else:
+        Responses carry a strong ETag and immutable cache headers and honour
+        If-None-Match and Range, so provider refetches ("press 2") are usually
+        a 304. Full responses go through the WSGI file wrapper, which gunicorn
+        serves with sendfile.
+        """
+        file_path = storage.get_audio_file_path(filename)
+        
+        if not file_path:
             logger.warning(f"Audio file not found: {filename}")
             abort(404)
+        
+        try:
+            response = send_file(
+                file_path,
+                mimetype='audio/wav',
+                as_attachment=False,
+                download_name=filename,
+                conditional=True,
+                etag=storage.get_etag(filename),
+                max_age=AUDIO_CACHE_MAX_AGE
+            )
+            response.cache_control.public = True
+            response.cache_control.immutable = True
+            logger.debug(f"Serving audio file: {filename} ({response.status_code})")
+            return response
+        except Exception as e:
+            logger.error(f"Error serving audio file {filename}: {e}")
+            abort(500)
     
     @app.route('/audio-storage/stats')
     def audio_storage_stats():
         """Get audio storage statistics"""
         try:
-            stats = audio_storage.get_storage_stats()
+            stats = storage.get_storage_stats()
             return stats
         except Exception as e:
             logger.error(f"Error getting storage stats: {e}")
@@ -267,7 +712,7 @@ def register_audio_routes(app: Flask):
             test_audio = b"RIFF test audio data for endpoint validation"
             
             # Store audio
-            audio_url = audio_storage.store_audio(test_audio, "endpoint_test")
+            audio_url = storage.store_audio(test_audio, "endpoint_test")
             
             if audio_url:
                 return {
@@ -0,0 +1,195 @@
+"""
+Adaptive concurrency limiting for VidyaVani
+
+Each class of request (IVR webhooks, question processing, text Q&A,
+dashboards, other API calls) gets its own AIMD limiter. A request that
+completes within the class's target latency while the limit is in use
+raises the limit by 1/limit (about one slot per window of completions);
+one that overshoots the target cuts the limit by a constant factor, at most
+once per target-latency interval so that the slow requests of a single
+overload episode only count once. Limits therefore settle just below the
+concurrency at which latency starts to climb instead of at a fixed guess.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .metrics_registry import metrics_registry
+
+_concurrency_limit = metrics_registry.gauge(
+    'vidyavani_concurrency_limit', 'Adaptive concurrency limit', ['request_class']
+)
+_requests_shed = metrics_registry.counter(
+    'vidyavani_requests_shed', 'Requests shed by the adaptive concurrency limiter', ['request_class']
+)
+
+# Endpoints never limited: health checks, metric scrapes, static pages,
+# long-lived event streams (capped per worker by the job manager instead, as
+# their duration says nothing about load) and the status callbacks that end a
+# call (shedding those would leak the session rather than save work)
+EXEMPT_ENDPOINTS = {
+    'health_check', 'api_health_check', 'detailed_health_check', 'health_history', 'metrics',
+    'static', 'index', 'frontend_app', 'serve_frontend_files', 'stream_job_events',
+    'webhook_call_end', 'webhook_recording_status',
+}
+
+# IVR webhooks carrying what the caller just said or pressed (RecordingUrl,
+# Digits); the retried request of a shed hop would arrive without it, so these
+# are always admitted
+CALLER_INPUT_ENDPOINTS = {
+    'webhook_language_selection', 'webhook_grade_confirmation', 'webhook_interaction_mode_selection',
+    'webhook_question_recording', 'webhook_follow_up_menu', 'webhook_error_recovery',
+}
+
+QUESTION_ENDPOINTS = {'process_question'}
+TEXT_QA_ENDPOINTS = {'answer_question', 'gemini_direct', 'get_demo_response', 'test_gemini'}
+DASHBOARD_PATH_PREFIXES = (
+    '/api/performance', '/api/errors', '/api/traces', '/api/load-balancer', '/api/circuits',
+    '/api/backup', '/api/demo/recordings', '/health/restart',
+)
+
+
+def classify_request(endpoint: Optional[str], path: str) -> Optional[str]:
+    """
+    Request class used for concurrency limiting
+
+    Args:
+        endpoint: Flask endpoint name (None when no route matched)
+        path: Request path
+
+    Returns:
+        'webhook', 'question', 'text_qa', 'dashboard' or 'api', or None if the
+        request is not limited
+    """
+    if endpoint is None or endpoint in EXEMPT_ENDPOINTS or endpoint.endswith('_page'):
+        return None
+    if endpoint in CALLER_INPUT_ENDPOINTS:
+        return None
+    if endpoint.startswith('webhook_'):
+        return 'webhook'
+    if endpoint in QUESTION_ENDPOINTS:
+        return 'question'
+    if endpoint in TEXT_QA_ENDPOINTS:
+        return 'text_qa'
+    if path.startswith(DASHBOARD_PATH_PREFIXES):
+        return 'dashboard'
+    return 'api'
+
+
+class AIMDLimiter:
+    """Additive-increase / multiplicative-decrease concurrency limit for one request class"""
+
+    def __init__(self, name: str, target_latency: float, initial_limit: int,
+                 min_limit: int = 1, max_limit: int = 100, backoff: float = 0.9):
+        """
+        Args:
+            name: Request class the limiter guards
+            target_latency: Seconds a request should complete within
+            initial_limit: Starting concurrency limit
+            min_limit: Lowest the limit is cut to
+            max_limit: Highest the limit grows to
+            backoff: Factor the limit is multiplied by when latency overshoots
+        """
+        self.name = name
+        self.target_latency = target_latency
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.backoff = backoff
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.in_flight = 0
+        self.accepted = 0
+        self.shed = 0
+        self.overshoots = 0
+        self._last_decrease = float('-inf')
+        self._lock = threading.Lock()
+        _concurrency_limit.set(int(self.limit), request_class=name)
+
+    def has_capacity(self) -> bool:
+        """Whether a slot is free, without taking it"""
+        with self._lock:
+            return self.in_flight < int(self.limit)
+
+    def try_acquire(self) -> bool:
+        """Take a slot if the class is under its limit"""
+        with self._lock:
+            if self.in_flight >= int(self.limit):
+                self.shed += 1
+                _requests_shed.inc(request_class=self.name)
+                return False
+            self.in_flight += 1
+            self.accepted += 1
+            return True
+
+    def release(self, latency: float, now: Optional[float] = None):
+        """
+        Return a slot and adjust the limit from the request's latency
+
+        Args:
+            latency: Seconds the request took
+            now: Monotonic time of completion, defaults to now
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            in_use = self.in_flight
+            self.in_flight = max(0, self.in_flight - 1)
+            if latency > self.target_latency:
+                self.overshoots += 1
+                if now - self._last_decrease < self.target_latency:
+                    return
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+            elif in_use * 2 >= int(self.limit):
+                # Only grow while the limit is actually being used
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+            else:
+                return
+            limit = int(self.limit)
+        _concurrency_limit.set(limit, request_class=self.name)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current limit and counters"""
+        with self._lock:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'target_latency': self.target_latency,
+                'accepted': self.accepted,
+                'shed': self.shed,
+                'overshoots': self.overshoots,
+            }
+
+
+class AdaptiveConcurrencyController:
+    """One AIMD limiter per request class"""
+
+    def __init__(self, config):
+        question_limit = config.MAX_CONCURRENT_CALLS
+        # Request class -> (target latency seconds, initial limit, min limit, max limit)
+        self.class_limits = {
+            'webhook': (config.WEBHOOK_TARGET_LATENCY, 20, 2, 200),
+            'question': (config.RESPONSE_TIMEOUT, question_limit, 1, question_limit * 4),
+            'text_qa': (config.RESPONSE_TIMEOUT, 4, 1, 32),
+            'dashboard': (2.0, 4, 1, 16),
+            'api': (2.0, 10, 2, 100),
+        }
+        self.limiters = {
+            name: AIMDLimiter(name, target, initial, min_limit, max_limit)
+            for name, (target, initial, min_limit, max_limit) in self.class_limits.items()
+        }
+
+    def has_capacity(self, request_class: str) -> bool:
+        """Whether a request of the class would be admitted"""
+        return self.limiters[request_class].has_capacity()
+
+    def try_acquire(self, request_class: str) -> bool:
+        """Take a slot for a request of the class"""
+        return self.limiters[request_class].try_acquire()
+
+    def release(self, request_class: str, latency: float):
+        """Return a slot taken by try_acquire"""
+        self.limiters[request_class].release(latency)
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """Limit and counters of every request class"""
+        return {name: limiter.snapshot() for name, limiter in self.limiters.items()}
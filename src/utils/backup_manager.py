@@ -123,14 +123,18 @@ class BackupManager:
                     shutil.copy2(source_file, faiss_backup_path / file_name)
                     self.logger.debug(f"Backed up FAISS file: {file_name}")
             
+            # Per-model indexes and their manifests
+            indexes_path = vector_db_path / 'indexes'
+            if indexes_path.exists():
+                shutil.copytree(indexes_path, faiss_backup_path / 'indexes', dirs_exist_ok=True)
+                self.logger.debug("Backed up per-model FAISS indexes")
+            
             # Create FAISS metadata
             faiss_metadata = {
                 'backup_timestamp': datetime.now().isoformat(),
                 'vector_count': self._get_vector_count(),
                 'index_size_bytes': sum(
-                    (vector_db_path / f).stat().st_size 
-                    for f in faiss_files 
-                    if (vector_db_path / f).exists()
+                    f.stat().st_size for f in faiss_backup_path.rglob('*') if f.is_file()
                 )
             }
             
@@ -403,6 +407,10 @@ class BackupManager:
                     shutil.copy2(source_file, vector_db_path / file_name)
                     self.logger.debug(f"Restored FAISS file: {file_name}")
             
+            if (faiss_backup_path / 'indexes').exists():
+                shutil.copytree(faiss_backup_path / 'indexes', vector_db_path / 'indexes', dirs_exist_ok=True)
+                self.logger.debug("Restored per-model FAISS indexes")
+            
             self.logger.info("FAISS index restore completed")
             return True
             
@@ -484,15 +492,20 @@ class BackupManager:
             return False
     
     def _get_vector_count(self) -> int:
-        """Get current vector count from FAISS index"""
+        """Get current vector count from the FAISS indexes (the largest per-model index)"""
         try:
-            import faiss
-            vector_db_path = Path('data/ncert/vector_db/faiss_index.bin')
+            vector_db_path = Path('data/ncert/vector_db')
+            manifests = list(vector_db_path.glob('indexes/*/manifest.json'))
+            if manifests:
+                return max(json.loads(manifest.read_text()).get('chunks', 0) for manifest in manifests)
             
-            if not vector_db_path.exists():
+            # Index saved before per-model indexes
+            import faiss
+            index_path = vector_db_path / 'faiss_index.bin'
+            if not index_path.exists():
                 return 0
             
-            index = faiss.read_index(str(vector_db_path))
+            index = faiss.read_index(str(index_path))
             return index.ntotal
             
         except Exception:
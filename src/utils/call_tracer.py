@@ -0,0 +1,403 @@
+"""
+Per-call tracing for VidyaVani IVR sessions
+
+One trace covers a whole call: every Exotel webhook hop, the background
+question thread and the pipeline stages it runs (download, STT, retrieval,
+LLM, TTS, upload). Spans are kept in an in-process ring buffer of recent
+traces and, when TRACE_EXPORT_PATH is set, finished traces are appended to
+that file as OTLP/JSON lines (one ExportTraceServiceRequest per line) so they
+can be loaded by any OpenTelemetry-compatible tool.
+
+The buffer is per process; with several gunicorn workers a trace is only
+complete in the export file, since Exotel may deliver webhooks of one call
+to different workers.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Span names of webhook hops start with this prefix; gaps are measured between them
+WEBHOOK_SPAN_PREFIX = 'webhook.'
+
+
+@dataclass
+class Span:
+    """A timed operation within a call trace"""
+    trace_id: str
+    span_id: str
+    name: str
+    start_time: float
+    parent_id: Optional[str] = None
+    end_time: Optional[float] = None
+    success: bool = True
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        end_time = self.end_time if self.end_time is not None else time.time()
+        return end_time - self.start_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copy of the span; the caller holds the tracer lock"""
+        return {
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+            'duration_ms': round(self.duration * 1000, 3),
+            'success': self.success,
+            'attributes': dict(self.attributes),
+        }
+
+
+@dataclass
+class CallTrace:
+    """All spans recorded for one call session"""
+    session_id: str
+    trace_id: str
+    started_at: float
+    spans: List[Span] = field(default_factory=list)
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    dropped_spans: int = 0
+    finished: bool = False
+    exported: bool = False
+
+    def webhook_gaps(self) -> List[Dict[str, Any]]:
+        """Time between consecutive webhook hops, e.g. between response-delivery polls"""
+        hops = sorted(
+            (span for span in self.spans
+             if span.parent_id is None and span.name.startswith(WEBHOOK_SPAN_PREFIX) and span.end_time),
+            key=lambda span: span.start_time
+        )
+        return [
+            {
+                'after': previous.name,
+                'before': current.name,
+                'gap_ms': round(max(0.0, current.start_time - previous.end_time) * 1000, 3),
+            }
+            for previous, current in zip(hops, hops[1:])
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Copy of the trace; the caller holds the tracer lock"""
+        spans = sorted(self.spans, key=lambda span: span.start_time)
+        ended = [span.end_time for span in spans if span.end_time is not None]
+        return {
+            'session_id': self.session_id,
+            'trace_id': self.trace_id,
+            'started_at': self.started_at,
+            'duration_ms': round((max(ended) - self.started_at) * 1000, 3) if ended else 0.0,
+            'finished': self.finished,
+            'attributes': dict(self.attributes),
+            'span_count': len(spans),
+            'dropped_spans': self.dropped_spans,
+            'spans': [span.to_dict() for span in spans],
+            'webhook_gaps': self.webhook_gaps(),
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, (list, tuple)):
+        return {'arrayValue': {'values': [_otlp_value(item) for item in value]}}
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+
+def trace_to_otlp(trace: CallTrace, service_name: str = 'vidyavani') -> Dict[str, Any]:
+    """
+    Convert a call trace to an OTLP/JSON ExportTraceServiceRequest
+
+    The caller holds the tracer lock, which guards span attributes.
+
+    Args:
+        trace: Trace to convert
+        service_name: Value of the service.name resource attribute
+
+    Returns:
+        JSON-serialisable OTLP request body
+    """
+    spans = []
+    for span in trace.spans:
+        end_time = span.end_time if span.end_time is not None else span.start_time
+        attributes = {'session.id': trace.session_id, **trace.attributes, **span.attributes}
+        spans.append({
+            'traceId': trace.trace_id,
+            'spanId': span.span_id,
+            'parentSpanId': span.parent_id or '',
+            'name': span.name,
+            'kind': 2 if span.name.startswith(WEBHOOK_SPAN_PREFIX) else 1,  # SERVER / INTERNAL
+            'startTimeUnixNano': str(int(span.start_time * 1e9)),
+            'endTimeUnixNano': str(int(end_time * 1e9)),
+            'attributes': _otlp_attributes(attributes),
+            'status': {'code': 1 if span.success else 2},  # OK / ERROR
+        })
+    return {
+        'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': service_name})},
+            'scopeSpans': [{'scope': {'name': __name__}, 'spans': spans}],
+        }]
+    }
+
+
+class CallTracer:
+    """
+    Records spans per call session into a bounded ring buffer of traces
+
+    Spans are updated from webhook and pipeline threads while traces are read
+    and exported from others, so span fields and attributes are only changed
+    and copied under the tracer lock.
+    """
+
+    def __init__(self, max_traces: int = 200, max_spans_per_trace: int = 500,
+                 export_path: str = ''):
+        """
+        Args:
+            max_traces: Number of recent traces kept in memory; 0 disables tracing
+            max_spans_per_trace: Spans kept per trace before further spans are dropped
+            export_path: OTLP/JSON lines file that finished traces are appended to
+        """
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self.export_path = export_path
+        self._traces: 'OrderedDict[str, CallTrace]' = OrderedDict()
+        self._aliases: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_traces > 0
+
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current_session(self) -> Optional[str]:
+        """Session ID traced on this thread, if any"""
+        return getattr(self._local, 'session_id', None)
+
+    @contextmanager
+    def activate(self, session_id: Optional[str]):
+        """Make session_id the trace of spans started on this thread without an explicit session"""
+        previous = self.current_session()
+        self._local.session_id = session_id
+        try:
+            yield
+        finally:
+            self._local.session_id = previous
+
+    def _get_or_create_trace_locked(self, session_id: str, evicted: List[CallTrace]) -> CallTrace:
+        trace = self._traces.get(session_id)
+        if trace is None:
+            trace = CallTrace(session_id=session_id, trace_id=uuid.uuid4().hex, started_at=time.time())
+            self._traces[session_id] = trace
+            while len(self._traces) > self.max_traces:
+                _, oldest = self._traces.popitem(last=False)
+                self._forget_aliases_locked(oldest.session_id)
+                if not oldest.exported:
+                    evicted.append(oldest)
+        return trace
+
+    def _forget_aliases_locked(self, session_id: str):
+        for alias in [alias for alias, target in self._aliases.items() if target == session_id]:
+            del self._aliases[alias]
+
+    def annotate(self, session_id: str, alias: Optional[str] = None, **attributes):
+        """
+        Attach call-level attributes to a trace and optionally register a lookup alias
+
+        Args:
+            session_id: Session the trace belongs to
+            alias: Extra key (e.g. the Exotel CallSid) that get_trace accepts
+            **attributes: Attributes exported on every span of the trace
+        """
+        if not self.enabled or not session_id:
+            return
+        evicted = []
+        with self._lock:
+            trace = self._get_or_create_trace_locked(session_id, evicted)
+            trace.attributes.update(attributes)
+            if alias:
+                self._aliases[alias] = session_id
+        for trace in evicted:
+            self._export(trace)
+
+    def start_span(self, name: str, session_id: Optional[str] = None,
+                   start_time: Optional[float] = None, **attributes) -> Optional[Span]:
+        """
+        Start a span and make it the parent of spans started next on this thread
+
+        Args:
+            name: Span name, e.g. 'webhook.incoming_call' or 'question_processing.stt_processing'
+            session_id: Trace to record into; defaults to the session activated on this thread
+            start_time: Epoch start time if the span began before this call
+            **attributes: Span attributes
+
+        Returns:
+            The started span, or None when there is no trace to record into
+        """
+        if not self.enabled:
+            return None
+        stack = self._stack()
+        parent = stack[-1] if stack else None
+        session_id = session_id or (parent and parent.attributes.get('session.id')) or self.current_session()
+        if not session_id:
+            return None
+
+        evicted = []
+        with self._lock:
+            trace = self._get_or_create_trace_locked(session_id, evicted)
+            if len(trace.spans) >= self.max_spans_per_trace:
+                trace.dropped_spans += 1
+                return None
+            span = Span(
+                trace_id=trace.trace_id,
+                span_id=uuid.uuid4().hex[:16],
+                name=name,
+                start_time=start_time if start_time is not None else time.time(),
+                parent_id=parent.span_id if parent and parent.trace_id == trace.trace_id else None,
+                attributes={**attributes, 'session.id': session_id},
+            )
+            trace.spans.append(span)
+        for evicted_trace in evicted:
+            self._export(evicted_trace)
+
+        stack.append(span)
+        return span
+
+    def end_span(self, span: Optional[Span], success: bool = True,
+                 end_time: Optional[float] = None, **attributes):
+        """End a span returned by start_span (at end_time if given); None is ignored"""
+        if span is None:
+            return
+        with self._lock:
+            span.end_time = end_time if end_time is not None else time.time()
+            span.success = success
+            span.attributes.update(attributes)
+        stack = self._stack()
+        if span in stack:
+            del stack[stack.index(span):]
+
+    def set_span_attributes(self, **attributes):
+        """Attach attributes to the innermost span open on this thread, if any"""
+        stack = getattr(self._local, 'stack', None)
+        if stack:
+            with self._lock:
+                stack[-1].attributes.update(attributes)
+
+    @contextmanager
+    def span(self, name: str, session_id: Optional[str] = None, **attributes):
+        """
+        Context manager around start_span/end_span that marks the span failed on exceptions
+
+        Yields:
+            The span (or None when not tracing)
+        """
+        span = self.start_span(name, session_id, **attributes)
+        try:
+            yield span
+        except Exception as e:
+            self.end_span(span, success=False, error=str(e))
+            raise
+        else:
+            self.end_span(span, success=span.success if span else True)
+
+    def record_span(self, name: str, start_time: float, end_time: float,
+                    session_id: Optional[str] = None, success: bool = True, **attributes):
+        """Record an already completed span, e.g. time a task spent queued"""
+        span = self.start_span(name, session_id, start_time=start_time, **attributes)
+        self.end_span(span, success, end_time=end_time)
+
+    def finish_trace(self, session_id: str):
+        """Mark a trace finished (the call ended) and export it"""
+        with self._lock:
+            trace = self._traces.get(session_id)
+            if trace is None or trace.finished:
+                return
+            trace.finished = True
+        self._export(trace)
+
+    def get_trace(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a trace by session ID or alias (CallSid)
+
+        Returns:
+            Trace with spans in start order and webhook gaps, or None if not buffered
+        """
+        with self._lock:
+            trace = self._traces.get(self._aliases.get(key, key))
+            return trace.to_dict() if trace else None
+
+    def get_trace_otlp(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a trace by session ID or alias as an OTLP/JSON request body"""
+        with self._lock:
+            trace = self._traces.get(self._aliases.get(key, key))
+            return trace_to_otlp(trace) if trace else None
+
+    def list_traces(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Summaries of the most recent traces, newest first"""
+        summaries = []
+        with self._lock:
+            traces = list(self._traces.values())[-limit:] if limit > 0 else []
+            for trace in reversed(traces):
+                summary = trace.to_dict()
+                del summary['spans']
+                summaries.append(summary)
+        return summaries
+
+    def clear(self):
+        """Drop all buffered traces"""
+        with self._lock:
+            self._traces.clear()
+            self._aliases.clear()
+
+    def _export(self, trace: CallTrace):
+        """Append a trace to the export file as one OTLP/JSON line"""
+        trace.exported = True
+        if not self.export_path:
+            return
+        try:
+            with self._lock:
+                body = trace_to_otlp(trace)
+            line = json.dumps(body, separators=(',', ':'))
+            with self._export_lock:
+                directory = os.path.dirname(self.export_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.export_path, 'a', encoding='utf-8') as export_file:
+                    export_file.write(line + '\n')
+        except Exception as e:
+            logger.warning(f"Failed to export trace {trace.session_id}: {e}")
+
+
+# Global call tracer instance
+call_tracer = CallTracer(
+    max_traces=Config.TRACE_BUFFER_SIZE,
+    max_spans_per_trace=Config.TRACE_MAX_SPANS,
+    export_path=Config.TRACE_EXPORT_PATH
+)
@@ -0,0 +1,242 @@
+"""
+Per-dependency circuit breakers for VidyaVani
+
+Each external dependency (Google STT, Google TTS, each LLM provider, the
+embeddings API and recording downloads) has its own breaker, so an outage in
+one only fast-fails the calls that need it. A breaker opens after
+consecutive failures or when too many recent calls are slower than the
+dependency's latency threshold. While open, calls fail immediately with
+CircuitOpenError and callers serve their cached or fallback answer instead
+of retrying; after the recovery timeout a single probe call is let through
+(half-open) and its outcome closes or re-opens the breaker.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Optional, Tuple, Type
+
+from config import Config
+from .metrics_registry import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+_circuit_state = metrics_registry.gauge(
+    'vidyavani_circuit_state', 'Dependency circuit state (0 closed, 1 half-open, 2 open)', ['dependency']
+)
+_circuit_rejections = metrics_registry.counter(
+    'vidyavani_circuit_rejections', 'Calls failed fast by an open circuit', ['dependency']
+)
+
+# Dependency -> seconds above which a call counts as slow. LLM breakers are
+# named 'llm:<provider>' and share the 'llm' threshold.
+LATENCY_THRESHOLDS = {
+    'google_stt': 8.0,
+    'google_tts': 8.0,
+    'llm': 12.0,
+    'embeddings': 3.0,
+    'recording_download': 10.0,
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, dependency: str):
+        super().__init__(f"{dependency} unavailable (circuit open)")
+        self.dependency = dependency
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker tripped by failures or slow calls"""
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0,
+                 latency_threshold: Optional[float] = None, slow_call_rate: float = 0.5,
+                 window_size: int = 20, min_calls: int = 5):
+        """
+        Args:
+            name: Dependency the breaker guards
+            failure_threshold: Consecutive failures that open the breaker
+            recovery_timeout: Seconds the breaker stays open before a probe is allowed
+            latency_threshold: Seconds above which a call counts as slow (None disables)
+            slow_call_rate: Fraction of slow calls in the window that opens the breaker
+            window_size: Recent calls considered for the slow call rate
+            min_calls: Calls needed in the window before the slow call rate applies
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.latency_threshold = latency_threshold
+        self.slow_call_rate = slow_call_rate
+        self.min_calls = min_calls
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.rejected_calls = 0
+        self.open_count = 0
+        self._recent_slow: Deque[bool] = deque(maxlen=window_size)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        _circuit_state.set(_STATE_VALUES[CLOSED], dependency=name)
+
+    def allow_request(self) -> bool:
+        """Whether a call may go ahead; moves an expired open breaker to half-open"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                self._set_state_locked(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            self.rejected_calls += 1
+        _circuit_rejections.inc(dependency=self.name)
+        return False
+
+    def record_success(self, latency: Optional[float] = None):
+        """Record a completed call; a slow one counts toward tripping"""
+        slow = self.latency_threshold is not None and latency is not None and latency > self.latency_threshold
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if slow:
+                    self._open_locked(f"probe took {latency:.1f}s")
+                else:
+                    self._recent_slow.clear()
+                    self._set_state_locked(CLOSED)
+                    logger.info(f"Circuit for {self.name} closed after successful probe")
+                return
+            self._recent_slow.append(slow)
+            if self.state == CLOSED and slow and self._slow_rate_exceeded_locked():
+                self._open_locked(f"{sum(self._recent_slow)}/{len(self._recent_slow)} recent calls "
+                                  f"slower than {self.latency_threshold:.1f}s")
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        """Record a failed call"""
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._open_locked(f"probe failed: {error}")
+            elif self.state == CLOSED:
+                if self.consecutive_failures >= self.failure_threshold:
+                    self._open_locked(f"{self.consecutive_failures} consecutive failures, last: {error}")
+
+    def _slow_rate_exceeded_locked(self) -> bool:
+        calls = len(self._recent_slow)
+        return calls >= self.min_calls and sum(self._recent_slow) / calls >= self.slow_call_rate
+
+    def _open_locked(self, reason: str):
+        self.opened_at = time.monotonic()
+        self.open_count += 1
+        self._set_state_locked(OPEN)
+        logger.warning(f"Circuit for {self.name} opened for {self.recovery_timeout:.0f}s: {reason}")
+
+    def _set_state_locked(self, state: str):
+        self.state = state
+        _circuit_state.set(_STATE_VALUES[state], dependency=self.name)
+
+    @contextmanager
+    def guard(self, ignore: Tuple[Type[BaseException], ...] = ()):
+        """
+        Run a dependency call under the breaker
+
+        Raises CircuitOpenError without running the block if the breaker is
+        open. Exceptions in ``ignore`` (e.g. invalid input) show the dependency
+        is up and count as successes; other exceptions count as failures.
+        All exceptions are re-raised.
+        """
+        if not self.allow_request():
+            raise CircuitOpenError(self.name)
+        started = time.monotonic()
+        try:
+            yield
+        except ignore:
+            self.record_success(time.monotonic() - started)
+            raise
+        except BaseException as e:
+            self.record_failure(e)
+            raise
+        self.record_success(time.monotonic() - started)
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being failed fast"""
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.recovery_timeout
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current state and counters"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'slow_calls': sum(self._recent_slow),
+                'recent_calls': len(self._recent_slow),
+                'latency_threshold': self.latency_threshold,
+                'open_count': self.open_count,
+                'rejected_calls': self.rejected_calls,
+                'open_for_seconds': round(time.monotonic() - self.opened_at, 1) if self.state != CLOSED else 0.0,
+            }
+
+    def reset(self):
+        """Close the breaker and forget recent calls"""
+        with self._lock:
+            self.consecutive_failures = 0
+            self._recent_slow.clear()
+            self._probe_in_flight = False
+            self._set_state_locked(CLOSED)
+
+
+class CircuitBreakerRegistry:
+    """Breakers by dependency name, created on first use"""
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> CircuitBreaker:
+        """Breaker for a dependency, e.g. 'google_tts' or 'llm:openai'"""
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(name)
+                if breaker is None:
+                    breaker = self._breakers[name] = CircuitBreaker(
+                        name,
+                        failure_threshold=self.failure_threshold,
+                        recovery_timeout=self.recovery_timeout,
+                        latency_threshold=LATENCY_THRESHOLDS.get(name.split(':', 1)[0])
+                    )
+        return breaker
+
+    def open_circuits(self):
+        """Names of dependencies currently failed fast"""
+        return sorted(name for name, breaker in list(self._breakers.items()) if breaker.is_open)
+
+    def get_status(self) -> Dict[str, Dict[str, Any]]:
+        """State of every breaker"""
+        return {name: breaker.snapshot() for name, breaker in sorted(list(self._breakers.items()))}
+
+    def reset(self):
+        """Close every breaker"""
+        for breaker in list(self._breakers.values()):
+            breaker.reset()
+
+
+# Global circuit breaker registry
+circuit_breakers = CircuitBreakerRegistry(
+    failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+    recovery_timeout=Config.CIRCUIT_RECOVERY_TIMEOUT
+)
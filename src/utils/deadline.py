@@ -0,0 +1,142 @@
+"""
+Per-question deadlines for VidyaVani
+
+A caller who records a question waits a fixed time for the answer before the
+call flow gives up on it. A Deadline created when the recording arrives
+travels with the question through download, STT, retrieval, LLM, TTS and
+upload: each external call takes its timeout from the remaining budget,
+retries are only attempted when they can still finish in time, and work for
+a caller who has already timed out or hung up is cancelled between stages.
+
+The pipeline passes the deadline explicitly and activates it on its worker
+thread (like call_tracer.activate) so that the service clients read it with
+current_deadline() without every intermediate layer taking a parameter.
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+_local = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    """Raised between stages once a question's deadline has passed or been cancelled"""
+
+    def __init__(self, stage: str, reason: str = ""):
+        super().__init__(f"Deadline exceeded before {stage}" + (f" ({reason})" if reason else ""))
+        self.stage = stage
+        self.reason = reason
+
+
+class Deadline:
+    """Time budget for answering one question, shared by every stage that works on it"""
+
+    def __init__(self, budget: float, started_at: Optional[float] = None):
+        """
+        Args:
+            budget: Seconds from started_at until the caller stops waiting (math.inf for none)
+            started_at: Monotonic start time, defaults to now
+        """
+        self.budget = budget
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.expires_at = self.started_at + budget
+        self._cancelled = threading.Event()
+        self._cancel_reasons = []  # Shared with deadlines derived by leaving()
+
+    @classmethod
+    def unbounded(cls) -> 'Deadline':
+        """Deadline that never expires, for work nobody is waiting on"""
+        return cls(math.inf)
+
+    def remaining(self) -> float:
+        """Seconds left, 0 once expired or cancelled"""
+        if self._cancelled.is_set():
+            return 0.0
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        """True once the budget is spent or the work was cancelled"""
+        return self.remaining() <= 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def cancel_reason(self) -> str:
+        return self._cancel_reasons[0] if self._cancel_reasons else ""
+
+    def cancel(self, reason: str):
+        """Stop work on the question, e.g. because the caller timed out or hung up"""
+        self._cancel_reasons.append(reason)
+        self._cancelled.set()
+
+    def leaving(self, reserve: float) -> 'Deadline':
+        """
+        Deadline ending reserve seconds earlier, keeping time for later stages
+
+        Cancelling either deadline cancels both.
+        """
+        child = Deadline(self.budget - reserve, self.started_at)
+        child._cancelled = self._cancelled
+        child._cancel_reasons = self._cancel_reasons
+        return child
+
+    def timeout(self, cap: float, floor: float = 0.1) -> float:
+        """
+        Timeout for one external call
+
+        Args:
+            cap: The call's usual timeout
+            floor: Smallest timeout handed to a client library
+
+        Returns:
+            cap, or the remaining budget if smaller
+        """
+        return max(floor, min(cap, self.remaining()))
+
+    def can_fit(self, seconds: float) -> bool:
+        """Whether work taking this long would finish before the deadline"""
+        return self.remaining() >= seconds
+
+    def wait_for_retry(self, delay: float, min_attempt: float = 1.0) -> bool:
+        """
+        Sleep before a retry if the retry can still finish in time
+
+        Args:
+            delay: Backoff before the retry
+            min_attempt: Shortest time a retry attempt can usefully take
+
+        Returns:
+            True after sleeping, False (without sleeping) if the retry should be skipped
+        """
+        if not self.can_fit(delay + min_attempt):
+            return False
+        if self._cancelled.wait(delay):
+            return False
+        return True
+
+    def check(self, stage: str):
+        """Raise DeadlineExceeded if work on the next stage should not start"""
+        if self.expired:
+            raise DeadlineExceeded(stage, self.cancel_reason)
+
+    @contextmanager
+    def activate(self):
+        """Make this the deadline returned by current_deadline() on this thread"""
+        previous = getattr(_local, 'deadline', None)
+        _local.deadline = self
+        try:
+            yield self
+        finally:
+            _local.deadline = previous
+
+
+def current_deadline() -> Deadline:
+    """Deadline of the question being processed on this thread, or an unbounded one"""
+    deadline = getattr(_local, 'deadline', None)
+    return deadline if deadline is not None else Deadline.unbounded()
@@ -6,17 +6,31 @@ suggestions for debugging during demo preparation.
 """
 
 import logging
+import sys
+import threading
 import traceback
 import hashlib
-from typing import Dict, Any, Optional, List
+from types import FrameType
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field
-from collections import defaultdict, deque
+from collections import OrderedDict, defaultdict, deque
 import json
 import os
 
+from .metrics_registry import metrics_registry
+from .time_buckets import TimeBucketedLog
+
 logger = logging.getLogger(__name__)
 
+_errors = metrics_registry.counter(
+    'vidyavani_errors', 'Tracked errors by component and category', ['component', 'error_type']
+)
+
+# Frames kept per stack fingerprint and distinct stacks remembered
+MAX_STACK_DEPTH = 30
+MAX_STACK_RECORDS = 200
+
 @dataclass
 class ErrorEvent:
     """Represents an error event with context"""
@@ -24,22 +38,86 @@ class ErrorEvent:
     component: str
     error_type: str
     error_message: str
-    stack_trace: Optional[str] = None
+    stack_fingerprint: Optional[str] = None
     session_id: Optional[str] = None
     phone_number: Optional[str] = None
     recovery_action: Optional[str] = None
     resolved: bool = False
 
+@dataclass
+class StackRecord:
+    """A distinct error location: frames are stored once and repeat errors only counted"""
+    fingerprint: str
+    exception_type: str
+    component: str
+    frames: Tuple[Tuple[str, int, str], ...]  # (filename, line number, function), outermost first
+    first_seen: datetime
+    last_seen: datetime
+    count: int = 0
+    _formatted: Optional[str] = field(default=None, repr=False)
+    
+    @property
+    def location(self) -> str:
+        """Innermost frame as file:line in function"""
+        if not self.frames:
+            return 'unknown'
+        filename, lineno, name = self.frames[-1]
+        return f"{os.path.basename(filename)}:{lineno} in {name}"
+    
+    def format(self) -> str:
+        """Formatted stack trace, rendered (and source lines read) on first use"""
+        if self._formatted is None:
+            summary = traceback.StackSummary.from_list(
+                [(filename, lineno, name, None) for filename, lineno, name in self.frames]
+            )
+            self._formatted = ''.join(summary.format()) + self.exception_type
+        return self._formatted
+    
+    def to_dict(self, include_trace: bool = False) -> Dict[str, Any]:
+        record = {
+            'fingerprint': self.fingerprint,
+            'exception_type': self.exception_type,
+            'component': self.component,
+            'location': self.location,
+            'count': self.count,
+            'first_seen': self.first_seen.isoformat(),
+            'last_seen': self.last_seen.isoformat()
+        }
+        if include_trace:
+            record['stack_trace'] = self.format()
+        return record
+
+def _stack_frames(error: Exception, frame: Optional[FrameType]) -> Tuple[Tuple[str, int, str], ...]:
+    """
+    Code locations of an error without formatting or reading source lines
+    
+    Uses the exception's traceback when it was raised, otherwise the stack
+    ending at frame (the code that is tracking it).
+    """
+    if error.__traceback__ is not None:
+        frames = [(frame.f_code.co_filename, lineno, frame.f_code.co_name)
+                  for frame, lineno in traceback.walk_tb(error.__traceback__)]
+    else:
+        frames = []
+        while frame is not None and len(frames) < MAX_STACK_DEPTH:
+            frames.append((frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name))
+            frame = frame.f_back
+        frames.reverse()
+    return tuple(frames[-MAX_STACK_DEPTH:])
+
 class ErrorTracker:
     """
     Comprehensive error tracking system for debugging and monitoring
     """
     
     def __init__(self):
-        self.error_events: List[ErrorEvent] = []
+        # Per-minute counts by (component, error type) for 24 hours with a bounded event sample
+        self.error_events = TimeBucketedLog()
         self.error_counts = defaultdict(int)
-        self.component_errors = defaultdict(list)
+        self.component_error_counts = defaultdict(int)
         self.recent_errors = deque(maxlen=100)  # Keep last 100 errors
+        self.stack_records: "OrderedDict[str, StackRecord]" = OrderedDict()
+        self._lock = threading.Lock()
         
         # Error categorization patterns
         self.error_patterns = {
@@ -114,7 +192,7 @@ class ErrorTracker:
     
     def track_error(self, component: str, error: Exception, 
                    session_id: str = None, phone_number: str = None,
-                   recovery_action: str = None) -> str:
+                   recovery_action: str = None, frame: Optional[FrameType] = None) -> str:
         """
         Track an error event with full context
         
@@ -124,28 +202,35 @@ class ErrorTracker:
             session_id: Optional session identifier
             phone_number: Optional phone number
             recovery_action: Optional recovery action taken
+            frame: Frame whose stack fingerprints an error that was never
+                raised; defaults to the caller of track_error
             
         Returns:
             Error ID for tracking
         """
+        if error.__traceback__ is None and frame is None:
+            frame = sys._getframe(1)
         error_type = self._categorize_error(str(error))
+        timestamp = datetime.now()
         
         error_event = ErrorEvent(
-            timestamp=datetime.now(),
+            timestamp=timestamp,
             component=component,
             error_type=error_type,
             error_message=str(error),
-            stack_trace=traceback.format_exc(),
+            stack_fingerprint=self._record_stack(component, error, timestamp, frame),
             session_id=session_id,
             phone_number=phone_number,
             recovery_action=recovery_action
         )
         
         # Store error
-        self.error_events.append(error_event)
+        self.error_events.append(error_event, key=(component, error_type), timestamp=timestamp.timestamp())
         self.recent_errors.append(error_event)
-        self.error_counts[error_type] += 1
-        self.component_errors[component].append(error_event)
+        with self._lock:
+            self.error_counts[error_type] += 1
+            self.component_error_counts[component] += 1
+        _errors.inc(component=component, error_type=error_type)
         
         # Log error with context (anonymizing phone number for privacy)
         logger.error(f"ERROR_TRACKED - {component} - {error_type}: {str(error)}")
@@ -160,6 +245,54 @@ class ErrorTracker:
         
         return f"{component}_{error_type}_{int(error_event.timestamp.timestamp())}"
     
+    def _record_stack(self, component: str, error: Exception, timestamp: datetime,
+                      frame: Optional[FrameType] = None) -> str:
+        """
+        Fingerprint an error by exception type and code location and count it
+        
+        Frames are stored the first time a fingerprint is seen; formatting is
+        deferred until the stack is requested.
+        
+        Returns:
+            Stack fingerprint
+        """
+        exception_type = type(error).__name__
+        frames = _stack_frames(error, frame)
+        fingerprint = hashlib.sha1(repr((exception_type, frames)).encode()).hexdigest()[:16]
+        
+        with self._lock:
+            record = self.stack_records.get(fingerprint)
+            if record is None:
+                record = StackRecord(fingerprint, exception_type, component, frames, timestamp, timestamp)
+                self.stack_records[fingerprint] = record
+                while len(self.stack_records) > MAX_STACK_RECORDS:
+                    self.stack_records.popitem(last=False)
+            else:
+                self.stack_records.move_to_end(fingerprint)
+            record.count += 1
+            record.last_seen = timestamp
+        return fingerprint
+    
+    def get_stack_trace(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a fingerprinted stack with its formatted trace
+        
+        Args:
+            fingerprint: Stack fingerprint from an error event
+            
+        Returns:
+            Stack record with 'stack_trace', or None if unknown
+        """
+        with self._lock:
+            record = self.stack_records.get(fingerprint)
+        return record.to_dict(include_trace=True) if record else None
+    
+    def get_top_stacks(self, limit: int = 5) -> List[Dict[str, Any]]:
+        """Most frequent error stacks"""
+        with self._lock:
+            records = sorted(self.stack_records.values(), key=lambda record: record.count, reverse=True)
+        return [record.to_dict() for record in records[:limit]]
+    
     def _categorize_error(self, error_message: str) -> str:
         """
         Categorize error based on message content
@@ -205,19 +338,17 @@ class ErrorTracker:
         Returns:
             Error summary dictionary
         """
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_errors = [
-            error for error in self.error_events 
-            if error.timestamp > cutoff_time
-        ]
+        window_seconds = hours * 3600
         
         # Count errors by type
         error_type_counts = defaultdict(int)
         component_counts = defaultdict(int)
         
-        for error in recent_errors:
-            error_type_counts[error.error_type] += 1
-            component_counts[error.component] += 1
+        for (component, error_type), count in self.error_events.counts(window_seconds).items():
+            error_type_counts[error_type] += count
+            component_counts[component] += count
+        
+        recent_errors = self.error_events.events(window_seconds, limit=10)
         
         # Find most problematic components
         top_error_types = sorted(
@@ -234,7 +365,8 @@ class ErrorTracker:
         
         return {
             'time_period_hours': hours,
-            'total_errors': len(recent_errors),
+            'retention_hours': self.error_events.retention_seconds / 3600,
+            'total_errors': sum(error_type_counts.values()),
             'unique_error_types': len(error_type_counts),
             'top_error_types': top_error_types,
             'top_problematic_components': top_components,
@@ -246,9 +378,10 @@ class ErrorTracker:
                     'message': error.error_message[:100] + '...' if len(error.error_message) > 100 else error.error_message,
                     'session_id': error.session_id,
                     'phone_hash': hashlib.sha256(error.phone_number.encode()).hexdigest()[:8] if error.phone_number else None,
-                    'recovery_action': error.recovery_action
+                    'recovery_action': error.recovery_action,
+                    'stack_fingerprint': error.stack_fingerprint
                 }
-                for error in recent_errors[-10:]  # Last 10 errors
+                for error in recent_errors  # Last 10 errors
             ]
         }
     
@@ -289,6 +422,7 @@ class ErrorTracker:
             'system_health': health_status,
             'error_summary': summary,
             'recommendations': recommendations,
+            'top_stacks': self.get_top_stacks(),
             'next_steps': self._get_next_steps(health_status, summary)
         }
     
@@ -367,13 +501,12 @@ class ErrorTracker:
         """
         cutoff_time = datetime.now() - timedelta(days=days)
         
-        original_count = len(self.error_events)
-        self.error_events = [
-            error for error in self.error_events 
-            if error.timestamp > cutoff_time
-        ]
+        cleared_count = self.error_events.prune(days * 86400)
+        with self._lock:
+            for fingerprint in [fingerprint for fingerprint, record in self.stack_records.items()
+                                if record.last_seen < cutoff_time]:
+                del self.stack_records[fingerprint]
         
-        cleared_count = original_count - len(self.error_events)
         if cleared_count > 0:
             logger.info(f"Cleared {cleared_count} old error events")
 
@@ -387,9 +520,11 @@ def track_error(component: str, error: Exception, **kwargs) -> str:
     Args:
         component: Component name where error occurred
         error: Exception object
-        **kwargs: Additional context (session_id, phone_number, recovery_action)
+        **kwargs: Additional context (session_id, phone_number, recovery_action, frame)
         
     Returns:
         Error tracking ID
     """
+    if error.__traceback__ is None:
+        kwargs.setdefault('frame', sys._getframe(1))
     return error_tracker.track_error(component, error, **kwargs)
\ No newline at end of file
@@ -0,0 +1,257 @@
+"""
+Local lexical matcher for frequently asked questions
+
+Transcribed questions rarely repeat a stored question word for word ("what
+is the reflection of light" vs "What is reflection of light?"). The matcher
+normalizes both sides (Unicode and Telugu script cleanup, punctuation,
+stopwords, plurals), keeping the question words that change what is asked
+("how is reflection useful" is not "what is reflection"), ranks stored questions with BM25 over character
+trigrams from an inverted index, and accepts the best candidate only if its
+trigram and word overlap with the question is high enough. A lookup runs
+locally in microseconds, so it is tried before any embedding or LLM call.
+
+Stored questions come from the demo question set and the precomputed answer
+bank; each registers under its source and can be replaced as a group.
+"""
+
+import logging
+import math
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+ENGLISH_STOPWORDS = frozenset("""
+a an the is are was were be been am of in on to for and or with by from as at into about
+what which whom whose does do did can could would should will shall
+please tell me us explain describe define give meaning mean means i we you it its this that
+these those our my your sir madam mam teacher kindly
+""".split())
+
+TELUGU_STOPWORDS = frozenset("""
+ఏమిటి ఏమి ఏంటి ఏది అంటే గురించి చెప్పండి చెప్పు వివరించండి
+ఒక మరియు యొక్క కూడా ఉంది ఉన్న అని
+""".split())
+
+# Question words kept as content words: "what is" / "explain" / "define" all ask
+# for the same definition, but how, why, when, where and who ask something else
+QUESTION_WORDS = frozenset("""
+how why when where who
+ఎలా ఎందుకు ఎప్పుడు ఎక్కడ ఎవరు
+""".split())
+
+# Words ending in 's' that are not plurals
+_SINGULAR_S = frozenset({'lens', 'series', 'species', 'always', 'various', 'gas', 'bias'})
+
+# Zero-width joiners and other format characters used inconsistently in Telugu text
+_FORMAT_CHARACTERS = dict.fromkeys((0x200B, 0x200C, 0x200D, 0x2060, 0xFEFF))
+# Telugu digits ౦-౯ read as ASCII digits
+_TELUGU_DIGITS = {0x0C66 + d: str(d) for d in range(10)}
+
+
+def _is_word_character(character: str) -> bool:
+    # Letters, combining marks (Telugu vowel signs and virama) and digits
+    return unicodedata.category(character)[0] in 'LMN'
+
+
+def normalize_text(text: str) -> List[str]:
+    """
+    Content words of a question
+
+    Applies NFC normalization, drops zero-width characters, maps Telugu digits,
+    lowercases, removes punctuation and stopwords and strips English plurals.
+    Question words in QUESTION_WORDS are kept.
+    """
+    text = unicodedata.normalize('NFC', text).translate(_FORMAT_CHARACTERS).translate(_TELUGU_DIGITS).lower()
+    text = ''.join(c if _is_word_character(c) else ' ' for c in text)
+
+    words = []
+    for word in text.split():
+        if word in ENGLISH_STOPWORDS or word in TELUGU_STOPWORDS:
+            continue
+        if word.isascii():
+            if len(word) < 2:
+                continue
+            if (len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is'))
+                    and word not in _SINGULAR_S):
+                word = word[:-1]
+        words.append(word)
+    return words
+
+
+def trigrams(words: Iterable[str]) -> List[str]:
+    """Character trigrams of each word, padded so word starts and ends count"""
+    grams = []
+    for word in words:
+        padded = f"#{word}#"
+        grams.extend(padded[i:i + 3] for i in range(max(1, len(padded) - 2)))
+    return grams
+
+
+def _dice(first: Counter, second: Counter) -> float:
+    total = sum(first.values()) + sum(second.values())
+    return 2.0 * sum((first & second).values()) / total if total else 0.0
+
+
+@dataclass
+class FAQMatch:
+    """Stored question matching a transcribed question"""
+    question: str
+    answer: Any  # Demo answer text or BankedAnswer, depending on source
+    source: str  # 'demo' or 'answer_bank'
+    language: str
+    score: float  # 1.0 for the same content words
+
+    @property
+    def answer_text(self) -> str:
+        """Simple answer text, whatever the source"""
+        return getattr(self.answer, 'simple_text', self.answer)
+
+    @property
+    def detailed_text(self) -> str:
+        """Detailed answer text (the simple one for demo answers)"""
+        return getattr(self.answer, 'detailed_text', self.answer)
+
+
+@dataclass
+class _Entry:
+    question: str
+    answer: Any
+    source: str
+    language: str
+    words: Counter
+    grams: Counter
+
+    @property
+    def length(self) -> int:
+        return sum(self.grams.values())
+
+
+class FAQMatcher:
+    """Inverted character-trigram index of stored questions, ranked with BM25"""
+
+    # BM25 parameters
+    K1 = 1.2
+    B = 0.75
+    # Best BM25 candidates rescored by overlap
+    CANDIDATES = 5
+
+    def __init__(self, threshold: float = 0.8):
+        """
+        Args:
+            threshold: Lowest overlap score accepted as a match, from 0 to 1
+        """
+        self.threshold = threshold
+        self._entries: Dict[Tuple[str, str, str], _Entry] = {}
+        self._postings: Dict[str, List[Tuple[int, int]]] = {}  # trigram -> [(entry number, count)]
+        self._indexed: List[_Entry] = []
+        self._average_length = 0.0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def add(self, question: str, answer: Any, source: str, language: str = 'english'):
+        """Store a question, replacing one with the same content words from the same source"""
+        words = normalize_text(question)
+        if not words:
+            return
+        entry = _Entry(question, answer, source, language.lower(), Counter(words), Counter(trigrams(words)))
+        with self._lock:
+            self._entries[(source, entry.language, ' '.join(words))] = entry
+            self._dirty = True
+
+    def replace_source(self, source: str, items: Iterable[Tuple[str, Any, str]]):
+        """
+        Replace every question stored from a source
+
+        Args:
+            items: (question, answer, language) tuples
+        """
+        with self._lock:
+            self._entries = {key: entry for key, entry in self._entries.items() if entry.source != source}
+            self._dirty = True
+        for question, answer, language in items:
+            self.add(question, answer, source, language)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _reindex(self):
+        """Rebuild the postings after questions changed (called with the lock held)"""
+        self._indexed = list(self._entries.values())
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for number, entry in enumerate(self._indexed):
+            for gram, count in entry.grams.items():
+                postings.setdefault(gram, []).append((number, count))
+        self._postings = postings
+        self._average_length = (sum(entry.length for entry in self._indexed) / len(self._indexed)
+                                if self._indexed else 0.0)
+        self._dirty = False
+
+    def match(self, question: str, language: Optional[str] = None,
+              source: Optional[str] = None) -> Optional[FAQMatch]:
+        """
+        Best stored question for a transcribed question
+
+        Args:
+            question: Question as transcribed
+            language: Only match questions stored in this language (any if None)
+            source: Only match questions from this source (any if None)
+
+        Returns:
+            FAQMatch scoring at least the threshold, or None
+        """
+        words = normalize_text(question)
+        if not words:
+            return None
+        grams = Counter(trigrams(words))
+        language = language.lower() if language else None
+
+        with self._lock:
+            if self._dirty:
+                self._reindex()
+            indexed, postings, average_length = self._indexed, self._postings, self._average_length
+
+        # BM25 over the trigram postings
+        scores: Dict[int, float] = {}
+        total = len(indexed)
+        for gram, query_count in grams.items():
+            posting = postings.get(gram)
+            if not posting:
+                continue
+            idf = math.log(1 + (total - len(posting) + 0.5) / (len(posting) + 0.5))
+            for number, count in posting:
+                entry = indexed[number]
+                if (language and entry.language != language) or (source and entry.source != source):
+                    continue
+                norm = self.K1 * (1 - self.B + self.B * entry.length / average_length)
+                scores[number] = scores.get(number, 0.0) + query_count * idf * count * (self.K1 + 1) / (count + norm)
+
+        best, best_score = None, 0.0
+        query_words = Counter(words)
+        for number in sorted(scores, key=scores.get, reverse=True)[:self.CANDIDATES]:
+            entry = indexed[number]
+            # Trigram overlap forgives small spelling differences; word overlap keeps
+            # look-alike terms (reflection / refraction) apart
+            score = 0.5 * _dice(grams, entry.grams) + 0.5 * _dice(query_words, entry.words)
+            if score > best_score:
+                best, best_score = entry, score
+
+        if best is None or best_score < self.threshold:
+            return None
+        return FAQMatch(best.question, best.answer, best.source, best.language, round(best_score, 3))
+
+    def get_status(self) -> Dict[str, Any]:
+        """Stored questions by source, for monitoring"""
+        by_source: Dict[str, int] = {}
+        for entry in list(self._entries.values()):
+            by_source[entry.source] = by_source.get(entry.source, 0) + 1
+        return {'questions': len(self._entries), 'by_source': by_source, 'threshold': self.threshold}
+
+
+# Global matcher over the demo questions and the answer bank
+faq_matcher = FAQMatcher(threshold=Config.FAQ_MATCH_THRESHOLD)
@@ -20,21 +20,40 @@ except ImportError:
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Gemini finish reasons as OpenAI reports them; anything else is a normal stop
+FINISH_REASONS = {
+    'MAX_TOKENS': 'length',
+    'SAFETY': 'content_filter',
+    'RECITATION': 'content_filter',
+    'BLOCKLIST': 'content_filter',
+    'PROHIBITED_CONTENT': 'content_filter',
+    'SPII': 'content_filter',
+}
+
+# gemini-2.5 models think before answering and the thinking tokens count
+# against max_output_tokens. This SDK cannot set a thinking budget, so the
+# limit is raised by this much and answers longer than max_tokens are
+# reported as cut off at the length limit.
+THINKING_MODEL_PREFIX = 'gemini-2.5'
+THINKING_HEADROOM_TOKENS = 1024
+
 
 class GeminiChatCompletion:
     """Mock OpenAI ChatCompletion response structure"""
     
-    def __init__(self, content: str, model: str, tokens_used: int = 0):
-        self.choices = [GeminiChoice(content)]
-        self.usage = GeminiUsage(tokens_used)
+    def __init__(self, content: str, model: str, tokens_used: int = 0,
+                 prompt_tokens: int = 0, cached_tokens: int = 0, finish_reason: str = 'stop'):
+        self.choices = [GeminiChoice(content, finish_reason)]
+        self.usage = GeminiUsage(tokens_used, prompt_tokens, cached_tokens)
         self.model = model
 
 
 class GeminiChoice:
     """Mock OpenAI Choice structure"""
     
-    def __init__(self, content: str):
+    def __init__(self, content: str, finish_reason: str = 'stop'):
         self.message = GeminiMessage(content)
+        self.finish_reason = finish_reason
 
 
 class GeminiMessage:
@@ -47,8 +66,17 @@ class GeminiMessage:
 class GeminiUsage:
     """Mock OpenAI Usage structure"""
     
-    def __init__(self, total_tokens: int):
+    def __init__(self, total_tokens: int, prompt_tokens: int = 0, cached_tokens: int = 0):
         self.total_tokens = total_tokens
+        self.prompt_tokens = prompt_tokens
+        self.prompt_tokens_details = GeminiPromptTokensDetails(cached_tokens)
+
+
+class GeminiPromptTokensDetails:
+    """Mock OpenAI PromptTokensDetails structure"""
+    
+    def __init__(self, cached_tokens: int):
+        self.cached_tokens = cached_tokens
 
 
 class GeminiEmbeddingResponse:
@@ -125,9 +153,10 @@ class GeminiAdapter:
             # Convert OpenAI messages to Gemini format
             prompt = self._convert_messages_to_prompt(messages)
             
-            # Configure generation
+            # Configure generation, leaving thinking models room to answer
+            thinking_headroom = THINKING_HEADROOM_TOKENS if self.model.startswith(THINKING_MODEL_PREFIX) else 0
             generation_config = genai.types.GenerationConfig(
-                max_output_tokens=max_tokens,
+                max_output_tokens=max_tokens + thinking_headroom,
                 temperature=temperature,
                 top_p=0.9,
                 top_k=40
@@ -153,11 +182,14 @@ class GeminiAdapter:
             
             # Extract content from Gemini response
             content = ""
+            finish_reason = 'stop'
             logger.info(f"Response has {len(response.candidates)} candidates")
             
             if response.candidates and len(response.candidates) > 0:
                 candidate = response.candidates[0]
                 logger.info(f"Candidate has content: {candidate.content is not None}")
+                reason = getattr(candidate, 'finish_reason', None)
+                finish_reason = FINISH_REASONS.get(getattr(reason, 'name', str(reason)), 'stop')
                 
                 if candidate.content and candidate.content.parts:
                     logger.info(f"Content has {len(candidate.content.parts)} parts")
@@ -168,10 +200,20 @@ class GeminiAdapter:
                 content = "I apologize, but I couldn't generate a response."
                 logger.warning("No content extracted from response")
             
-            # Estimate token usage (rough approximation)
-            tokens_used = len(prompt.split()) + len(content.split())
+            # Token usage as reported, including prompt tokens served from Gemini's implicit cache
+            usage = getattr(response, 'usage_metadata', None)
+            prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+            cached_tokens = getattr(usage, 'cached_content_token_count', 0) or 0
+            tokens_used = getattr(usage, 'total_token_count', 0) or 0
+            if not tokens_used:
+                # Estimate token usage (rough approximation)
+                tokens_used = len(prompt.split()) + len(content.split())
+            # The answer itself ran past the caller's limit, inside the thinking headroom
+            if (getattr(usage, 'candidates_token_count', 0) or 0) > max_tokens:
+                finish_reason = 'length'
             
-            return GeminiChatCompletion(content, self.model, tokens_used)
+            return GeminiChatCompletion(content, self.model, tokens_used, prompt_tokens, cached_tokens,
+                                        finish_reason)
             
         except Exception as e:
             logger.error(f"Gemini chat completion failed: {e}")
@@ -179,24 +221,26 @@ class GeminiAdapter:
             fallback_content = "I'm sorry, I'm having technical difficulties. Please try again."
             return GeminiChatCompletion(fallback_content, self.model, 0)
     
-    def embeddings_create(self, model: str, input: str, **kwargs) -> GeminiEmbeddingResponse:
+    def embeddings_create(self, model: str, input: str, task_type: str = "retrieval_query",
+                          **kwargs) -> GeminiEmbeddingResponse:
         """
         Create embeddings using Gemini (OpenAI-compatible interface)
         
         Args:
-            model: Model name (ignored, uses text-embedding-004)
+            model: Gemini embedding model name, e.g. text-embedding-004
             input: Text to embed
+            task_type: What the embedding is for: "retrieval_query" for
+                search queries, "retrieval_document" for the indexed texts
             **kwargs: Additional arguments (ignored)
             
         Returns:
             GeminiEmbeddingResponse object with OpenAI-compatible structure
         """
         try:
-            # Use Gemini's embedding model
             result = genai.embed_content(
-                model="models/text-embedding-004",
+                model=model if model.startswith("models/") else f"models/{model}",
                 content=input,
-                task_type="retrieval_query"
+                task_type=task_type
             )
             
             embedding = result['embedding']
@@ -150,14 +150,20 @@ class HealthMonitor:
         try:
             vector_db_path = Path('data/ncert/vector_db')
             
-            # Check if vector database files exist
-            required_files = ['faiss_index.bin', 'chunk_metadata.json', 'id_mapping.json']
+            # Check if vector database files exist (an index per embedding model, or an older single index)
+            required_files = ['chunk_metadata.json', 'id_mapping.json']
             missing_files = []
             
             for file_name in required_files:
                 if not (vector_db_path / file_name).exists():
                     missing_files.append(file_name)
             
+            index_files = list(vector_db_path.glob('indexes/*/faiss_index.bin'))
+            if not index_files and (vector_db_path / 'faiss_index.bin').exists():
+                index_files = [vector_db_path / 'faiss_index.bin']
+            if not index_files:
+                missing_files.append('faiss_index.bin')
+            
             response_time = time.time() - start_time
             
             if missing_files:
@@ -170,8 +176,8 @@ class HealthMonitor:
                 )
             
             # Check file size instead of loading (memory efficient)
-            index_file = vector_db_path / 'faiss_index.bin'
-            file_size_mb = index_file.stat().st_size / (1024 * 1024)
+            file_size_mb = sum(index_file.stat().st_size for index_file in index_files) / (1024 * 1024)
+            models = [index_file.parent.name for index_file in index_files if index_file.parent.name != 'vector_db']
             
             return HealthCheckResult(
                 component="vector_database",
@@ -179,7 +185,7 @@ class HealthMonitor:
                 response_time=response_time,
                 message=f"Vector database healthy ({file_size_mb:.1f}MB)",
                 timestamp=datetime.now(),
-                details={"file_size_mb": file_size_mb}
+                details={"file_size_mb": file_size_mb, "embedding_models": models}
             )
             
         except Exception as e:
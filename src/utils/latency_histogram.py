@@ -0,0 +1,235 @@
+"""
+Fixed-memory latency histograms for VidyaVani performance tracking
+
+Log-linear (HDR-style) buckets give every recorded latency a bucket in O(1)
+with a bounded relative error, so percentiles can be read from counts alone
+and histograms from different windows or components merge by adding counts.
+"""
+
+import math
+import operator
+import time
+from typing import Dict, Iterable, List, Optional
+
+# Values are recorded in microseconds. The first 2 * SUB_BUCKETS values get
+# exact unit-width buckets; above that each power-of-two range is split into
+# SUB_BUCKETS linear buckets (at most 1/16 = 6.25% relative bucket width).
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_LINEAR_LIMIT = 2 * SUB_BUCKETS
+MAX_TRACKABLE_US = (1 << 28) - 1  # ~268 seconds; larger values are clamped
+NUM_BUCKETS = _LINEAR_LIMIT + (MAX_TRACKABLE_US.bit_length() - SUB_BUCKET_BITS - 1) * SUB_BUCKETS
+
+# Sliding windows reported by summaries, in minutes
+DEFAULT_WINDOWS = (1, 5, 60)
+DEFAULT_PERCENTILES = (50.0, 90.0, 95.0, 99.0)
+
+
+def bucket_index(value_us: int) -> int:
+    """
+    Map a latency in microseconds to its bucket index
+
+    Args:
+        value_us: Non-negative latency in microseconds
+
+    Returns:
+        Bucket index in [0, NUM_BUCKETS)
+    """
+    if value_us < _LINEAR_LIMIT:
+        return value_us if value_us > 0 else 0
+    if value_us > MAX_TRACKABLE_US:
+        value_us = MAX_TRACKABLE_US
+    shift = value_us.bit_length() - SUB_BUCKET_BITS - 1
+    return _LINEAR_LIMIT + (shift - 1) * SUB_BUCKETS + (value_us >> shift) - SUB_BUCKETS
+
+
+def bucket_bounds(index: int) -> tuple:
+    """
+    Get the [low, high) microsecond range covered by a bucket
+
+    Args:
+        index: Bucket index
+
+    Returns:
+        Tuple of (low, high) in microseconds
+    """
+    if index < _LINEAR_LIMIT:
+        return index, index + 1
+    shift, offset = divmod(index - _LINEAR_LIMIT, SUB_BUCKETS)
+    shift += 1
+    low = (SUB_BUCKETS + offset) << shift
+    return low, low + (1 << shift)
+
+
+class LatencyHistogram:
+    """Bucketed latency counts with count, sum and max"""
+
+    __slots__ = ('counts', 'count', 'total_us', 'max_us')
+
+    def __init__(self):
+        self.counts: List[int] = [0] * NUM_BUCKETS
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def record(self, seconds: float):
+        """Record one latency in seconds"""
+        value_us = int(seconds * 1_000_000)
+        self._add(value_us, bucket_index(value_us))
+
+    def _add(self, value_us: int, index: int):
+        self.counts[index] += 1
+        self.count += 1
+        self.total_us += value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+
+    def merge(self, other: 'LatencyHistogram') -> 'LatencyHistogram':
+        """Add another histogram's counts into this one"""
+        if not other.count:
+            return self
+        self.counts = list(map(operator.add, self.counts, other.counts))
+        self.count += other.count
+        self.total_us += other.total_us
+        self.max_us = max(self.max_us, other.max_us)
+        return self
+
+    def clear(self):
+        """Reset all counts in place"""
+        self.counts[:] = _ZERO_COUNTS
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+
+    def percentiles(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """
+        Compute percentiles in seconds from bucket midpoints
+
+        Args:
+            percentiles: Percentiles to compute (0-100)
+
+        Returns:
+            Mapping like {'p50': 0.41, 'p95': 1.2}
+        """
+        wanted = sorted(percentiles)
+        results: Dict[str, float] = {}
+        if self.count == 0:
+            return {_label(p): 0.0 for p in wanted}
+
+        targets = [max(1, math.ceil(p / 100.0 * self.count)) for p in wanted]
+        cumulative = 0
+        position = 0
+        for index, value in enumerate(self.counts):
+            if not value:
+                continue
+            cumulative += value
+            while position < len(targets) and cumulative >= targets[position]:
+                low, high = bucket_bounds(index)
+                midpoint = min((low + high - 1) / 2.0, self.max_us)
+                results[_label(wanted[position])] = midpoint / 1_000_000
+                position += 1
+            if position == len(targets):
+                break
+        return results
+
+    def summary(self, percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> Dict[str, float]:
+        """Count, mean, max and percentiles in seconds"""
+        result = {
+            'count': self.count,
+            'mean': (self.total_us / self.count / 1_000_000) if self.count else 0.0,
+            'max': self.max_us / 1_000_000,
+        }
+        result.update(self.percentiles(percentiles))
+        return result
+
+
+_ZERO_COUNTS = [0] * NUM_BUCKETS
+
+
+def _label(percentile: float) -> str:
+    return f"p{percentile:g}".replace('.', '_')
+
+
+class WindowedLatencyHistogram:
+    """
+    Cumulative latency histogram plus one-minute slots for sliding windows
+
+    Slots live in a ring covering the longest window and are zeroed in place
+    when reused, so memory is fixed after the first hour of traffic.
+    """
+
+    def __init__(self, max_window_minutes: int = max(DEFAULT_WINDOWS)):
+        self.max_window_minutes = max_window_minutes
+        self.cumulative = LatencyHistogram()
+        self._slots: List[Optional[LatencyHistogram]] = [None] * max_window_minutes
+        self._slot_minutes: List[int] = [-1] * max_window_minutes
+
+    def record(self, seconds: float, now: Optional[float] = None):
+        """Record one latency in seconds"""
+        minute = int((now if now is not None else time.time()) // 60)
+        slot_index = minute % self.max_window_minutes
+        slot = self._slots[slot_index]
+        if slot is None:
+            slot = self._slots[slot_index] = LatencyHistogram()
+            self._slot_minutes[slot_index] = minute
+        elif self._slot_minutes[slot_index] != minute:
+            slot.clear()
+            self._slot_minutes[slot_index] = minute
+
+        # One bucket lookup for both histograms
+        value_us = int(seconds * 1_000_000)
+        index = bucket_index(value_us)
+        slot._add(value_us, index)
+        self.cumulative._add(value_us, index)
+
+    def merge(self, other: 'WindowedLatencyHistogram') -> 'WindowedLatencyHistogram':
+        """
+        Add another windowed histogram into this one
+
+        Slots holding the same minute are added; a slot holding an older
+        minute is replaced, mirroring what record() would have done.
+        """
+        self.cumulative.merge(other.cumulative)
+        for slot, slot_minute in zip(other._slots, other._slot_minutes):
+            if slot is None or not slot.count:
+                continue
+            slot_index = slot_minute % self.max_window_minutes
+            current_minute = self._slot_minutes[slot_index]
+            if current_minute == slot_minute:
+                self._slots[slot_index].merge(slot)
+            elif current_minute < slot_minute:
+                self._slots[slot_index] = LatencyHistogram().merge(slot)
+                self._slot_minutes[slot_index] = slot_minute
+        return self
+
+    def window(self, minutes: int, now: Optional[float] = None) -> LatencyHistogram:
+        """
+        Merge the slots covering the last `minutes` minutes (including the current one)
+
+        Args:
+            minutes: Window length in minutes (resolution is one minute)
+            now: Current time, defaults to time.time()
+
+        Returns:
+            New histogram for the window
+        """
+        current_minute = int((now if now is not None else time.time()) // 60)
+        oldest_minute = current_minute - min(minutes, self.max_window_minutes) + 1
+        merged = LatencyHistogram()
+        for slot, slot_minute in zip(self._slots, self._slot_minutes):
+            if slot is not None and oldest_minute <= slot_minute <= current_minute:
+                merged.merge(slot)
+        return merged
+
+    def summary(self, windows: Iterable[int] = DEFAULT_WINDOWS,
+                now: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Percentile summaries since start and for each sliding window
+
+        Returns:
+            Mapping like {'all': {...}, '1m': {...}, '5m': {...}, '60m': {...}}
+        """
+        result = {'all': self.cumulative.summary()}
+        for minutes in windows:
+            result[f"{minutes}m"] = self.window(minutes, now).summary()
+        return result
@@ -6,13 +6,31 @@ import os
 import time
 import threading
 import logging
-from datetime import datetime, timedelta
+import xml.etree.ElementTree as ET
+from datetime import datetime
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass
-from collections import deque
+from collections import OrderedDict, deque
 import asyncio
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from .adaptive_concurrency import AdaptiveConcurrencyController, classify_request
+from .circuit_breaker import circuit_breakers
+from .metrics_registry import metrics_registry
+
+_http_requests = metrics_registry.counter(
+    'vidyavani_http_requests', 'HTTP requests completed', ['endpoint', 'status']
+)
+_http_request_duration_seconds = metrics_registry.histogram(
+    'vidyavani_http_request_duration_seconds', 'HTTP request latency', ['endpoint']
+)
+_http_requests_in_flight = metrics_registry.gauge(
+    'vidyavani_http_requests_in_flight', 'HTTP requests being processed'
+)
+_http_requests_rejected = metrics_registry.counter(
+    'vidyavani_http_requests_rejected', 'HTTP requests rejected by the load balancer'
+)
+
 @dataclass
 class RequestInfo:
     """Request information for load balancing"""
@@ -22,6 +40,7 @@ class RequestInfo:
     start_time: datetime
     priority: int = 1  # 1=normal, 2=high, 3=critical
     estimated_duration: float = 8.0  # seconds
+    request_class: str = 'api'  # webhook, question, text_qa, dashboard, api
 
 @dataclass
 class WorkerInfo:
@@ -35,20 +54,87 @@ class WorkerInfo:
     cpu_usage: float = 0.0
     memory_usage: float = 0.0
 
+class TokenBucket:
+    """Token bucket for one caller"""
+
+    __slots__ = ('tokens', 'updated_at')
+
+    def __init__(self, tokens: float, updated_at: float):
+        self.tokens = tokens
+        self.updated_at = updated_at
+
+
+class CallerRateLimiter:
+    """Per-caller token buckets kept in an LRU-bounded map
+
+    Each caller's bucket refills continuously at rate_per_minute and holds at
+    most burst tokens; a request spends one token. Buckets of callers not seen
+    recently are evicted once max_callers is reached, which is safe because an
+    evicted bucket would have refilled to full anyway. Not thread-safe on its
+    own: LoadBalancer calls it under its lock.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int, max_callers: int = 10000):
+        """
+        Args:
+            rate_per_minute: Sustained requests allowed per caller per minute
+            burst: Requests a caller may make back to back
+            max_callers: Buckets kept before the least recently seen caller is evicted
+        """
+        self.rate_per_second = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_callers = max(1, max_callers)
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+
+    def _refill(self, phone_number: str, now: float) -> Optional[TokenBucket]:
+        bucket = self._buckets.get(phone_number)
+        if bucket is None:
+            return None
+        self._buckets.move_to_end(phone_number)
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated_at) * self.rate_per_second)
+        bucket.updated_at = now
+        return bucket
+
+    def allows(self, phone_number: str, now: float) -> bool:
+        """Whether the caller has a token, without spending it"""
+        bucket = self._refill(phone_number, now)
+        return bucket is None or bucket.tokens >= 1
+
+    def try_acquire(self, phone_number: str, now: float) -> bool:
+        """Spend one of the caller's tokens if available"""
+        bucket = self._refill(phone_number, now)
+        if bucket is None:
+            bucket = self._buckets[phone_number] = TokenBucket(self.burst, now)
+            if len(self._buckets) > self.max_callers:
+                self._buckets.popitem(last=False)
+        if bucket.tokens < 1:
+            return False
+        bucket.tokens -= 1
+        return True
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
 class LoadBalancer:
     """Load balancing and request management"""
+
+    # Requests without a caller number are not tied to one call
+    ANONYMOUS_CALLER = 'unknown'
     
     def __init__(self, config):
         self.config = config
         self.logger = logging.getLogger(__name__)
         
-        # Concurrency limits
-        self.max_concurrent_requests = config.MAX_CONCURRENT_CALLS
+        # Concurrency limits, adapted per request class from observed latency
+        self.concurrency = AdaptiveConcurrencyController(config)
         self.max_requests_per_worker = 2
         self.request_timeout = config.RESPONSE_TIMEOUT
         
-        # Request tracking
+        # Request tracking; admission and completion hold _lock
+        self._lock = threading.Lock()
         self.active_requests: Dict[str, RequestInfo] = {}
+        self.active_by_phone: Dict[str, str] = {}  # phone number -> active request ID
         self.request_queue: deque = deque()
         self.completed_requests: deque = deque(maxlen=1000)
         
@@ -60,17 +146,12 @@ class LoadBalancer:
         )
         
         # Rate limiting
-        self.rate_limit_window = 60  # seconds
-        self.max_requests_per_minute = 30
-        self.request_history: deque = deque(maxlen=100)
-        
-        # Circuit breaker
-        self.circuit_breaker_enabled = True
-        self.failure_threshold = 5
-        self.recovery_timeout = 300  # 5 minutes
-        self.circuit_state = 'closed'  # closed, open, half-open
-        self.failure_count = 0
-        self.last_failure_time = None
+        self.max_requests_per_minute = config.RATE_LIMIT_PER_MINUTE
+        self.rate_limiter = CallerRateLimiter(
+            rate_per_minute=config.RATE_LIMIT_PER_MINUTE,
+            burst=config.RATE_LIMIT_BURST,
+            max_callers=config.RATE_LIMIT_MAX_CALLERS
+        )
         
         # Load balancing metrics
         self.metrics = {
@@ -79,6 +160,7 @@ class LoadBalancer:
             'failed_requests': 0,
             'queued_requests': 0,
             'rejected_requests': 0,
+            'rate_limited_requests': 0,
             'average_response_time': 0.0,
             'peak_concurrent_requests': 0
         }
@@ -101,7 +183,6 @@ class LoadBalancer:
                     self._update_worker_status()
                     self._process_request_queue()
                     self._cleanup_completed_requests()
-                    self._update_circuit_breaker()
                     self._update_metrics()
                     
                     time.sleep(1)  # Monitor every second
@@ -120,54 +201,64 @@ class LoadBalancer:
             self.monitoring_thread.join(timeout=5)
         self.logger.info("Load balancer monitoring stopped")
     
-    def can_accept_request(self, phone_number: str) -> tuple[bool, str]:
+    def can_accept_request(self, phone_number: str, request_class: str = 'api') -> tuple[bool, str]:
         """Check if system can accept new request"""
-        # Check circuit breaker
-        if self.circuit_state == 'open':
-            return False, "System temporarily unavailable (circuit breaker open)"
-        
-        # Check concurrent request limit
-        if len(self.active_requests) >= self.max_concurrent_requests:
-            return False, f"Maximum concurrent requests reached ({self.max_concurrent_requests})"
-        
+        with self._lock:
+            can_accept, reason = self._check_admission_locked(phone_number, time.monotonic())
+            if can_accept and not self.concurrency.has_capacity(request_class):
+                return False, f"Concurrency limit reached for {request_class} requests"
+            return can_accept, reason
+
+    def _check_admission_locked(self, phone_number: str, now: float) -> tuple[bool, str]:
+        """Per-caller admission checks, all O(1); does not spend a rate limit token"""
         # Check rate limiting
-        if not self._check_rate_limit(phone_number):
+        if not self.rate_limiter.allows(phone_number, now):
             return False, "Rate limit exceeded"
         
         # Check if phone number already has active request
-        for request in self.active_requests.values():
-            if request.phone_number == phone_number:
-                return False, "Request already in progress for this phone number"
+        if phone_number != self.ANONYMOUS_CALLER and phone_number in self.active_by_phone:
+            return False, "Request already in progress for this phone number"
         
         return True, "OK"
     
     def submit_request(self, request_info: RequestInfo) -> bool:
         """Submit request for processing"""
         try:
-            # Check if request can be accepted
-            can_accept, reason = self.can_accept_request(request_info.phone_number)
+            phone_number = request_info.phone_number
+            now = time.monotonic()
+            with self._lock:
+                # Check if request can be accepted
+                request_class = request_info.request_class
+                can_accept, reason = self._check_admission_locked(phone_number, now)
+                # Check the request class's concurrency limit
+                if can_accept and not self.concurrency.try_acquire(request_class):
+                    can_accept, reason = False, f"Concurrency limit reached for {request_class} requests"
+                if can_accept:
+                    self.rate_limiter.try_acquire(phone_number, now)
+                
+                if not can_accept:
+                    self.metrics['rejected_requests'] += 1
+                    if reason == "Rate limit exceeded":
+                        self.metrics['rate_limited_requests'] += 1
+                else:
+                    # Add to active requests
+                    self.active_requests[request_info.request_id] = request_info
+                    if phone_number != self.ANONYMOUS_CALLER:
+                        self.active_by_phone[phone_number] = request_info.request_id
+                    self.metrics['total_requests'] += 1
+                    
+                    # Update peak concurrent requests
+                    current_concurrent = len(self.active_requests)
+                    if current_concurrent > self.metrics['peak_concurrent_requests']:
+                        self.metrics['peak_concurrent_requests'] = current_concurrent
             
             if not can_accept:
                 self.logger.warning(f"Request rejected: {reason}")
-                self.metrics['rejected_requests'] += 1
+                _http_requests_rejected.inc()
                 return False
             
-            # Add to active requests
-            self.active_requests[request_info.request_id] = request_info
-            self.metrics['total_requests'] += 1
-            
-            # Update peak concurrent requests
-            current_concurrent = len(self.active_requests)
-            if current_concurrent > self.metrics['peak_concurrent_requests']:
-                self.metrics['peak_concurrent_requests'] = current_concurrent
-            
-            # Add to request history for rate limiting
-            self.request_history.append({
-                'phone_number': request_info.phone_number,
-                'timestamp': datetime.now()
-            })
-            
-            self.logger.info(f"Request accepted: {request_info.request_id} ({current_concurrent}/{self.max_concurrent_requests})")
+            _http_requests_in_flight.inc()
+            self.logger.info(f"Request accepted: {request_info.request_id} ({request_class}, {current_concurrent} active)")
             return True
             
         except Exception as e:
@@ -177,58 +268,46 @@ class LoadBalancer:
     def complete_request(self, request_id: str, success: bool, response_time: float):
         """Mark request as completed"""
         try:
-            if request_id not in self.active_requests:
-                self.logger.warning(f"Request not found in active requests: {request_id}")
-                return
-            
-            request_info = self.active_requests.pop(request_id)
-            
-            # Update metrics
-            if success:
-                self.metrics['successful_requests'] += 1
-                self.failure_count = 0  # Reset failure count on success
-            else:
-                self.metrics['failed_requests'] += 1
-                self.failure_count += 1
-                self.last_failure_time = datetime.now()
-            
-            # Update average response time
-            total_successful = self.metrics['successful_requests']
-            if total_successful > 0:
-                current_avg = self.metrics['average_response_time']
-                self.metrics['average_response_time'] = (
-                    (current_avg * (total_successful - 1) + response_time) / total_successful
-                )
-            
-            # Add to completed requests
-            self.completed_requests.append({
-                'request_id': request_id,
-                'phone_number': request_info.phone_number,
-                'endpoint': request_info.endpoint,
-                'start_time': request_info.start_time,
-                'end_time': datetime.now(),
-                'response_time': response_time,
-                'success': success
-            })
+            with self._lock:
+                request_info = self.active_requests.pop(request_id, None)
+                if request_info is None:
+                    self.logger.warning(f"Request not found in active requests: {request_id}")
+                    return
+                if self.active_by_phone.get(request_info.phone_number) == request_id:
+                    del self.active_by_phone[request_info.phone_number]
+                self.concurrency.release(request_info.request_class, response_time)
+                
+                # Update metrics
+                if success:
+                    self.metrics['successful_requests'] += 1
+                else:
+                    self.metrics['failed_requests'] += 1
+                
+                # Update average response time
+                total_successful = self.metrics['successful_requests']
+                if total_successful > 0:
+                    current_avg = self.metrics['average_response_time']
+                    self.metrics['average_response_time'] = (
+                        (current_avg * (total_successful - 1) + response_time) / total_successful
+                    )
+                
+                # Add to completed requests
+                self.completed_requests.append({
+                    'request_id': request_id,
+                    'phone_number': request_info.phone_number,
+                    'endpoint': request_info.endpoint,
+                    'start_time': request_info.start_time,
+                    'end_time': datetime.now(),
+                    'response_time': response_time,
+                    'success': success
+                })
             
+            _http_requests_in_flight.dec()
             self.logger.info(f"Request completed: {request_id} (success: {success}, time: {response_time:.2f}s)")
             
         except Exception as e:
             self.logger.error(f"Failed to complete request: {str(e)}")
     
-    def _check_rate_limit(self, phone_number: str) -> bool:
-        """Check rate limiting for phone number"""
-        now = datetime.now()
-        cutoff_time = now - timedelta(seconds=self.rate_limit_window)
-        
-        # Count recent requests from this phone number
-        recent_requests = sum(
-            1 for req in self.request_history
-            if req['phone_number'] == phone_number and req['timestamp'] > cutoff_time
-        )
-        
-        return recent_requests < self.max_requests_per_minute
-    
     def _update_worker_status(self):
         """Update worker status information"""
         try:
@@ -278,47 +357,21 @@ class LoadBalancer:
         # Completed requests are automatically limited by deque maxlen
         pass
     
-    def _update_circuit_breaker(self):
-        """Update circuit breaker state"""
-        if not self.circuit_breaker_enabled:
-            return
-        
-        now = datetime.now()
-        
-        if self.circuit_state == 'closed':
-            # Check if we should open the circuit
-            if self.failure_count >= self.failure_threshold:
-                self.circuit_state = 'open'
-                self.logger.warning(f"Circuit breaker opened due to {self.failure_count} failures")
-        
-        elif self.circuit_state == 'open':
-            # Check if we should try half-open
-            if (self.last_failure_time and 
-                now - self.last_failure_time > timedelta(seconds=self.recovery_timeout)):
-                self.circuit_state = 'half-open'
-                self.logger.info("Circuit breaker moved to half-open state")
-        
-        elif self.circuit_state == 'half-open':
-            # Check if we should close or re-open
-            if self.failure_count == 0:
-                self.circuit_state = 'closed'
-                self.logger.info("Circuit breaker closed - system recovered")
-            elif self.failure_count >= 1:
-                self.circuit_state = 'open'
-                self.logger.warning("Circuit breaker re-opened due to continued failures")
-    
     def _update_metrics(self):
         """Update load balancing metrics"""
         self.metrics['queued_requests'] = len(self.request_queue)
     
     def get_load_status(self) -> Dict[str, Any]:
         """Get current load balancing status"""
+        with self._lock:
+            metrics = self.metrics.copy()
         return {
             'active_requests': len(self.active_requests),
-            'max_concurrent_requests': self.max_concurrent_requests,
+            'active_callers': len(self.active_by_phone),
+            'concurrency': self.concurrency.get_status(),
+            'rate_limit_buckets': len(self.rate_limiter),
             'queue_length': len(self.request_queue),
-            'circuit_state': self.circuit_state,
-            'failure_count': self.failure_count,
+            'dependencies': circuit_breakers.get_status(),
             'workers': {
                 worker_id: {
                     'status': worker.status,
@@ -328,7 +381,7 @@ class LoadBalancer:
                 }
                 for worker_id, worker in self.workers.items()
             },
-            'metrics': self.metrics.copy()
+            'metrics': metrics
         }
     
     def get_performance_metrics(self) -> Dict[str, Any]:
@@ -344,11 +397,36 @@ class LoadBalancer:
                 'average_response_time': self.metrics['average_response_time'],
                 'concurrent_requests': len(self.active_requests),
                 'peak_concurrent_requests': self.metrics['peak_concurrent_requests'],
+                'concurrency_limits': {
+                    name: status['limit'] for name, status in self.concurrency.get_status().items()
+                },
                 'rejected_requests': self.metrics['rejected_requests'],
-                'circuit_breaker_state': self.circuit_state
+                'rate_limited_requests': self.metrics['rate_limited_requests'],
+                'open_circuits': circuit_breakers.open_circuits()
             }
         }
 
+def shed_webhook_xml(path: str) -> str:
+    """
+    Call flow XML returned when a webhook is shed
+
+    A new call is told the line is busy and hung up; a call already in
+    progress is asked to hold and its webhook is retried after a pause. Only
+    hops without caller input are shed (see CALLER_INPUT_ENDPOINTS), so the
+    retry loses nothing.
+    """
+    root = ET.Element('Response')
+    say = ET.SubElement(root, 'Say', voice='alice', language='en-IN')
+    if path == '/webhook/incoming-call':
+        say.text = "All our lines are busy right now. Please call again in a few minutes."
+        ET.SubElement(root, 'Hangup')
+    else:
+        say.text = "Please hold on a moment."
+        ET.SubElement(root, 'Pause', length='2')
+        redirect = ET.SubElement(root, 'Redirect', method='POST')
+        redirect.text = path
+    return ET.tostring(root, encoding='unicode')
+
 class RequestMiddleware:
     """Flask middleware for load balancing"""
     
@@ -365,8 +443,9 @@ class RequestMiddleware:
             from flask import g, request
             import uuid
             
-            # Skip load balancing for health checks and static resources
-            if request.endpoint in ['health_check', 'detailed_health_check']:
+            # Skip load balancing for health checks, metric scrapes and static resources
+            request_class = classify_request(request.endpoint, request.path)
+            if request_class is None:
                 return
             
             # Generate request info
@@ -400,24 +479,30 @@ class RequestMiddleware:
                 phone_number=phone_number,
                 endpoint=request.endpoint or request.path,
                 start_time=datetime.now(),
-                priority=priority
+                priority=priority,
+                request_class=request_class
             )
             
             # Submit request to load balancer
             if not self.load_balancer.submit_request(request_info):
-                from flask import jsonify
-                return jsonify({
+                from flask import Response, jsonify
+                if request_class == 'webhook':
+                    # Exotel needs call flow XML; a 503 would drop the call
+                    return Response(shed_webhook_xml(request.path), mimetype='application/xml')
+                response = jsonify({
                     'error': 'System overloaded',
                     'message': 'Please try again in a few moments',
                     'retry_after': 30
-                }), 503
+                })
+                response.headers['Retry-After'] = '30'
+                return response, 503
             
             # Store request info in Flask context
             g.load_balancer_request = request_info
         
         @self.app.after_request
         def after_request(response):
-            from flask import g
+            from flask import g, request
             
             # Complete request in load balancer
             if hasattr(g, 'load_balancer_request'):
@@ -435,6 +520,10 @@ class RequestMiddleware:
                     success,
                     response_time
                 )
+                
+                endpoint = request_info.endpoint if request.endpoint else 'unmatched'
+                _http_requests.inc(endpoint=endpoint, status=response.status_code)
+                _http_request_duration_seconds.observe(response_time, endpoint=endpoint)
             
             return response
 
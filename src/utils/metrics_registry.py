@@ -0,0 +1,593 @@
+"""
+OpenMetrics exposition for VidyaVani runtime metrics
+
+Counters, gauges and histograms are updated incrementally where events happen
+and rendered on demand for the /metrics endpoint. When METRICS_MULTIPROC_DIR
+is set, every process writes its values to its own memory-mapped file in that
+directory and a scrape of any gunicorn worker merges the files of all workers,
+so the exposition reports totals for the whole deployment.
+"""
+
+import bisect
+import fcntl
+import glob
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Request and pipeline latencies in seconds; IVR turns can take up to ~20s
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0)
+
+# Layout of the per-process value files: an 8-byte header holding the number
+# of bytes in use, then entries of (key length, key padded to 8 bytes, double)
+_HEADER = struct.Struct('<I4x')
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_FILE_SIZE = 1 << 16
+
+
+def _iter_entries(buffer, used: int):
+    """Yield (key, value, value_offset) for each entry in a value file buffer"""
+    offset = _HEADER.size
+    while offset < used:
+        key_length = _KEY_LENGTH.unpack_from(buffer, offset)[0]
+        key_start = offset + _KEY_LENGTH.size
+        padded = key_length + (-(key_length + _KEY_LENGTH.size) % 8)
+        value_offset = key_start + padded
+        key = bytes(buffer[key_start:key_start + key_length]).decode('utf-8')
+        yield key, _VALUE.unpack_from(buffer, value_offset)[0], value_offset
+        offset = value_offset + _VALUE.size
+
+
+def read_value_file(path: str) -> Dict[str, float]:
+    """
+    Read all values from a process's value file
+
+    Args:
+        path: Path of a file written by _MmapValues
+
+    Returns:
+        Mapping of sample key to value (empty if the file is unreadable)
+    """
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except OSError:
+        return {}
+    if len(data) < _HEADER.size:
+        return {}
+    used = min(_HEADER.unpack_from(data, 0)[0], len(data))
+    return {key: value for key, value, _ in _iter_entries(data, used)}
+
+
+class _DictValues:
+    """Sample values held in process memory"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, float] = {}
+
+    def inc(self, updates: Sequence[Tuple[str, float]]):
+        with self._lock:
+            values = self._values
+            for key, amount in updates:
+                values[key] = values.get(key, 0.0) + amount
+
+    def set(self, key: str, value: float):
+        with self._lock:
+            self._values[key] = value
+
+    def items(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def close(self):
+        pass
+
+
+class _MmapValues:
+    """
+    Sample values in a memory-mapped file written by a single process
+
+    Other processes only read the file. Keys are appended and never removed,
+    so a value's offset is fixed once assigned.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size < _INITIAL_FILE_SIZE:
+            self._file.truncate(_INITIAL_FILE_SIZE)
+            size = _INITIAL_FILE_SIZE
+        self._capacity = size
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+        self._used = _HEADER.unpack_from(self._map, 0)[0] or _HEADER.size
+        # A file left by an earlier process with the same PID is continued
+        self._offsets = {key: offset for key, _, offset in _iter_entries(self._map, self._used)}
+
+    def _grow_locked(self):
+        self._map.close()
+        self._capacity *= 2
+        self._file.truncate(self._capacity)
+        self._map = mmap.mmap(self._file.fileno(), self._capacity)
+
+    def _offset_locked(self, key: str) -> int:
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+
+        encoded = key.encode('utf-8')
+        padded = len(encoded) + (-(len(encoded) + _KEY_LENGTH.size) % 8)
+        entry_size = _KEY_LENGTH.size + padded + _VALUE.size
+        while self._used + entry_size > self._capacity:
+            self._grow_locked()
+
+        start = self._used
+        _KEY_LENGTH.pack_into(self._map, start, len(encoded))
+        self._map[start + _KEY_LENGTH.size:start + _KEY_LENGTH.size + len(encoded)] = encoded
+        offset = start + _KEY_LENGTH.size + padded
+        _VALUE.pack_into(self._map, offset, 0.0)
+        # Publish the entry to readers only after it is fully written
+        self._used += entry_size
+        _HEADER.pack_into(self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def inc(self, updates: Sequence[Tuple[str, float]]):
+        with self._lock:
+            for key, amount in updates:
+                offset = self._offset_locked(key)
+                _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def set(self, key: str, value: float):
+        with self._lock:
+            _VALUE.pack_into(self._map, self._offset_locked(key), value)
+
+    def items(self) -> Dict[str, float]:
+        with self._lock:
+            return {key: _VALUE.unpack_from(self._map, offset)[0] for key, offset in self._offsets.items()}
+
+    def close(self):
+        with self._lock:
+            self._map.close()
+            self._file.close()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _file_pid(path: str) -> Optional[int]:
+    """PID encoded in a value file name like counter_1234.db"""
+    stem = os.path.basename(path)[:-len('.db')]
+    try:
+        return int(stem.rsplit('_', 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+# Registries whose stores are reset in forked children, so a gunicorn worker
+# forked from a preloaded master never writes into the master's files
+_registries: 'weakref.WeakSet[MetricsRegistry]' = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for registry in list(_registries):
+        registry._reset_stores()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+@dataclass
+class MetricFamily:
+    """Samples of one metric produced by a scrape-time collector"""
+    name: str
+    type: str  # 'gauge' or 'counter'
+    documentation: str
+    samples: List[Tuple[Dict[str, str], float]] = field(default_factory=list)
+
+    def add(self, value: float, **labels):
+        self.samples.append(({key: str(val) for key, val in labels.items()}, float(value)))
+        return self
+
+
+class _Metric:
+    """Base for registered metrics; values live in the registry's stores"""
+
+    type = ''
+
+    def __init__(self, registry: 'MetricsRegistry', name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Sample keys per label set, keyed by the caller's label items
+        self._series: Dict[tuple, object] = {}
+
+    def _label_values(self, labels: Dict[str, object]) -> tuple:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"Metric {self.name} expects labels {self.labelnames}, got {sorted(labels)}")
+        try:
+            return tuple(str(labels[name]) for name in self.labelnames)
+        except KeyError as e:
+            raise ValueError(f"Metric {self.name} is missing label {e}") from None
+
+    def _key(self, suffix: str, values: tuple, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = [list(pair) for pair in zip(self.labelnames, values)] + [list(pair) for pair in extra]
+        return json.dumps([self.name, suffix, pairs])
+
+    def _series_for(self, labels: Dict[str, object]):
+        cache_key = tuple(labels.items())
+        series = self._series.get(cache_key)
+        if series is None:
+            series = self._series[cache_key] = self._make_series(self._label_values(labels))
+        return series
+
+    def _make_series(self, values: tuple):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonic counter, summed across processes"""
+
+    type = 'counter'
+
+    def _make_series(self, values: tuple) -> str:
+        return self._key('_total', values)
+
+    def inc(self, amount: float = 1.0, **labels):
+        """Increase the counter for a label set"""
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self.registry._store('counter').inc(((self._series_for(labels), amount),))
+
+
+class Gauge(_Metric):
+    """Gauge summed across live processes"""
+
+    type = 'gauge'
+
+    def _make_series(self, values: tuple) -> str:
+        return self._key('', values)
+
+    def inc(self, amount: float = 1.0, **labels):
+        self.registry._store('gauge').inc(((self._series_for(labels), amount),))
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        self.registry._store('gauge').set(self._series_for(labels), value)
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed upper bounds, summed across processes"""
+
+    type = 'histogram'
+
+    def __init__(self, registry, name, documentation, labelnames=(),
+                 buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        super().__init__(registry, name, documentation, labelnames)
+        if 'le' in self.labelnames:
+            raise ValueError("Histogram label 'le' is reserved")
+        self.upper_bounds = sorted(float(bound) for bound in buckets if not math.isinf(bound))
+        self._bucket_labels = [repr(bound) for bound in self.upper_bounds] + ['+Inf']
+
+    def _make_series(self, values: tuple) -> tuple:
+        bucket_keys = [self._key('_bucket', values, (('le', le),)) for le in self._bucket_labels]
+        return bucket_keys, self._key('_sum', values), self._key('_count', values)
+
+    def observe(self, value: float, **labels):
+        """Record one observation"""
+        bucket_keys, sum_key, count_key = self._series_for(labels)
+        self.registry._store('counter').inc((
+            (bucket_keys[bisect.bisect_left(self.upper_bounds, value)], 1.0),
+            (sum_key, value),
+            (count_key, 1.0),
+        ))
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if math.isnan(value):
+        return 'NaN'
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    rendered = ','.join(f'{name}="{_escape_label(value)}"' for name, value in pairs)
+    return f"{{{rendered}}}" if rendered else ''
+
+
+class MetricsRegistry:
+    """
+    Registry of metrics and scrape-time collectors
+
+    Metric updates go to a per-process value store: a dict in single-process
+    mode, or counter_<pid>.db / gauge_<pid>.db files in the multiprocess
+    directory. Rendering merges the stores of every process; counter and
+    histogram files of exited processes are folded into one archive file,
+    and gauge files of exited processes are dropped.
+    """
+
+    def __init__(self, multiprocess_dir: Optional[str] = None):
+        """
+        Initialize metrics registry
+
+        Args:
+            multiprocess_dir: Shared directory for per-process value files, or
+                None to keep values in this process only
+        """
+        self.multiprocess_dir = multiprocess_dir or None
+        if self.multiprocess_dir:
+            os.makedirs(self.multiprocess_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+        self._stores: Dict[str, object] = {}
+        _registries.add(self)
+
+    def _reset_stores(self):
+        self._lock = threading.Lock()
+        self._stores = {}
+
+    def _store(self, kind: str):
+        store = self._stores.get(kind)
+        if store is None:
+            with self._lock:
+                store = self._stores.get(kind)
+                if store is None:
+                    if self.multiprocess_dir:
+                        path = os.path.join(self.multiprocess_dir, f"{kind}_{os.getpid()}.db")
+                        if kind == 'gauge':
+                            # Gauges left by an exited process with the same PID describe that process
+                            _remove(path)
+                        store = _MmapValues(path)
+                    else:
+                        store = _DictValues()
+                    self._stores[kind] = store
+        return store
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} already registered with a different definition")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Register (or get) a counter; a trailing _total is added on exposition"""
+        if name.endswith('_total'):
+            name = name[:-len('_total')]
+        return self._register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Register (or get) a gauge"""
+        return self._register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        """Register (or get) a histogram"""
+        return self._register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]):
+        """
+        Register a function called on each scrape for point-in-time metrics
+
+        Collectors run in the process serving the scrape and report that
+        process's view (e.g. its in-memory session table).
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _collect_values(self) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Merge counter and gauge values of all processes"""
+        if not self.multiprocess_dir:
+            return self._store('counter').items(), self._store('gauge').items()
+
+        # Make sure this process has files so its values are included
+        self._store('counter')
+        self._store('gauge')
+        self._archive_dead_processes()
+
+        counters: Dict[str, float] = {}
+        for path in glob.glob(os.path.join(self.multiprocess_dir, 'counter_*.db')):
+            for key, value in read_value_file(path).items():
+                counters[key] = counters.get(key, 0.0) + value
+
+        gauges: Dict[str, float] = {}
+        for path in glob.glob(os.path.join(self.multiprocess_dir, 'gauge_*.db')):
+            pid = _file_pid(path)
+            if pid is not None and pid != os.getpid() and not _pid_alive(pid):
+                _remove(path)
+                continue
+            for key, value in read_value_file(path).items():
+                gauges[key] = gauges.get(key, 0.0) + value
+        return counters, gauges
+
+    def _archive_dead_processes(self):
+        """Fold counter files of exited processes into counter_archive.db"""
+        pattern = os.path.join(self.multiprocess_dir, 'counter_*.db')
+        dead = [
+            path for path in glob.glob(pattern)
+            if (_file_pid(path) is not None and _file_pid(path) != os.getpid()
+                and not _pid_alive(_file_pid(path)))
+        ]
+        if dead:
+            self._archive_counter_files(dead)
+
+    def _archive_counter_files(self, dead: List[str]):
+        lock_path = os.path.join(self.multiprocess_dir, 'archive.lock')
+        with open(lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                archive = _MmapValues(os.path.join(self.multiprocess_dir, 'counter_archive.db'))
+                try:
+                    for path in dead:
+                        if not os.path.exists(path):
+                            continue  # archived by another scrape
+                        archive.inc(list(read_value_file(path).items()))
+                        os.remove(path)
+                finally:
+                    archive.close()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def mark_process_dead(self, pid: int):
+        """
+        Retire the value files of an exited worker (gunicorn child_exit hook)
+
+        Its counters are archived and its gauges dropped right away, rather
+        than at a scrape that may come after the PID has been reused.
+        """
+        if not self.multiprocess_dir:
+            return
+        _remove(os.path.join(self.multiprocess_dir, f"gauge_{pid}.db"))
+        counter_path = os.path.join(self.multiprocess_dir, f"counter_{pid}.db")
+        if os.path.exists(counter_path):
+            self._archive_counter_files([counter_path])
+
+    def remove_stale_gauges(self):
+        """
+        Drop gauge files of every other process (gunicorn on_starting hook)
+
+        Called by the master before workers start, when no other process of
+        this deployment can be live; counter files are kept and archived.
+        """
+        if not self.multiprocess_dir:
+            return
+        own = os.path.join(self.multiprocess_dir, f"gauge_{os.getpid()}.db")
+        for path in glob.glob(os.path.join(self.multiprocess_dir, 'gauge_*.db')):
+            if path != own:
+                _remove(path)
+
+    def render(self, openmetrics: bool = True) -> str:
+        """
+        Render all metrics in exposition format
+
+        Args:
+            openmetrics: OpenMetrics 1.0 text (True) or Prometheus text 0.0.4
+
+        Returns:
+            Exposition text
+        """
+        counters, gauges = self._collect_values()
+        samples: Dict[str, List[Tuple[str, List[Tuple[str, str]], float]]] = {}
+        for values in (counters, gauges):
+            for key, value in values.items():
+                name, suffix, pairs = json.loads(key)
+                samples.setdefault(name, []).append((suffix, [tuple(pair) for pair in pairs], value))
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+
+        lines: List[str] = []
+        for metric in metrics:
+            family = samples.get(metric.name, [])
+            if isinstance(metric, Histogram):
+                body = self._render_histogram(metric, family)
+            elif not family and not metric.labelnames:
+                # Unlabelled counters and gauges are reported from zero
+                body = [f"{metric.name}{'_total' if metric.type == 'counter' else ''} 0"]
+            else:
+                body = [
+                    f"{metric.name}{suffix}{_format_labels(pairs)} {_format_value(value)}"
+                    for suffix, pairs, value in sorted(family, key=lambda sample: sample[1])
+                ]
+            lines.extend(self._render_header(metric.name, metric.type, metric.documentation, openmetrics))
+            lines.extend(body)
+
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+                continue
+            for family in families:
+                suffix = '_total' if family.type == 'counter' else ''
+                lines.extend(self._render_header(family.name, family.type, family.documentation, openmetrics))
+                lines.extend(
+                    f"{family.name}{suffix}{_format_labels(sorted(labels.items()))} {_format_value(value)}"
+                    for labels, value in family.samples
+                )
+
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _render_header(name: str, metric_type: str, documentation: str, openmetrics: bool) -> List[str]:
+        # The Prometheus text format names counter families by their sample name
+        family = name if openmetrics or metric_type != 'counter' else f"{name}_total"
+        help_text = documentation.replace('\\', '\\\\').replace('\n', '\\n')
+        return [f"# HELP {family} {help_text}", f"# TYPE {family} {metric_type}"]
+
+    @staticmethod
+    def _render_histogram(metric: Histogram, family) -> List[str]:
+        series: Dict[tuple, Dict[str, object]] = {}
+        for suffix, pairs, value in family:
+            labels = tuple(pair for pair in pairs if pair[0] != 'le')
+            entry = series.setdefault(labels, {'buckets': {}, 'sum': 0.0})
+            if suffix == '_bucket':
+                le = dict(pairs)['le']
+                entry['buckets'][le] = entry['buckets'].get(le, 0.0) + value
+            elif suffix == '_sum':
+                entry['sum'] = value
+
+        lines = []
+        for labels in sorted(series):
+            entry = series[labels]
+            cumulative = 0.0
+            for le in metric._bucket_labels:
+                cumulative += entry['buckets'].get(le, 0.0)
+                lines.append(f"{metric.name}_bucket{_format_labels(labels + (('le', le),))} "
+                             f"{_format_value(cumulative)}")
+            lines.append(f"{metric.name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+            lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(entry['sum'])}")
+        return lines
+
+
+# Global metrics registry instance
+metrics_registry = MetricsRegistry(multiprocess_dir=Config.METRICS_MULTIPROC_DIR)
@@ -12,9 +12,16 @@ from typing import Callable, Any, Optional
 
 from .performance_tracker import performance_tracker
 from .logging_config import performance_logger
+from .metrics_registry import metrics_registry
+from .call_tracer import call_tracer
 
 logger = logging.getLogger(__name__)
 
+_pipeline_stage_duration_seconds = metrics_registry.histogram(
+    'vidyavani_pipeline_stage_duration_seconds', 'Duration of processing pipeline stages',
+    ['pipeline', 'stage']
+)
+
 def track_performance(component_name: str, track_api_usage: bool = False, 
                      service_name: str = None, estimate_cost: bool = False):
     """
@@ -41,12 +48,12 @@ def track_performance(component_name: str, track_api_usage: bool = False,
         @functools.wraps(func)
         def wrapper(*args, **kwargs) -> Any:
             # Start timing
-            timing_id = performance_tracker.start_component_timing(component_name)
-            start_time = time.time()
+            token = performance_tracker.start_component_timing(component_name)
             
             success = False
             error_message = None
             tokens_used = 0
+            cached_tokens = 0
             estimated_cost = 0.0
             
             try:
@@ -64,6 +71,7 @@ def track_performance(component_name: str, track_api_usage: bool = False,
                     # Extract token usage for API calls
                     if track_api_usage and 'tokens_used' in result:
                         tokens_used = result['tokens_used']
+                        cached_tokens = result.get('cached_tokens', 0)
                         
                 elif hasattr(result, 'success'):
                     # Handle object responses (AudioProcessingResult, etc.)
@@ -85,8 +93,7 @@ def track_performance(component_name: str, track_api_usage: bool = False,
                 
             finally:
                 # End timing and record metrics
-                duration = time.time() - start_time
-                performance_tracker.end_component_timing(timing_id, success, error_message)
+                duration = performance_tracker.end_component_timing(token, success, error_message)
                 
                 # Track API usage if requested
                 if track_api_usage and service_name:
@@ -98,13 +105,16 @@ def track_performance(component_name: str, track_api_usage: bool = False,
                         service=service_name,
                         success=success,
                         tokens_used=tokens_used,
-                        estimated_cost=estimated_cost
+                        cached_tokens=cached_tokens,
+                        estimated_cost=estimated_cost,
+                        latency=duration
                     )
                 
-                # Log performance details
-                performance_logger.log_response_time(component_name, duration)
+                # Log performance details (successful calls only when enabled)
+                if performance_tracker.log_success or not success:
+                    performance_logger.log_response_time(component_name, duration)
                 
-                if track_api_usage:
+                if track_api_usage and (performance_tracker.log_success or not success):
                     performance_logger.log_api_call(
                         service=service_name or component_name,
                         endpoint=func.__name__,
@@ -156,7 +166,8 @@ def track_cache_usage(cache_name: str):
             
             # Track cache usage
             performance_tracker.track_cache_usage(cache_name, cache_hit)
-            performance_logger.log_cache_hit(cache_name, str(hash(str(args) + str(kwargs)))[:8], cache_hit)
+            if performance_tracker.log_success:
+                performance_logger.log_cache_hit(cache_name, str(hash(str(args) + str(kwargs)))[:8], cache_hit)
             
             return actual_result
         
@@ -285,15 +296,19 @@ class PipelineTracker:
             tracker.end_stage("tts", tts_result.success)
     """
     
-    def __init__(self, pipeline_name: str, phone_number: str = None):
+    def __init__(self, pipeline_name: str, phone_number: str = None,
+                 stage_callback: Optional[Callable[[str, str, float], None]] = None):
         self.pipeline_name = pipeline_name
         self.phone_number = phone_number
+        self.stage_callback = stage_callback
         self.stages = {}
         self.current_stage = None
         self.pipeline_start_time = None
+        self._span = None
     
     def __enter__(self):
         self.pipeline_start_time = time.time()
+        self._span = call_tracer.start_span(self.pipeline_name, start_time=self.pipeline_start_time)
         logger.info(f"Starting pipeline tracking: {self.pipeline_name}")
         return self
     
@@ -301,8 +316,14 @@ class PipelineTracker:
         total_time = time.time() - self.pipeline_start_time
         success = exc_type is None
         
+        for stage_info in self.stages.values():
+            call_tracer.end_span(stage_info.pop('span', None), False)
+        call_tracer.end_span(self._span, success)
+        
         logger.info(f"Pipeline {self.pipeline_name} completed in {total_time:.3f}s - "
                    f"{'SUCCESS' if success else 'FAILED'}")
+        performance_tracker.record_latency('pipeline_stages', f"{self.pipeline_name}.total", total_time)
+        _pipeline_stage_duration_seconds.observe(total_time, pipeline=self.pipeline_name, stage='total')
         
         # Log stage breakdown
         for stage_name, stage_info in self.stages.items():
@@ -319,13 +340,16 @@ class PipelineTracker:
             logger.warning(f"Starting stage {stage_name} while {self.current_stage} is still active")
         
         self.current_stage = stage_name
+        start_time = time.time()
         self.stages[stage_name] = {
-            'start_time': time.time(),
+            'start_time': start_time,
             'duration': 0.0,
-            'success': False
+            'success': False,
+            'span': call_tracer.start_span(f"{self.pipeline_name}.{stage_name}", start_time=start_time)
         }
         
         logger.debug(f"Pipeline stage started: {stage_name}")
+        self._notify_stage(stage_name, 'started', 0.0)
     
     def end_stage(self, stage_name: str, success: bool = True):
         """End timing a pipeline stage"""
@@ -336,9 +360,27 @@ class PipelineTracker:
         stage_info = self.stages[stage_name]
         stage_info['duration'] = time.time() - stage_info['start_time']
         stage_info['success'] = success
+        call_tracer.end_span(stage_info.pop('span', None), success)
         
         if self.current_stage == stage_name:
             self.current_stage = None
         
+        performance_tracker.record_latency(
+            'pipeline_stages', f"{self.pipeline_name}.{stage_name}", stage_info['duration']
+        )
+        _pipeline_stage_duration_seconds.observe(
+            stage_info['duration'], pipeline=self.pipeline_name, stage=stage_name
+        )
+        
         logger.debug(f"Pipeline stage completed: {stage_name} - {stage_info['duration']:.3f}s - "
-                    f"{'SUCCESS' if success else 'FAILED'}")
\ No newline at end of file
+                    f"{'SUCCESS' if success else 'FAILED'}")
+        self._notify_stage(stage_name, 'completed' if success else 'failed', stage_info['duration'])
+    
+    def _notify_stage(self, stage_name: str, status: str, duration: float):
+        """Report stage progress to the optional callback without affecting the pipeline"""
+        if not self.stage_callback:
+            return
+        try:
+            self.stage_callback(stage_name, status, duration)
+        except Exception as e:
+            logger.warning(f"Pipeline stage callback failed for {stage_name}: {e}")
\ No newline at end of file
@@ -5,18 +5,60 @@ This module provides comprehensive performance tracking for all system component
 including response times, API usage, cache performance, and error rates.
 """
 
+import heapq
 import logging
 import time
 import threading
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, NamedTuple
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
+from datetime import datetime
 from collections import defaultdict, deque
+from itertools import chain
 import json
 import os
 
+from config import Config
+from .latency_histogram import WindowedLatencyHistogram
+from .metrics_registry import metrics_registry
+from .time_buckets import TimeBucketedLog
+
 logger = logging.getLogger(__name__)
 
+# Alerts reported by get_performance_summary: counts cover the window, the list the latest few
+RECENT_ALERT_WINDOW_SECONDS = 24 * 3600
+RECENT_ALERT_LIMIT = 100
+
+# Latest successful calls per component behind the "recent average"
+RECENT_RESPONSE_LIMIT = 100
+
+# Exposed on /metrics and aggregated across worker processes
+_component_duration_seconds = metrics_registry.histogram(
+    'vidyavani_component_duration_seconds', 'Duration of tracked component calls', ['component', 'outcome']
+)
+_api_requests = metrics_registry.counter(
+    'vidyavani_api_requests', 'External API requests', ['service', 'outcome']
+)
+_api_tokens = metrics_registry.counter(
+    'vidyavani_api_tokens', 'Tokens used by external API requests', ['service']
+)
+_api_cached_tokens = metrics_registry.counter(
+    'vidyavani_api_cached_tokens', 'Prompt tokens served from the provider prompt cache', ['service']
+)
+_api_cost_usd = metrics_registry.counter(
+    'vidyavani_api_cost_usd', 'Estimated external API cost in USD', ['service']
+)
+_api_duration_seconds = metrics_registry.histogram(
+    'vidyavani_api_request_duration_seconds', 'Duration of external API requests', ['service']
+)
+_cache_requests = metrics_registry.counter(
+    'vidyavani_cache_requests', 'Cache lookups by result', ['cache', 'result']
+)
+_calls_started = metrics_registry.counter('vidyavani_calls', 'IVR calls started')
+_active_calls = metrics_registry.gauge('vidyavani_active_calls', 'IVR calls in progress')
+_questions = metrics_registry.counter(
+    'vidyavani_questions', 'Questions processed in calls', ['outcome']
+)
+
 @dataclass
 class ComponentMetrics:
     """Metrics for individual system components"""
@@ -27,7 +69,21 @@ class ComponentMetrics:
     total_response_time: float = 0.0
     min_response_time: float = float('inf')
     max_response_time: float = 0.0
-    recent_response_times: deque = field(default_factory=lambda: deque(maxlen=100))
+    # (perf_counter at completion, duration) of the latest successful calls
+    recent_response_times: deque = field(default_factory=lambda: deque(maxlen=RECENT_RESPONSE_LIMIT))
+    
+    def merge(self, other: 'ComponentMetrics'):
+        """Add another shard's metrics for the same component"""
+        self.total_calls += other.total_calls
+        self.successful_calls += other.successful_calls
+        self.failed_calls += other.failed_calls
+        self.total_response_time += other.total_response_time
+        self.min_response_time = min(self.min_response_time, other.min_response_time)
+        self.max_response_time = max(self.max_response_time, other.max_response_time)
+        # Keep the latest calls of both shards, still in completion order
+        limit = self.recent_response_times.maxlen
+        latest = heapq.nlargest(limit, chain(self.recent_response_times, other.recent_response_times))
+        self.recent_response_times = deque(reversed(latest), maxlen=limit)
     
     @property
     def success_rate(self) -> float:
@@ -48,7 +104,7 @@ class ComponentMetrics:
         """Calculate average of recent response times"""
         if not self.recent_response_times:
             return 0.0
-        return sum(self.recent_response_times) / len(self.recent_response_times)
+        return sum(duration for _, duration in self.recent_response_times) / len(self.recent_response_times)
 
 @dataclass
 class APIUsageMetrics:
@@ -58,10 +114,24 @@ class APIUsageMetrics:
     successful_requests: int = 0
     failed_requests: int = 0
     total_tokens_used: int = 0
+    cached_tokens: int = 0  # Prompt tokens the provider served from its prompt cache
     estimated_cost: float = 0.0
     rate_limit_hits: int = 0
     last_request_time: Optional[datetime] = None
     
+    def merge(self, other: 'APIUsageMetrics'):
+        """Add another shard's usage for the same service"""
+        self.total_requests += other.total_requests
+        self.successful_requests += other.successful_requests
+        self.failed_requests += other.failed_requests
+        self.total_tokens_used += other.total_tokens_used
+        self.cached_tokens += other.cached_tokens
+        self.estimated_cost += other.estimated_cost
+        self.rate_limit_hits += other.rate_limit_hits
+        if other.last_request_time and (self.last_request_time is None
+                                        or other.last_request_time > self.last_request_time):
+            self.last_request_time = other.last_request_time
+    
     @property
     def success_rate(self) -> float:
         """Calculate API success rate"""
@@ -77,6 +147,12 @@ class CacheMetrics:
     cache_hits: int = 0
     cache_misses: int = 0
     
+    def merge(self, other: 'CacheMetrics'):
+        """Add another shard's hits and misses for the same cache"""
+        self.total_requests += other.total_requests
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+    
     @property
     def hit_rate(self) -> float:
         """Calculate cache hit rate percentage"""
@@ -110,38 +186,114 @@ class SessionMetrics:
             return 0.0
         return (self.successful_responses / self.total_questions) * 100
 
+class TimingToken(NamedTuple):
+    """Start of a timed operation, handed back by value to end_component_timing"""
+    component: str
+    start_time: float  # time.perf_counter()
+
+# Services and caches always listed in summaries, with display names
+DEFAULT_API_SERVICES = {
+    'openai_gpt': 'OpenAI GPT',
+    'openai_embeddings': 'OpenAI Embeddings',
+    'google_stt': 'Google Speech-to-Text',
+    'google_tts': 'Google Text-to-Speech',
+    'exotel': 'Exotel IVR'
+}
+DEFAULT_CACHES = {
+    'response_cache': 'Response Cache',
+    'audio_cache': 'Audio Cache',
+    'session_cache': 'Session Cache',
+    'demo_cache': 'Demo Cache'
+}
+
+# Latency histogram groups always listed in percentile results
+_LATENCY_CATEGORIES = ('components', 'api_services', 'pipeline_stages')
+
+class _MetricsShard:
+    """
+    Counters and histograms written by a single thread
+    
+    Each shard has its own lock, so a recording thread only ever waits for a
+    reader merging that shard, never for other recording threads.
+    """
+    
+    __slots__ = ('thread', 'lock', 'components', 'api', 'cache', 'latency')
+    
+    def __init__(self, thread: Optional[threading.Thread] = None):
+        self.thread = thread
+        self.lock = threading.Lock()
+        self.components: Dict[str, ComponentMetrics] = {}
+        self.api: Dict[str, APIUsageMetrics] = {}
+        self.cache: Dict[str, CacheMetrics] = {}
+        self.latency: Dict[str, Dict[str, WindowedLatencyHistogram]] = {}
+    
+    def component(self, name: str) -> ComponentMetrics:
+        metrics = self.components.get(name)
+        if metrics is None:
+            metrics = self.components[name] = ComponentMetrics(name)
+        return metrics
+    
+    def histogram(self, category: str, name: str) -> WindowedLatencyHistogram:
+        histograms = self.latency.get(category)
+        if histograms is None:
+            histograms = self.latency[category] = {}
+        histogram = histograms.get(name)
+        if histogram is None:
+            histogram = histograms[name] = WindowedLatencyHistogram()
+        return histogram
+    
+    def absorb(self, other: '_MetricsShard'):
+        """Merge another shard into this one. Caller holds other's lock."""
+        for name, metrics in other.components.items():
+            self.component(name).merge(metrics)
+        for name, metrics in other.api.items():
+            if name not in self.api:
+                self.api[name] = APIUsageMetrics(DEFAULT_API_SERVICES.get(name, name))
+            self.api[name].merge(metrics)
+        for name, metrics in other.cache.items():
+            if name not in self.cache:
+                self.cache[name] = CacheMetrics(DEFAULT_CACHES.get(name, name))
+            self.cache[name].merge(metrics)
+        for category, histograms in other.latency.items():
+            for name, histogram in histograms.items():
+                self.histogram(category, name).merge(histogram)
+    
+    def clear(self):
+        self.components.clear()
+        self.api.clear()
+        self.cache.clear()
+        self.latency.clear()
+
 class PerformanceTracker:
     """
     Comprehensive performance tracking system for VidyaVani
     
     Tracks response times, API usage, cache performance, and system metrics
     with thread-safe operations and configurable retention policies.
+    
+    Per-call metrics are recorded into per-thread shards and merged when a
+    summary is read, so instrumented calls on different threads never wait
+    on each other. Session and system metrics change once per call or
+    question and stay behind the tracker lock.
     """
     
-    def __init__(self, config=None):
-        """Initialize performance tracker"""
+    def __init__(self, config=None, log_success: Optional[bool] = None):
+        """
+        Initialize performance tracker
+        
+        Args:
+            config: Optional configuration object
+            log_success: Log every successful operation (failures are always
+                logged). Defaults to Config.PERF_LOG_SUCCESS.
+        """
         self.config = config
+        self.log_success = Config.PERF_LOG_SUCCESS if log_success is None else log_success
         self._lock = threading.Lock()
         
-        # Component metrics
-        self.component_metrics: Dict[str, ComponentMetrics] = {}
-        
-        # API usage tracking
-        self.api_metrics: Dict[str, APIUsageMetrics] = {
-            'openai_gpt': APIUsageMetrics('OpenAI GPT'),
-            'openai_embeddings': APIUsageMetrics('OpenAI Embeddings'),
-            'google_stt': APIUsageMetrics('Google Speech-to-Text'),
-            'google_tts': APIUsageMetrics('Google Text-to-Speech'),
-            'exotel': APIUsageMetrics('Exotel IVR')
-        }
-        
-        # Cache performance tracking
-        self.cache_metrics: Dict[str, CacheMetrics] = {
-            'response_cache': CacheMetrics('Response Cache'),
-            'audio_cache': CacheMetrics('Audio Cache'),
-            'session_cache': CacheMetrics('Session Cache'),
-            'demo_cache': CacheMetrics('Demo Cache')
-        }
+        # Per-thread metric shards, plus one holding shards of exited threads
+        self._local = threading.local()
+        self._shards: List[_MetricsShard] = []
+        self._retired = _MetricsShard()
         
         # Session tracking
         self.session_metrics: Dict[str, SessionMetrics] = {}
@@ -156,8 +308,8 @@ class PerformanceTracker:
             'last_activity_time': datetime.now()
         }
         
-        # Performance alerts
-        self.performance_alerts = []
+        # Performance alerts, counted per minute with a bounded sample kept for display
+        self.performance_alerts = TimeBucketedLog()
         self.alert_thresholds = {
             'response_time_warning': 8.0,  # seconds
             'response_time_critical': 12.0,  # seconds
@@ -169,7 +321,42 @@ class PerformanceTracker:
         
         logger.info("Performance tracker initialized")
     
-    def start_component_timing(self, component_name: str) -> str:
+    def _shard(self) -> _MetricsShard:
+        """Get the calling thread's shard, registering it on first use"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = _MetricsShard(threading.current_thread())
+            with self._lock:
+                self._retire_dead_shards_locked()
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+    
+    def _retire_dead_shards_locked(self):
+        """Fold shards of exited threads into the retired shard. Caller holds the lock."""
+        live = []
+        for shard in self._shards:
+            if shard.thread.is_alive():
+                live.append(shard)
+            else:
+                with shard.lock:
+                    self._retired.absorb(shard)
+        self._shards = live
+    
+    def _collect(self) -> _MetricsShard:
+        """Merge all shards into a snapshot"""
+        snapshot = _MetricsShard()
+        snapshot.api = {name: APIUsageMetrics(display) for name, display in DEFAULT_API_SERVICES.items()}
+        snapshot.cache = {name: CacheMetrics(display) for name, display in DEFAULT_CACHES.items()}
+        with self._lock:
+            self._retire_dead_shards_locked()
+            for shard in [self._retired] + self._shards:
+                with shard.lock:
+                    snapshot.absorb(shard)
+        return snapshot
+    
+    def start_component_timing(self, component_name: str) -> TimingToken:
         """
         Start timing for a component operation
         
@@ -177,69 +364,63 @@ class PerformanceTracker:
             component_name: Name of the component being timed
             
         Returns:
-            Timing ID for use with end_component_timing
+            Timing token to pass to end_component_timing
         """
-        timing_id = f"{component_name}_{int(time.time() * 1000000)}"
-        
-        with self._lock:
-            if component_name not in self.component_metrics:
-                self.component_metrics[component_name] = ComponentMetrics(component_name)
-            
-            # Store start time
-            if not hasattr(self, '_active_timings'):
-                self._active_timings = {}
-            self._active_timings[timing_id] = {
-                'component': component_name,
-                'start_time': time.time()
-            }
-        
-        return timing_id
+        return TimingToken(component_name, time.perf_counter())
     
-    def end_component_timing(self, timing_id: str, success: bool = True, error_message: str = None):
+    def end_component_timing(self, token: TimingToken, success: bool = True,
+                             error_message: str = None) -> float:
         """
         End timing for a component operation
         
         Args:
-            timing_id: Timing ID from start_component_timing
+            token: Timing token from start_component_timing
             success: Whether the operation was successful
             error_message: Optional error message if operation failed
+            
+        Returns:
+            Operation duration in seconds
         """
-        end_time = time.time()
+        duration = time.perf_counter() - token.start_time
+        component_name = token.component
         
-        with self._lock:
-            if not hasattr(self, '_active_timings') or timing_id not in self._active_timings:
-                logger.warning(f"No active timing found for ID: {timing_id}")
-                return
-            
-            timing_info = self._active_timings.pop(timing_id)
-            component_name = timing_info['component']
-            start_time = timing_info['start_time']
-            duration = end_time - start_time
-            
-            metrics = self.component_metrics[component_name]
+        shard = self._shard()
+        with shard.lock:
+            metrics = shard.component(component_name)
             metrics.total_calls += 1
+            shard.histogram('components', component_name).record(duration)
             
             if success:
                 metrics.successful_calls += 1
                 metrics.total_response_time += duration
-                metrics.min_response_time = min(metrics.min_response_time, duration)
-                metrics.max_response_time = max(metrics.max_response_time, duration)
-                metrics.recent_response_times.append(duration)
-                
-                # Log performance info
-                logger.info(f"PERF - {component_name}: {duration:.3f}s - SUCCESS")
-                
-                # Check for performance alerts
-                self._check_performance_alerts(component_name, duration, success)
+                if duration < metrics.min_response_time:
+                    metrics.min_response_time = duration
+                if duration > metrics.max_response_time:
+                    metrics.max_response_time = duration
+                metrics.recent_response_times.append((token.start_time + duration, duration))
             else:
                 metrics.failed_calls += 1
-                logger.warning(f"PERF - {component_name}: {duration:.3f}s - FAILED: {error_message}")
-                
-                # Check for performance alerts
-                self._check_performance_alerts(component_name, duration, success)
+        
+        _component_duration_seconds.observe(
+            duration, component=component_name, outcome='success' if success else 'failure'
+        )
+        
+        if success:
+            if self.log_success:
+                logger.info(f"PERF - {component_name}: {duration:.3f}s - SUCCESS")
+        else:
+            logger.warning(f"PERF - {component_name}: {duration:.3f}s - FAILED: {error_message}")
+        
+        # Only slow calls can raise response time alerts and only failures
+        # can lower the success rate, so the common path skips the check
+        if not success or duration > self.alert_thresholds['response_time_warning']:
+            self._check_performance_alerts(component_name, duration, success)
+        
+        return duration
     
     def track_api_usage(self, service: str, success: bool, tokens_used: int = 0, 
-                       estimated_cost: float = 0.0, rate_limited: bool = False):
+                       estimated_cost: float = 0.0, rate_limited: bool = False,
+                       latency: Optional[float] = None, cached_tokens: int = 0):
         """
         Track API usage metrics
         
@@ -249,12 +430,18 @@ class PerformanceTracker:
             tokens_used: Number of tokens used (for OpenAI)
             estimated_cost: Estimated cost of the API call
             rate_limited: Whether the call hit rate limits
+            latency: Call duration in seconds, recorded in the service's latency histogram
+            cached_tokens: Prompt tokens served from the provider's prompt cache
         """
-        with self._lock:
-            if service not in self.api_metrics:
-                self.api_metrics[service] = APIUsageMetrics(service)
+        shard = self._shard()
+        with shard.lock:
+            metrics = shard.api.get(service)
+            if metrics is None:
+                metrics = shard.api[service] = APIUsageMetrics(DEFAULT_API_SERVICES.get(service, service))
+            
+            if latency is not None:
+                shard.histogram('api_services', service).record(latency)
             
-            metrics = self.api_metrics[service]
             metrics.total_requests += 1
             metrics.last_request_time = datetime.now()
             
@@ -266,15 +453,65 @@ class PerformanceTracker:
             if tokens_used > 0:
                 metrics.total_tokens_used += tokens_used
             
+            if cached_tokens > 0:
+                metrics.cached_tokens += cached_tokens
+            
             if estimated_cost > 0:
                 metrics.estimated_cost += estimated_cost
             
             if rate_limited:
                 metrics.rate_limit_hits += 1
-            
+        
+        _api_requests.inc(service=service, outcome='success' if success else 'failure')
+        if tokens_used > 0:
+            _api_tokens.inc(tokens_used, service=service)
+        if cached_tokens > 0:
+            _api_cached_tokens.inc(cached_tokens, service=service)
+        if estimated_cost > 0:
+            _api_cost_usd.inc(estimated_cost, service=service)
+        if latency is not None:
+            _api_duration_seconds.observe(latency, service=service)
+        
+        if self.log_success or not success:
             logger.info(f"API - {service}: {'SUCCESS' if success else 'FAILED'} - "
                        f"Tokens: {tokens_used}, Cost: ${estimated_cost:.4f}")
     
+    def record_latency(self, category: str, name: str, duration: float):
+        """
+        Record a latency sample in a percentile histogram
+        
+        Args:
+            category: Histogram group (components, api_services, pipeline_stages)
+            name: Component, service or stage name
+            duration: Duration in seconds
+        """
+        shard = self._shard()
+        with shard.lock:
+            shard.histogram(category, name).record(duration)
+    
+    def get_latency_percentiles(self, category: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get p50/p90/p95/p99 latency since start and over 1/5/60 minute windows
+        
+        Args:
+            category: Optional histogram group to restrict the result to
+            
+        Returns:
+            Mapping of category -> name -> window -> summary (seconds)
+        """
+        now = time.time()
+        latency = self._collect().latency
+        categories = [category] if category else list(_LATENCY_CATEGORIES) + [
+            name for name in latency if name not in _LATENCY_CATEGORIES
+        ]
+        return {
+            name: {
+                item: histogram.summary(now=now)
+                for item, histogram in latency.get(name, {}).items()
+            }
+            for name in categories
+        }
+    
     def track_cache_usage(self, cache_name: str, hit: bool):
         """
         Track cache hit/miss metrics
@@ -283,20 +520,24 @@ class PerformanceTracker:
             cache_name: Name of the cache
             hit: Whether it was a cache hit (True) or miss (False)
         """
-        with self._lock:
-            if cache_name not in self.cache_metrics:
-                self.cache_metrics[cache_name] = CacheMetrics(cache_name)
+        shard = self._shard()
+        with shard.lock:
+            metrics = shard.cache.get(cache_name)
+            if metrics is None:
+                metrics = shard.cache[cache_name] = CacheMetrics(DEFAULT_CACHES.get(cache_name, cache_name))
             
-            metrics = self.cache_metrics[cache_name]
             metrics.total_requests += 1
             
             if hit:
                 metrics.cache_hits += 1
             else:
                 metrics.cache_misses += 1
-            
-            logger.info(f"CACHE - {cache_name}: {'HIT' if hit else 'MISS'} - "
-                       f"Hit rate: {metrics.hit_rate:.1f}%")
+        
+        _cache_requests.inc(cache=cache_name, result='hit' if hit else 'miss')
+        
+        if self.log_success:
+            logger.info(f"CACHE - {cache_name}: {'HIT' if hit else 'MISS'}")
+    
     
     def start_session_tracking(self, session_id: str, phone_number: str, language: str = "english"):
         """
@@ -308,6 +549,11 @@ class PerformanceTracker:
             language: Session language
         """
         with self._lock:
+            previous = self.session_metrics.get(session_id)
+            if previous is None or previous.end_time is not None:
+                _active_calls.inc()
+            _calls_started.inc()
+            
             self.session_metrics[session_id] = SessionMetrics(
                 session_id=session_id,
                 phone_number=phone_number,
@@ -336,6 +582,8 @@ class PerformanceTracker:
         with self._lock:
             if session_id in self.session_metrics:
                 session = self.session_metrics[session_id]
+                if session.end_time is None:
+                    _active_calls.dec()
                 session.end_time = datetime.now()
                 
                 # Update system metrics
@@ -362,14 +610,16 @@ class PerformanceTracker:
                 session = self.session_metrics[session_id]
                 session.total_questions += 1
                 session.total_processing_time += processing_time
+                _questions.inc(outcome='success' if success else 'failure')
                 
                 if success:
                     session.successful_responses += 1
                 else:
                     session.failed_responses += 1
                 
-                logger.info(f"QUESTION - {session_id}: {processing_time:.3f}s - "
-                           f"{'SUCCESS' if success else 'FAILED'}")
+                if self.log_success or not success:
+                    logger.info(f"QUESTION - {session_id}: {processing_time:.3f}s - "
+                               f"{'SUCCESS' if success else 'FAILED'}")
     
     def _check_performance_alerts(self, component_name: str, duration: float, success: bool):
         """
@@ -380,6 +630,24 @@ class PerformanceTracker:
             duration: Response time duration
             success: Whether the operation was successful
         """
+        with self._lock:
+            self._check_performance_alerts_locked(component_name, duration, success)
+    
+    def _component_success_rate_locked(self, component_name: str) -> Optional[float]:
+        """Success rate of a component across all shards. Caller holds the lock."""
+        total_calls = successful_calls = 0
+        for shard in [self._retired] + self._shards:
+            with shard.lock:
+                metrics = shard.components.get(component_name)
+                if metrics:
+                    total_calls += metrics.total_calls
+                    successful_calls += metrics.successful_calls
+        if total_calls == 0:
+            return None
+        return (successful_calls / total_calls) * 100
+    
+    def _check_performance_alerts_locked(self, component_name: str, duration: float, success: bool):
+        """Append response time and success rate alerts. Caller holds the lock."""
         # Response time alerts
         if duration > self.alert_thresholds['response_time_critical']:
             alert = {
@@ -389,7 +657,7 @@ class PerformanceTracker:
                 'threshold': self.alert_thresholds['response_time_critical'],
                 'timestamp': datetime.now()
             }
-            self.performance_alerts.append(alert)
+            self.performance_alerts.append(alert, key=alert['type'])
             logger.critical(f"ALERT - Critical response time: {component_name} took {duration:.3f}s")
             
         elif duration > self.alert_thresholds['response_time_warning']:
@@ -400,14 +668,12 @@ class PerformanceTracker:
                 'threshold': self.alert_thresholds['response_time_warning'],
                 'timestamp': datetime.now()
             }
-            self.performance_alerts.append(alert)
+            self.performance_alerts.append(alert, key=alert['type'])
             logger.warning(f"ALERT - Slow response time: {component_name} took {duration:.3f}s")
         
         # Success rate alerts
-        if component_name in self.component_metrics:
-            metrics = self.component_metrics[component_name]
-            success_rate = metrics.success_rate
-            
+        success_rate = self._component_success_rate_locked(component_name)
+        if success_rate is not None:
             if success_rate < self.alert_thresholds['success_rate_critical']:
                 alert = {
                     'type': 'success_rate_critical',
@@ -416,7 +682,7 @@ class PerformanceTracker:
                     'threshold': self.alert_thresholds['success_rate_critical'],
                     'timestamp': datetime.now()
                 }
-                self.performance_alerts.append(alert)
+                self.performance_alerts.append(alert, key=alert['type'])
                 logger.critical(f"ALERT - Critical success rate: {component_name} at {success_rate:.1f}%")
                 
             elif success_rate < self.alert_thresholds['success_rate_warning']:
@@ -427,7 +693,7 @@ class PerformanceTracker:
                     'threshold': self.alert_thresholds['success_rate_warning'],
                     'timestamp': datetime.now()
                 }
-                self.performance_alerts.append(alert)
+                self.performance_alerts.append(alert, key=alert['type'])
                 logger.warning(f"ALERT - Low success rate: {component_name} at {success_rate:.1f}%")
     
     def get_performance_summary(self) -> Dict[str, Any]:
@@ -437,10 +703,12 @@ class PerformanceTracker:
         Returns:
             Dictionary containing all performance metrics
         """
+        snapshot = self._collect()
+        
         with self._lock:
             # Component metrics summary
             component_summary = {}
-            for name, metrics in self.component_metrics.items():
+            for name, metrics in snapshot.components.items():
                 component_summary[name] = {
                     'total_calls': metrics.total_calls,
                     'success_rate': metrics.success_rate,
@@ -452,18 +720,19 @@ class PerformanceTracker:
             
             # API metrics summary
             api_summary = {}
-            for name, metrics in self.api_metrics.items():
+            for name, metrics in snapshot.api.items():
                 api_summary[name] = {
                     'total_requests': metrics.total_requests,
                     'success_rate': metrics.success_rate,
                     'total_tokens_used': metrics.total_tokens_used,
+                    'cached_tokens': metrics.cached_tokens,
                     'estimated_cost': metrics.estimated_cost,
                     'rate_limit_hits': metrics.rate_limit_hits
                 }
             
             # Cache metrics summary
             cache_summary = {}
-            for name, metrics in self.cache_metrics.items():
+            for name, metrics in snapshot.cache.items():
                 cache_summary[name] = {
                     'total_requests': metrics.total_requests,
                     'hit_rate': metrics.hit_rate,
@@ -471,14 +740,21 @@ class PerformanceTracker:
                     'cache_misses': metrics.cache_misses
                 }
             
+            # Latency percentiles since start and over the last 5 minutes
+            now = time.time()
+            for name, histogram in snapshot.latency.get('components', {}).items():
+                if name in component_summary:
+                    component_summary[name]['latency_percentiles'] = {
+                        'all': histogram.cumulative.summary(),
+                        '5m': histogram.window(5, now).summary()
+                    }
+            
             # Active sessions summary
             active_sessions = len([s for s in self.session_metrics.values() if s.end_time is None])
             
             # Recent alerts (last 24 hours)
-            recent_alerts = [
-                alert for alert in self.performance_alerts
-                if alert['timestamp'] > datetime.now() - timedelta(hours=24)
-            ]
+            recent_alerts = self.performance_alerts.events(RECENT_ALERT_WINDOW_SECONDS, limit=RECENT_ALERT_LIMIT)
+            alert_counts = dict(self.performance_alerts.counts(RECENT_ALERT_WINDOW_SECONDS))
             
             return {
                 'system_metrics': self.system_metrics.copy(),
@@ -491,6 +767,7 @@ class PerformanceTracker:
                     'concurrent_calls': self.system_metrics['concurrent_calls']
                 },
                 'recent_alerts': recent_alerts,
+                'alert_counts': alert_counts,
                 'uptime_seconds': (datetime.now() - self.system_metrics['system_start_time']).total_seconds()
             }
     
@@ -531,22 +808,13 @@ class PerformanceTracker:
     def reset_metrics(self):
         """Reset all metrics (useful for testing)"""
         with self._lock:
-            self.component_metrics.clear()
-            for metrics in self.api_metrics.values():
-                metrics.total_requests = 0
-                metrics.successful_requests = 0
-                metrics.failed_requests = 0
-                metrics.total_tokens_used = 0
-                metrics.estimated_cost = 0.0
-                metrics.rate_limit_hits = 0
-            
-            for metrics in self.cache_metrics.values():
-                metrics.total_requests = 0
-                metrics.cache_hits = 0
-                metrics.cache_misses = 0
+            for shard in [self._retired] + self._shards:
+                with shard.lock:
+                    shard.clear()
             
             self.session_metrics.clear()
             self.performance_alerts.clear()
+            _active_calls.set(0)
             
             self.system_metrics.update({
                 'total_calls': 0,
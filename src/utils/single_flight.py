@@ -0,0 +1,113 @@
+"""
+Single-flight coalescing of identical concurrent work for VidyaVani
+
+When a class calls in together or a teacher runs a demo, many callers ask the
+same question at the same moment. Work keyed the same way (the normalized
+question, the text to synthesize, the query to embed) is run once: the first
+caller becomes the leader and runs it, callers arriving while it is in flight
+wait for and share its result (or its exception). Nothing is kept once the
+work finishes; longer-lived reuse is left to the caches.
+
+A waiting caller gives up when its own deadline passes. If the leader's
+caller hangs up and its work is abandoned, a waiter with time left takes
+over and runs the work itself.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from .deadline import DeadlineExceeded, current_deadline
+from .metrics_registry import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+_single_flight_calls = metrics_registry.counter(
+    'vidyavani_single_flight_calls', 'Coalescable calls by whether they ran the work or shared it', ['group', 'role']
+)
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its outcome with concurrent callers"""
+
+    # Seconds between checks of a waiting caller's own deadline
+    WAIT_INTERVAL = 0.1
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Group name used in metrics and logs
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._shared = 0
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Run fn, or wait for the identical call already in flight
+
+        Args:
+            key: Identifies identical work
+            fn: Work to run if no call with this key is in flight
+
+        Returns:
+            (result, shared) where shared is True if another caller ran the work
+
+        Raises:
+            Whatever fn raised, in the leader and every waiter
+            DeadlineExceeded: if this caller's deadline passes while waiting
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = Future()
+                else:
+                    self._shared += 1
+
+            if leader:
+                _single_flight_calls.inc(group=self.name, role='leader')
+                return self._run(key, call, fn, args, kwargs), False
+
+            _single_flight_calls.inc(group=self.name, role='follower')
+            logger.debug(f"Sharing in-flight {self.name} call")
+            try:
+                return self._wait(call), True
+            except DeadlineExceeded:
+                if current_deadline().expired:
+                    raise
+                # The leader's caller gave up; run the work for this caller instead
+                logger.info(f"In-flight {self.name} call was abandoned by its caller, taking over")
+
+    def _run(self, key: Hashable, call: Future, fn: Callable[..., Any], args, kwargs) -> Any:
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            self._finish(key)
+            call.set_exception(e)
+            raise
+        self._finish(key)
+        call.set_result(result)
+        return result
+
+    def _finish(self, key: Hashable):
+        # Later callers start a fresh call instead of reusing this outcome
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def _wait(self, call: Future) -> Any:
+        deadline = current_deadline()
+        while True:
+            try:
+                return call.result(timeout=min(self.WAIT_INTERVAL, deadline.remaining()))
+            except FutureTimeoutError:
+                if deadline.expired:
+                    raise DeadlineExceeded(f"shared {self.name}", deadline.cancel_reason)
+
+    def get_status(self) -> Dict[str, int]:
+        """Calls currently running and calls that shared another caller's result"""
+        with self._lock:
+            return {'in_flight': len(self._calls), 'shared_calls': self._shared}
@@ -0,0 +1,213 @@
+"""
+Slow call capture for VidyaVani
+
+When a question takes longer than SLOW_CALL_THRESHOLD seconds end to end, its
+call trace is written to SLOW_CALL_DIR together with a per-stage breakdown and
+the sizes that drive latency (audio bytes, transcript length, retrieved chunk
+IDs and scores, prompt tokens, answer length, TTS bytes and retry counts).
+Captures are JSON files named by capture time; the oldest are deleted once
+SLOW_CALL_MAX_CAPTURES is exceeded, so the store stays bounded on disk even
+when several workers write to the same directory.
+"""
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from .call_tracer import Span, call_tracer
+
+logger = logging.getLogger(__name__)
+
+# Span attributes copied into the capture's input summary
+INPUT_ATTRIBUTES = (
+    'audio_bytes', 'transcript_chars', 'chunk_ids', 'chunk_scores', 'prompt_tokens',
+    'tokens_used', 'answer_chars', 'llm_attempts', 'tts_bytes', 'tts_attempts',
+)
+
+_CAPTURE_SUFFIX = '.json'
+
+
+def question_spans(trace: Dict[str, Any], root_span_id: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Spans of one question: the span root_span_id and everything nested under it
+
+    Args:
+        trace: Trace dictionary from CallTracer.get_trace (spans in start order)
+        root_span_id: Span covering the question, or None for the whole trace
+    """
+    if root_span_id is None:
+        return trace['spans']
+    included = {root_span_id}
+    spans = []
+    for span in trace['spans']:
+        # Parents start before their children, so one pass in start order suffices
+        if span['span_id'] in included or span['parent_id'] in included:
+            included.add(span['span_id'])
+            spans.append(span)
+    return spans
+
+
+def summarize_inputs(trace: Dict[str, Any], root_span_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Collect input sizes and retry counts recorded as span attributes
+
+    Args:
+        trace: Trace dictionary from CallTracer.get_trace
+        root_span_id: Span covering the captured question; earlier questions
+            of the same call are left out. None summarizes the whole trace.
+
+    Returns:
+        Mapping of attribute -> list of values in span order, plus retry counts
+    """
+    spans = question_spans(trace, root_span_id)
+    inputs: Dict[str, Any] = {}
+    for span in spans:
+        for key in INPUT_ATTRIBUTES:
+            if key in span['attributes']:
+                inputs.setdefault(key, []).append(span['attributes'][key])
+
+    attempts = [span for span in spans if span['name'] == 'pipeline_attempt']
+    inputs['pipeline_retries'] = max(0, len(attempts) - 1)
+    inputs['llm_retries'] = sum(max(0, count - 1) for count in inputs.get('llm_attempts', []))
+    inputs['tts_retries'] = sum(max(0, count - 1) for count in inputs.get('tts_attempts', []))
+    return inputs
+
+
+def summarize_stages(trace: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Name, offset from trace start, duration and outcome of every span"""
+    started_at = trace['started_at']
+    return [
+        {
+            'name': span['name'],
+            'offset_ms': round((span['start_time'] - started_at) * 1000, 3),
+            'duration_ms': span['duration_ms'],
+            'success': span['success'],
+        }
+        for span in trace['spans']
+    ]
+
+
+class SlowCallStore:
+    """Bounded on-disk store of traces for questions slower than a threshold"""
+
+    def __init__(self, directory: str, threshold_seconds: float = 12.0, max_captures: int = 100):
+        """
+        Args:
+            directory: Directory capture files are written to
+            threshold_seconds: End-to-end question time above which a capture is saved
+            max_captures: Captures kept on disk; 0 disables capture
+        """
+        self.directory = directory
+        self.threshold_seconds = threshold_seconds
+        self.max_captures = max_captures
+        self._lock = threading.Lock()
+
+    def capture_if_slow(self, session_id: str, elapsed_seconds: float,
+                        question_span: Optional[Span] = None, **details) -> Optional[str]:
+        """
+        Save the session's trace if the question took longer than the threshold
+
+        Args:
+            session_id: Session whose trace is captured
+            elapsed_seconds: End-to-end time of the question
+            question_span: Span covering the question (e.g. job.process_question);
+                input sizes and retries are summarized from it and its children
+            **details: Extra context stored with the capture (e.g. source, language)
+
+        Returns:
+            Capture ID if a capture was written, otherwise None
+        """
+        if self.max_captures <= 0 or elapsed_seconds <= self.threshold_seconds:
+            return None
+        trace = call_tracer.get_trace(session_id)
+        if trace is None:
+            return None
+        root_span_id = question_span.span_id if question_span is not None else None
+        return self.save(trace, elapsed_seconds, root_span_id=root_span_id, **details)
+
+    def save(self, trace: Dict[str, Any], elapsed_seconds: float, root_span_id: Optional[str] = None,
+             **details) -> Optional[str]:
+        """Write a capture for a trace (inputs summarized under root_span_id) and prune the oldest captures"""
+        captured_ns = time.time_ns()
+        captured_at = captured_ns / 1e9
+        capture_id = f"{captured_ns:020d}_{uuid.uuid4().hex[:8]}"
+        capture = {
+            'capture_id': capture_id,
+            'session_id': trace['session_id'],
+            'trace_id': trace['trace_id'],
+            'captured_at': captured_at,
+            'elapsed_seconds': round(elapsed_seconds, 3),
+            'threshold_seconds': self.threshold_seconds,
+            'details': details,
+            'question_span_id': root_span_id,
+            'inputs': summarize_inputs(trace, root_span_id),
+            'stages': summarize_stages(trace),
+            'trace': trace,
+        }
+
+        try:
+            with self._lock:
+                os.makedirs(self.directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.capture_')
+                with os.fdopen(fd, 'w', encoding='utf-8') as capture_file:
+                    json.dump(capture, capture_file, default=str)
+                os.replace(temp_path, os.path.join(self.directory, capture_id + _CAPTURE_SUFFIX))
+                self._prune_locked()
+        except Exception as e:
+            logger.warning(f"Failed to save slow call capture for {trace['session_id']}: {e}")
+            return None
+
+        logger.warning(f"Slow call captured for {trace['session_id']}: {elapsed_seconds:.2f}s "
+                       f"(threshold {self.threshold_seconds:.1f}s) -> {capture_id}")
+        return capture_id
+
+    def _capture_ids(self) -> List[str]:
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(_CAPTURE_SUFFIX)] for name in names
+                      if name.endswith(_CAPTURE_SUFFIX) and not name.startswith('.'))
+
+    def _prune_locked(self):
+        capture_ids = self._capture_ids()
+        for capture_id in capture_ids[:max(0, len(capture_ids) - self.max_captures)]:
+            try:
+                os.remove(os.path.join(self.directory, capture_id + _CAPTURE_SUFFIX))
+            except FileNotFoundError:
+                pass
+
+    def list_captures(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Summaries of the most recent captures, newest first"""
+        summaries = []
+        for capture_id in reversed(self._capture_ids()[-limit:] if limit > 0 else []):
+            capture = self.load(capture_id)
+            if capture is None:
+                continue
+            summaries.append({key: capture[key] for key in
+                              ('capture_id', 'session_id', 'captured_at', 'elapsed_seconds', 'details', 'inputs')})
+        return summaries
+
+    def load(self, capture_id: str) -> Optional[Dict[str, Any]]:
+        """Load one capture by ID"""
+        if os.path.basename(capture_id) != capture_id or capture_id.startswith('.'):
+            return None
+        try:
+            with open(os.path.join(self.directory, capture_id + _CAPTURE_SUFFIX), encoding='utf-8') as capture_file:
+                return json.load(capture_file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+
+# Global slow call store instance
+slow_call_store = SlowCallStore(
+    directory=Config.SLOW_CALL_DIR,
+    threshold_seconds=Config.SLOW_CALL_THRESHOLD,
+    max_captures=Config.SLOW_CALL_MAX_CAPTURES
+)
@@ -0,0 +1,124 @@
+"""
+Spoken-length budgets for VidyaVani answers
+
+Answers are played to callers, so how long an answer may be is set by how
+long it takes to speak. Each detail level has a target spoken duration; the
+language's speaking rate turns it into the most words an answer may have,
+and the tokenizer's tokens per word into the most tokens worth generating.
+Text beyond the budget is cut at a sentence boundary rather than mid-word.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Optional
+
+# Words the IVR voices speak per second at speaking rate 1.0
+WORDS_PER_SECOND = {'english': 2.6, 'telugu': 1.7}
+# Completion tokens per word; Telugu words are long and split into many tokens
+TOKENS_PER_WORD = {'english': 1.4, 'telugu': 5.0}
+# Speaking rate of the IVR voices (slightly slower for clarity)
+TTS_SPEAKING_RATE = 0.9
+# Tokens allowed beyond the word budget so the last sentence can finish
+TOKEN_MARGIN = 24
+# Google TTS rejects input longer than this many bytes
+TTS_MAX_BYTES = 5000
+
+SENTENCE_END = re.compile(r'(?<=[.!?।])\s+')
+
+
+def _language_key(language: Any) -> str:
+    """'telugu' or 'english' for a language name ('Telugu') or Language enum (te-IN)"""
+    name = str(getattr(language, 'value', language)).lower()
+    return 'telugu' if name.startswith('te') else 'english'
+
+
+def words_per_second(language: Any, speaking_rate: float = TTS_SPEAKING_RATE) -> float:
+    return WORDS_PER_SECOND[_language_key(language)] * speaking_rate
+
+
+def estimate_speech_time(text: str, language: Any, speaking_rate: float = TTS_SPEAKING_RATE) -> float:
+    """Seconds the IVR voice takes to speak text"""
+    return len(text.split()) / words_per_second(language, speaking_rate)
+
+
+def truncate_at_sentence(text: str, max_words: Optional[int] = None, max_bytes: Optional[int] = None) -> str:
+    """
+    Leading whole sentences of text within the limits
+
+    If even the first sentence is too long it is cut at a word boundary.
+
+    Args:
+        text: Text to shorten
+        max_words: Most words to keep
+        max_bytes: Most UTF-8 bytes to keep
+
+    Returns:
+        text itself if within the limits
+    """
+    def fits(candidate: str) -> bool:
+        return ((max_words is None or len(candidate.split()) <= max_words) and
+                (max_bytes is None or len(candidate.encode('utf-8')) <= max_bytes))
+
+    text = text.strip()
+    if fits(text):
+        return text
+
+    kept = ""
+    for sentence in SENTENCE_END.split(text):
+        candidate = f"{kept} {sentence}".strip()
+        if not fits(candidate):
+            break
+        kept = candidate
+    if kept:
+        return kept
+
+    words = []
+    for word in text.split():
+        if not fits(' '.join(words + [word])):
+            break
+        words.append(word)
+    return ' '.join(words)
+
+
+def complete_sentences(text: str) -> str:
+    """text without a trailing unfinished sentence, e.g. one cut off by the token limit"""
+    sentences = SENTENCE_END.split(text.strip())
+    if len(sentences) > 1 and not re.search(r'[.!?।]["\')]*$', sentences[-1]):
+        sentences.pop()
+    return ' '.join(sentences)
+
+
+@dataclass
+class SpeechBudget:
+    """Spoken-length budget of one answer"""
+    target_seconds: float
+    language: str  # 'english' or 'telugu'
+    speaking_rate: float = TTS_SPEAKING_RATE
+
+    @classmethod
+    def for_answer(cls, config, language: Any, detail_level: str) -> 'SpeechBudget':
+        """Budget for an answer at a detail level, from SPEECH_TARGET_SECONDS_*"""
+        target = (config.SPEECH_TARGET_SECONDS_DETAILED if detail_level == 'detailed'
+                  else config.SPEECH_TARGET_SECONDS_SIMPLE)
+        return cls(target, _language_key(language))
+
+    @property
+    def max_words(self) -> int:
+        return int(self.target_seconds * words_per_second(self.language, self.speaking_rate))
+
+    @property
+    def max_tokens(self) -> int:
+        """Completion tokens worth generating; anything beyond would not be played"""
+        return math.ceil(self.max_words * TOKENS_PER_WORD[self.language]) + TOKEN_MARGIN
+
+    def fit(self, text: str, cut_off: bool = False) -> str:
+        """
+        text cut at a sentence boundary to the word budget
+
+        Args:
+            cut_off: Generation stopped at the token limit, so the last sentence is unfinished
+        """
+        if cut_off:
+            text = complete_sentences(text)
+        return truncate_at_sentence(text, max_words=self.max_words)
@@ -0,0 +1,130 @@
+"""
+Time-bucketed event storage for VidyaVani telemetry
+
+Alerts and tracked errors are appended to a fixed ring of per-interval
+buckets (one minute by default, covering 24 hours). Each bucket counts every
+event by key and keeps only a bounded sample of the events themselves, so an
+append is O(1), a window query walks at most the buckets in the window, and
+memory stays constant no matter how many events an outage produces.
+"""
+
+import math
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Hashable, List, Optional
+
+
+class _Bucket:
+    """Counts and retained events for one time interval"""
+
+    __slots__ = ('index', 'counts', 'events')
+
+    def __init__(self, index: int, max_events: int):
+        self.index = index
+        self.counts: Counter = Counter()
+        self.events: Deque[Any] = deque(maxlen=max_events)
+
+
+class TimeBucketedLog:
+    """Ring of per-interval buckets with event counts and bounded event samples"""
+
+    def __init__(self, bucket_seconds: int = 60, num_buckets: int = 1440, max_events_per_bucket: int = 20):
+        """
+        Args:
+            bucket_seconds: Width of each bucket
+            num_buckets: Buckets in the ring; bucket_seconds * num_buckets is the longest window
+            max_events_per_bucket: Events retained per bucket; all events are still counted
+        """
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = num_buckets
+        self.max_events_per_bucket = max_events_per_bucket
+        self._buckets: List[Optional[_Bucket]] = [None] * num_buckets
+        self._lock = threading.Lock()
+
+    @property
+    def retention_seconds(self) -> int:
+        return self.bucket_seconds * self.num_buckets
+
+    def append(self, event: Any, key: Hashable = None, timestamp: Optional[float] = None):
+        """
+        Record an event
+
+        Args:
+            event: Event retained (subject to the per-bucket limit) for window listings
+            key: Key the event is counted under
+            timestamp: Epoch time of the event, defaults to now
+        """
+        index = int((timestamp if timestamp is not None else time.time()) // self.bucket_seconds)
+        slot = index % self.num_buckets
+        with self._lock:
+            bucket = self._buckets[slot]
+            if bucket is None or bucket.index != index:
+                if bucket is not None and bucket.index > index:
+                    return  # Older than the ring covers
+                bucket = self._buckets[slot] = _Bucket(index, self.max_events_per_bucket)
+            bucket.counts[key] += 1
+            bucket.events.append(event)
+
+    def _window_buckets_locked(self, window_seconds: float, now: float) -> List[_Bucket]:
+        """Buckets of the window (the current one and those before it), oldest first"""
+        newest = int(now // self.bucket_seconds)
+        span = min(self.num_buckets, max(1, math.ceil(window_seconds / self.bucket_seconds)))
+        buckets = []
+        for index in range(newest - span + 1, newest + 1):
+            bucket = self._buckets[index % self.num_buckets]
+            if bucket is not None and bucket.index == index:
+                buckets.append(bucket)
+        return buckets
+
+    def counts(self, window_seconds: float, now: Optional[float] = None) -> Counter:
+        """Event counts by key within the window"""
+        now = now if now is not None else time.time()
+        total: Counter = Counter()
+        with self._lock:
+            for bucket in self._window_buckets_locked(window_seconds, now):
+                total.update(bucket.counts)
+        return total
+
+    def total(self, window_seconds: float, now: Optional[float] = None) -> int:
+        """Number of events within the window"""
+        return sum(self.counts(window_seconds, now).values())
+
+    def events(self, window_seconds: float, now: Optional[float] = None,
+               limit: Optional[int] = None) -> List[Any]:
+        """
+        Retained events within the window, oldest first
+
+        Args:
+            window_seconds: How far back to look
+            now: Epoch time the window ends at, defaults to now
+            limit: Return only the most recent events
+        """
+        now = now if now is not None else time.time()
+        with self._lock:
+            buckets = self._window_buckets_locked(window_seconds, now)
+            if limit is None:
+                return [event for bucket in buckets for event in bucket.events]
+            recent: Deque[Any] = deque(maxlen=limit)
+            for bucket in reversed(buckets):
+                for event in reversed(bucket.events):
+                    recent.appendleft(event)
+                    if len(recent) == limit:
+                        return list(recent)
+            return list(recent)
+
+    def prune(self, older_than_seconds: float, now: Optional[float] = None) -> int:
+        """Drop buckets that end more than older_than_seconds ago; returns events dropped"""
+        cutoff = int(((now if now is not None else time.time()) - older_than_seconds) // self.bucket_seconds)
+        dropped = 0
+        with self._lock:
+            for slot, bucket in enumerate(self._buckets):
+                if bucket is not None and bucket.index < cutoff:
+                    dropped += sum(bucket.counts.values())
+                    self._buckets[slot] = None
+        return dropped
+
+    def clear(self):
+        """Drop all buckets"""
+        with self._lock:
+            self._buckets = [None] * self.num_buckets
@@ -0,0 +1,70 @@
+"""
+Token counting for VidyaVani prompts
+
+Prompt budgets are counted in model tokens with tiktoken when it is
+installed. Without it, tokens are estimated at four characters each, which
+is close for English text with the OpenAI tokenizers.
+
+tiktoken downloads an encoding the first time it is used, with no timeout,
+unless TIKTOKEN_CACHE_DIR already holds it. The image build fetches it into
+that directory and server startup loads it (load_tokenizer), so questions
+never wait on the download.
+"""
+
+import logging
+import math
+from functools import lru_cache
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Tokenizer of the gpt-4o / gpt-5 model families
+DEFAULT_ENCODING = 'o200k_base'
+CHARS_PER_TOKEN = 4.0
+
+
+@lru_cache(maxsize=None)
+def _encoding(name: str):
+    try:
+        return tiktoken.get_encoding(name)
+    except Exception as e:
+        logger.warning(f"Tokenizer {name} unavailable, estimating token counts: {e}")
+        return None
+
+
+def load_tokenizer(encoding: str = DEFAULT_ENCODING) -> bool:
+    """
+    Load a tokenizer before the first prompt is counted
+
+    Args:
+        encoding: tiktoken encoding name
+
+    Returns:
+        True if token counts will be exact
+    """
+    return TIKTOKEN_AVAILABLE and _encoding(encoding) is not None
+
+
+def count_tokens(text: str, encoding: str = DEFAULT_ENCODING) -> int:
+    """
+    Number of tokens text takes in a prompt
+
+    Args:
+        text: Text to count
+        encoding: tiktoken encoding name
+
+    Returns:
+        Exact count with tiktoken, otherwise an estimate
+    """
+    if not text:
+        return 0
+    tokenizer = _encoding(encoding) if TIKTOKEN_AVAILABLE else None
+    if tokenizer is not None:
+        return len(tokenizer.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)